@@ -0,0 +1,50 @@
+"""
+Admin-only diagnostics: on-demand CPU profiling.
+
+Every route needs X-Admin-Token matching ADMIN_TOKEN; with ADMIN_TOKEN
+unset they all answer 404.
+"""
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.middleware import is_admin
+from app.services import profiler
+
+def require_admin(request: Request):
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin(request.headers):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+router = APIRouter(prefix="/v1/admin", dependencies=[Depends(require_admin)])
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def sample_profile(
+    seconds: float = Query(10.0, gt=0),
+    interval_ms: float = Query(None, gt=0),
+):
+    """
+    Sample the whole process for `seconds` (capped at PROFILE_MAX_SECONDS)
+    and return collapsed stacks, e.g. `| flamegraph.pl > cpu.svg`
+    """
+    try:
+        text = await asyncio.to_thread(profiler.profile_for, seconds, interval_ms)
+    except profiler.ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(text or "# no busy stacks sampled\n")
+
+@router.get("/profiles")
+def list_profiles():
+    """Recent per-request profiles (X-Profile header), newest first"""
+    return {"profiles": profiler.recent()}
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile(profile_id: str):
+    """Collapsed stacks (sample) or pstats summary (cprofile) for one request"""
+    prof = profiler.get(profile_id)
+    if prof is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(prof["text"])
@@ -1,10 +1,14 @@
+import logging
+
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from app.services.vectorstore import get_vectorstore
-from app.services.llm import get_llm
+from app.services.llm import generate_response
+from app.services.prompts import rag_prompt
 import time
 
 router = APIRouter()
+log = logging.getLogger("app.api.routes_answer")
 
 class AnswerRequest(BaseModel):
     question: str
@@ -20,8 +24,8 @@ async def answer_question(request: AnswerRequest):
     try:
         start_time = time.time()
         
-        print(f"[Answer] Question: {request.question}")
-        print(f"[Answer] Model: {request.model}, Mode: {request.search_mode}")
+        log.debug("Question received: %.200s", request.question,
+                  extra={"model": request.model, "mode": request.search_mode, "top_k": request.top_k})
         
         # Step 1: Get vectorstore and retrieve relevant chunks
         vectorstore = get_vectorstore()
@@ -40,36 +44,24 @@ async def answer_question(request: AnswerRequest):
         # Extract text from documents
         chunks = [doc.page_content for doc in docs]
         
-        print(f"[Answer] Retrieved {len(chunks)} chunks")
+        log.debug("Retrieved %d chunks", len(chunks))
         
         # Step 2: Prepare context
-        context = "\n\n".join(chunks)
+        context = "\n\n".join(f"[{i}] {c}" for i, c in enumerate(chunks, 1))
         
-        # Step 3: Create prompt
-        prompt = f"""Based on the following context, answer the question accurately and concisely.
-
-Context:
-{context}
-
-Question: {request.question}
-
-Answer:"""
+        # Step 3: Create prompt (shared instruction prefix, context + question last)
+        prompt = rag_prompt(request.question, context)
         
         # Step 4: Generate answer using LLM
-        llm = get_llm(model_name=request.model)
-        answer = llm.invoke(prompt)
-        
-        # Extract text from response
-        if hasattr(answer, 'content'):
-            answer_text = answer.content
-        elif isinstance(answer, str):
-            answer_text = answer
-        else:
-            answer_text = str(answer)
+        result = generate_response(prompt=prompt, model_name=request.model)
+        if not result["success"]:
+            raise RuntimeError(result["error"])
+        answer_text = result["response"]
         
         elapsed_time = round(time.time() - start_time, 2)
         
-        print(f"[Answer] ✓ Answer generated in {elapsed_time}s")
+        log.info("Answer generated", extra={"model": request.model, "elapsed_ms": round(elapsed_time * 1000, 1),
+                                            "chunks": len(chunks)})
         
         # Format sources
         sources = [
@@ -90,7 +82,5 @@ Answer:"""
         }
         
     except Exception as e:
-        print(f"[Answer] Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Answer failed", extra={"model": request.model})
         raise HTTPException(status_code=500, detail=f"Error generating answer: {str(e)}")
\ No newline at end of file
@@ -1,103 +1,75 @@
 """
 Benchmark evaluation routes
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from pydantic import BaseModel
 from typing import List, Dict, Optional
-import json
 import time
-from pathlib import Path
 
-from app.services.pipeline import vs_query
-from app.services.generator import build_rag_prompt
-from app.services.llm import generate_multi_model_responses
+from app.services.llm import get_available_models
+from app.workers.benchmark import benchmark_runner, list_runs, load_benchmark_questions, run_report
 
 router = APIRouter()
 
-# Load benchmark questions
-BENCHMARK_FILE = Path("benchmark_questions.json")
-
-def load_benchmark_questions():
-    """Load benchmark questions from JSON file"""
-    if not BENCHMARK_FILE.exists():
-        raise FileNotFoundError("benchmark_questions.json not found")
-    
-    with open(BENCHMARK_FILE, 'r') as f:
-        return json.load(f)
-
 class BenchmarkRequest(BaseModel):
     models: Optional[List[str]] = None
     top_k: int = 5
     max_tokens: int = 500
+    wait: bool = False  # True: block until the run finishes and return its report (holds a worker thread)
 
 @router.post("/v1/benchmark/run")
-async def run_benchmark(req: BenchmarkRequest):
+def run_benchmark(req: BenchmarkRequest, response: Response):
     """
     Run complete benchmark test on all questions with all models
+
+    Runs in the background (see app.workers.benchmark) and checkpoints every
+    answer, so a failed or interrupted run can be resumed. Answers 202 with
+    the run id; poll GET /v1/benchmark/runs/{run_id} for progress. wait=true
+    blocks until the run is done and returns the full report instead.
     """
     try:
-        start_time = time.time()
-        
-        # Load questions
-        benchmark_data = load_benchmark_questions()
-        questions = benchmark_data["questions"]
-        
-        results = []
-        
-        for q_data in questions:
-            question = q_data["question"]
-            
-            # Retrieve context
-            chunks = vs_query(query=question, top_k=req.top_k, mode="hybrid")
-            
-            if not chunks:
-                results.append({
-                    "question_id": q_data["id"],
-                    "question": question,
-                    "error": "No relevant context found",
-                    "responses": {}
-                })
-                continue
-            
-            # Build prompt
-            rag_prompt = build_rag_prompt(question=question, chunks=chunks)
-            
-            # Get responses from all models
-            multi_response = generate_multi_model_responses(
-                prompt=rag_prompt,
-                models=req.models,
-                max_tokens=req.max_tokens
-            )
-            
-            # Format responses
-            model_responses = {}
-            for model_name, result in multi_response["responses"].items():
-                model_responses[model_name] = {
-                    "answer": result["response"] if result["success"] else None,
-                    "success": result["success"],
-                    "error": result["error"]
-                }
-            
-            results.append({
-                "question_id": q_data["id"],
-                "question": question,
-                "category": q_data["category"],
-                "expected_keywords": q_data["expected_keywords"],
-                "responses": model_responses,
-                "sources_count": len(chunks)
-            })
-        
-        elapsed_time = time.time() - start_time
-        
-        return {
-            "benchmark_name": benchmark_data["benchmark_name"],
-            "total_questions": len(questions),
-            "results": results,
-            "elapsed_time": round(elapsed_time, 2)
-        }
-        
+        run_id = benchmark_runner.start(req.models or get_available_models(), req.top_k, req.max_tokens)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    if not req.wait:
+        response.status_code = 202
+        return {"run_id": run_id, "status": "QUEUED"}
+
+    try:
+        benchmark_runner.wait(run_id)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=f"Benchmark run {run_id} failed: {e}")
+    return run_report(run_id)
+
+@router.get("/v1/benchmark/runs")
+def get_benchmark_runs(limit: int = 20):
+    """
+    Recent benchmark runs with progress
+    """
+    return {"runs": list_runs(limit)}
+
+@router.get("/v1/benchmark/runs/{run_id}")
+def get_benchmark_run(run_id: str):
+    """
+    Progress and answers so far (per-question retrieval and per-answer latency)
+    """
+    report = run_report(run_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Benchmark run not found")
+    return report
+
+@router.post("/v1/benchmark/runs/{run_id}/resume", status_code=202)
+def resume_benchmark_run(run_id: str):
+    """
+    Continue a failed or interrupted run; answers that already succeeded are kept
+    """
+    report = run_report(run_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Benchmark run not found")
+    if not benchmark_runner.resume(run_id):
+        raise HTTPException(status_code=409, detail="Benchmark run is already running")
+    return {"run_id": run_id, "status": "QUEUED", "progress": report["progress"]}
 
 @router.get("/v1/benchmark/questions")
 async def get_benchmark_questions():
@@ -9,6 +9,7 @@ import time
 from app.services.llm import generate_multi_model_responses, get_available_models, test_model_availability
 from app.services.pipeline import vs_query
 from app.services.generator import build_rag_prompt, gen_compare_all
+from app.services.scheduler import Overloaded, PRIORITY_INTERACTIVE, llm_scheduler
 
 router = APIRouter()
 
@@ -20,7 +21,7 @@ class CompareRequest(BaseModel):
     top_k: int = 5
 
 @router.post("/v1/compare")
-async def compare_models(req: CompareRequest):
+def compare_models(req: CompareRequest):
     """
     Compare responses from multiple LLM models using RAG
     
@@ -32,7 +33,8 @@ async def compare_models(req: CompareRequest):
             question=req.question,
             top_k=req.top_k,
             mode="hybrid",
-            models=req.models
+            models=req.models,
+            priority=PRIORITY_INTERACTIVE
         )
         
         # Format for API response
@@ -44,7 +46,11 @@ async def compare_models(req: CompareRequest):
                 "answer": model_result["answer"],
                 "success": model_result.get("success", True),
                 "error": model_result.get("error", None),
-                "time_ms": model_result["time_ms"]
+                "time_ms": model_result["time_ms"],
+                "tokens": model_result.get("tokens", 0),
+                "tokens_per_sec": model_result.get("tokens_per_sec"),
+                "timings": model_result.get("timings", {}),
+                "usage": model_result.get("usage", {})
             }
             
             # Get chunks from first model (they're all the same)
@@ -69,6 +75,8 @@ async def compare_models(req: CompareRequest):
             "aggregate": result.get("aggregate", {})
         }
         
+    except Overloaded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -86,6 +94,13 @@ async def list_models():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/v1/models/scheduler")
+async def scheduler_status():
+    """
+    Per-model admission control state: slot limit, active and queued requests
+    """
+    return llm_scheduler.stats()
+
 @router.get("/v1/models/status")
 async def check_models_status():
     """
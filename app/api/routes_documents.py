@@ -2,52 +2,87 @@
 
 from __future__ import annotations
 
-import shutil
 from pathlib import Path
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
 
-from app.services.storage import save_and_index_pdf
-from app.core.schemas import UploadResponse
+from app.models.schemas import DocCreateResponse, DocItem, DocListResponse
+from app.services import metrics
+from app.services.storage import commit_upload, stream_upload
+from app.workers.ingest import ingest_queue, get_job, list_jobs, IngestBacklogFull
 
 router = APIRouter(tags=["documents"])
 
 
-@router.post("/upload", response_model=UploadResponse)
-async def upload(file: UploadFile = File(...)):
+def _to_item(job: dict) -> DocItem:
+    return DocItem(
+        document_id=job["document_id"],
+        filename=job["filename"],
+        status=job["status"],
+        page_count=job["page_count"],
+        chunk_count=job["chunk_count"],
+        error=job["error"],
+        created_at=job["created_at"],
+        updated_at=job["updated_at"],
+    )
+
+
+@router.post("/upload", response_model=DocCreateResponse, status_code=202)
+def upload(file: UploadFile = File(...)):
     """
     1) Receive a PDF
-    2) Save it to disk
-    3) Extract + chunk + index via save_and_index_pdf
+    2) Stream it to UPLOAD_DIR in fixed-size chunks, hashing as it goes
+    3) Queue extract + chunk + index as a background job
+
+    Returns the job id right away; poll GET /v1/documents/{document_id}
+    until status is READY or FAILED. Re-uploading identical content returns
+    the existing job (duplicate=true) instead of indexing it again.
     """
 
     if not file.filename:
         raise HTTPException(status_code=400, detail="Empty filename")
 
-    upload_dir = Path("uploaded_files")
-    upload_dir.mkdir(parents=True, exist_ok=True)
-
-    target = upload_dir / file.filename
-
-    # Save uploaded file to disk
-    with target.open("wb") as f:
-        shutil.copyfileobj(file.file, f)
+    tmp_path, content_hash, size_bytes = stream_upload(file.file)
 
-    # Call storage pipeline
+    # Dedup, move into UPLOAD_DIR and queue as one atomic step, so two
+    # concurrent uploads of the same file yield a single job
     try:
-        result = save_and_index_pdf(target)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Indexing failed: {e}")
-
-    if not result.get("ok"):
-        raise HTTPException(
-            status_code=400,
-            detail=result.get("error", "Unknown indexing error"),
+        job, duplicate = ingest_queue.submit(
+            tmp_path,
+            Path(file.filename).name,
+            content_hash=content_hash,
+            size_bytes=size_bytes,
+            commit=lambda p: commit_upload(p, file.filename, content_hash),
         )
+    except IngestBacklogFull as e:
+        tmp_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=429, detail=str(e))
+    except BaseException:
+        # e.g. a locked database or a failed move: don't leave the .part file behind
+        tmp_path.unlink(missing_ok=True)
+        raise
 
-    return UploadResponse(
-        ok=True,
-        filename=result["filename"],
-        chunks_indexed=result["chunks_indexed"],
-        collection_info=result["collection_info"],
-    )
+    metrics.CACHE_REQUESTS.inc(cache="upload_dedup", result="hit" if duplicate else "miss")
+    if duplicate:
+        tmp_path.unlink(missing_ok=True)
+        return DocCreateResponse(document_id=job["document_id"], status=job["status"], duplicate=True)
+
+    return DocCreateResponse(document_id=job["document_id"], status="QUEUED")
+
+
+@router.get("/documents/{document_id}", response_model=DocItem)
+def get_document(document_id: str):
+    """Status of one ingestion job (QUEUED / PROCESSING / READY / FAILED)."""
+    job = get_job(document_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown document_id")
+    return _to_item(job)
+
+
+@router.get("/documents", response_model=DocListResponse)
+def list_documents(
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+):
+    """Most recent ingestion jobs first."""
+    return DocListResponse(items=[_to_item(j) for j in list_jobs(limit, offset)])
@@ -2,41 +2,29 @@
 
 from __future__ import annotations
 
-import json
-from pathlib import Path
-from typing import List, Dict, Any
+from typing import Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 
 from app.core.schemas import EvaluationItem, EvaluationListResponse
+from app.services.metadata_store import add_evaluation, list_evaluations
 
 router = APIRouter(prefix="/v1", tags=["evaluation"])
 
-ROOT = Path(__file__).resolve().parents[2]
-EVAL_FILE = ROOT / "evaluations.json"
-
-
-def _load_evals() -> List[Dict[str, Any]]:
-    if not EVAL_FILE.exists():
-        return []
-    return json.loads(EVAL_FILE.read_text(encoding="utf-8"))
-
-
-def _save_evals(evals: List[Dict[str, Any]]):
-    EVAL_FILE.write_text(json.dumps(evals, indent=2), encoding="utf-8")
-
 
 @router.get("/evaluate", response_model=EvaluationListResponse)
-def list_evaluations() -> EvaluationListResponse:
-    rows = _load_evals()
+def list_evaluations_route(
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    model: Optional[str] = None,
+) -> EvaluationListResponse:
+    rows, total = list_evaluations(limit, offset, model=model)
     return EvaluationListResponse(
-        items=[EvaluationItem(**r) for r in rows]
+        items=[EvaluationItem(**r) for r in rows], total=total, limit=limit, offset=offset
     )
 
 
 @router.post("/evaluate", response_model=EvaluationItem)
 def save_evaluation(item: EvaluationItem) -> EvaluationItem:
-    rows = _load_evals()
-    rows.append(item.dict())
-    _save_evals(rows)
+    add_evaluation(item.dict())
     return item
@@ -1,46 +1,54 @@
 """
 Health check endpoints
 """
-from fastapi import APIRouter, HTTPException
-import ollama
+from fastapi import APIRouter, Response
+from app.services import readiness
 
 router = APIRouter()
 
 @router.get("/health")
 async def health_check():
     """
-    Basic health check endpoint
+    Liveness: answers as soon as the process serves HTTP
+    (never waits on models or Ollama)
     """
     return {
         "status": "healthy",
         "message": "EDUrag backend is running"
     }
 
+@router.get("/ready")
+async def readiness_check(response: Response):
+    """
+    Readiness: 200 once the startup warm-up has loaded the embedding model
+    and indexes and run a dummy query, 503 with per-component progress until
+    then. Served from the cache app.services.readiness refreshes in the
+    background.
+    """
+    state = readiness.status()
+    if not state["ready"]:
+        response.status_code = 503
+    return state
+
 @router.get("/v1/health")
 async def detailed_health_check():
     """
-    Detailed health check with system status
+    Detailed health check with system status (served from the cached
+    readiness state; never calls Ollama itself)
     """
-    try:
-        # Check if Ollama is accessible
-        try:
-            ollama_models = ollama.list()
-            ollama_status = "connected"
-            models_count = len(ollama_models.get('models', []))
-        except Exception as e:
-            ollama_status = "disconnected"
-            models_count = 0
-        
-        return {
-            "status": "healthy",
-            "message": "EDUrag backend is running",
-            "services": {
-                "ollama": {
-                    "status": ollama_status,
-                    "models_available": models_count
-                },
-                "vectorstore": "ready"
-            }
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+    state = readiness.status()
+    ollama = state["dependencies"].get("ollama", {})
+    vectorstore = state["components"].get("vectorstore", {}).get("status", readiness.PENDING)
+    return {
+        "status": "healthy",
+        "message": "EDUrag backend is running",
+        "ready": state["ready"],
+        "services": {
+            "ollama": {
+                "status": ollama.get("status", "unknown"),
+                "models_available": ollama.get("models_available", 0)
+            },
+            "vectorstore": "ready" if vectorstore == readiness.OK else vectorstore
+        },
+        "checked_at": state["dependencies"].get("checked_at")
+    }
@@ -1,9 +1,13 @@
+import logging
+
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Dict, Any
 from app.services.generator import gen_answer
+from app.services.scheduler import Overloaded, PRIORITY_INTERACTIVE
 
 router = APIRouter()
+log = logging.getLogger("app.api.routes_query")
 
 class QueryRequest(BaseModel):
     query: str
@@ -17,27 +21,32 @@ class QueryResponse(BaseModel):
     sources: List[dict]
     model: str
     elapsed_time: float
+    timings: Dict[str, float] = {}
+    usage: Dict[str, Any] = {}
 
 @router.post("/query", response_model=QueryResponse)
-async def query_documents(request: QueryRequest):
+def query_documents(request: QueryRequest):
     """
     Query documents and generate an answer using RAG
     """
     try:
-        print(f"\n[Query] Question: {request.query}")
-        print(f"[Query] Model: {request.model}, Mode: {request.mode}")
+        log.debug("Query received: %.200s", request.query,
+                  extra={"model": request.model, "mode": request.mode, "top_k": request.top_k})
         
         # Use existing gen_answer function from generator.py
         answer_text, used_chunks, meta = gen_answer(
             question=request.query,
             top_k=request.top_k,
             mode=request.mode,
-            model=request.model
+            model=request.model,
+            priority=PRIORITY_INTERACTIVE
         )
         
         elapsed_time = meta.get("time_ms", 0) / 1000.0  # Convert ms to seconds
         
-        print(f"[Query] ✓ Answer generated in {elapsed_time:.2f}s\n")
+        log.info("Answer generated", extra={"model": request.model, "mode": request.mode,
+                                            "elapsed_ms": meta.get("time_ms", 0),
+                                            "timings": meta.get("timings", {})})
         
         # Format sources for frontend
         sources = [
@@ -53,11 +62,13 @@ async def query_documents(request: QueryRequest):
             chunks=used_chunks,
             sources=sources,
             model=request.model,
-            elapsed_time=round(elapsed_time, 2)
+            elapsed_time=round(elapsed_time, 2),
+            timings=meta.get("timings", {}),
+            usage=meta.get("usage", {})
         )
         
+    except Overloaded:
+        raise
     except Exception as e:
-        print(f"[Query] Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Query failed", extra={"model": request.model, "mode": request.mode})
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
\ No newline at end of file
@@ -2,15 +2,26 @@
 """
 Quiz generation using Phi-3-Mini (faster, smaller LLM)
 """
+import logging
+
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Optional, Dict, Any
 import json
+import time
 
 from app.services.pipeline import vs_query
 from app.services.llm import generate_response
+from app.services.context_packer import pack_chunks
+from app.services.prompts import format_context, quiz_prompt
+from app.services.generator import stage_timings
+from app.services.scheduler import Overloaded, PRIORITY_BATCH
 
 router = APIRouter(tags=["quiz"])
+log = logging.getLogger("app.api.routes_quiz")
+
+# Context token budget for quiz prompts (keeps phi3 prefill short)
+QUIZ_CONTEXT_TOKENS = 500
 
 
 class QuizRequest(BaseModel):
@@ -33,6 +44,8 @@ class QuizResponse(BaseModel):
     topic: str
     num_questions: int
     questions: List[QuizQuestion]
+    timings: Dict[str, float] = {}
+    usage: Dict[str, Any] = {}
 
 
 @router.post("/quiz/generate", response_model=QuizResponse)
@@ -45,10 +58,11 @@ def generate_quiz(req: QuizRequest):
     
     query = req.topic.strip() or "key concepts important information"
     
-    print(f"[Quiz-Phi3] Retrieving chunks for: {query}")
+    log.debug("Quiz requested: %.200s", query, extra={"num_questions": req.num_questions})
     
     try:
         # Get fewer chunks for speed
+        t0 = time.perf_counter()
         chunks = vs_query(
             query=query,
             top_k=min(8, req.num_questions * 2),  # Fewer chunks = faster
@@ -61,50 +75,33 @@ def generate_quiz(req: QuizRequest):
                 detail="No content indexed. Please upload a document or URL first."
             )
         
-        # Use only top 5 chunks for speed
-        context_parts = []
-        for i, chunk in enumerate(chunks[:5], 1):
-            text = chunk.get('text', '') if isinstance(chunk, dict) else getattr(chunk, 'text', '')
-            if text:
-                # Limit chunk size for speed
-                text = text[:300]
-                context_parts.append(f"[{i}] {text}")
+        retrieve_ms = round((time.perf_counter() - t0) * 1000, 2)
         
-        context = "\n\n".join(context_parts)
+        # Pack chunks into a small token budget for speed
+        t0 = time.perf_counter()
+        packed, _ = pack_chunks(
+            query,
+            chunks,
+            model="phi3",
+            budget_tokens=QUIZ_CONTEXT_TOKENS
+        )
         
-        # Simplified, shorter prompt for faster generation
-        prompt = f"""Generate {req.num_questions} quiz questions from this content.
-
-CONTENT:
-{context}
-
-Create {req.num_questions} multiple choice questions. Each question has 4 options.
+        # Fixed instruction prefix first, variable context last (KV-cache friendly)
+        prompt = quiz_prompt(format_context(packed), req.num_questions)
+        pack_ms = round((time.perf_counter() - t0) * 1000, 2)
 
-JSON format only:
-{{
-  "questions": [
-    {{
-      "question": "Your question here?",
-      "options": ["A", "B", "C", "D"],
-      "answer": "A",
-      "explanation": "Why A is correct"
-    }}
-  ]
-}}
-
-Generate now:"""
-
-        print(f"[Quiz-Phi3] Generating with Phi-3-Mini (faster model)...")
-        
         # Use Phi-3-Mini for speed!
+        t0 = time.perf_counter()
         result = generate_response(
             prompt=prompt,
             model_name="phi3",  # Smaller, faster model!
             max_tokens=1000,  # Less tokens = faster
-            temperature=0.6
+            temperature=0.6,
+            priority=PRIORITY_BATCH  # Interactive Q&A goes first
         )
         
-        response_text = result.get('response', '').strip()
+        llm_ms = round((time.perf_counter() - t0) * 1000, 2)
+        response_text = (result.get('response') or '').strip()
         
         # Clean response
         response_text = response_text.replace('```json', '').replace('```', '').strip()
@@ -134,26 +131,31 @@ Generate now:"""
         if not questions:
             raise ValueError("No questions generated")
         
-        print(f"[Quiz-Phi3] ✓ Generated {len(questions)} questions with Phi-3-Mini")
+        log.info("Quiz generated", extra={"questions": len(questions), "retrieve_ms": retrieve_ms,
+                                          "pack_ms": pack_ms, "llm_ms": llm_ms})
         
         return QuizResponse(
             ok=True,
             topic=req.topic or "General",
             num_questions=len(questions),
-            questions=questions
+            questions=questions,
+            timings=stage_timings(retrieve_ms, pack_ms, result, llm_ms),
+            usage=result.get("usage") or {}
         )
         
     except json.JSONDecodeError as e:
-        print(f"[Quiz-Phi3] JSON error: {e}")
-        print(f"[Quiz-Phi3] Response: {response_text[:300]}")
+        log.warning("Quiz JSON parse failed: %s", e, extra={"response_head": response_text[:300]})
         
         raise HTTPException(
             status_code=500,
             detail="Failed to parse quiz. Model returned invalid format."
         )
     
+    except Overloaded:
+        raise
+    
     except Exception as e:
-        print(f"[Quiz-Phi3] Error: {e}")
+        log.exception("Quiz generation failed")
         raise HTTPException(
             status_code=500,
             detail=f"Quiz generation failed: {str(e)}"
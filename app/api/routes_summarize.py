@@ -2,13 +2,26 @@
 """
 Fast summarization using Phi-3-Mini (smaller, faster model)
 """
+import logging
+
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+from typing import Dict, Any
+import time
 
 from app.services.pipeline import vs_query
 from app.services.llm import generate_response
+from app.services.context_packer import pack_chunks
+from app.services.prompts import format_context, summary_prompt
+from app.services.generator import stage_timings
+from app.services.scheduler import Overloaded, PRIORITY_NORMAL
 
 router = APIRouter(tags=["summarize"])
+log = logging.getLogger("app.api.routes_summarize")
+
+
+# Context token budget for summaries (phi3 prefill dominates latency)
+SUMMARY_CONTEXT_TOKENS = 600
 
 
 class SummarizeRequest(BaseModel):
@@ -17,6 +30,8 @@ class SummarizeRequest(BaseModel):
 
 class SummarizeResponse(BaseModel):
     summary: str
+    timings: Dict[str, float] = {}
+    usage: Dict[str, Any] = {}
 
 
 @router.post("/summarize", response_model=SummarizeResponse)
@@ -27,10 +42,9 @@ def summarize(req: SummarizeRequest) -> SummarizeResponse:
     Uses smaller model for speed while maintaining quality.
     """
     
-    print("[Summary-Phi3] Generating summary with Phi-3-Mini...")
-    
     try:
         # Get fewer chunks for speed
+        t0 = time.perf_counter()
         chunks = vs_query(
             query="main topics key concepts overview",
             top_k=min(req.max_chunks, 8),  # Limit chunks for speed
@@ -43,34 +57,33 @@ def summarize(req: SummarizeRequest) -> SummarizeResponse:
                 detail="No content indexed. Please upload a document or URL first."
             )
         
-        # Build shorter context for faster generation
-        context_parts = []
-        for i, chunk in enumerate(chunks[:5], 1):  # Only use top 5
-            text = chunk.get('text', '') if isinstance(chunk, dict) else getattr(chunk, 'text', '')
-            if text:
-                # Limit chunk length
-                text = text[:400]
-                context_parts.append(f"Section {i}:\n{text}")
+        retrieve_ms = round((time.perf_counter() - t0) * 1000, 2)
         
-        context = "\n\n".join(context_parts)
+        # Pack chunks into a small token budget for faster generation
+        t0 = time.perf_counter()
+        packed, _ = pack_chunks(
+            "main topics key concepts overview",
+            chunks,
+            model="phi3",
+            budget_tokens=SUMMARY_CONTEXT_TOKENS
+        )
         
-        # Shorter, simpler prompt for speed
-        prompt = f"""Summarize the main ideas from this content in 3-4 sentences.
-
-CONTENT:
-{context}
-
-Provide a clear, concise summary:"""
+        # Fixed instruction prefix first, variable context last (KV-cache friendly)
+        prompt = summary_prompt(format_context(packed, style="sections"))
+        pack_ms = round((time.perf_counter() - t0) * 1000, 2)
 
         # Use Phi-3-Mini for faster generation!
+        t0 = time.perf_counter()
         result = generate_response(
             prompt=prompt,
             model_name="phi3",  # Smaller, faster model
             max_tokens=300,  # Shorter response = faster
-            temperature=0.5
+            temperature=0.5,
+            priority=PRIORITY_NORMAL
         )
         
-        summary = result.get('response', '').strip()
+        llm_ms = round((time.perf_counter() - t0) * 1000, 2)
+        summary = (result.get('response') or '').strip()
         
         if not summary:
             raise ValueError("Empty summary generated")
@@ -78,12 +91,19 @@ Provide a clear, concise summary:"""
         # Add metadata
         summary_with_meta = f"{summary}\n\n---\n📊 Analyzed {len(chunks)} sections from indexed documents."
         
-        print(f"[Summary-Phi3] ✓ Summary generated with Phi-3-Mini")
+        log.info("Summary generated", extra={"chunks": len(chunks), "retrieve_ms": retrieve_ms,
+                                             "pack_ms": pack_ms, "llm_ms": llm_ms})
         
-        return SummarizeResponse(summary=summary_with_meta)
+        return SummarizeResponse(
+            summary=summary_with_meta,
+            timings=stage_timings(retrieve_ms, pack_ms, result, llm_ms),
+            usage=result.get("usage") or {}
+        )
         
+    except Overloaded:
+        raise
     except Exception as e:
-        print(f"[Summary-Phi3] Error: {e}")
+        log.exception("Summarization failed")
         raise HTTPException(
             status_code=500,
             detail=f"Summarization failed: {str(e)}"
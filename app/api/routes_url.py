@@ -2,23 +2,24 @@
 """
 URL ingestion endpoint - fetch web content and index it like a PDF
 """
+import logging
+
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, HttpUrl, Field
-from typing import Optional
-import requests
-from bs4 import BeautifulSoup
+from typing import List, Optional
 import time
 
-from app.services.chunker import chunk_text
-from app.services.vectorstore import add_documents
-from app.services.embeddings import embed_texts
+from app.services.html_extract import extract_html
+from app.services.url_ingest import FAILED, ingest_urls, ingest_urls_async
 
 router = APIRouter(tags=["url"])
+log = logging.getLogger("app.api.routes_url")
 
 
 class URLRequest(BaseModel):
     url: HttpUrl
     title: Optional[str] = None  # Optional custom title
+    force: bool = False          # re-fetch and re-index even if unchanged
 
 
 class URLResponse(BaseModel):
@@ -28,13 +29,41 @@ class URLResponse(BaseModel):
     chars_extracted: int
     chunks_indexed: int
     elapsed_time: float
+    status: str = "indexed"      # indexed | unchanged
+
+
+class URLBatchRequest(BaseModel):
+    urls: List[HttpUrl] = Field(..., min_length=1, max_length=500)
+    force: bool = False
+
+
+class URLBatchItem(BaseModel):
+    url: str
+    status: str                  # indexed | unchanged | failed
+    http_status: Optional[int] = None
+    title: Optional[str] = None
+    chars: int = 0
+    chunks_indexed: int = 0
+    elapsed_ms: float = 0.0
+    error: Optional[str] = None
+
+
+class URLBatchResponse(BaseModel):
+    indexed: int
+    unchanged: int
+    failed: int
+    elapsed_time: float
+    results: List[URLBatchItem]
 
 
 @router.post("/url/ingest", response_model=URLResponse)
 def ingest_url(body: URLRequest):
     """
     Fetch content from a URL, extract text, chunk it, and index in vector store.
-    
+
+    Pages fetched before are re-requested conditionally (ETag /
+    Last-Modified) and only re-indexed when they changed.
+
     Example:
         POST /v1/url/ingest
         {
@@ -42,106 +71,49 @@ def ingest_url(body: URLRequest):
             "title": "Transformer Wikipedia"
         }
     """
+    url = str(body.url)
+    log.debug("Ingesting URL %s", url)
+    titles = {url: body.title} if body.title else None
+    result = ingest_urls([url], force=body.force, titles=titles)[0]
+
+    if result["status"] == FAILED:
+        client_error = result["error"].startswith(("Failed to fetch", "Could not extract"))
+        raise HTTPException(status_code=400 if client_error else 500, detail=result["error"])
+
+    log.info("URL %s", result["status"], extra={"url": url, "chunks": result["chunks_indexed"],
+                                                "elapsed_ms": result["elapsed_ms"]})
+
+    return URLResponse(
+        ok=True,
+        url=url,
+        title=result["title"] or url,
+        chars_extracted=result["chars"],
+        chunks_indexed=result["chunks_indexed"],
+        elapsed_time=result["elapsed_ms"] / 1000,
+        status=result["status"],
+    )
+
+
+@router.post("/url/ingest/batch", response_model=URLBatchResponse)
+async def ingest_url_batch(body: URLBatchRequest):
+    """
+    Fetch and index many URLs concurrently (pooled connections, per-host
+    limits, conditional GETs). One failing URL doesn't fail the batch.
+
+    Example:
+        POST /v1/url/ingest/batch
+        {"urls": ["https://example.org/a", "https://example.org/b"]}
+    """
     start_time = time.time()
-    
-    try:
-        # Step 1: Fetch the webpage
-        print(f"[URL] Fetching: {body.url}")
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        response = requests.get(str(body.url), headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        # Step 2: Extract text content
-        print("[URL] Parsing HTML...")
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        # Remove script, style, nav, footer, ads
-        for tag in soup(['script', 'style', 'nav', 'footer', 'aside', 'header']):
-            tag.decompose()
-        
-        # Try to find main content (common patterns)
-        main_content = (
-            soup.find('article') or 
-            soup.find('main') or 
-            soup.find('div', class_=lambda x: x and 'content' in x.lower()) or
-            soup.find('body')
-        )
-        
-        if main_content:
-            text = main_content.get_text(separator="\n", strip=True)
-        else:
-            text = soup.get_text(separator="\n", strip=True)
-        
-        # Clean up excessive whitespace
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        text = '\n'.join(lines)
-        
-        if not text or len(text) < 100:
-            raise HTTPException(
-                status_code=400, 
-                detail="Could not extract meaningful content from URL"
-            )
-        
-        chars_extracted = len(text)
-        print(f"[URL] Extracted {chars_extracted} characters")
-        
-        # Step 3: Chunk the text
-        print("[URL] Chunking text...")
-        chunks = chunk_text(text)
-        
-        if not chunks:
-            raise HTTPException(
-                status_code=400,
-                detail="Text chunking failed - content too short or invalid"
-            )
-        
-        # Step 4: Prepare metadata
-        doc_title = body.title or soup.find('title').get_text() if soup.find('title') else str(body.url)
-        doc_title = doc_title[:200]  # Limit title length
-        
-        # Format chunks with metadata
-        documents = []
-        for i, chunk in enumerate(chunks):
-            documents.append({
-                "text": chunk,
-                "meta": {
-                    "source": str(body.url),
-                    "title": doc_title,
-                    "chunk_id": i,
-                    "type": "url",
-                    "timestamp": time.time()
-                }
-            })
-        
-        # Step 5: Add to vector store
-        print(f"[URL] Indexing {len(documents)} chunks...")
-        ids, collection_info = add_documents(documents)
-        
-        elapsed_time = time.time() - start_time
-        
-        print(f"[URL] ✓ Successfully indexed {len(ids)} chunks in {elapsed_time:.2f}s")
-        
-        return URLResponse(
-            ok=True,
-            url=str(body.url),
-            title=doc_title,
-            chars_extracted=chars_extracted,
-            chunks_indexed=len(ids),
-            elapsed_time=elapsed_time
-        )
-        
-    except requests.RequestException as e:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Failed to fetch URL: {str(e)}"
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error processing URL: {str(e)}"
-        )
+    results = await ingest_urls_async([str(u) for u in body.urls], force=body.force)
+    counts = {s: sum(1 for r in results if r["status"] == s) for s in ("indexed", "unchanged", "failed")}
+    log.info("URL batch of %d done", len(results),
+             extra={**counts, "elapsed_ms": round((time.time() - start_time) * 1000, 1)})
+    return URLBatchResponse(
+        **counts,
+        elapsed_time=time.time() - start_time,
+        results=[URLBatchItem(**r) for r in results],
+    )
 
 
 @router.get("/url/test")
@@ -149,21 +121,22 @@ def test_url_extraction():
     """
     Test endpoint to verify URL fetching works
     """
+    import requests
+
     test_url = "https://en.wikipedia.org/wiki/Artificial_intelligence"
-    
+
     try:
         response = requests.get(test_url, timeout=10)
-        soup = BeautifulSoup(response.text, "html.parser")
-        title = soup.find('title').get_text() if soup.find('title') else "No title"
-        
+        title, _ = extract_html(response.text)
+
         return {
             "ok": True,
             "test_url": test_url,
-            "title": title,
+            "title": title or "No title",
             "status_code": response.status_code
         }
     except Exception as e:
         return {
             "ok": False,
             "error": str(e)
-        }
\ No newline at end of file
+        }
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import os
 import json
+import time
 from typing import Any, Dict, Tuple
 
 import requests
@@ -162,6 +163,15 @@ if page == "Upload Document":
         if do_upload:
             with st.spinner("Uploading to backend…"):
                 ok, resp = post_file("/v1/upload", file_name, data, mime)
+            # Upload only queues the job; poll until indexing finishes.
+            if ok:
+                with st.spinner("Indexing…"):
+                    while resp.get("status") in ("QUEUED", "PROCESSING"):
+                        time.sleep(1)
+                        ok, resp = get_json(f"/v1/documents/{resp['document_id']}")
+                        if not ok:
+                            break
+                ok = ok and resp.get("status") == "READY"
             if ok:
                 st.success("Indexed ✅")
                 st.json(resp)
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from typing import Dict, List
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -11,8 +13,76 @@ class Settings(BaseSettings):
     model_provider: str = "ollama"             # maps from MODEL_PROVIDER
     model_name: str = "mistral"                # maps from MODEL_NAME
 
+    # --- LLM admission control (per-model slots + priority queue) ---
+    llm_concurrency_per_model: int = 1         # LLM_CONCURRENCY_PER_MODEL
+    llm_concurrency_overrides: Dict[str, int] = {}  # LLM_CONCURRENCY_OVERRIDES='{"phi3": 2}'
+    llm_max_queue: int = 16                    # LLM_MAX_QUEUE (per model)
+    llm_queue_timeout_s: float = 60.0          # LLM_QUEUE_TIMEOUT_S (interactive)
+    llm_batch_queue_timeout_s: float = 600.0   # LLM_BATCH_QUEUE_TIMEOUT_S (benchmark/quiz)
+
+    # --- Ollama server ---
+    # Point at benchmarks/fake_ollama.py (e.g. http://127.0.0.1:11435) for load tests.
+    ollama_host: str | None = None             # OLLAMA_HOST (default: http://127.0.0.1:11434)
+    ollama_timeout_s: float = 600.0            # OLLAMA_TIMEOUT_S
+
+    # --- Ollama model residency ---
+    ollama_keep_alive: str = "30m"             # OLLAMA_KEEP_ALIVE (how long idle models stay loaded)
+    ollama_pinned_models: List[str] = []       # OLLAMA_PINNED_MODELS='["phi3"]' (never unloaded)
+    ollama_warmup_models: List[str] = ["phi3", "mistral"]  # OLLAMA_WARMUP_MODELS (loaded at startup)
+
+    # --- Startup warm-up / readiness (GET /v1/ready) ---
+    # Models load on a background thread after startup; /v1/health answers at once.
+    # Two independent switches: retrieval gates readiness, the LLM preload is
+    # best effort (so it can be off where Ollama is remote or absent).
+    warmup_on_startup: bool = True             # WARMUP_ON_STARTUP (retrieval: embeddings, indexes, tokenizers, one dummy query)
+    ollama_warmup_on_startup: bool = True      # OLLAMA_WARMUP_ON_STARTUP (LLM: load OLLAMA_WARMUP_MODELS into Ollama)
+    ready_refresh_s: float = 15.0              # READY_REFRESH_S (background re-check of Ollama / indexes)
+    ready_check_timeout_s: float = 2.0         # READY_CHECK_TIMEOUT_S (per Ollama check)
+
+    # --- Context packing (prompt token budgets) ---
+    # Tokenizer per Ollama model, used to count prompt tokens exactly: an HF repo
+    # id (ungated mirrors; the official mistralai/meta-llama repos need a token)
+    # or a local tokenizer.json path. Loaded by the startup warm-up.
+    llm_tokenizers: Dict[str, str] = {         # LLM_TOKENIZERS (JSON)
+        "mistral": "unsloth/mistral-7b-instruct-v0.3",
+        "llama3": "NousResearch/Meta-Llama-3-8B-Instruct",
+        "phi3": "microsoft/Phi-3-mini-4k-instruct",
+    }
+    context_token_budgets: Dict[str, int] = {  # CONTEXT_TOKEN_BUDGETS (JSON)
+        "mistral": 2500,
+        "llama3": 2500,
+        "phi3": 1500,
+    }
+    context_default_budget: int = 1500         # CONTEXT_DEFAULT_BUDGET
+    context_sentence_filter: bool = False      # CONTEXT_SENTENCE_FILTER
+
+    # --- Metadata store / background ingestion ---
+    metadata_db_path: str = "data/scholarstream.db"  # METADATA_DB_PATH (SQLite, WAL mode)
+    ingest_workers: int = 2                    # INGEST_WORKERS (concurrent ingestion jobs)
+    ingest_max_pending: int = 100              # INGEST_MAX_PENDING (429 beyond this)
+    ingest_max_attempts: int = 3               # INGEST_MAX_ATTEMPTS
+    ingest_retry_backoff_s: float = 5.0        # INGEST_RETRY_BACKOFF_S (doubles per attempt)
+    ingest_embed_batch_size: int = 64          # INGEST_EMBED_BATCH_SIZE (chunks per embedding call)
+    ingest_queue_size: int = 4                 # INGEST_QUEUE_SIZE (items buffered between pipeline stages)
+
+    # --- Benchmark runs (/v1/benchmark/run) ---
+    benchmark_model_concurrency: int = 2       # BENCHMARK_MODEL_CONCURRENCY (questions in flight per model)
+    benchmark_retrieval_workers: int = 4       # BENCHMARK_RETRIEVAL_WORKERS
+
+    # --- URL ingestion ---
+    url_fetch_concurrency: int = 16            # URL_FETCH_CONCURRENCY (pooled connections)
+    url_fetch_per_host: int = 4                # URL_FETCH_PER_HOST (concurrent requests per host)
+    url_fetch_timeout_s: float = 15.0          # URL_FETCH_TIMEOUT_S
+    url_index_concurrency: int = 2             # URL_INDEX_CONCURRENCY (pages parsed/indexed at once)
+
     # --- Embeddings / vectorstore ---
     embeddings_model: str = "all-MiniLM-L6-v2" # maps from EMBEDDINGS_MODEL
+    bm25_index_path: str = "data/bm25_chunks.pkl"  # BM25_INDEX_PATH (keyword index, loaded on first query)
+
+    # --- Chunking (sizes in embedding-model tokens; MiniLM truncates at 256) ---
+    chunk_max_tokens: int = 240                # CHUNK_MAX_TOKENS
+    chunk_overlap_tokens: int = 32             # CHUNK_OVERLAP_TOKENS
+    chunk_min_tokens: int = 64                 # CHUNK_MIN_TOKENS (earliest sentence-boundary cut)
 
     # --- Backend URL (used by eval / UI helpers etc.) ---
     backend_url: str = "http://127.0.0.1:8000" # maps from BACKEND_URL
@@ -23,10 +93,43 @@ class Settings(BaseSettings):
     eval_questions_file: str = "questions.txt" # maps from EVAL_QUESTIONS_FILE
     eval_models_file: str = "configs/models.json"  # maps from EVAL_MODELS_FILE
 
+    # --- PDF text extraction ---
+    pdf_extract_workers: int = 0               # PDF_EXTRACT_WORKERS (0 = one per CPU)
+    pdf_parallel_min_pages: int = 24           # PDF_PARALLEL_MIN_PAGES (smaller PDFs stay in-process)
+    pdf_pages_per_task: int = 16               # PDF_PAGES_PER_TASK (page range per worker task)
+
     # --- OCR support ---
     enable_ocr: bool = True                    # maps from ENABLE_OCR
     ocr_lang: str = "eng"                      # maps from OCR_LANG
     tesseract_cmd: str = r"C:\Program Files\Tesseract-OCR\tesseract.exe"  # TESSERACT_CMD
+    ocr_workers: int = 0                       # OCR_WORKERS (0 = one per CPU)
+    ocr_dpi: int = 300                         # OCR_DPI (rasterization resolution)
+    ocr_min_chars: int = 10                    # OCR_MIN_CHARS (pages with less text get OCR'd)
+    ocr_cache: bool = True                     # OCR_CACHE (reuse results by page-image hash)
+
+    # --- Observability ---
+    log_level: str = "INFO"                    # LOG_LEVEL
+    log_format: str = "json"                   # LOG_FORMAT: json | text
+    log_queue_size: int = 10000                # LOG_QUEUE_SIZE (records buffered for the writer thread; excess dropped)
+    log_sample_rates: Dict[str, float] = {}    # LOG_SAMPLE_RATES (JSON, logger prefix -> share of INFO/DEBUG kept)
+    metrics_enabled: bool = True               # METRICS_ENABLED (off: /metrics 404, instrumentation is a no-op)
+    trace_enabled: bool = True                 # TRACE_ENABLED (request-scoped spans, see app.services.tracing)
+    trace_exporter: str = "none"               # TRACE_EXPORTER: none | jsonl | otlp
+    trace_sample_rate: float = 1.0             # TRACE_SAMPLE_RATE (share of traces exported)
+    trace_file: str = "data/traces.jsonl"      # TRACE_FILE (jsonl exporter)
+    trace_otlp_endpoint: str = "http://127.0.0.1:4317"  # TRACE_OTLP_ENDPOINT (OTLP gRPC collector)
+    # Slower traces are always captured. A normal LLM answer takes from a few
+    # seconds to tens of seconds, so this sits above that, at the interactive
+    # queue deadline (LLM_QUEUE_TIMEOUT_S), to flag outliers only.
+    trace_slow_ms: float = 60000.0             # TRACE_SLOW_MS
+    trace_slow_file: str = "data/slow_traces.jsonl"  # TRACE_SLOW_FILE
+    trace_slow_keep: int = 50                  # TRACE_SLOW_KEEP (slow traces kept in memory)
+
+    # --- Admin / profiling ---
+    admin_token: str = ""                      # ADMIN_TOKEN (X-Admin-Token; empty disables /v1/admin and X-Profile)
+    profile_interval_ms: float = 5.0           # PROFILE_INTERVAL_MS (sampling profiler period)
+    profile_max_seconds: float = 60.0          # PROFILE_MAX_SECONDS
+    profile_benchmark_mode: bool = False       # PROFILE_BENCHMARK_MODE (allow X-Profile: cprofile)
 
     # --- Chroma telemetry ---
     chroma_telemetry_enabled: bool = False     # CHROMA_TELEMETRY_ENABLED
@@ -0,0 +1,170 @@
+# app/core/db.py
+"""
+Embedded SQLite metadata store.
+
+One database file (settings.metadata_db_path) in WAL mode, so readers never
+block the writer and concurrent workers don't lose updates. Each thread
+gets its own connection.
+
+Provides:
+    - get_conn()        -> sqlite3.Connection (thread-local, Row factory)
+    - transaction()     -> context manager wrapping BEGIN IMMEDIATE / COMMIT
+    - utcnow()          -> ISO-8601 UTC timestamp string
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+from app.core.config import settings
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = False
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    document_id   TEXT PRIMARY KEY,
+    filename      TEXT NOT NULL,
+    path          TEXT NOT NULL,
+    content_hash  TEXT,
+    size_bytes    INTEGER NOT NULL DEFAULT 0,
+    status        TEXT NOT NULL,           -- QUEUED | PROCESSING | READY | FAILED
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    error         TEXT,
+    page_count    INTEGER NOT NULL DEFAULT 0,
+    chunk_count   INTEGER NOT NULL DEFAULT 0,
+    created_at    TEXT NOT NULL,
+    updated_at    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_status ON documents(status);
+CREATE INDEX IF NOT EXISTS idx_documents_hash ON documents(content_hash);
+CREATE INDEX IF NOT EXISTS idx_documents_created ON documents(created_at);
+CREATE INDEX IF NOT EXISTS idx_documents_path ON documents(path);
+
+CREATE TABLE IF NOT EXISTS url_cache (
+    url           TEXT PRIMARY KEY,
+    etag          TEXT,
+    last_modified TEXT,
+    content_hash  TEXT,                    -- sha256 of the fetched body
+    title         TEXT,
+    chunk_count   INTEGER NOT NULL DEFAULT 0,
+    fetched_at    TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS ocr_cache (
+    image_hash    TEXT PRIMARY KEY,        -- sha256 of rendered page pixels + lang
+    text          TEXT NOT NULL,
+    ocr_ms        REAL NOT NULL DEFAULT 0,
+    created_at    TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS knowledge_docs (
+    id            INTEGER PRIMARY KEY,
+    filename      TEXT NOT NULL,
+    path          TEXT NOT NULL DEFAULT '',
+    source        TEXT,                    -- upload | bulk | legacy
+    content_hash  TEXT,
+    size_bytes    INTEGER NOT NULL DEFAULT 0,
+    pages         INTEGER NOT NULL DEFAULT 0,
+    chunks        INTEGER NOT NULL DEFAULT 0,
+    created_at    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_knowledge_filename ON knowledge_docs(filename);
+CREATE INDEX IF NOT EXISTS idx_knowledge_hash ON knowledge_docs(content_hash);
+CREATE INDEX IF NOT EXISTS idx_knowledge_path ON knowledge_docs(path);
+CREATE INDEX IF NOT EXISTS idx_knowledge_created ON knowledge_docs(created_at);
+
+CREATE TABLE IF NOT EXISTS evaluations (
+    id            INTEGER PRIMARY KEY,
+    question      TEXT NOT NULL,
+    model         TEXT NOT NULL,
+    provider      TEXT NOT NULL,
+    answer        TEXT NOT NULL,
+    accuracy      INTEGER NOT NULL,
+    relevance     INTEGER NOT NULL,
+    completeness  INTEGER NOT NULL,
+    hallucination INTEGER NOT NULL,        -- 0 | 1
+    notes         TEXT,
+    created_at    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_evaluations_model ON evaluations(model);
+CREATE INDEX IF NOT EXISTS idx_evaluations_created ON evaluations(created_at);
+
+CREATE TABLE IF NOT EXISTS benchmark_runs (
+    run_id        TEXT PRIMARY KEY,
+    status        TEXT NOT NULL,           -- QUEUED | RUNNING | DONE | FAILED
+    config        TEXT NOT NULL,           -- JSON: models, top_k, max_tokens
+    total         INTEGER NOT NULL DEFAULT 0,   -- question x model pairs
+    error         TEXT,
+    created_at    TEXT NOT NULL,
+    updated_at    TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS benchmark_results (
+    run_id        TEXT NOT NULL,
+    question_id   INTEGER NOT NULL,
+    model         TEXT NOT NULL,
+    success       INTEGER NOT NULL,        -- 0 | 1 (failed pairs are retried on resume)
+    answer        TEXT,
+    error         TEXT,
+    retrieve_ms   REAL NOT NULL DEFAULT 0, -- shared by every model for the question
+    latency_ms    REAL NOT NULL DEFAULT 0,
+    queue_ms      REAL NOT NULL DEFAULT 0,
+    sources_count INTEGER NOT NULL DEFAULT 0,
+    usage         TEXT,                    -- JSON
+    created_at    TEXT NOT NULL,
+    PRIMARY KEY (run_id, question_id, model)
+);
+"""
+
+
+def utcnow() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _connect() -> sqlite3.Connection:
+    path = Path(settings.metadata_db_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+
+def _init_schema(conn: sqlite3.Connection) -> None:
+    global _initialized
+    with _init_lock:
+        if not _initialized:
+            conn.executescript(SCHEMA)
+            _initialized = True
+
+
+def get_conn() -> sqlite3.Connection:
+    """Thread-local connection (autocommit; use transaction() for multi-statement writes)."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _connect()
+        _init_schema(conn)
+        _local.conn = conn
+    return conn
+
+
+@contextmanager
+def transaction() -> Iterator[sqlite3.Connection]:
+    conn = get_conn()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    else:
+        conn.execute("COMMIT")
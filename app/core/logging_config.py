@@ -0,0 +1,184 @@
+# app/core/logging_config.py
+"""
+Process-wide logging setup.
+
+Provides:
+    - configure_logging()          install the handlers below on the root logger (idempotent)
+    - request_id_var               contextvar holding the current request id
+    - JsonFormatter                one JSON object per line
+    - SamplingFilter               keeps a share of verbose records per logger
+
+Records are handed to a QueueHandler and written by a QueueListener thread,
+so a request thread only formats its message and enqueues it; the stdout
+write happens off the request path. If the queue is full the record is
+dropped (and counted) instead of blocking.
+
+Every record carries request_id (set by RequestIdMiddleware) and, with
+tracing on, trace_id / span_id. Extra fields passed as
+`log.info("...", extra={"elapsed_ms": 12.3})` become JSON keys.
+
+Sampling (settings.log_sample_rates, logger name prefix -> rate) applies
+to DEBUG/INFO only, and is decided per request id, so a sampled request
+keeps all of its lines. WARNING and above always pass.
+
+uvicorn's own access log is suppressed: RequestIdMiddleware already writes
+one access line per request (with request and trace ids), and uvicorn's
+handler would write a second one synchronously, off the queue.
+"""
+
+from __future__ import annotations
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import zlib
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("edurag_request_id", default=None)
+
+# LogRecord attributes that are not user "extra" fields
+_STD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "request_id", "trace_id", "span_id",
+}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_atexit_registered = False
+_dropped = 0
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds")
+                  .replace("+00:00", "Z"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key in ("request_id", "trace_id", "span_id"):
+            value = getattr(record, key, None)
+            if value and value != "-":
+                out[key] = value
+        for key, value in record.__dict__.items():
+            if key not in _STD_ATTRS and not key.startswith("_"):
+                out[key] = value
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep `rate` of DEBUG/INFO records from loggers under each configured prefix."""
+
+    def __init__(self, rates: Dict[str, float]) -> None:
+        super().__init__()
+        # Longest prefix first so "app.api.routes_query" beats "app.api"
+        self.rates = sorted(rates.items(), key=lambda kv: len(kv[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                if rate >= 1.0:
+                    return True
+                if rate <= 0.0:
+                    return False
+                key = getattr(record, "request_id", None) or f"{record.thread}:{record.created}"
+                return zlib.crc32(key.encode()) % 10_000 < rate * 10_000
+        return True
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Like QueueHandler.prepare (merge args, drop the traceback object) but
+        # keep the traceback in exc_text rather than glued onto the message.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        global _dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped += 1
+
+
+class _ContextFilter(logging.Filter):
+    """Stamp request_id (and default trace ids) before the record leaves the request thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get() or "-"
+        if not hasattr(record, "trace_id"):
+            record.trace_id = record.span_id = "-"
+        return True
+
+
+class _DropAll(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        return False
+
+
+# A logger filter, not `disabled`: uvicorn's dictConfig re-enables the
+# loggers it configures but keeps their filters.
+_DROP_ALL = _DropAll()
+
+
+def dropped_records() -> int:
+    return _dropped
+
+
+def _stop_listener() -> None:
+    if _listener is not None and _listener._thread is not None:  # not already stopped
+        _listener.stop()
+
+
+def configure_logging(force: bool = False) -> None:
+    """Route the root logger through a queue to a stdout handler (JSON or text)."""
+    global _listener, _atexit_registered
+    if _listener is not None and not force:
+        return
+    if _listener is not None:
+        _listener.stop()
+
+    stream = logging.StreamHandler(sys.stdout)
+    if settings.log_format == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+        ))
+
+    handler = _DroppingQueueHandler(queue.Queue(maxsize=settings.log_queue_size))
+    handler.addFilter(_ContextFilter())
+    handler.addFilter(SamplingFilter(settings.log_sample_rates))
+
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        if isinstance(h, logging.handlers.QueueHandler):
+            root.removeHandler(h)
+    root.addHandler(handler)
+    root.setLevel(settings.log_level.upper())
+
+    logging.getLogger("uvicorn.access").addFilter(_DROP_ALL)
+
+    _listener = logging.handlers.QueueListener(handler.queue, stream, respect_handler_level=True)
+    _listener.start()
+    if not _atexit_registered:
+        atexit.register(_stop_listener)  # whichever listener is current at exit
+        _atexit_registered = True
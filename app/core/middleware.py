@@ -0,0 +1,227 @@
+# app/core/middleware.py
+"""
+ASGI middleware for the API.
+
+Provides:
+    - MetricsMiddleware   per-route request latency / count / in-flight
+    - TracingMiddleware   one root span per request, X-Trace-Id response header
+    - RequestIdMiddleware request id for logs (X-Request-ID in/out) + one access log line
+    - ProfilingMiddleware X-Profile: sample|cprofile on one request (admin token required)
+    - is_admin(headers)
+
+Plain ASGI classes rather than @app.middleware("http"): no extra task or
+body buffering per request, and streaming responses pass straight through.
+"""
+
+from __future__ import annotations
+
+import hmac
+import logging
+import re
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict
+
+from app.core.config import settings
+from app.core.logging_config import request_id_var
+from app.services import metrics, profiler, tracing
+
+access_log = logging.getLogger("app.access")
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+_REQUEST_SECONDS = metrics.histogram(
+    "http_request_duration_seconds", "Request latency by route template, method and status"
+)
+_REQUESTS = metrics.counter("http_requests_total", "Requests by route template, method and status")
+_IN_FLIGHT = metrics.gauge("http_requests_in_flight", "Requests currently being served")
+
+
+def route_template(scope: Scope) -> str:
+    """The matched route's path template (/v1/documents/{document_id}), not the raw path."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Records every HTTP request; a no-op pass-through while metrics are disabled."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not metrics.enabled():
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        _IN_FLIGHT.inc()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - t0
+            _IN_FLIGHT.dec()
+            labels = {"route": route_template(scope), "method": scope["method"], "status": status[0]}
+            _REQUEST_SECONDS.observe(elapsed, **labels)
+            _REQUESTS.inc(**labels)
+
+
+# W3C trace context: version-traceid-parentid-flags
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+class TracingMiddleware:
+    """
+    Opens the root span for each HTTP request, continuing an incoming
+    `traceparent` when present, and returns the trace id as X-Trace-Id.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.trace_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = parent_id = None
+        for name, value in scope.get("headers", ()):
+            if name == b"traceparent":
+                m = _TRACEPARENT.match(value.decode("latin-1").strip())
+                if m:
+                    trace_id, parent_id = m.groups()
+                break
+
+        root = tracing.start_trace("http.request", trace_id=trace_id, parent_id=parent_id,
+                                   method=scope["method"], path=scope["path"])
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                root.set(status=message["status"])
+                message["headers"] = list(message.get("headers", ())) + [(b"x-trace-id", root.trace_id.encode())]
+            await send(message)
+
+        with root:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                root.name = f"{scope['method']} {route_template(scope)}"
+
+
+class RequestIdMiddleware:
+    """
+    Binds a request id (the client's X-Request-ID, else a new one) to every
+    log record of the request, echoes it back, and logs one structured
+    access line with the route, status and duration.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex[:16]
+        token = request_id_var.set(request_id)
+        status = [500]
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                message["headers"] = list(message.get("headers", ())) + [(b"x-request-id", request_id.encode())]
+            await send(message)
+
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            access_log.info(
+                "%s %s %s", scope["method"], scope["path"], status[0],
+                extra={
+                    "route": route_template(scope),
+                    "status": status[0],
+                    "duration_ms": round((time.perf_counter() - t0) * 1000, 2),
+                },
+            )
+            request_id_var.reset(token)
+
+
+def is_admin(headers: Any) -> bool:
+    """True when ADMIN_TOKEN is set and the X-Admin-Token header matches it."""
+    token = settings.admin_token
+    if not token:
+        return False
+    if isinstance(headers, (list, tuple)):
+        given = next((v.decode("latin-1") for k, v in headers if k == b"x-admin-token"), "")
+    else:
+        given = headers.get("x-admin-token", "")
+    return hmac.compare_digest(given.encode(), token.encode())
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a single request on demand. With a valid X-Admin-Token:
+        X-Profile: sample     sampling profiler over the request (collapsed stacks)
+        X-Profile: cprofile   cProfile of the endpoint (PROFILE_BENCHMARK_MODE only)
+    The response carries X-Profile-Id; fetch the result from
+    GET /v1/admin/profiles/{id}. Only installed when ADMIN_TOKEN is set.
+
+    Sampling covers every thread while the request runs, so it is most
+    useful with little else in flight (benchmarks, a quiet replica).
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = scope.get("headers", ())
+        mode = next((v.decode("latin-1").strip().lower() for k, v in headers if k == b"x-profile"), None)
+        if mode not in ("sample", "cprofile") or not is_admin(headers):
+            await self.app(scope, receive, send)
+            return
+        if mode == "cprofile" and not settings.profile_benchmark_mode:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = profiler.new_id()
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", ())) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        meta = {"method": scope["method"], "path": scope["path"]}
+        t0 = time.perf_counter()
+        if mode == "sample":
+            try:
+                with profiler.sampling() as prof:
+                    await self.app(scope, receive, send_wrapper)
+            except profiler.ProfilerBusy:
+                await self.app(scope, receive, send)
+                return
+            text = prof.collapsed()
+        else:
+            with profiler.cprofile_request() as holder:
+                await self.app(scope, receive, send_wrapper)
+            text = profiler.cprofile_summary(holder)
+        profiler.save(profile_id, mode, text, duration_ms=round((time.perf_counter() - t0) * 1000, 1), **meta)
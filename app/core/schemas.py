@@ -193,9 +193,12 @@ class EvaluationItem(BaseModel):
 
 class EvaluationListResponse(BaseModel):
     """
-    Wrapper for returning a list of evaluations.
+    Wrapper for returning a page of evaluations (newest first).
     """
     items: List[EvaluationItem]
+    total: int = 0
+    limit: int = 50
+    offset: int = 0
 
 
 # ---------------------------------------------------------
@@ -206,15 +209,20 @@ class KnowledgeDoc(BaseModel):
     """
     Metadata for one document in the knowledge base.
     """
+    id: str = ""
     filename: str
     path: str
     pages: int
     chunks: int
     size_bytes: int
+    created_at: Optional[str] = None
 
 
 class KnowledgeListResponse(BaseModel):
     """
-    Response for listing knowledge base documents.
+    Response for listing knowledge base documents (newest first).
     """
     docs: List[KnowledgeDoc]
+    total: int = 0
+    limit: int = 50
+    offset: int = 0
@@ -1,18 +1,52 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from app.api import (
     routes_health,
     routes_documents,
     routes_query,
     routes_url,
     routes_quiz,
-    routes_summarize
+    routes_summarize,
+    routes_compare,
+    routes_benchmarks,
+    routes_knowledge,
+    routes_evaluate,
+    routes_admin,
 )
 
+from app.core.config import settings
+from app.core.logging_config import configure_logging
+from app.core.middleware import MetricsMiddleware, ProfilingMiddleware, RequestIdMiddleware, TracingMiddleware
+from app.services import metrics, profiler, readiness, tracing
+from app.services.scheduler import Overloaded
+from app.workers.benchmark import benchmark_runner
+from app.workers.ingest import ingest_queue
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup and shutdown hooks"""
+    # Load embeddings, indexes and Ollama models in the background; GET /v1/ready reports progress
+    readiness.start_warmup()
+    # Pick up uploads that were queued or running when the server stopped
+    ingest_queue.recover()
+    # Continue benchmark runs interrupted by a restart (finished answers are kept)
+    benchmark_runner.recover()
+    try:
+        yield
+    finally:
+        ingest_queue.shutdown(wait=False)
+        readiness.stop()
+
+
 app = FastAPI(
     title="EDUrag API",
     description="Multi-Model RAG System for Document Q&A",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan,
 )
 
 # CORS Configuration
@@ -24,6 +58,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# X-Profile: sample|cprofile for admins; not installed at all without ADMIN_TOKEN
+if settings.admin_token:
+    app.add_middleware(ProfilingMiddleware)
+# Per-route latency histograms for /metrics (pass-through when METRICS_ENABLED=false)
+app.add_middleware(MetricsMiddleware)
+# Request id on every log record, one JSON access line per request
+app.add_middleware(RequestIdMiddleware)
+configure_logging()
+# Outermost: one trace per request, so the access line carries its trace id too
+app.add_middleware(TracingMiddleware)
+tracing.install_log_context()
+
 # Register all routers
 app.include_router(routes_health.router, prefix="/v1", tags=["health"])
 app.include_router(routes_documents.router, prefix="/v1", tags=["documents"])
@@ -31,6 +77,42 @@ app.include_router(routes_query.router, prefix="/v1", tags=["query"])
 app.include_router(routes_url.router, prefix="/v1", tags=["url"])
 app.include_router(routes_quiz.router, prefix="/v1", tags=["quiz"])
 app.include_router(routes_summarize.router, prefix="/v1", tags=["summarize"])
+# These declare full "/v1/..." paths themselves
+app.include_router(routes_compare.router, tags=["compare"])
+app.include_router(routes_benchmarks.router, tags=["benchmarks"])
+app.include_router(routes_knowledge.router, tags=["knowledge"])
+app.include_router(routes_evaluate.router, tags=["evaluation"])
+app.include_router(routes_admin.router, tags=["admin"])
+
+
+# Admission control: shed overloaded LLM requests fast
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc), "model": exc.model},
+        headers={"Retry-After": str(int(round(exc.retry_after)))},
+    )
+
+
+@app.get("/v1/metrics")
+async def metrics_snapshot():
+    """In-process metrics (LLM queue depth, wait time, rejections)"""
+    return metrics.snapshot()
+
+
+@app.get("/v1/traces/slow")
+async def recent_slow_traces(limit: int = 20):
+    """Recent requests slower than TRACE_SLOW_MS, with their span breakdown"""
+    return {"threshold_ms": settings.trace_slow_ms, "traces": tracing.slow_traces(limit)}
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape endpoint (text exposition format)"""
+    if not metrics.enabled():
+        return Response(status_code=404)
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
 
 # Root endpoint
 @app.get("/")
@@ -49,6 +131,11 @@ async def root():
         ]
     }
 
+# Last, once every route exists: lets X-Profile: cprofile profile the endpoint
+# on the thread that runs it
+if settings.admin_token and settings.profile_benchmark_mode:
+    profiler.instrument_routes(app)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
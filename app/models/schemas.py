@@ -6,6 +6,7 @@ Status = Literal["QUEUED","PROCESSING","READY","FAILED"]
 class DocCreateResponse(BaseModel):
     document_id: str
     status: Status
+    duplicate: bool = False
 
 class DocItem(BaseModel):
     document_id: str
@@ -13,6 +14,7 @@ class DocItem(BaseModel):
     status: Status
     page_count: int = 0
     chunk_count: int = 0
+    error: Optional[str] = None
     created_at: str
     updated_at: str
 
@@ -1,11 +1,29 @@
-from sentence_transformers import CrossEncoder
+import threading
 
-# small local reranker/summarizer
-model = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
+from app.services import metrics
+
+
+# small local reranker/summarizer, loaded on first use (sentence-transformers
+# and the model weights take seconds to load)
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """The shared CrossEncoder (loaded on the first call)"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import CrossEncoder
+
+                _model = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
+    return _model
 
 def generate_answer(query, passages):
     pairs = [[query, p] for p in passages]
-    scores = model.predict(pairs)
+    with metrics.RAG_STAGE.time(stage="rerank"):
+        scores = get_model().predict(pairs)
     ranked = [p for _, p in sorted(zip(scores, passages), reverse=True)]
     top = " ".join(ranked[:3])
     return f"Answer summary: {top[:500]}..."
@@ -3,21 +3,39 @@
 Simple in-memory BM25 index for keyword retrieval.
 
 This file MUST provide:
-    - add_chunks(doc_id: str, chunks: list[str])  -> None
+    - add_chunks(doc_id: str, chunks: list[str], metas=None)  -> None
 
 Optionally, we also expose:
     - query_bm25(query: str, top_k: int = 6) -> list[dict]
     - query(query: str, top_k: int = 6)      -> list[dict]
+    - remove_doc(doc_id: str)                -> int
+    - save(path=None) / load(path=None)      persist to settings.bm25_index_path
+    - ensure_loaded()                        -> int (load once, e.g. at warm-up)
 
 If the rest of the app imports only `add_chunks`, that's fine.
 If it later wants `query(...)`, we also have it implemented here.
+
+Adding chunks only updates document frequencies; IDF is recomputed lazily
+on the next query, so bulk ingestion stays linear instead of rescanning
+the whole corpus after every document. The index is loaded from disk on
+first use.
 """
 
 from __future__ import annotations
 
+import logging
 import math
+import os
+import pickle
 import re
-from typing import Any, Dict, List, Tuple
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services import metrics
+
+log = logging.getLogger("app.services.bm25_index")
 
 # ---------------------------------------------------------------------
 # Internal global state: VERY simple in-memory BM25 index
@@ -25,10 +43,24 @@ from typing import Any, Dict, List, Tuple
 
 _DOCS: List[str] = []          # raw chunk text
 _DOC_IDS: List[str] = []       # doc_id for each chunk
+_METAS: List[Dict[str, Any]] = []  # chunk metadata (filename, page, ...)
 _TOKENS: List[List[str]] = []  # tokenized chunks
 
+_DF: Dict[str, int] = {}       # word -> number of chunks containing it
+_TOTAL_LEN: int = 0            # sum of chunk lengths (tokens)
 _IDF: Dict[str, float] = {}    # word -> idf
 _AVG_DL: float = 0.0           # average document length
+_DIRTY: bool = False           # IDF out of date
+_LOADED: bool = False
+
+_LOCK = threading.RLock()
+_FORMAT_VERSION = 1
+
+
+@metrics.collector
+def _report_size() -> None:
+    if _LOADED:
+        metrics.INDEX_CHUNKS.set(len(_DOCS), index="bm25")
 
 # BM25 parameters
 _K1: float = 1.5
@@ -41,35 +73,49 @@ def _tokenize(text: str) -> List[str]:
 
 
 def _recompute_idf() -> None:
-    """Recompute IDF and average document length. Called after indexing."""
-    global _IDF, _AVG_DL
+    """Recompute IDF and average document length from the running counts."""
+    global _IDF, _AVG_DL, _DIRTY
 
     n_docs = len(_DOCS)
+    _DIRTY = False
     if n_docs == 0:
         _IDF = {}
         _AVG_DL = 0.0
         return
 
-    df: Dict[str, int] = {}
-    lengths: List[int] = []
+    _AVG_DL = _TOTAL_LEN / float(n_docs)
 
-    for toks in _TOKENS:
-        lengths.append(len(toks))
-        seen = set()
-        for t in toks:
-            if t not in seen:
-                df[t] = df.get(t, 0) + 1
-                seen.add(t)
+    # Standard BM25-ish idf
+    _IDF = {
+        term: math.log(1.0 + (n_docs - freq + 0.5) / (freq + 0.5))
+        for term, freq in _DF.items()
+    }
 
-    _AVG_DL = sum(lengths) / float(n_docs)
-    _IDF = {}
 
-    # Standard BM25-ish idf
-    for term, freq in df.items():
-        _IDF[term] = math.log(1.0 + (n_docs - freq + 0.5) / (freq + 0.5))
+def _count(tokens: List[str], sign: int) -> None:
+    global _TOTAL_LEN
+    _TOTAL_LEN += sign * len(tokens)
+    for t in set(tokens):
+        n = _DF.get(t, 0) + sign
+        if n > 0:
+            _DF[t] = n
+        else:
+            _DF.pop(t, None)
+
+
+def _ensure_loaded() -> None:
+    if not _LOADED:
+        load()
 
 
-def add_chunks(doc_id: str, chunks: List[str]) -> None:
+def ensure_loaded() -> int:
+    """Load the saved index unless this process already has; returns the chunk count."""
+    with _LOCK:
+        _ensure_loaded()
+        return len(_DOCS)
+
+
+def add_chunks(doc_id: str, chunks: List[str], metas: Optional[List[Dict[str, Any]]] = None) -> None:
     """
     Add a list of text chunks for a given document into the BM25 index.
 
@@ -82,18 +128,86 @@ def add_chunks(doc_id: str, chunks: List[str]) -> None:
         Identifier for the source document (e.g., filename, UUID).
     chunks : list[str]
         The text chunks to index.
+    metas : list[dict], optional
+        Per-chunk metadata returned with query results.
     """
-    global _DOCS, _DOC_IDS, _TOKENS
-
-    for ch in chunks:
-        if not ch or not ch.strip():
-            continue
-
-        _DOCS.append(ch)
-        _DOC_IDS.append(doc_id)
-        _TOKENS.append(_tokenize(ch))
-
-    _recompute_idf()
+    global _DIRTY
+
+    with _LOCK:
+        _ensure_loaded()
+        for i, ch in enumerate(chunks):
+            if not ch or not ch.strip():
+                continue
+
+            toks = _tokenize(ch)
+            _DOCS.append(ch)
+            _DOC_IDS.append(doc_id)
+            _METAS.append(dict(metas[i]) if metas else {})
+            _TOKENS.append(toks)
+            _count(toks, +1)
+
+        _DIRTY = True
+
+
+def remove_doc(doc_id: str) -> int:
+    """Drop every chunk of `doc_id` (before re-indexing it). Returns chunks removed."""
+    global _DOCS, _DOC_IDS, _METAS, _TOKENS, _DIRTY
+
+    with _LOCK:
+        _ensure_loaded()
+        keep = [i for i, d in enumerate(_DOC_IDS) if d != doc_id]
+        removed = len(_DOC_IDS) - len(keep)
+        if removed:
+            for i, d in enumerate(_DOC_IDS):
+                if d == doc_id:
+                    _count(_TOKENS[i], -1)
+            _DOCS = [_DOCS[i] for i in keep]
+            _DOC_IDS = [_DOC_IDS[i] for i in keep]
+            _METAS = [_METAS[i] for i in keep]
+            _TOKENS = [_TOKENS[i] for i in keep]
+            _DIRTY = True
+        return removed
+
+
+def save(path: Optional[str | os.PathLike] = None) -> Path:
+    """Write the index atomically (tokens are recomputed on load)."""
+    path = Path(path or settings.bm25_index_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _LOCK:
+        state = {"version": _FORMAT_VERSION, "docs": _DOCS, "doc_ids": _DOC_IDS, "metas": _METAS}
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    return path
+
+
+def load(path: Optional[str | os.PathLike] = None) -> int:
+    """Replace the in-memory index with the saved one (if any). Returns chunk count."""
+    global _DOCS, _DOC_IDS, _METAS, _TOKENS, _DF, _TOTAL_LEN, _DIRTY, _LOADED
+
+    path = Path(path or settings.bm25_index_path)
+    with _LOCK:
+        _LOADED = True
+        if not path.exists():
+            return len(_DOCS)
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+            if state.get("version") != _FORMAT_VERSION:
+                raise ValueError(f"unsupported BM25 index version {state.get('version')}")
+        except Exception:
+            log.warning("Could not load BM25 index from %s; starting empty", path, exc_info=True)
+            return len(_DOCS)
+
+        _DOCS, _DOC_IDS, _METAS = state["docs"], state["doc_ids"], state["metas"]
+        _TOKENS = [_tokenize(d) for d in _DOCS]
+        _DF, _TOTAL_LEN = {}, 0
+        for toks in _TOKENS:
+            _count(toks, +1)
+        _DIRTY = True
+        log.info("Loaded BM25 index: %d chunks from %s", len(_DOCS), path)
+        return len(_DOCS)
 
 
 def _bm25_score(query_tokens: List[str], doc_tokens: List[str]) -> float:
@@ -134,40 +248,43 @@ def query_bm25(query: str, top_k: int = 6) -> List[Dict[str, Any]]:
             "score": <bm25_score>,
             "meta": {
                 "doc_id": <doc_id>,
-                "chunk_index": <index_in_internal_list>
+                "chunk_index": <from metas, else index_in_internal_list>,
+                ...the rest of the chunk's metas
             }
         }
     """
-    if not _DOCS:
-        return []
-
     q_tokens = _tokenize(query)
     if not q_tokens:
         return []
 
-    scored: List[Tuple[int, float]] = []
-
-    for idx, tokens in enumerate(_TOKENS):
-        s = _bm25_score(q_tokens, tokens)
-        if s > 0.0:
-            scored.append((idx, s))
-
-    # sort by score descending
-    scored.sort(key=lambda x: x[1], reverse=True)
-    scored = scored[:top_k]
-
-    results: List[Dict[str, Any]] = []
-    for idx, s in scored:
-        results.append(
-            {
-                "text": _DOCS[idx],
-                "score": s,
-                "meta": {
-                    "doc_id": _DOC_IDS[idx],
-                    "chunk_index": idx,
-                },
-            }
-        )
+    with _LOCK:
+        _ensure_loaded()
+        if not _DOCS:
+            return []
+        if _DIRTY:
+            _recompute_idf()
+
+        scored: List[Tuple[int, float]] = []
+
+        for idx, tokens in enumerate(_TOKENS):
+            s = _bm25_score(q_tokens, tokens)
+            if s > 0.0:
+                scored.append((idx, s))
+
+        # sort by score descending
+        scored.sort(key=lambda x: x[1], reverse=True)
+        scored = scored[:top_k]
+
+        results: List[Dict[str, Any]] = []
+        for idx, s in scored:
+            meta = {"chunk_index": idx, **_METAS[idx], "doc_id": _DOC_IDS[idx]}
+            results.append(
+                {
+                    "text": _DOCS[idx],
+                    "score": s,
+                    "meta": meta,
+                }
+            )
 
     return results
 
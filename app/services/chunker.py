@@ -1,45 +1,196 @@
+# app/services/chunker.py
+"""
+The one chunker every ingestion path uses (PDF uploads, URLs, scripts).
+
+Chunks are sized in *embedding-model tokens*, not characters: the embedding
+model silently truncates anything past its max sequence length, so a
+character budget either wastes context or loses text depending on the
+document. Windows prefer to end on a sentence boundary and overlap by a few
+tokens.
+
+Single pass: each page is tokenized once (fast Rust tokenizer with offsets),
+its sentence ends are found with one regex scan and mapped to token
+indices, and a window's cut point is found by bisecting those boundaries
+rather than re-scanning the window text.
+Consumed text is dropped as it goes, so memory stays at ~one window.
+
+Provides:
+    - iter_chunks(pages, ...)      streaming; yields chunk dicts
+    - chunk_text(text, ...)        -> List[str]
+    - chunk_pages(pages, ...)      -> List[str]
+    - embedding_tokenizer()        -> tokenizers.Tokenizer | None
+
+Chunk dicts:
+    {"text", "page", "page_end", "char_start", "char_end", "tokens"}
+where char offsets index the document text formed by joining non-empty
+pages with a blank line.
+"""
+
 from __future__ import annotations
-from typing import List
 
+import re
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-def chunk_text(
-    text: str,
-    max_chars: int = 800,
-    overlap: int = 100,
-) -> List[str]:
-    if not text or not text.strip():
-        return []
+from app.core.config import settings
+from app.services.token_counter import get_tokenizer
 
-    text = text.strip()
-    chunks: List[str] = []
+# Word/punctuation split used when the embedding tokenizer can't be loaded.
+# WordPiece produces at least this many tokens, so sizes stay conservative.
+_FALLBACK_TOKEN = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END = re.compile(r"[.!?](?=\s|$)")
 
-    start = 0
-    length = len(text)
+Page = Union[str, Tuple[int, str]]
 
-    while start < length:
-        end = min(start + max_chars, length)
-        chunk = text[start:end].strip()
-        if chunk:
-            chunks.append(chunk)
 
-        if end >= length:
-            break
+def embedding_tokenizer():
+    """The tokenizer of EMBEDDINGS_MODEL (cached); None when it can't be loaded."""
+    name = settings.embeddings_model
+    if "/" not in name:
+        name = f"sentence-transformers/{name}"
+    return get_tokenizer(name)
 
-        start = max(0, end - overlap)
 
-    return chunks
+def _token_spans(text: str, tokenizer) -> List[Tuple[int, int]]:
+    if tokenizer is not None:
+        return tokenizer.encode(text, add_special_tokens=False).offsets
+    return [m.span() for m in _FALLBACK_TOKEN.finditer(text)]
 
 
-def chunk_pages(
-    pages: List[str],
-    max_chars: int = 800,
-    overlap: int = 100,
+def _numbered(pages: Iterable[Page]) -> Iterator[Tuple[int, str]]:
+    for i, page in enumerate(pages, start=1):
+        yield page if isinstance(page, tuple) else (i, page)
+
+
+def iter_chunks(
+    pages: Iterable[Page],
+    max_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None,
+    min_tokens: Optional[int] = None,
+    tokenizer: Any = "auto",
+) -> Iterator[Dict[str, Any]]:
+    """
+    Chunk a stream of pages.
+
+    Args:
+        pages: (page_number, text) pairs, or plain strings (numbered from 1)
+        max_tokens: window size (default settings.chunk_max_tokens)
+        overlap_tokens: tokens shared by consecutive chunks
+        min_tokens: never cut at a sentence boundary before this many tokens
+        tokenizer: a `tokenizers.Tokenizer`, None for the word-split
+            fallback, or "auto" for the embedding model's tokenizer
+    """
+    max_tokens = max_tokens or settings.chunk_max_tokens
+    overlap = settings.chunk_overlap_tokens if overlap_tokens is None else overlap_tokens
+    overlap = min(overlap, max_tokens - 1)
+    min_tokens = min(min_tokens or settings.chunk_min_tokens, max_tokens)
+    if isinstance(tokenizer, str):
+        tokenizer = embedding_tokenizer()
+
+    buf = ""                    # document text from offset `base` onwards
+    base = 0
+    doc_len = 0
+    starts: List[int] = []      # token start offsets (document coordinates)
+    ends: List[int] = []        # token end offsets
+    breaks: List[int] = []      # indices of tokens that end a sentence
+    mark_idx: List[int] = []    # first token index of each page ...
+    mark_page: List[int] = []   # ... and that page's number
+    first = 0                   # first token of the current window
+    prev_last = -1              # last token of the previous window
+
+    def page_at(idx: int) -> int:
+        return mark_page[bisect_right(mark_idx, idx) - 1]
+
+    def emit(last: int) -> Dict[str, Any]:
+        s, e = starts[first], ends[last]
+        return {
+            "text": buf[s - base:e - base],
+            "page": page_at(first),
+            "page_end": page_at(last),
+            "char_start": s,
+            "char_end": e,
+            "tokens": last - first + 1,
+        }
+
+    def cut_point() -> int:
+        limit = first + max_tokens - 1
+        i = bisect_right(breaks, limit) - 1
+        # A boundary inside the overlap would repeat the previous window.
+        if i >= 0 and breaks[i] >= max(first + min_tokens - 1, prev_last + 1):
+            return breaks[i]
+        return limit
+
+    for page_no, text in _numbered(pages):
+        text = (text or "").strip()
+        if not text:
+            continue
+        spans = _token_spans(text, tokenizer)
+        if not spans:
+            continue
+        if doc_len:
+            buf += "\n\n"
+            doc_len += 2
+        offset = doc_len
+        buf += text
+        doc_len += len(text)
+
+        n0 = len(starts)
+        mark_idx.append(n0)
+        mark_page.append(page_no)
+        starts.extend([offset + s for s, _ in spans])
+        ends.extend([offset + e for _, e in spans])
+        # Sentence ends are found with one regex pass over the page and
+        # mapped to the token that ends there; the page end always counts.
+        for m in _SENTENCE_END.finditer(text):
+            i = bisect_left(ends, offset + m.end(), n0)
+            if i < len(ends) and ends[i] == offset + m.end() and (not breaks or breaks[-1] < i):
+                breaks.append(i)
+        if not breaks or breaks[-1] != len(ends) - 1:
+            breaks.append(len(ends) - 1)
+
+        # Cut every window that later pages can no longer change.
+        while len(starts) - first > max_tokens:
+            last = cut_point()
+            yield emit(last)
+            prev_last = last
+            first = max(last + 1 - overlap, first + 1)
+
+        # Drop consumed tokens/text.
+        if first:
+            keep_page = page_at(first)
+            del starts[:first], ends[:first]
+            breaks = [b - first for b in breaks[bisect_left(breaks, first):]]
+            j = bisect_right(mark_idx, first)
+            mark_idx = [0] + [i - first for i in mark_idx[j:]]
+            mark_page = [keep_page] + mark_page[j:]
+            cut = starts[0] - base
+            buf = buf[cut:]
+            base += cut
+            prev_last -= first
+            first = 0
+
+    while first < len(starts):
+        last = len(starts) - 1 if len(starts) - first <= max_tokens else cut_point()
+        yield emit(last)
+        if last == len(starts) - 1:
+            break
+        prev_last = last
+        first = max(last + 1 - overlap, first + 1)
+
+
+def chunk_text(
+    text: str,
+    max_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None,
 ) -> List[str]:
-    all_chunks: List[str] = []
+    if not text or not text.strip():
+        return []
+    return [c["text"] for c in iter_chunks([text], max_tokens, overlap_tokens)]
 
-    for page in pages:
-        if page and page.strip():
-            page_chunks = chunk_text(page, max_chars=max_chars, overlap=overlap)
-            all_chunks.extend(page_chunks)
 
-    return all_chunks
+def chunk_pages(
+    pages: Iterable[str],
+    max_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None,
+) -> List[str]:
+    return [c["text"] for c in iter_chunks(pages, max_tokens, overlap_tokens)]
@@ -0,0 +1,210 @@
+# app/services/context_packer.py
+"""
+Fit retrieved chunks into a per-model prompt token budget.
+
+Exports:
+    - budget_for(models)                                  -> int
+    - pack_chunks(question, chunks, model, ...)           -> (chunks, stats)
+
+Packing steps (chunks are assumed to arrive in rank order, best first):
+    1) drop exact duplicates (hybrid search can return a chunk twice)
+    2) greedily add chunks until the budget is spent; the lowest-ranked
+       chunks are trimmed (at a sentence boundary) or dropped first. Each
+       chunk optionally keeps only the sentences that mention question terms.
+    3) while filling, strip the text a chunk repeats from the previous window
+       of the same document (the chunker overlaps windows by ~200 chars), but
+       only once that previous window is in the prompt intact: stripping
+       against a window that is then filtered, trimmed or dropped would lose
+       the text altogether. When the later window was packed first, its head
+       is stripped (and its tokens refunded) as the earlier one goes in.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.token_counter import count_tokens
+
+# Don't bother including a trimmed tail shorter than this.
+_MIN_PARTIAL_TOKENS = 48
+# Minimum overlap (chars) before we treat two chunks as overlapping.
+_MIN_OVERLAP = 24
+_MAX_OVERLAP = 800
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n{2,}")
+_WORD = re.compile(r"\b\w{3,}\b")
+_STOPWORDS = frozenset(
+    "the and for are but not you all any can had her was one our out has his how "
+    "its may new now old see two way who did get let say she too use what when "
+    "where which while with this that from have they will your does into than "
+    "then them these those there their about would could should explain describe".split()
+)
+
+
+def budget_for(models: Iterable[str] | str | None) -> int:
+    """Context token budget for a model (or the smallest across several)."""
+    if models is None:
+        return settings.context_default_budget
+    if isinstance(models, str):
+        models = [models]
+    budgets = [
+        settings.context_token_budgets.get(m, settings.context_default_budget)
+        for m in models
+    ]
+    return min(budgets) if budgets else settings.context_default_budget
+
+
+def _source_key(chunk: Dict[str, Any]) -> Tuple[Optional[str], Optional[int]]:
+    meta = chunk.get("meta") or chunk.get("metadata") or {}
+    src = meta.get("path") or meta.get("filename") or meta.get("source") or meta.get("doc_id")
+    idx = meta.get("chunk_index", meta.get("chunk_id"))
+    return src, idx if isinstance(idx, int) else None
+
+
+def _overlap(prev: str, nxt: str) -> int:
+    """Length of the longest suffix of `prev` that is a prefix of `nxt`."""
+    if len(prev) < _MIN_OVERLAP or len(nxt) < _MIN_OVERLAP:
+        return 0
+    tail = prev[-_MAX_OVERLAP:]
+    probe = nxt[:_MIN_OVERLAP]
+    pos = tail.find(probe)
+    while pos != -1:
+        if nxt.startswith(tail[pos:]):
+            return len(tail) - pos
+        pos = tail.find(probe, pos + 1)
+    return 0
+
+
+def _split_sentences(text: str) -> List[str]:
+    return [s for s in _SENTENCE_END.split(text) if s and s.strip()]
+
+
+def _question_terms(question: str) -> set:
+    return {w for w in _WORD.findall(question.lower()) if w not in _STOPWORDS}
+
+
+def _relevant_sentences(text: str, terms: set) -> str:
+    """Keep sentences mentioning a question term (original order)."""
+    if not terms:
+        return text
+    sentences = _split_sentences(text)
+    kept = [s for s in sentences if terms.intersection(_WORD.findall(s.lower()))]
+    return " ".join(s.strip() for s in kept) if kept else text
+
+
+def _trim_to_budget(text: str, budget: int, model: Optional[str]) -> str:
+    """Longest sentence-aligned prefix of `text` costing <= budget tokens."""
+    sentences = _split_sentences(text)
+    out: List[str] = []
+    used = 0
+    for s in sentences:
+        cost = count_tokens(s + " ", model)
+        if used + cost > budget:
+            break
+        out.append(s.strip())
+        used += cost
+    return " ".join(out)
+
+
+def pack_chunks(
+    question: str,
+    chunks: List[Dict[str, Any]],
+    model: Optional[str] = None,
+    budget_tokens: Optional[int] = None,
+    sentence_filter: Optional[bool] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Pack ranked chunks into `budget_tokens` (default: the model's budget).
+
+    Returns (packed_chunks, stats). Packed chunks are shallow copies with
+    their "text" rewritten; input dicts are not modified.
+    """
+    budget = budget_tokens if budget_tokens is not None else budget_for(model)
+    if sentence_filter is None:
+        sentence_filter = settings.context_sentence_filter
+
+    stats: Dict[str, Any] = {
+        "budget_tokens": budget,
+        "chunks_in": len(chunks),
+        "tokens_in": 0,
+        "tokens_out": 0,
+        "duplicates_dropped": 0,
+        "overlap_chars_removed": 0,
+        "trimmed": 0,
+        "dropped": 0,
+    }
+
+    # 1) exact duplicates
+    seen: set = set()
+    unique: List[Dict[str, Any]] = []
+    for ch in chunks:
+        text = (ch.get("text") or "").strip()
+        if not text or text in seen:
+            stats["duplicates_dropped"] += 1
+            continue
+        seen.add(text)
+        unique.append(dict(ch, text=text))
+
+    terms = _question_terms(question) if sentence_filter else set()
+
+    # 2) + 3) greedy fill in rank order, stripping overlap against packed neighbours
+    packed: List[Dict[str, Any]] = []
+    placed: Dict[Tuple[str, int], Tuple[Dict[str, Any], bool]] = {}  # (src, idx) -> (packed chunk, intact)
+    remaining = budget
+    for ch in unique:
+        text = ch["text"]
+        src, idx = _source_key(ch)
+        key = (src, idx) if src is not None and idx is not None else None
+
+        prev = placed.get((src, idx - 1)) if key else None
+        if prev is not None and prev[1]:
+            n = _overlap(prev[0]["text"], text)
+            if n:
+                text = text[n:].lstrip()
+                stats["overlap_chars_removed"] += n
+        full = text
+        if terms:
+            text = _relevant_sentences(text, terms)
+        if not text:
+            continue
+        cost = count_tokens(text, model)
+        stats["tokens_in"] += cost
+
+        if cost <= remaining:
+            out = dict(ch, text=text)
+            remaining -= cost
+        elif remaining >= _MIN_PARTIAL_TOKENS:
+            trimmed = _trim_to_budget(text, remaining, model)
+            if trimmed:
+                used = count_tokens(trimmed, model)
+                out = dict(ch, text=trimmed)
+                remaining = max(0, remaining - used)
+                stats["trimmed"] += 1
+            else:
+                stats["dropped"] += 1
+                continue
+        else:
+            stats["dropped"] += 1
+            continue
+        packed.append(out)
+        intact = out["text"] == full
+        if key:
+            placed[key] = (out, intact)
+
+        # The next window went in first: strip its head now that this one is whole
+        nxt = placed.get((src, idx + 1)) if key and intact else None
+        if nxt is not None:
+            n = _overlap(out["text"], nxt[0]["text"])
+            if n:
+                before = count_tokens(nxt[0]["text"], model)
+                nxt[0]["text"] = nxt[0]["text"][n:].lstrip()
+                remaining += before - count_tokens(nxt[0]["text"], model)
+                stats["overlap_chars_removed"] += n
+                if not nxt[0]["text"]:
+                    packed = [c for c in packed if c is not nxt[0]]
+
+    stats["tokens_out"] = budget - remaining
+    stats["chunks_out"] = len(packed)
+    return packed, stats
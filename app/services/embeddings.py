@@ -13,40 +13,43 @@ from __future__ import annotations
 
 from typing import List
 
-import torch
-from transformers import AutoTokenizer, AutoModel
-
 from app.core.config import settings
 
+# torch / transformers are imported by _load_model(): they take seconds to import.
 
 # Use the model name from .env or default to MiniLM
 _EMBEDDING_MODEL_NAME = getattr(settings, "embeddings_model", None) or "all-MiniLM-L6-v2"
 
 _tokenizer = None
 _model = None
-_device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+_device = None
 
 
 def _load_model():
     """
     Lazy-load the HuggingFace model & tokenizer once.
     """
-    global _tokenizer, _model
+    global _tokenizer, _model, _device
 
     if _tokenizer is not None and _model is not None:
         return
 
+    import torch
+    from transformers import AutoTokenizer, AutoModel
+
+    _device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     _tokenizer = AutoTokenizer.from_pretrained(_EMBEDDING_MODEL_NAME)
     _model = AutoModel.from_pretrained(_EMBEDDING_MODEL_NAME)
     _model.to(_device)
     _model.eval()
 
 
-@torch.no_grad()
 def _encode_batch(texts: List[str]) -> List[List[float]]:
     """
     Encode a batch of texts into sentence embeddings using mean pooling.
     """
+    import torch
+
     _load_model()
 
     # Replace empty or None texts to avoid crashes
@@ -62,7 +65,8 @@ def _encode_batch(texts: List[str]) -> List[List[float]]:
 
     encoded = {k: v.to(_device) for k, v in encoded.items()}
 
-    outputs = _model(**encoded)
+    with torch.no_grad():
+        outputs = _model(**encoded)
     last_hidden_state = outputs.last_hidden_state  # (batch, seq_len, hidden_dim)
     attention_mask = encoded["attention_mask"]     # (batch, seq_len)
 
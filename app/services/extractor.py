@@ -4,15 +4,27 @@
 Simple text extractor for PDFs and text files.
 
 Provides:
+    - iter_pdf_pages(file_path)      -> iterator of (page_number, text)
     - extract_text_pages(file_path)  -> list[str]
     - extract_text_from_file(file_path) -> dict
+
+Large PDFs are split into page ranges and extracted on a process pool;
+each worker opens the file itself, and pages are yielded back in order as
+soon as their range is done, so callers can start chunking page 1 while
+later pages are still being parsed.
 """
 
 from __future__ import annotations
 
+import multiprocessing
 import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict
+from typing import Deque, Iterator, List, Dict, Optional, Tuple
+
+from app.core.config import settings
 
 try:
     import PyPDF2
@@ -20,26 +32,99 @@ except ImportError:
     PyPDF2 = None  # We'll show a clear error message later
 
 
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
 # ---------------------------
 #   Helper extractors
 # ---------------------------
 
-def _extract_from_pdf(path: Path) -> List[str]:
-    """Extracts text page-by-page from a PDF."""
+def _require_pypdf2() -> None:
     if PyPDF2 is None:
         raise RuntimeError(
             "PyPDF2 not installed. Install with: pip install PyPDF2"
         )
 
-    pages = []
-    with path.open("rb") as f:
-        reader = PyPDF2.PdfReader(f)
-        for page in reader.pages:
-            text = page.extract_text() or ""
-            text = text.strip()
-            if text:
-                pages.append(text)
-    return pages
+
+def _page_text(reader, index: int) -> str:
+    try:
+        return (reader.pages[index].extract_text() or "").strip()
+    except Exception:
+        return ""
+
+
+def _extract_range(path: str, start: int, end: int) -> List[str]:
+    """Worker task: open the PDF independently and extract pages [start, end)."""
+    reader = PyPDF2.PdfReader(path)
+    return [_page_text(reader, i) for i in range(start, end)]
+
+
+def _worker_count() -> int:
+    return settings.pdf_extract_workers or os.cpu_count() or 1
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Shared process pool (spawned once; 'spawn' is safe alongside server threads)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=_worker_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def iter_pdf_pages(
+    file_path: str | os.PathLike,
+    workers: Optional[int] = None,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_number, text) for every page, in order (page numbers start at 1).
+
+    Empty pages are yielded too (text == ""), so callers can OCR them.
+    PDFs with fewer than settings.pdf_parallel_min_pages pages, or workers=1,
+    are extracted in-process.
+    """
+    _require_pypdf2()
+    path = str(file_path)
+    reader = PyPDF2.PdfReader(path)
+    n_pages = len(reader.pages)
+
+    workers = workers if workers is not None else _worker_count()
+    if workers <= 1 or n_pages < settings.pdf_parallel_min_pages:
+        for i in range(n_pages):
+            yield i + 1, _page_text(reader, i)
+        return
+    del reader
+
+    pool = _get_pool()
+    step = max(1, settings.pdf_pages_per_task)
+    ranges = [(s, min(s + step, n_pages)) for s in range(0, n_pages, step)]
+
+    # Keep a bounded window of ranges in flight so memory stays flat.
+    in_flight: Deque = deque()
+    next_range = 0
+    while next_range < len(ranges) and len(in_flight) < workers * 2:
+        start, end = ranges[next_range]
+        in_flight.append((start, pool.submit(_extract_range, path, start, end)))
+        next_range += 1
+
+    while in_flight:
+        start, fut = in_flight.popleft()
+        texts = fut.result()
+        if next_range < len(ranges):
+            s, e = ranges[next_range]
+            in_flight.append((s, pool.submit(_extract_range, path, s, e)))
+            next_range += 1
+        for offset, text in enumerate(texts):
+            yield start + offset + 1, text
+
+
+def _extract_from_pdf(path: Path) -> List[str]:
+    """Extracts text page-by-page from a PDF (non-empty pages only)."""
+    return [text for _, text in iter_pdf_pages(path) if text]
 
 
 def _extract_from_txt(path: Path) -> List[str]:
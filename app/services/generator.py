@@ -2,41 +2,77 @@
 
 from __future__ import annotations
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import time
 
+from app.services import metrics
+from app.services.tracing import span, traced
 from app.services.pipeline import vs_query
+from app.services.context_packer import pack_chunks, budget_for
+from app.services.prompts import format_context, rag_prompt
 from app.services.llm import generate_response
+from app.services.scheduler import PRIORITY_INTERACTIVE
 
 
-def build_rag_prompt(question: str, chunks: List[Dict[str, Any]]) -> str:
+def _ms_since(t0: float) -> float:
+    return round((time.perf_counter() - t0) * 1000, 2)
+
+
+def stage_timings(
+    retrieve_ms: float,
+    pack_ms: float,
+    llm_result: Dict[str, Any],
+    llm_ms: float,
+) -> Dict[str, float]:
     """
-    Build a RAG prompt from question and retrieved chunks
+    Per-stage breakdown of one RAG request:
+    retrieve -> pack -> queue (scheduler) -> load -> prefill -> decode.
     """
-    context_parts = []
-    for i, chunk in enumerate(chunks, 1):
-        text = chunk.get("text", "")
-        context_parts.append(f"[{i}] {text}")
-    
-    context_str = "\n\n".join(context_parts)
-    
-    prompt = f"""Based on the following context, answer the question.
+    usage = llm_result.get("usage") or {}
+    return {
+        "retrieve_ms": retrieve_ms,
+        "pack_ms": pack_ms,
+        "queue_ms": llm_result.get("queue_ms", 0.0),
+        "load_ms": usage.get("load_ms", 0.0),
+        "prefill_ms": usage.get("prefill_ms", 0.0),
+        "decode_ms": usage.get("decode_ms", 0.0),
+        "llm_ms": llm_ms,
+    }
 
-Context:
-{context_str}
 
-Question: {question}
+def _completion_tokens(llm_result: Dict[str, Any]) -> int:
+    """Ollama's eval_count; word count only if the server didn't report it."""
+    if not llm_result["success"]:
+        return 0
+    usage = llm_result.get("usage") or {}
+    return usage.get("completion_tokens") or len(llm_result["response"].split())
 
-Answer the question based solely on the information provided in the context above. If the context doesn't contain enough information, say so."""
-    
-    return prompt
 
+def build_rag_prompt(
+    question: str,
+    chunks: List[Dict[str, Any]],
+    model: Optional[str] = None,
+    budget_tokens: Optional[int] = None,
+) -> str:
+    """
+    Build a RAG prompt from question and retrieved chunks.
+
+    If `model` or `budget_tokens` is given, chunks are first packed into the
+    token budget (see context_packer.pack_chunks).
+    """
+    if model is not None or budget_tokens is not None:
+        chunks, _ = pack_chunks(question, chunks, model=model, budget_tokens=budget_tokens)
+
+    return rag_prompt(question, format_context(chunks))
 
+
+@traced("rag.gen_answer")
 def gen_answer(
     question: str,
     top_k: int = 4,
     mode: str = "hybrid",
     model: str = "mistral",
+    priority: int = PRIORITY_INTERACTIVE,
 ) -> tuple[str, List[Dict[str, Any]], Dict[str, Any]]:
     """
     Main QA pipeline:
@@ -45,30 +81,48 @@ def gen_answer(
     Returns:
         answer_text, used_chunks, meta
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     # Retrieve chunks
     chunks = vs_query(query=question, top_k=top_k, mode=mode)
+    retrieve_ms = _ms_since(start_time)
     
-    # Build prompt
-    prompt = build_rag_prompt(question, chunks)
+    # Fit chunks into the model's context budget, then build prompt
+    t0 = time.perf_counter()
+    with span("rag.pack_chunks"):
+        chunks, pack_stats = pack_chunks(question, chunks, model=model)
+    with span("rag.build_prompt"), metrics.RAG_STAGE.time(stage="prompt_build"):
+        prompt = build_rag_prompt(question, chunks)
+    pack_ms = _ms_since(t0)
     
     # Generate answer
+    t0 = time.perf_counter()
     llm_result = generate_response(
         prompt=prompt,
         model_name=model,
         max_tokens=500,
-        temperature=0.7
+        temperature=0.7,
+        priority=priority
     )
+    llm_ms = _ms_since(t0)
     
-    elapsed_ms = (time.time() - start_time) * 1000
+    elapsed_ms = _ms_since(start_time)
+    metrics.RAG_STAGE.observe(retrieve_ms / 1000, stage="retrieve")
+    metrics.RAG_STAGE.observe(pack_ms / 1000, stage="pack")
     
     # Format output to match expected structure
+    usage = llm_result.get("usage") or {}
     llm_out = {
         "answer": llm_result["response"] if llm_result["success"] else "Error generating answer",
         "model": model,
-        "time_ms": round(elapsed_ms, 2),
-        "tokens": len(llm_result["response"].split()) if llm_result["success"] else 0,
+        "time_ms": elapsed_ms,
+        "tokens": _completion_tokens(llm_result),
+        "prompt_tokens": usage.get("prompt_tokens", 0),
+        "tokens_per_sec": usage.get("decode_tokens_per_sec"),
+        "queue_ms": llm_result.get("queue_ms", 0.0),
+        "timings": stage_timings(retrieve_ms, pack_ms, llm_result, llm_ms),
+        "usage": usage,
+        "context": pack_stats,
         "success": llm_result["success"],
         "error": llm_result["error"]
     }
@@ -81,6 +135,7 @@ def gen_compare_all(
     top_k: int = 4,
     mode: str = "hybrid",
     models: List[str] | None = None,
+    priority: int = PRIORITY_INTERACTIVE,
 ) -> Dict[str, Any]:
     """
     Run the same RAG query through multiple models.
@@ -99,32 +154,46 @@ def gen_compare_all(
         models = ["mistral", "llama3", "phi3"]
 
     # Retrieve chunks once (same for all models)
+    t0 = time.perf_counter()
     chunks = vs_query(query=question, top_k=top_k, mode=mode)
+    retrieve_ms = _ms_since(t0)
     
-    # Build prompt once
+    # Pack to the smallest budget so every model sees the same prompt
+    t0 = time.perf_counter()
+    chunks, _ = pack_chunks(question, chunks, budget_tokens=budget_for(models))
     prompt = build_rag_prompt(question, chunks)
+    pack_ms = _ms_since(t0)
+    metrics.RAG_STAGE.observe(retrieve_ms / 1000, stage="retrieve")
+    metrics.RAG_STAGE.observe(pack_ms / 1000, stage="pack")
 
     results: Dict[str, Any] = {}
     
     for m in models:
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # Generate answer with this model
         llm_result = generate_response(
             prompt=prompt,
             model_name=m,
             max_tokens=500,
-            temperature=0.7
+            temperature=0.7,
+            priority=priority
         )
         
-        elapsed_ms = (time.time() - start_time) * 1000
+        elapsed_ms = _ms_since(start_time)
+        usage = llm_result.get("usage") or {}
         
         out = {
             "answer": llm_result["response"] if llm_result["success"] else "Error",
             "model": m,
-            "time_ms": round(elapsed_ms, 2),
-            "tokens": len(llm_result["response"].split()) if llm_result["success"] else 0,
+            "time_ms": elapsed_ms,
+            "tokens": _completion_tokens(llm_result),
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "tokens_per_sec": usage.get("decode_tokens_per_sec"),
             "used_chunks": chunks,
+            "queue_ms": llm_result.get("queue_ms", 0.0),
+            "timings": stage_timings(retrieve_ms, pack_ms, llm_result, elapsed_ms),
+            "usage": usage,
             "success": llm_result["success"],
             "error": llm_result["error"]
         }
@@ -133,12 +202,15 @@ def gen_compare_all(
     # Aggregate simple metrics
     agg: Dict[str, Any] = {
         "total_queries": 1,
+        "retrieve_ms": retrieve_ms,
+        "pack_ms": pack_ms,
     }
     for m in models:
         key_time = f"avg_time_{m}"
         key_tok = f"avg_tokens_{m}"
         agg[key_time] = results[m]["time_ms"]
         agg[key_tok] = results[m]["tokens"]
+        agg[f"tokens_per_sec_{m}"] = results[m]["tokens_per_sec"]
 
     return {
         "results": results,
@@ -154,7 +226,7 @@ def gen_summary(max_chunks: int = 20) -> str:
     pseudo_question = "Give a high-level summary of the key ideas in this knowledge base."
     chunks = vs_query(query=pseudo_question, top_k=max_chunks, mode="semantic")
     
-    prompt = build_rag_prompt("Summarize the above context.", chunks)
+    prompt = build_rag_prompt("Summarize the above context.", chunks, model="mistral")
     
     result = generate_response(
         prompt=prompt,
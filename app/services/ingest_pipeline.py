@@ -0,0 +1,360 @@
+# app/services/ingest_pipeline.py
+"""
+Staged, streaming ingestion: extract -> chunk -> embed -> index.
+
+Each stage runs on its own thread and talks to the next one through a
+bounded queue, so
+    - page N+1 is extracted while page N is chunked/embedded and the
+      vectors of the previous batch are written
+    - a slow stage applies backpressure (full queue) instead of letting
+      earlier stages pile the whole document up in memory
+
+Exports:
+    - run_pipeline(pages, doc_key, base_meta, ...) -> dict   (one document)
+    - run_stages(items, to_docs, ...)               -> dict   (any item stream, e.g. many files)
+    - chunk_meta(chunk)                             -> dict
+    - bm25_writer(doc_id, write_fn=None)            -> write_fn that also feeds BM25
+    - StageError
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services import metrics
+
+_DONE = object()
+
+_STAGE_ITEMS = metrics.counter("ingest_stage_items_total", "Items emitted per ingestion pipeline stage")
+_STAGE_BUSY = metrics.counter("ingest_stage_busy_seconds_total", "Time ingestion stages spent working")
+_CHUNKS = metrics.counter("ingest_chunks_total", "Chunks embedded and written to the index")
+_RUN_SECONDS = metrics.histogram("ingest_run_seconds", "Wall time per ingestion pipeline run")
+
+
+class StageError(RuntimeError):
+    """A pipeline stage failed; `stage` names it, __cause__ is the original error."""
+
+    def __init__(self, stage: str, exc: BaseException) -> None:
+        super().__init__(f"{stage} stage failed: {exc}")
+        self.stage = stage
+
+
+class _StageStats:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.busy_s = 0.0
+        self.wall_s = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "busy_s": round(self.busy_s, 3),
+            "wall_s": round(self.wall_s, 3),
+            "items_per_sec": round(self.items_out / self.busy_s, 1) if self.busy_s else None,
+        }
+
+
+def _rss_bytes() -> Optional[int]:
+    # Current (not peak) resident set size; Linux only.
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _RssSampler(threading.Thread):
+    """
+    Samples RSS every `interval_s` while a run is in flight. `delta_mb()` is
+    the highest sample minus the RSS at start, i.e. what this run added,
+    rather than the process-lifetime high-water mark (ru_maxrss), which
+    earlier runs and model loading would dominate.
+    """
+
+    def __init__(self, interval_s: float = 0.05) -> None:
+        super().__init__(name="ingest-rss", daemon=True)
+        self.interval_s = interval_s
+        self.start_bytes = _rss_bytes()
+        self.peak_bytes = self.start_bytes
+        self._done = threading.Event()
+
+    def _sample(self) -> None:
+        rss = _rss_bytes()
+        if rss is not None and (self.peak_bytes is None or rss > self.peak_bytes):
+            self.peak_bytes = rss
+
+    def run(self) -> None:
+        while not self._done.wait(self.interval_s):
+            self._sample()
+
+    def finish(self) -> Optional[float]:
+        self._done.set()
+        self.join()
+        self._sample()
+        return self.delta_mb()
+
+    def delta_mb(self) -> Optional[float]:
+        if self.start_bytes is None or self.peak_bytes is None:
+            return None
+        return round((self.peak_bytes - self.start_bytes) / (1024 * 1024), 1)
+
+
+class _Stage(threading.Thread):
+    """
+    Runs `fn(inputs) -> outputs` where inputs come from `inbox` (or a source
+    iterable) and outputs go to `outbox`. Time spent blocked on either queue
+    is excluded from busy time.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[Iterable[Any]], Iterator[Any]],
+        inbox: "queue.Queue | Iterable[Any]",
+        outbox: Optional[queue.Queue],
+        stop: threading.Event,
+    ) -> None:
+        super().__init__(name=f"ingest-{name}", daemon=True)
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self.stop = stop
+        self.stats = _StageStats(name)
+        self.error: Optional[BaseException] = None
+        self._wait_s = 0.0
+
+    def _inputs(self) -> Iterator[Any]:
+        if not isinstance(self.inbox, queue.Queue):
+            for item in self.inbox:
+                self.stats.items_in += 1
+                yield item
+            return
+        while not self.stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                item = self.inbox.get(timeout=0.1)
+            except queue.Empty:
+                self._wait_s += time.perf_counter() - t0
+                continue
+            self._wait_s += time.perf_counter() - t0
+            if item is _DONE:
+                return
+            self.stats.items_in += 1
+            yield item
+
+    def _put(self, item: Any) -> bool:
+        t0 = time.perf_counter()
+        while not self.stop.is_set():
+            try:
+                self.outbox.put(item, timeout=0.1)
+                self._wait_s += time.perf_counter() - t0
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(self) -> None:
+        start = time.perf_counter()
+        try:
+            for out in self.fn(self._inputs()):
+                self.stats.items_out += 1
+                if self.outbox is not None and not self._put(out):
+                    return
+        except BaseException as e:
+            self.error = e
+            self.stop.set()
+        finally:
+            # Not a blocking put: if a later stage fails while this queue is
+            # full, nothing will ever drain it.
+            if self.outbox is not None:
+                self._put(_DONE)
+            self.stats.wall_s = time.perf_counter() - start
+            self.stats.busy_s = max(0.0, self.stats.wall_s - self._wait_s)
+
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def chunk_meta(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    """Position fields of a chunker chunk dict, for vectorstore metadata."""
+    return {k: chunk[k] for k in ("page", "page_end", "char_start", "char_end", "tokens") if k in chunk}
+
+
+def bm25_writer(doc_id: str, write_fn: Optional[Callable[..., None]] = None) -> Callable[..., None]:
+    """
+    write_fn that also feeds the BM25 keyword index, so Chroma and BM25 are
+    built from the same chunks in the same pass. Callers remove the old
+    BM25 entries for `doc_id` first and bm25_index.save() when done.
+    """
+    from app.services import bm25_index
+
+    if write_fn is None:
+        from app.services.vectorstore import add_embedded as write_fn
+
+    def write(ids: List[str], texts: List[str], embeddings: List[List[float]],
+              metadatas: List[Dict[str, Any]]) -> None:
+        write_fn(ids=ids, texts=texts, embeddings=embeddings, metadatas=metadatas)
+        bm25_index.add_chunks(doc_id, texts, metadatas)
+
+    return write
+
+
+def run_stages(
+    items: Iterable[Any],
+    to_docs: Callable[[Iterable[Any]], Iterator[Dict[str, Any]]],
+    *,
+    embed_fn: Optional[Callable[[List[str]], List[List[float]]]] = None,
+    write_fn: Optional[Callable[..., None]] = None,
+    batch_size: Optional[int] = None,
+    queue_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Generic form of the pipeline: pull `items` (the extract stage; pass a
+    lazy iterator so extraction happens here), turn them into
+    {"id", "text", "meta"} docs with `to_docs`, embed in batches of
+    `batch_size` and write. Batches may span documents.
+
+    Returns:
+        {"items", "chunks_indexed", "stages": {...}, "rss_delta_mb", "elapsed_s"}
+
+    `rss_delta_mb` is the peak RSS sampled during the run minus the RSS at
+    its start (None where /proc/self/statm is unavailable).
+    Raises:
+        StageError naming the stage that failed.
+    """
+    if embed_fn is None or write_fn is None:
+        from app.services.vectorstore import add_embedded, embed_documents
+        embed_fn = embed_fn or embed_documents
+        write_fn = write_fn or add_embedded
+
+    batch_size = batch_size or settings.ingest_embed_batch_size
+    queue_size = queue_size or settings.ingest_queue_size
+    stop = threading.Event()
+    written = [0]
+
+    def extract(source: Iterable[Any]) -> Iterator[Any]:
+        yield from source
+
+    def chunk(source_items: Iterable[Any]) -> Iterator[List[Dict[str, Any]]]:
+        yield from _batched(to_docs(source_items), batch_size)
+
+    def embed(batches: Iterable[List[Dict[str, Any]]]) -> Iterator[Tuple[List[Dict[str, Any]], List[List[float]]]]:
+        for batch in batches:
+            yield batch, embed_fn([d["text"] for d in batch])
+
+    def index(pairs: Iterable[Tuple[List[Dict[str, Any]], List[List[float]]]]) -> Iterator[int]:
+        for batch, vectors in pairs:
+            write_fn(
+                ids=[d["id"] for d in batch],
+                texts=[d["text"] for d in batch],
+                embeddings=vectors,
+                metadatas=[d["meta"] for d in batch],
+            )
+            written[0] += len(batch)
+            yield len(batch)
+
+    q_items: queue.Queue = queue.Queue(maxsize=queue_size)
+    q_chunks: queue.Queue = queue.Queue(maxsize=queue_size)
+    q_vectors: queue.Queue = queue.Queue(maxsize=queue_size)
+
+    stages = [
+        _Stage("extract", extract, items, q_items, stop),
+        _Stage("chunk", chunk, q_items, q_chunks, stop),
+        _Stage("embed", embed, q_chunks, q_vectors, stop),
+        _Stage("index", index, q_vectors, None, stop),
+    ]
+
+    rss = _RssSampler()
+    t0 = time.perf_counter()
+    rss.start()
+    for st in stages:
+        st.start()
+    for st in stages:
+        st.join()
+    rss_delta_mb = rss.finish()
+
+    elapsed = time.perf_counter() - t0
+    for st in stages:
+        _STAGE_ITEMS.inc(st.stats.items_out, stage=st.stats.name)
+        _STAGE_BUSY.inc(st.stats.busy_s, stage=st.stats.name)
+    _CHUNKS.inc(written[0])
+    _RUN_SECONDS.observe(elapsed)
+
+    for st in stages:
+        if st.error is not None:
+            raise StageError(st.stats.name, st.error) from st.error
+
+    return {
+        "items": stages[0].stats.items_out,
+        "chunks_indexed": written[0],
+        "stages": {st.stats.name: st.stats.as_dict() for st in stages},
+        "rss_delta_mb": rss_delta_mb,
+        "elapsed_s": round(elapsed, 3),
+    }
+
+
+def run_pipeline(
+    pages: Iterable[Tuple[int, str]],
+    doc_key: str,
+    base_meta: Dict[str, Any],
+    *,
+    chunker: Callable[[Iterable[Tuple[int, str]]], Iterator[Dict[str, Any]]],
+    embed_fn: Optional[Callable[[List[str]], List[List[float]]]] = None,
+    write_fn: Optional[Callable[..., None]] = None,
+    batch_size: Optional[int] = None,
+    queue_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Stream one document's `pages` ((page_number, text) pairs) through
+    chunk -> embed -> index.
+
+    `chunker` turns pages into chunk dicts ({"text", "page", ...}, see
+    app.services.chunker.iter_chunks); their position fields are copied
+    into each chunk's metadata.
+
+    Chunk ids are f"{doc_key}:{i}" (1-based), so re-ingesting a document
+    overwrites its chunks instead of duplicating them.
+
+    Returns:
+        {"pages", "chars", "chunks_indexed", "stages": {...}, "rss_delta_mb", "elapsed_s"}
+    Raises:
+        StageError naming the stage that failed.
+    """
+    counters = {"pages": 0, "chars": 0}
+
+    def counted(source: Iterable[Tuple[int, str]]) -> Iterator[Tuple[int, str]]:
+        for page_no, text in source:
+            counters["pages"] = page_no
+            counters["chars"] += len(text or "")
+            yield page_no, text
+
+    def to_docs(page_items: Iterable[Tuple[int, str]]) -> Iterator[Dict[str, Any]]:
+        for i, ch in enumerate(chunker(page_items), start=1):
+            yield {
+                "id": f"{doc_key}:{i}",
+                "text": ch["text"],
+                "meta": dict(base_meta, chunk_index=i, **chunk_meta(ch)),
+            }
+
+    run = run_stages(
+        counted(pages), to_docs,
+        embed_fn=embed_fn, write_fn=write_fn, batch_size=batch_size, queue_size=queue_size,
+    )
+    run.pop("items")
+    return {"pages": counters["pages"], "chars": counters["chars"], **run}
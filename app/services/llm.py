@@ -2,8 +2,19 @@
 Multi-model LLM service using Ollama
 Supports: Mistral, LLaMA3, Phi-3
 """
-import ollama
-from typing import Optional, Dict, Any
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Union
+
+from app.core.config import settings
+from app.services import metrics
+from app.services.prompts import TASK_PREFIXES
+from app.services.tracing import add_span, span
+from app.services.scheduler import llm_scheduler, Overloaded, PRIORITY_INTERACTIVE, PRIORITY_BATCH
+
+if TYPE_CHECKING:  # the client library is imported on first use (startup time)
+    import ollama
 
 # Available models
 AVAILABLE_MODELS = {
@@ -12,15 +23,85 @@ AVAILABLE_MODELS = {
     "phi3": "phi3:latest"
 }
 
+_client: Optional[ollama.Client] = None
+
+_TOKENS = metrics.counter("llm_tokens_total", "Tokens processed by Ollama (kind=prompt|completion)")
+_LLM_STAGE = metrics.histogram("llm_stage_seconds", "Ollama load / prefill / decode time per request")
+_DECODE_TPS = metrics.histogram(
+    "llm_decode_tokens_per_second",
+    "Generation throughput per request",
+    buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 250),
+)
+
+def get_client() -> ollama.Client:
+    """Shared Ollama client for settings.ollama_host (real server or fake stand-in)"""
+    global _client
+    if _client is None:
+        import ollama
+
+        _client = ollama.Client(host=settings.ollama_host, timeout=settings.ollama_timeout_s)
+    return _client
+
 def get_available_models():
     """Return list of available models"""
     return list(AVAILABLE_MODELS.keys())
 
+def keep_alive_for(model_name: str) -> Union[str, int]:
+    """How long Ollama should keep this model loaded after a request (-1 = pinned)"""
+    if model_name in settings.ollama_pinned_models:
+        return -1
+    return settings.ollama_keep_alive
+
+def _ns_to_ms(value: Any) -> float:
+    return round((value or 0) / 1e6, 2)
+
+def extract_usage(response: Any) -> Dict[str, Any]:
+    """
+    Ollama's own accounting for one generate call.
+
+    prompt_eval_* covers prefill, eval_* covers decode (durations come in ns).
+    prompt_eval_count is small or missing when the prompt prefix was already
+    in the KV cache.
+    """
+    get = response.get if hasattr(response, "get") else lambda k, d=None: getattr(response, k, d)
+    prompt_tokens = get("prompt_eval_count") or 0
+    completion_tokens = get("eval_count") or 0
+    prefill_ms = _ns_to_ms(get("prompt_eval_duration"))
+    decode_ms = _ns_to_ms(get("eval_duration"))
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "load_ms": _ns_to_ms(get("load_duration")),
+        "prefill_ms": prefill_ms,
+        "decode_ms": decode_ms,
+        "total_ms": _ns_to_ms(get("total_duration")),
+        "prefill_tokens_per_sec": round(prompt_tokens / (prefill_ms / 1000), 2) if prefill_ms else None,
+        "decode_tokens_per_sec": round(completion_tokens / (decode_ms / 1000), 2) if decode_ms else None,
+    }
+
+def _record_usage(model_name: str, usage: Dict[str, Any]) -> None:
+    _TOKENS.inc(usage["prompt_tokens"], model=model_name, kind="prompt")
+    _TOKENS.inc(usage["completion_tokens"], model=model_name, kind="completion")
+    for stage in ("load", "prefill", "decode"):
+        _LLM_STAGE.observe(usage[f"{stage}_ms"] / 1000, model=model_name, stage=stage)
+    if usage["decode_tokens_per_sec"]:
+        _DECODE_TPS.observe(usage["decode_tokens_per_sec"], model=model_name)
+
+def _trace_usage(t_wait: float, queue_s: float, t_call: float, usage: Dict[str, Any]) -> None:
+    """Child spans for the scheduler wait and Ollama's own load / prefill / decode split."""
+    add_span("llm.queue", t_wait, queue_s)
+    t = t_call
+    for stage in ("load", "prefill", "decode"):
+        duration = usage[f"{stage}_ms"] / 1000
+        add_span(f"llm.{stage}", t, duration)
+        t += duration
+
 def generate_response(
     prompt: str,
     model_name: str = "mistral",
     max_tokens: int = 500,
-    temperature: float = 0.7
+    temperature: float = 0.7,
+    priority: int = PRIORITY_INTERACTIVE,
 ) -> Dict[str, Any]:
     """
     Generate response from specified LLM model
@@ -30,9 +111,14 @@ def generate_response(
         model_name: One of 'mistral', 'llama3', 'phi3'
         max_tokens: Maximum tokens to generate
         temperature: Sampling temperature
+        priority: Scheduler priority (see app.services.scheduler)
         
     Returns:
-        Dict with 'response', 'model', 'success', 'error'
+        Dict with 'response', 'model', 'success', 'error', 'queue_ms' and
+        'usage' (Ollama token counts and load/prefill/decode timings)
+
+    Raises:
+        Overloaded: when admission control sheds the request (429/503)
     """
     try:
         # Validate model
@@ -46,23 +132,38 @@ def generate_response(
         
         model_id = AVAILABLE_MODELS[model_name]
         
-        # Generate response
-        response = ollama.generate(
-            model=model_id,
-            prompt=prompt,
-            options={
-                "num_predict": max_tokens,
-                "temperature": temperature
-            }
-        )
+        # Generate response (waits for a free slot for this model)
+        with span("llm.generate", model=model_name) as sp:
+            t_wait = time.perf_counter()
+            with llm_scheduler.slot(model_name, priority=priority) as slot:
+                t_call = time.perf_counter()
+                response = get_client().generate(
+                    model=model_id,
+                    prompt=prompt,
+                    options={
+                        "num_predict": max_tokens,
+                        "temperature": temperature
+                    },
+                    keep_alive=keep_alive_for(model_name)
+                )
+
+            usage = extract_usage(response)
+            _record_usage(model_name, usage)
+            _trace_usage(t_wait, slot["queue_s"], t_call, usage)
+            sp.set(prompt_tokens=usage["prompt_tokens"], completion_tokens=usage["completion_tokens"])
         
         return {
             "success": True,
             "response": response['response'],
             "model": model_name,
-            "error": None
+            "error": None,
+            "queue_ms": round(slot["queue_s"] * 1000, 2),
+            "usage": usage
         }
         
+    except Overloaded:
+        # Let the API layer turn this into 429/503
+        raise
     except Exception as e:
         return {
             "success": False,
@@ -75,7 +176,8 @@ def generate_multi_model_responses(
     prompt: str,
     models: list = None,
     max_tokens: int = 500,
-    temperature: float = 0.7
+    temperature: float = 0.7,
+    priority: int = PRIORITY_INTERACTIVE,
 ) -> Dict[str, Any]:
     """
     Generate responses from multiple models simultaneously
@@ -85,6 +187,7 @@ def generate_multi_model_responses(
         models: List of model names (default: all available)
         max_tokens: Maximum tokens per model
         temperature: Sampling temperature
+        priority: Scheduler priority for every call
         
     Returns:
         Dict with responses from each model
@@ -99,7 +202,8 @@ def generate_multi_model_responses(
             prompt=prompt,
             model_name=model,
             max_tokens=max_tokens,
-            temperature=temperature
+            temperature=temperature,
+            priority=priority
         )
         results[model] = result
     
@@ -109,24 +213,76 @@ def generate_multi_model_responses(
         "responses": results
     }
 
+def warm_up_models(models: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Load models into Ollama memory and pre-fill the shared prompt prefixes.
+
+    Each task prefix is sent once with num_predict=1, so the model is resident
+    (for keep_alive / pinned) and the fixed instruction prefix is already in
+    its KV cache when the first real request arrives.
+
+    Returns:
+        Dict of model -> {"ok", "load_ms", "total_ms", "error"}
+    """
+    if models is None:
+        models = settings.ollama_warmup_models
+
+    report: Dict[str, Any] = {}
+    for model_name in models:
+        model_id = AVAILABLE_MODELS.get(model_name)
+        if model_id is None:
+            report[model_name] = {"ok": False, "error": "unknown model"}
+            continue
+
+        start = time.perf_counter()
+        load_ms = 0.0
+        try:
+            with llm_scheduler.slot(model_name, priority=PRIORITY_BATCH):
+                for prefix in TASK_PREFIXES.values():
+                    resp = get_client().generate(
+                        model=model_id,
+                        prompt=prefix,
+                        options={"num_predict": 1},
+                        keep_alive=keep_alive_for(model_name)
+                    )
+                    load_ms += (resp.get("load_duration") or 0) / 1e6
+            report[model_name] = {
+                "ok": True,
+                "load_ms": round(load_ms, 1),
+                "total_ms": round((time.perf_counter() - start) * 1000, 1),
+                "error": None
+            }
+        except Exception as e:
+            report[model_name] = {"ok": False, "error": str(e)}
+
+    return report
+
 def test_model_availability():
-    """Test which models are actually available in Ollama"""
+    """
+    Which models are installed in Ollama.
+
+    Reads the model list instead of generating: no model gets loaded (or
+    evicts a pinned one) and nothing competes with admitted requests for a
+    scheduler slot.
+    """
+    try:
+        listed = get_client().list().get("models", [])
+    except Exception as e:
+        return {
+            "available": [],
+            "unavailable": [{"model": name, "error": str(e)} for name in AVAILABLE_MODELS]
+        }
+
+    installed = {m.get("model") or m.get("name") for m in listed}
     available = []
     unavailable = []
-    
     for model_name, model_id in AVAILABLE_MODELS.items():
-        try:
-            # Try a minimal generation
-            ollama.generate(
-                model=model_id,
-                prompt="test",
-                options={"num_predict": 1}
-            )
+        if model_id in installed:
             available.append(model_name)
-        except Exception as e:
-            unavailable.append({"model": model_name, "error": str(e)})
-    
+        else:
+            unavailable.append({"model": model_name, "error": f"'{model_id}' is not pulled in Ollama"})
+
     return {
         "available": available,
         "unavailable": unavailable
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,170 @@
+# app/services/metadata_store.py
+"""
+Knowledge-base and evaluation records in the SQLite metadata store.
+
+Replaces knowledge_meta.json / evaluations.json, which were read, appended
+to and rewritten in full on every write (O(n) per ingest, and concurrent
+ingestion workers overwrote each other's entries). Appends are now single
+INSERTs in a transaction and listings are indexed, paginated queries.
+
+Provides:
+    - add_document(filename, path, pages, chunks, ...)  -> int (row id; replace=True drops older rows for path)
+    - list_documents(limit, offset)                     -> (rows, total)
+    - add_evaluation(item)                              -> int (row id)
+    - list_evaluations(limit, offset, model=None)       -> (rows, total)
+
+The old JSON files are imported once, the first time each table is used
+while still empty; they are left in place untouched.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.db import get_conn, transaction, utcnow
+
+log = logging.getLogger("app.services.metadata_store")
+
+ROOT = Path(__file__).resolve().parents[2]
+LEGACY_KB_FILE = ROOT / "knowledge_meta.json"
+LEGACY_EVAL_FILE = ROOT / "evaluations.json"
+
+_EVAL_FIELDS = ("question", "model", "provider", "answer", "accuracy", "relevance",
+                "completeness", "hallucination", "notes")
+
+_imported: set = set()
+_import_lock = threading.Lock()
+
+
+# ---------- legacy JSON import ----------
+
+def _load_legacy(path: Path) -> List[Dict[str, Any]]:
+    try:
+        rows = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return []
+    except Exception:
+        log.warning("Could not read legacy %s; skipping import", path.name, exc_info=True)
+        return []
+    return [r for r in rows if isinstance(r, dict)] if isinstance(rows, list) else []
+
+
+def _legacy_doc(row: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (
+        row.get("filename") or row.get("name") or "Unknown document",
+        row.get("path") or "",
+        "legacy",
+        row.get("content_hash"),
+        row.get("size_bytes") or row.get("bytes") or 0,
+        row.get("pages") or row.get("page_count") or row.get("num_pages") or 0,
+        row.get("chunks") or row.get("chunks_indexed") or row.get("num_chunks") or 0,
+        row.get("created_at") or row.get("added_at") or row.get("uploaded_at") or utcnow(),
+    )
+
+
+def _legacy_eval(row: Dict[str, Any]) -> Tuple[Any, ...]:
+    return tuple(_eval_value(k, row.get(k)) for k in _EVAL_FIELDS) + (row.get("created_at") or utcnow(),)
+
+
+def _ensure_imported(table: str) -> None:
+    if table in _imported:
+        return
+    with _import_lock:
+        if table in _imported:
+            return
+        with transaction() as conn:
+            # Checked inside BEGIN IMMEDIATE so two processes can't both import.
+            if conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None:
+                if table == "knowledge_docs":
+                    rows = [_legacy_doc(r) for r in _load_legacy(LEGACY_KB_FILE)]
+                    conn.executemany(
+                        "INSERT INTO knowledge_docs (filename, path, source, content_hash, size_bytes,"
+                        " pages, chunks, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                else:
+                    rows = [_legacy_eval(r) for r in _load_legacy(LEGACY_EVAL_FILE)
+                            if all(r.get(k) is not None for k in _EVAL_FIELDS[:-1])]
+                    conn.executemany(
+                        f"INSERT INTO evaluations ({', '.join(_EVAL_FIELDS)}, created_at)"
+                        f" VALUES ({', '.join('?' * (len(_EVAL_FIELDS) + 1))})", rows)
+                if rows:
+                    log.info("Imported %d legacy rows into %s", len(rows), table)
+        _imported.add(table)
+
+
+def _page(table: str, where: str, params: Tuple[Any, ...], limit: int, offset: int
+          ) -> Tuple[List[Dict[str, Any]], int]:
+    conn = get_conn()
+    total = conn.execute(f"SELECT COUNT(*) FROM {table}{where}", params).fetchone()[0]
+    rows = conn.execute(
+        f"SELECT * FROM {table}{where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+        params + (limit, offset),
+    ).fetchall()
+    return [dict(r) for r in rows], total
+
+
+# ---------- knowledge base ----------
+
+def add_document(
+    filename: str,
+    path: str,
+    pages: int,
+    chunks: int,
+    *,
+    size_bytes: int = 0,
+    content_hash: Optional[str] = None,
+    source: str = "upload",
+    replace: bool = False,
+) -> int:
+    """
+    Record one indexed document for the Knowledge Base Manager. With
+    replace=True, earlier rows for the same path are dropped (re-indexing).
+    """
+    _ensure_imported("knowledge_docs")
+    with transaction() as conn:
+        if replace:
+            conn.execute("DELETE FROM knowledge_docs WHERE path = ?", (path,))
+        cur = conn.execute(
+            "INSERT INTO knowledge_docs (filename, path, source, content_hash, size_bytes, pages,"
+            " chunks, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (filename, path, source, content_hash, size_bytes, pages, chunks, utcnow()),
+        )
+        return cur.lastrowid
+
+
+def list_documents(limit: int = 50, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+    """Newest first, plus the total row count."""
+    _ensure_imported("knowledge_docs")
+    return _page("knowledge_docs", "", (), limit, offset)
+
+
+# ---------- evaluations ----------
+
+def _eval_value(key: str, value: Any) -> Any:
+    return int(bool(value)) if key == "hallucination" else value
+
+
+def add_evaluation(item: Dict[str, Any]) -> int:
+    """Append one manual evaluation (EvaluationItem fields)."""
+    _ensure_imported("evaluations")
+    with transaction() as conn:
+        cur = conn.execute(
+            f"INSERT INTO evaluations ({', '.join(_EVAL_FIELDS)}, created_at)"
+            f" VALUES ({', '.join('?' * (len(_EVAL_FIELDS) + 1))})",
+            tuple(_eval_value(k, item.get(k)) for k in _EVAL_FIELDS) + (utcnow(),),
+        )
+        return cur.lastrowid
+
+
+def list_evaluations(limit: int = 50, offset: int = 0, model: Optional[str] = None
+                     ) -> Tuple[List[Dict[str, Any]], int]:
+    """Newest first, optionally for one model, plus the total matching count."""
+    _ensure_imported("evaluations")
+    where, params = (" WHERE model = ?", (model,)) if model else ("", ())
+    rows, total = _page("evaluations", where, params, limit, offset)
+    for r in rows:
+        r["hallucination"] = bool(r["hallucination"])
+    return rows, total
@@ -0,0 +1,328 @@
+# app/services/metrics.py
+"""
+Tiny in-process metrics registry.
+
+Provides:
+    - counter(name, help)    -> Counter
+    - gauge(name, help)      -> Gauge
+    - histogram(name, help)  -> Histogram
+    - collector(fn)          -> fn   (called before every scrape, e.g. to set size gauges)
+    - snapshot()             -> dict (JSON friendly, /v1/metrics)
+    - render_prometheus()    -> str  (text exposition format, /metrics)
+    - enabled() / set_enabled(flag)
+    - RAG_STAGE, CACHE_REQUESTS, INDEX_CHUNKS   (metrics recorded by several modules)
+
+Metrics are keyed by name and an optional set of string labels, e.g.
+
+    histogram("llm_queue_wait_seconds").observe(0.12, model="phi3")
+    with histogram("rag_stage_seconds").time(stage="bm25"):
+        ...
+
+With settings.metrics_enabled off, inc/set/observe return before touching
+any lock or dict and .time() hands back a shared no-op context manager, so
+instrumented code paths pay one attribute check.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.core.config import settings
+
+log = logging.getLogger("app.services.metrics")
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Latency buckets in seconds (upper bounds); +Inf is implicit.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+_LOCK = threading.Lock()
+_REGISTRY: Dict[str, "_Metric"] = {}
+_COLLECTORS: List[Callable[[], None]] = []
+
+
+class _State:
+    enabled = settings.metrics_enabled
+
+
+def enabled() -> bool:
+    return _State.enabled
+
+
+def set_enabled(flag: bool) -> None:
+    _State.enabled = bool(flag)
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str = "") -> None:
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+
+    def samples(self) -> List[Dict[str, Any]]:  # pragma: no cover - overridden
+        return []
+
+
+class Counter(_Metric):
+    """Monotonically increasing value."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str = "") -> None:
+        super().__init__(name, help)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if not _State.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{"labels": dict(k), "value": v} for k, v in self._values.items()]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down (queue depth, in-flight requests...)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str = "") -> None:
+        super().__init__(name, help)
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        if not _State.enabled:
+            return
+        with self._lock:
+            self._values[_label_key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if not _State.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{"labels": dict(k), "value": v} for k, v in self._values.items()]
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram (cumulative bucket counts, sum and count)."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str = "",
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts..., +Inf count], sum, count
+        self._counts: Dict[LabelKey, List[int]] = {}
+        self._sums: Dict[LabelKey, float] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        if not _State.enabled:
+            return
+        key = _label_key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = [0] * (len(self.buckets) + 1)
+                self._counts[key] = counts
+                self._sums[key] = 0.0
+            counts[idx] += 1
+            self._sums[key] += value
+
+    def time(self, **labels: Any) -> "_Timer | _NullTimer":
+        """Context manager observing the elapsed wall time of its block."""
+        if not _State.enabled:
+            return _NULL_TIMER
+        return _Timer(self, labels)
+
+    def samples(self) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        with self._lock:
+            for key, counts in self._counts.items():
+                cumulative: List[Tuple[str, int]] = []
+                running = 0
+                for bound, c in zip(self.buckets, counts):
+                    running += c
+                    cumulative.append((repr(bound), running))
+                running += counts[-1]
+                cumulative.append(("+Inf", running))
+                total = self._sums[key]
+                out.append(
+                    {
+                        "labels": dict(key),
+                        "count": running,
+                        "sum": total,
+                        "avg": (total / running) if running else 0.0,
+                        "buckets": cumulative,
+                    }
+                )
+        return out
+
+
+class _Timer:
+    __slots__ = ("_hist", "_labels", "_t0")
+
+    def __init__(self, hist: Histogram, labels: Dict[str, Any]) -> None:
+        self._hist = hist
+        self._labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._hist.observe(time.perf_counter() - self._t0, **self._labels)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def _get_or_create(cls, name: str, help: str, **kwargs: Any):
+    with _LOCK:
+        metric = _REGISTRY.get(name)
+        if metric is None:
+            metric = cls(name, help, **kwargs)
+            _REGISTRY[name] = metric
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metric '{name}' already registered as {metric.kind}")
+        return metric
+
+
+def counter(name: str, help: str = "") -> Counter:
+    return _get_or_create(Counter, name, help)
+
+
+def gauge(name: str, help: str = "") -> Gauge:
+    return _get_or_create(Gauge, name, help)
+
+
+def histogram(
+    name: str,
+    help: str = "",
+    buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+) -> Histogram:
+    return _get_or_create(Histogram, name, help, buckets=buckets)
+
+
+def collector(fn: Callable[[], None]) -> Callable[[], None]:
+    """
+    Register `fn` to run before each snapshot/scrape. For values that are
+    cheap to read but not worth updating on every change (index sizes).
+    Usable as a decorator.
+    """
+    with _LOCK:
+        _COLLECTORS.append(fn)
+    return fn
+
+
+# ---------- shared metrics ----------
+# Declared once here so every module that records them agrees on the help text.
+
+RAG_STAGE = histogram("rag_stage_seconds", "Retrieval-side stage time per request")
+CACHE_REQUESTS = counter("cache_requests_total", "Cache lookups by cache and result (hit|miss)")
+INDEX_CHUNKS = gauge("index_chunks", "Chunks held by each retrieval index (index=chroma|bm25)")
+
+
+def _collect() -> List["_Metric"]:
+    with _LOCK:
+        collectors = list(_COLLECTORS)
+        metrics = list(_REGISTRY.values())
+    if _State.enabled:
+        for fn in collectors:
+            try:
+                fn()
+            except Exception:
+                log.debug("Metrics collector %r failed", fn, exc_info=True)
+    return metrics
+
+
+def snapshot() -> Dict[str, Any]:
+    """Return every registered metric as a JSON-friendly dict."""
+    metrics = _collect()
+    return {
+        m.name: {"type": m.kind, "help": m.help, "samples": m.samples()}
+        for m in metrics
+    }
+
+
+# ---------- Prometheus text format ----------
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _escape_help(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _fmt_labels(labels: Dict[str, str], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = list(labels.items()) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in items) + "}"
+
+
+def _fmt_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def render_prometheus() -> str:
+    """Every registered metric in the Prometheus text exposition format (0.0.4)."""
+    lines: List[str] = []
+    for m in sorted(_collect(), key=lambda m: m.name):
+        samples = m.samples()
+        if m.help:
+            lines.append(f"# HELP {m.name} {_escape_help(m.help)}")
+        lines.append(f"# TYPE {m.name} {m.kind}")
+        for s in samples:
+            labels = s["labels"]
+            if m.kind == "histogram":
+                for bound, count in s["buckets"]:
+                    lines.append(f"{m.name}_bucket{_fmt_labels(labels, (('le', bound),))} {count}")
+                lines.append(f"{m.name}_sum{_fmt_labels(labels)} {_fmt_value(s['sum'])}")
+                lines.append(f"{m.name}_count{_fmt_labels(labels)} {s['count']}")
+            else:
+                lines.append(f"{m.name}{_fmt_labels(labels)} {_fmt_value(s['value'])}")
+    return "\n".join(lines) + "\n"
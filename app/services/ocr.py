@@ -0,0 +1,229 @@
+# app/services/ocr.py
+"""
+OCR fallback for PDF pages without a text layer (scanned pages).
+
+Provides:
+    - ocr_available()                          -> bool
+    - with_ocr(pages, pdf_path, stats=None)    -> iterator of (page_number, text)
+    - summarize(stats)                         -> dict of OCR totals + per-page timings
+
+`with_ocr` wraps the (page_number, text) stream from
+extractor.iter_pdf_pages: pages that have text pass straight through, pages
+with less than settings.ocr_min_chars characters are rasterized (PyMuPDF)
+and OCR'd (pytesseract) on a process pool. Output order is preserved and
+only a bounded window of pages is in flight.
+
+Results are cached in the `ocr_cache` table keyed by a hash of the rendered
+page pixels + language, so re-ingesting the same scan skips Tesseract.
+
+Per-page timings (render_ms, ocr_ms, cached) are appended to `stats` when a
+list is passed, and recorded in the ocr_page_seconds histogram.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from app.core.config import settings
+from app.services import metrics
+
+log = logging.getLogger("app.services.ocr")
+
+# Imported by _import_deps() on first use rather than with the app:
+# pytesseract alone drags in pandas when it is installed.
+fitz: Any = None  # PyMuPDF
+pytesseract: Any = None
+
+_OCR_SECONDS = metrics.histogram("ocr_page_seconds", "Rasterize + OCR time per scanned page")
+_OCR_PAGES = metrics.counter("ocr_pages_total", "Pages sent to OCR (cached=true|false)")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_problem: Optional[str] = None
+_checked = False
+
+
+def ocr_available() -> bool:
+    """True when OCR is enabled and both PyMuPDF and pytesseract + tesseract are usable."""
+    global _problem, _checked
+    if not settings.enable_ocr:
+        return False
+    if _checked:
+        return _problem is None
+    _import_deps()
+    problem = None
+    if fitz is None:
+        problem = "PyMuPDF not installed"
+    elif pytesseract is None:
+        problem = "pytesseract not installed"
+    else:
+        _configure_tesseract()
+        try:
+            pytesseract.get_tesseract_version()
+        except Exception as e:
+            problem = f"tesseract binary not found ({e})"
+    if problem:
+        log.warning("OCR disabled: %s", problem)
+    _problem, _checked = problem, True
+    return problem is None
+
+
+def _import_deps() -> None:
+    global fitz, pytesseract
+    if fitz is None:
+        try:
+            import fitz
+        except ImportError:  # pragma: no cover
+            pass
+    if pytesseract is None:
+        try:
+            import pytesseract
+        except ImportError:  # pragma: no cover
+            pass
+
+
+def _configure_tesseract() -> None:
+    if settings.tesseract_cmd and os.path.exists(settings.tesseract_cmd):
+        pytesseract.pytesseract.tesseract_cmd = settings.tesseract_cmd
+
+
+def _init_worker() -> None:
+    # One page per process; stop Tesseract's OpenMP from oversubscribing cores.
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    _import_deps()
+    _configure_tesseract()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.ocr_workers or os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return _pool
+
+
+# ---------- cache ----------
+
+def _cache_get(key: str) -> Optional[str]:
+    from app.core.db import get_conn
+    row = get_conn().execute("SELECT text FROM ocr_cache WHERE image_hash = ?", (key,)).fetchone()
+    return row["text"] if row else None
+
+
+def _cache_put(key: str, text: str, ocr_ms: float) -> None:
+    from app.core.db import get_conn, utcnow
+    get_conn().execute(
+        "INSERT OR REPLACE INTO ocr_cache (image_hash, text, ocr_ms, created_at) VALUES (?, ?, ?, ?)",
+        (key, text, ocr_ms, utcnow()),
+    )
+
+
+# ---------- worker ----------
+
+def _ocr_page(path: str, page_no: int, dpi: int, lang: str, use_cache: bool) -> Dict[str, Any]:
+    """Worker task: render one page, look it up in the cache, OCR on a miss."""
+    t0 = time.perf_counter()
+    with fitz.open(path) as doc:
+        pix = doc[page_no - 1].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    key = hashlib.sha256(pix.samples + f"|{pix.width}x{pix.height}|{lang}".encode()).hexdigest()
+    render_ms = (time.perf_counter() - t0) * 1000
+
+    text = _cache_get(key) if use_cache else None
+    cached = text is not None
+    ocr_ms = 0.0
+    if not cached:
+        t1 = time.perf_counter()
+        from PIL import Image
+        image = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+        text = pytesseract.image_to_string(image, lang=lang).strip()
+        ocr_ms = (time.perf_counter() - t1) * 1000
+        if use_cache:
+            _cache_put(key, text, ocr_ms)
+
+    return {
+        "page": page_no,
+        "text": text,
+        "cached": cached,
+        "render_ms": round(render_ms, 1),
+        "ocr_ms": round(ocr_ms, 1),
+        "chars": len(text),
+    }
+
+
+# ---------- public API ----------
+
+def with_ocr(
+    pages: Iterable[Tuple[int, str]],
+    pdf_path: Union[str, os.PathLike],
+    stats: Optional[List[Dict[str, Any]]] = None,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Pass text pages through; OCR pages with no text layer in parallel.
+
+    Falls back to plain pass-through (with one warning) when OCR is disabled
+    or its dependencies are missing.
+    """
+    if not ocr_available():
+        yield from pages
+        return
+
+    path = str(pdf_path)
+    pool = _get_pool()
+    window = max(2, 2 * (settings.ocr_workers or os.cpu_count() or 1))
+    max_buffered = 8 * window  # text pages waiting behind a slow OCR page
+    pending: Deque[Tuple[int, Union[str, Future], float]] = deque()
+
+    def drain(block_until: int) -> Iterator[Tuple[int, str]]:
+        # Yield finished pages from the head; block while more than
+        # `block_until` OCR tasks are outstanding.
+        while pending:
+            page_no, item, submitted = pending[0]
+            if isinstance(item, Future):
+                outstanding = sum(isinstance(p[1], Future) for p in pending)
+                if not item.done() and outstanding <= block_until and len(pending) <= max_buffered:
+                    return
+                res = item.result()
+                _OCR_SECONDS.observe(time.perf_counter() - submitted)
+                _OCR_PAGES.inc(cached=str(res["cached"]).lower())
+                if settings.ocr_cache:
+                    metrics.CACHE_REQUESTS.inc(cache="ocr", result="hit" if res["cached"] else "miss")
+                if stats is not None:
+                    stats.append({k: v for k, v in res.items() if k != "text"})
+                item = res["text"]
+            pending.popleft()
+            yield page_no, item
+
+    for page_no, text in pages:
+        if len((text or "").strip()) >= settings.ocr_min_chars:
+            pending.append((page_no, text, 0.0))
+        else:
+            fut = pool.submit(_ocr_page, path, page_no, settings.ocr_dpi, settings.ocr_lang, settings.ocr_cache)
+            pending.append((page_no, fut, time.perf_counter()))
+        yield from drain(window - 1)
+
+    yield from drain(-1)
+
+
+def summarize(stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Totals for a with_ocr stats list (for ingestion results)."""
+    ocr_ms = [s["ocr_ms"] for s in stats if not s["cached"]]
+    return {
+        "pages": len(stats),
+        "cached": sum(1 for s in stats if s["cached"]),
+        "render_ms": round(sum(s["render_ms"] for s in stats), 1),
+        "ocr_ms": round(sum(ocr_ms), 1),
+        "avg_ocr_ms": round(sum(ocr_ms) / len(ocr_ms), 1) if ocr_ms else None,
+        "per_page": stats,
+    }
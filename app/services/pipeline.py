@@ -13,6 +13,8 @@ from __future__ import annotations
 
 from typing import List, Dict, Any
 
+from app.services import metrics
+from app.services.tracing import span, traced
 from app.services.vectorstore import semantic_query
 from app.services.bm25_index import query as bm25_query
 
@@ -51,6 +53,7 @@ def _hybrid_merge(
     return merged[:top_k]
 
 
+@traced("retrieval.vs_query")
 def vs_query(query: str, top_k: int = 6, mode: str = "hybrid") -> List[Dict[str, Any]]:
     """
     Perform vectorstore retrieval.
@@ -60,10 +63,12 @@ def vs_query(query: str, top_k: int = 6, mode: str = "hybrid") -> List[Dict[str,
     mode = mode.lower()
 
     # --- 1) Semantic search ---
-    semantic_results = semantic_query(query, top_k=top_k)
+    with span("retrieval.semantic"):
+        semantic_results = semantic_query(query, top_k=top_k)
 
     # --- 2) Keyword/BM25 search ---
-    keyword_results = bm25_query(query, top_k=top_k)
+    with span("retrieval.bm25"), metrics.RAG_STAGE.time(stage="bm25"):
+        keyword_results = bm25_query(query, top_k=top_k)
 
     # --- 3) Mode selection ---
     if mode == "semantic":
@@ -73,4 +78,5 @@ def vs_query(query: str, top_k: int = 6, mode: str = "hybrid") -> List[Dict[str,
         return keyword_results
 
     # --- 4) Hybrid merge ---
-    return _hybrid_merge(semantic_results, keyword_results, top_k)
+    with span("retrieval.fusion"), metrics.RAG_STAGE.time(stage="fusion"):
+        return _hybrid_merge(semantic_results, keyword_results, top_k)
@@ -0,0 +1,227 @@
+# app/services/profiler.py
+"""
+On-demand CPU profiling inside the API process.
+
+Provides:
+    - SamplingProfiler(interval_s)     start() / stop() -> collapsed stacks
+    - profile_for(seconds, interval_ms) -> str   (collapsed / "folded" stacks)
+    - instrument_routes(app)           let requests opt into a cProfile run
+    - cprofile_request()               context manager used by ProfilingMiddleware
+    - new_id() / save(id, ...) / get(id) / recent()   recent per-request profiles
+    - ProfilerBusy
+
+The sampling profiler is a background thread that reads
+sys._current_frames() every `interval` and counts each thread's stack.
+Nothing is hooked into the interpreter, so the cost is that thread waking
+up (~1-2% at 5 ms) and only while a profile is running. Output is
+Brendan Gregg's collapsed format, one "frame;frame;frame count" line per
+stack, readable by flamegraph.pl, speedscope and inferno. Threads parked
+in a wait (idle pool workers, the event loop's selector) are left out.
+
+cProfile only sees the thread that enables it, and sync endpoints run on
+FastAPI's threadpool. instrument_routes() therefore wraps every endpoint
+so the profiler is enabled on the thread that actually runs it, but only
+for requests that asked for it (a contextvar set by the middleware).
+"""
+
+from __future__ import annotations
+
+import cProfile
+import functools
+import inspect
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+
+# Leaf frames that mean "this thread is waiting, not using CPU".
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("base_events.py", "_run_once"),
+    ("profiler.py", "profile_for"),     # the thread sleeping while it samples
+}
+
+_MAX_STORED = 20
+_stored: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_stored_lock = threading.Lock()
+_active_lock = threading.Lock()
+
+_cprofile_holder: ContextVar[Optional[Dict[str, Any]]] = ContextVar("edurag_cprofile", default=None)
+
+
+class ProfilerBusy(RuntimeError):
+    """Another sampling profile is already running."""
+
+
+# ---------- sampling profiler ----------
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    def __init__(self, interval_s: Optional[float] = None, skip_idle: bool = True) -> None:
+        self.interval_s = interval_s or settings.profile_interval_ms / 1000
+        self.skip_idle = skip_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval_s):
+            names.update((t.ident, t.name) for t in threading.enumerate())
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                code = frame.f_code
+                if self.skip_idle and (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> str:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.collapsed()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+@contextmanager
+def sampling(interval_s: Optional[float] = None) -> Iterator[SamplingProfiler]:
+    """Run one sampling profile around a block; raises ProfilerBusy if one is running."""
+    if not _active_lock.acquire(blocking=False):
+        raise ProfilerBusy("a sampling profile is already running")
+    prof = SamplingProfiler(interval_s)
+    try:
+        prof.start()
+        yield prof
+    finally:
+        prof.stop()
+        _active_lock.release()
+
+
+def profile_for(seconds: float, interval_ms: Optional[float] = None) -> str:
+    """Sample every thread for `seconds` and return collapsed stacks."""
+    seconds = min(seconds, settings.profile_max_seconds)
+    with sampling(interval_ms / 1000 if interval_ms else None) as prof:
+        time.sleep(seconds)
+    return prof.collapsed()
+
+
+# ---------- per-request cProfile ----------
+
+def _wrap_endpoint(fn: Callable[..., Any]) -> Callable[..., Any]:
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_inner(*args: Any, **kwargs: Any) -> Any:
+            holder = _cprofile_holder.get()
+            if holder is None:
+                return await fn(*args, **kwargs)
+            prof = holder.setdefault("profile", cProfile.Profile())
+            prof.enable()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                prof.disable()
+        return async_inner
+
+    @functools.wraps(fn)
+    def inner(*args: Any, **kwargs: Any) -> Any:
+        holder = _cprofile_holder.get()
+        if holder is None:
+            return fn(*args, **kwargs)
+        prof = holder.setdefault("profile", cProfile.Profile())
+        prof.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            prof.disable()
+    return inner
+
+
+def instrument_routes(app: Any) -> int:
+    """Wrap every API route's endpoint for per-request cProfile; returns how many."""
+    from fastapi.routing import APIRoute
+
+    n = 0
+    for route in app.routes:
+        if isinstance(route, APIRoute) and not getattr(route.dependant.call, "_profiled", False):
+            # The request handler reads dependant.call on every request.
+            route.dependant.call = _wrap_endpoint(route.dependant.call)
+            route.dependant.call._profiled = True
+            n += 1
+    return n
+
+
+@contextmanager
+def cprofile_request() -> Iterator[Dict[str, Any]]:
+    """Profile the endpoint of the request running inside this block (see instrument_routes)."""
+    holder: Dict[str, Any] = {}
+    token = _cprofile_holder.set(holder)
+    try:
+        yield holder
+    finally:
+        _cprofile_holder.reset(token)
+
+
+def cprofile_summary(holder: Dict[str, Any], limit: int = 40) -> str:
+    prof = holder.get("profile")
+    if prof is None:
+        return "no profiled endpoint ran in this request\n"
+    out = io.StringIO()
+    pstats.Stats(prof, stream=out).strip_dirs().sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+# ---------- stored per-request results ----------
+
+def new_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def save(profile_id: str, kind: str, text: str, **meta: Any) -> None:
+    """Keep a per-request profile (the last few are retained) for GET /v1/admin/profiles/{id}."""
+    with _stored_lock:
+        _stored[profile_id] = {"id": profile_id, "kind": kind, "text": text, "created": time.time(), **meta}
+        while len(_stored) > _MAX_STORED:
+            _stored.popitem(last=False)
+
+
+def get(profile_id: str) -> Optional[Dict[str, Any]]:
+    with _stored_lock:
+        return _stored.get(profile_id)
+
+
+def recent() -> List[Dict[str, Any]]:
+    with _stored_lock:
+        return [{k: v for k, v in p.items() if k != "text"} for p in reversed(_stored.values())]
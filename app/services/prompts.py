@@ -0,0 +1,101 @@
+# app/services/prompts.py
+"""
+All LLM prompt templates in one place.
+
+Every template starts with the same SHARED_PREFIX, followed by fixed
+per-task instructions; the variable parts (retrieved context, question,
+counts) always come LAST. Requests for the same task therefore share a
+long identical prefix, which lets Ollama reuse its KV cache for it instead
+of re-running prefill on every call.
+
+Exports:
+    - SHARED_PREFIX
+    - format_context(chunks, style="numbered") -> str
+    - rag_prompt(question, context)            -> str
+    - summary_prompt(context)                  -> str
+    - quiz_prompt(context, num_questions)      -> str
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+SHARED_PREFIX = (
+    "You are ScholarStream, a study assistant for course material. "
+    "Use ONLY the information in the CONTEXT section below. "
+    "If the context does not contain the answer, say so plainly instead of guessing.\n\n"
+)
+
+_RAG_INSTRUCTIONS = (
+    "TASK: Answer the question accurately and concisely, based solely on the context. "
+    "Refer to passages by their number, e.g. [1], when it helps.\n\n"
+)
+
+_SUMMARY_INSTRUCTIONS = (
+    "TASK: Summarize the main ideas of the context in 3-4 clear, concise sentences.\n\n"
+)
+
+_QUIZ_INSTRUCTIONS = (
+    "TASK: Write multiple choice quiz questions about the context. "
+    "Each question has exactly 4 options and one correct answer. "
+    "Reply with JSON only, in this format:\n"
+    "{\n"
+    '  "questions": [\n'
+    "    {\n"
+    '      "question": "Your question here?",\n'
+    '      "options": ["A", "B", "C", "D"],\n'
+    '      "answer": "A",\n'
+    '      "explanation": "Why A is correct"\n'
+    "    }\n"
+    "  ]\n"
+    "}\n\n"
+)
+
+
+def format_context(chunks: List[Dict[str, Any]], style: str = "numbered") -> str:
+    """Render chunk texts as "[1] ..." (numbered) or "Section 1:\\n..." (sections)."""
+    parts: List[str] = []
+    for i, chunk in enumerate(chunks, 1):
+        text = chunk.get("text", "") if isinstance(chunk, dict) else getattr(chunk, "text", "")
+        if not text:
+            continue
+        if style == "sections":
+            parts.append(f"Section {i}:\n{text}")
+        else:
+            parts.append(f"[{i}] {text}")
+    return "\n\n".join(parts)
+
+
+def rag_prompt(question: str, context: str) -> str:
+    return (
+        SHARED_PREFIX
+        + _RAG_INSTRUCTIONS
+        + f"CONTEXT:\n{context}\n\n"
+        + f"QUESTION: {question}\n\nANSWER:"
+    )
+
+
+def summary_prompt(context: str) -> str:
+    return (
+        SHARED_PREFIX
+        + _SUMMARY_INSTRUCTIONS
+        + f"CONTEXT:\n{context}\n\nSUMMARY:"
+    )
+
+
+def quiz_prompt(context: str, num_questions: int) -> str:
+    return (
+        SHARED_PREFIX
+        + _QUIZ_INSTRUCTIONS
+        + f"CONTEXT:\n{context}\n\n"
+        + f"Generate {num_questions} questions now. JSON:"
+    )
+
+
+# Fixed prefixes per task (no variable parts) - used to pre-fill the KV cache
+# during warm-up.
+TASK_PREFIXES = {
+    "rag": SHARED_PREFIX + _RAG_INSTRUCTIONS,
+    "summary": SHARED_PREFIX + _SUMMARY_INSTRUCTIONS,
+    "quiz": SHARED_PREFIX + _QUIZ_INSTRUCTIONS,
+}
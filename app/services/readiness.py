@@ -0,0 +1,253 @@
+# app/services/readiness.py
+"""
+Startup warm-up and readiness (liveness is separate).
+
+Provides:
+    - start_warmup()  -> None   (startup hook; warm-up + refresh threads)
+    - stop()          -> None   (shutdown hook)
+    - status()        -> dict   (GET /v1/ready and the detailed health check; never blocks)
+    - is_ready()      -> bool
+
+The process is *live* as soon as it serves HTTP: GET /v1/health never touches
+a model or Ollama. It is *ready* once the warm-up thread has done everything
+the first query would otherwise pay for:
+
+    - vectorstore   embedding model + Chroma collection          (required)
+    - bm25          BM25 index loaded from disk                  (required)
+    - query         one dummy hybrid query: embeds, searches both
+                    indexes, builds the BM25 IDF table            (required)
+    - tokenizers    embedding tokenizer for chunk sizes and      (best effort:
+                    LLM_TOKENIZERS for exact prompt budgets       falls back to
+                                                                  estimates)
+    - llm           OLLAMA_WARMUP_MODELS loaded into Ollama       (best effort:
+                    a down Ollama only fails LLM calls)
+
+Two settings switch the steps on, independently:
+    WARMUP_ON_STARTUP          retrieval: vectorstore, bm25, query, tokenizers
+    OLLAMA_WARMUP_ON_STARTUP   llm (and only when OLLAMA_WARMUP_MODELS is set)
+
+Each component is pending -> ok | failed | skipped, with its load time and
+error. A skipped component counts as ready; it loads on first use instead.
+
+A second thread refreshes the cached dependency view every READY_REFRESH_S:
+whether Ollama answers (short-timeout client, separate from the one serving
+requests), how many chunks each index holds, and a retry of any required
+component that failed. Probes only ever read that cache.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.db import utcnow
+from app.services import metrics
+
+log = logging.getLogger("app.services.readiness")
+
+PENDING = "pending"
+OK = "ok"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+_READY = metrics.gauge("app_ready", "1 once the startup warm-up has loaded every required component")
+_WARMUP_SECONDS = metrics.gauge("warmup_seconds", "Startup warm-up time per component")
+_DEPENDENCY_UP = metrics.gauge("dependency_up", "1 when the last background check of a dependency passed")
+
+Step = Tuple[str, Callable[[], Dict[str, Any]], bool, bool]
+
+_lock = threading.Lock()
+_components: Dict[str, Dict[str, Any]] = {}
+_required: Dict[str, bool] = {}
+_dependencies: Dict[str, Any] = {}
+_threads: List[threading.Thread] = []
+_stop = threading.Event()
+_started_at = time.monotonic()
+_check_client = None
+
+
+# ---------- warm-up steps ----------
+
+def _load_vectorstore() -> Dict[str, Any]:
+    from app.services.vectorstore import get_vectorstore
+
+    return {"chunks": get_vectorstore()._collection.count()}
+
+
+def _load_bm25() -> Dict[str, Any]:
+    from app.services import bm25_index
+
+    return {"chunks": bm25_index.ensure_loaded()}
+
+
+def _dummy_query() -> Dict[str, Any]:
+    from app.services.pipeline import vs_query
+
+    return {"results": len(vs_query("warm-up query", top_k=1, mode="hybrid"))}
+
+
+def _load_tokenizers() -> Dict[str, Any]:
+    from app.services.chunker import embedding_tokenizer
+    from app.services.token_counter import preload
+
+    embedding = embedding_tokenizer() is not None
+    loaded = preload()
+    if not embedding:
+        raise RuntimeError("embedding tokenizer could not be loaded; chunk sizes are estimated")
+    if loaded and not any(loaded.values()):
+        raise RuntimeError("no LLM tokenizer could be loaded; prompt tokens are estimated")
+    return {"exact": sorted(m for m, ok in loaded.items() if ok)}
+
+
+def _load_llms() -> Dict[str, Any]:
+    from app.services.llm import warm_up_models
+
+    report = warm_up_models()
+    if report and not any(r["ok"] for r in report.values()):
+        raise RuntimeError("; ".join(f"{m}: {r['error']}" for m, r in report.items()))
+    return {"models": report}
+
+
+def _steps() -> List[Step]:
+    """(name, loader, required, enabled) in load order."""
+    retrieval = settings.warmup_on_startup
+    return [
+        ("vectorstore", _load_vectorstore, True, retrieval),
+        ("bm25", _load_bm25, True, retrieval),
+        ("query", _dummy_query, True, retrieval),
+        ("tokenizers", _load_tokenizers, False, retrieval),
+        ("llm", _load_llms, False, settings.ollama_warmup_on_startup and bool(settings.ollama_warmup_models)),
+    ]
+
+
+def _set(name: str, **fields: Any) -> None:
+    with _lock:
+        _components[name].update(fields)
+
+
+def _run(steps: List[Step]) -> None:
+    for name, load, _, enabled in steps:
+        if not enabled or _stop.is_set():
+            continue
+        t0 = time.perf_counter()
+        try:
+            detail = load()
+        except Exception as e:
+            elapsed = time.perf_counter() - t0
+            log.exception("Warm-up of %s failed after %.1fs", name, elapsed)
+            _set(name, status=FAILED, seconds=round(elapsed, 2), error=f"{type(e).__name__}: {e}")
+        else:
+            elapsed = time.perf_counter() - t0
+            log.info("Warm-up of %s done in %.1fs", name, elapsed)
+            _set(name, status=OK, seconds=round(elapsed, 2), error=None, **detail)
+        _WARMUP_SECONDS.set(elapsed, component=name)
+        _READY.set(1 if is_ready() else 0)
+
+
+# ---------- background refresh ----------
+
+def _check_ollama() -> Dict[str, Any]:
+    global _check_client
+    try:
+        if _check_client is None:
+            import ollama
+
+            _check_client = ollama.Client(host=settings.ollama_host, timeout=settings.ready_check_timeout_s)
+        models = _check_client.list().get("models", [])
+        return {"status": "connected", "models_available": len(models), "error": None}
+    except Exception as e:
+        return {"status": "disconnected", "models_available": 0, "error": f"{type(e).__name__}: {e}"}
+
+
+def _index_sizes() -> Dict[str, Optional[int]]:
+    # Only indexes that are already open: a check must never be what loads them.
+    from app.services import bm25_index, vectorstore
+
+    store = vectorstore._vectorstore
+    return {
+        "chroma": store._collection.count() if store is not None else None,
+        "bm25": len(bm25_index._DOCS) if bm25_index._LOADED else None,
+    }
+
+
+def refresh() -> Dict[str, Any]:
+    """Re-check dependencies now and update the cache (the refresh thread calls this)."""
+    t0 = time.perf_counter()
+    ollama_state = _check_ollama()
+    try:
+        indexes: Dict[str, Any] = _index_sizes()
+    except Exception as e:
+        indexes = {"error": f"{type(e).__name__}: {e}"}
+    checked = {
+        "ollama": ollama_state,
+        "indexes": indexes,
+        "checked_at": utcnow(),
+        "check_ms": round((time.perf_counter() - t0) * 1000, 1),
+    }
+    _DEPENDENCY_UP.set(1 if ollama_state["status"] == "connected" else 0, dependency="ollama")
+    with _lock:
+        _dependencies.clear()
+        _dependencies.update(checked)
+    return checked
+
+
+def _refresh_loop(steps: List[Step]) -> None:
+    while True:
+        refresh()
+        if _stop.wait(max(1.0, settings.ready_refresh_s)):
+            return
+        # The warm-up thread has moved past a failed step, so a retry here
+        # can't overlap it (and needn't wait for a slow LLM preload).
+        with _lock:
+            failed = [s for s in steps if _required[s[0]] and _components[s[0]]["status"] == FAILED]
+        if failed:
+            log.info("Retrying failed warm-up steps: %s", ", ".join(s[0] for s in failed))
+            _run(failed)
+
+
+# ---------- public API ----------
+
+def start_warmup() -> None:
+    """Register the components and start the warm-up and refresh threads (once per process)."""
+    steps = _steps()
+    with _lock:
+        if _threads:
+            return
+        for name, _, required, enabled in steps:
+            _components[name] = {"status": PENDING if enabled else SKIPPED, "seconds": None, "error": None}
+            _required[name] = required
+        warmup = threading.Thread(target=_run, args=(steps,), name="warmup", daemon=True)
+        refresher = threading.Thread(target=_refresh_loop, args=(steps,), name="ready-refresh", daemon=True)
+        _threads.extend([warmup, refresher])
+    _READY.set(1 if is_ready() else 0)
+    warmup.start()
+    refresher.start()
+
+
+def stop() -> None:
+    """Stop the refresh loop and skip any warm-up steps not started yet."""
+    _stop.set()
+
+
+def is_ready() -> bool:
+    """True once warm-up has started and every required component is ok (or skipped)."""
+    with _lock:
+        if not _threads:
+            return False
+        return all(c["status"] in (OK, SKIPPED) for name, c in _components.items() if _required[name])
+
+
+def status() -> Dict[str, Any]:
+    """The cached view; reads memory only, so probes stay fast whatever Ollama is doing."""
+    with _lock:
+        components = {name: dict(c, required=_required[name]) for name, c in _components.items()}
+        dependencies = dict(_dependencies)
+    return {
+        "ready": is_ready(),
+        "uptime_s": round(time.monotonic() - _started_at, 1),
+        "components": components,
+        "dependencies": dependencies,
+    }
@@ -0,0 +1,249 @@
+# app/services/scheduler.py
+"""
+Admission control in front of Ollama.
+
+Every LLM call goes through a per-model slot pool:
+    - at most `limit` generations run at once for a given model
+    - extra callers wait in a bounded priority queue
+      (lower number = served first, FIFO within a priority)
+    - callers are shed immediately when the queue is full (429) or when the
+      estimated wait already exceeds their deadline, and after the deadline
+      expires while queued (503)
+
+Usage:
+    with llm_scheduler.slot("phi3", priority=PRIORITY_BATCH):
+        ollama.generate(...)
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.services import metrics
+
+# Priorities: interactive Q&A first, bulk jobs (benchmarks, quizzes) last.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 5
+PRIORITY_BATCH = 10
+
+_QUEUE_DEPTH = metrics.gauge("llm_queue_depth", "Requests waiting for an LLM slot")
+_IN_FLIGHT = metrics.gauge("llm_in_flight", "LLM generations currently running")
+_QUEUE_WAIT = metrics.histogram(
+    "llm_queue_wait_seconds", "Time spent waiting for an LLM slot"
+)
+_REJECTED = metrics.counter("llm_rejected_total", "LLM requests shed by admission control")
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted; carries the HTTP status to return."""
+
+    status_code = 503
+
+    def __init__(self, model: str, reason: str, retry_after: float = 1.0) -> None:
+        super().__init__(f"Model '{model}' is overloaded: {reason}")
+        self.model = model
+        self.reason = reason
+        self.retry_after = max(1.0, retry_after)
+
+
+class QueueFull(Overloaded):
+    status_code = 429
+
+
+class QueueTimeout(Overloaded):
+    status_code = 503
+
+
+class _Waiter:
+    __slots__ = ("priority", "event", "granted", "cancelled")
+
+    def __init__(self, priority: int) -> None:
+        self.priority = priority
+        self.event = threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+
+class _ModelPool:
+    """Slot pool + priority wait queue for one model."""
+
+    def __init__(self, model: str, limit: int) -> None:
+        self.model = model
+        self.limit = max(1, limit)
+        self.active = 0
+        self.waiters: List[tuple] = []   # heap of (priority, seq, waiter)
+        self.avg_service_s = 0.0         # EWMA of generation time
+        self.admitted = 0
+
+    def queued(self) -> int:
+        return sum(1 for _, _, w in self.waiters if not w.cancelled)
+
+    def ahead_of(self, priority: int) -> int:
+        return sum(1 for p, _, w in self.waiters if p <= priority and not w.cancelled)
+
+
+class LLMScheduler:
+    """Per-model concurrency limits with a bounded priority queue."""
+
+    def __init__(
+        self,
+        default_limit: int = 1,
+        limits: Optional[Dict[str, int]] = None,
+        max_queue: int = 16,
+        timeouts: Optional[Dict[int, float]] = None,
+    ) -> None:
+        self.default_limit = default_limit
+        self.limits = dict(limits or {})
+        self.max_queue = max_queue
+        self.timeouts = dict(timeouts or {})
+        self._lock = threading.Lock()
+        self._pools: Dict[str, _ModelPool] = {}
+        self._seq = itertools.count()
+
+    # ---------- internals ----------
+
+    def _pool(self, model: str) -> _ModelPool:
+        pool = self._pools.get(model)
+        if pool is None:
+            pool = _ModelPool(model, self.limits.get(model, self.default_limit))
+            self._pools[model] = pool
+        return pool
+
+    def _timeout_for(self, priority: int) -> float:
+        if priority in self.timeouts:
+            return self.timeouts[priority]
+        # fall back to the closest configured priority below this one
+        lower = [p for p in self.timeouts if p <= priority]
+        return self.timeouts[max(lower)] if lower else 60.0
+
+    def _grant_next(self, pool: _ModelPool) -> None:
+        """Hand free slots to the best waiting callers. Caller holds the lock."""
+        while pool.waiters and pool.active < pool.limit:
+            _, _, waiter = heapq.heappop(pool.waiters)
+            if waiter.cancelled:
+                continue
+            waiter.granted = True
+            pool.active += 1
+            waiter.event.set()
+
+    def _publish(self, pool: _ModelPool) -> None:
+        _QUEUE_DEPTH.set(pool.queued(), model=pool.model)
+        _IN_FLIGHT.set(pool.active, model=pool.model)
+
+    # ---------- public API ----------
+
+    def acquire(self, model: str, priority: int = PRIORITY_NORMAL) -> float:
+        """
+        Block until a slot for `model` is free.
+
+        Returns the time spent waiting (seconds).
+        Raises QueueFull / QueueTimeout when the request is shed.
+        """
+        deadline_s = self._timeout_for(priority)
+        start = time.perf_counter()
+
+        with self._lock:
+            pool = self._pool(model)
+
+            if pool.active < pool.limit and not pool.queued():
+                pool.active += 1
+                pool.admitted += 1
+                self._publish(pool)
+                _QUEUE_WAIT.observe(0.0, model=model)
+                return 0.0
+
+            if pool.queued() >= self.max_queue:
+                _REJECTED.inc(model=model, reason="queue_full")
+                raise QueueFull(
+                    model,
+                    f"{pool.queued()} requests already queued",
+                    retry_after=pool.avg_service_s,
+                )
+
+            # Shed fast if we already know we won't make the deadline.
+            ahead = pool.ahead_of(priority)
+            est_wait = (ahead // pool.limit + 1) * pool.avg_service_s
+            if pool.avg_service_s and est_wait > deadline_s:
+                _REJECTED.inc(model=model, reason="deadline")
+                raise QueueTimeout(
+                    model,
+                    f"estimated wait {est_wait:.1f}s exceeds {deadline_s:.1f}s",
+                    retry_after=est_wait,
+                )
+
+            waiter = _Waiter(priority)
+            heapq.heappush(pool.waiters, (priority, next(self._seq), waiter))
+            self._publish(pool)
+
+        waiter.event.wait(deadline_s)
+
+        with self._lock:
+            waited = time.perf_counter() - start
+            if not waiter.granted:
+                waiter.cancelled = True
+                self._publish(pool)
+                _REJECTED.inc(model=model, reason="timeout")
+                raise QueueTimeout(
+                    model,
+                    f"no slot within {deadline_s:.1f}s",
+                    retry_after=pool.avg_service_s,
+                )
+            pool.admitted += 1
+            self._publish(pool)
+
+        _QUEUE_WAIT.observe(waited, model=model)
+        return waited
+
+    def release(self, model: str, service_s: Optional[float] = None) -> None:
+        """Free a slot and wake the next waiter."""
+        with self._lock:
+            pool = self._pool(model)
+            pool.active = max(0, pool.active - 1)
+            if service_s is not None:
+                pool.avg_service_s = (
+                    service_s if not pool.avg_service_s
+                    else 0.8 * pool.avg_service_s + 0.2 * service_s
+                )
+            self._grant_next(pool)
+            self._publish(pool)
+
+    @contextmanager
+    def slot(self, model: str, priority: int = PRIORITY_NORMAL) -> Iterator[Dict[str, float]]:
+        """Context manager wrapping acquire/release; yields {'queue_s': ...}."""
+        waited = self.acquire(model, priority)
+        info = {"queue_s": waited}
+        start = time.perf_counter()
+        try:
+            yield info
+        finally:
+            self.release(model, time.perf_counter() - start)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                model: {
+                    "limit": pool.limit,
+                    "active": pool.active,
+                    "queued": pool.queued(),
+                    "admitted": pool.admitted,
+                    "avg_service_s": round(pool.avg_service_s, 3),
+                }
+                for model, pool in self._pools.items()
+            }
+
+
+llm_scheduler = LLMScheduler(
+    default_limit=settings.llm_concurrency_per_model,
+    limits=settings.llm_concurrency_overrides,
+    max_queue=settings.llm_max_queue,
+    timeouts={
+        PRIORITY_INTERACTIVE: settings.llm_queue_timeout_s,
+        PRIORITY_BATCH: settings.llm_batch_queue_timeout_s,
+    },
+)
@@ -4,11 +4,11 @@ from __future__ import annotations
 import io
 import os
 import uuid
-import json
+import shutil
 import logging
-from datetime import datetime
+import tempfile
 from pathlib import Path
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, BinaryIO, List, Tuple, Optional
 
 try:
     # PyPDF2 is lightweight and already in most RAG stacks
@@ -17,7 +17,13 @@ except Exception as e:  # pragma: no cover
     PdfReader = None  # We'll raise a helpful error at runtime.
 
 # Local services
-from app.services.vectorstore import vs_add
+from app.services import bm25_index
+from app.services.ingest_pipeline import StageError, bm25_writer, run_pipeline
+from app.services.metadata_store import add_document
+from app.services.chunker import chunk_text, iter_chunks
+from app.services.extractor import iter_pdf_pages
+from app.services.ocr import ocr_available, summarize as summarize_ocr, with_ocr
+from app.utils.hashing import copy_and_hash
 
 log = logging.getLogger("app.services.storage")
 
@@ -25,10 +31,6 @@ log = logging.getLogger("app.services.storage")
 UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "uploaded_files")).resolve()
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
-# Where we store simple metadata about indexed PDFs
-ROOT = Path(__file__).resolve().parents[2]
-KB_FILE = ROOT / "knowledge_meta.json"
-
 
 # ---------- small utils ----------
 
@@ -38,14 +40,11 @@ def _read_pdf_text(pdf_path: Path) -> Tuple[str, int]:
         raise RuntimeError(
             "PyPDF2 is not installed. Please add 'PyPDF2' to requirements.txt and pip install."
         )
-    reader = PdfReader(str(pdf_path))
-    pages = len(reader.pages)
+    pages = 0
     parts: List[str] = []
-    for i in range(pages):
-        try:
-            txt = reader.pages[i].extract_text() or ""
-        except Exception:
-            txt = ""
+    # Pages arrive in order; large PDFs are extracted on a process pool.
+    for page_no, txt in iter_pdf_pages(pdf_path):
+        pages = page_no
         if txt.strip():
             parts.append(txt)
     text = "\n\n".join(parts).strip()
@@ -54,36 +53,55 @@ def _read_pdf_text(pdf_path: Path) -> Tuple[str, int]:
 
 def _chunk_text(
     text: str,
-    chunk_chars: int = 1400,
-    overlap: int = 200,
+    max_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None,
 ) -> List[str]:
-    """Simple, robust character-based chunker."""
-    text = (text or "").strip()
-    if not text:
-        return []
-
-    chunks: List[str] = []
-    start = 0
-    n = len(text)
-    while start < n:
-        end = min(start + chunk_chars, n)
-        # try to break on a nearby sentence boundary
-        window = text[start:end]
-        split_at = max(
-            window.rfind("\n\n"),
-            window.rfind(". "),
-            window.rfind("? "),
-            window.rfind("! "),
-        )
-        if split_at > 400:  # don't split too early
-            end = start + split_at + 1
+    """Kept for callers of the old helper; see app.services.chunker."""
+    return chunk_text(text, max_tokens, overlap_tokens)
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    """Hardlink when src and dst share a filesystem, else a kernel-side copy."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
 
-        chunks.append(text[start:end].strip())
-        if end >= n:
-            break
-        start = max(0, end - overlap)
 
-    return [c for c in chunks if c]
+def _drop_indexed(path: Path) -> None:
+    from app.services.vectorstore import delete_by_path
+
+    delete_by_path(str(path))
+    bm25_index.remove_doc(path.name)
+
+
+# ---------- uploads ----------
+
+def stream_upload(src: BinaryIO) -> Tuple[Path, str, int]:
+    """
+    Stream an upload into a temp file inside UPLOAD_DIR, hashing on the fly.
+
+    The temp file sits next to its final location, so commit_upload() is a
+    rename rather than a second copy. Returns (temp_path, sha256, size_bytes).
+    """
+    fd, tmp = tempfile.mkstemp(dir=UPLOAD_DIR, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            digest, size = copy_and_hash(src, out)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return Path(tmp), digest, size
+
+
+def commit_upload(tmp_path: Path, filename: str, content_hash: str) -> Path:
+    """Move a streamed upload to UPLOAD_DIR/<filename> (renamed on name clash)."""
+    name = Path(filename).name or f"{content_hash[:12]}.pdf"
+    target = UPLOAD_DIR / name
+    if target.exists():
+        target = UPLOAD_DIR / f"{target.stem}-{content_hash[:8]}{target.suffix}"
+    os.replace(tmp_path, target)
+    return target
 
 
 # ---------- main public API ----------
@@ -92,10 +110,12 @@ def save_and_index_pdf(
     file_path: str | Path,
     *,
     source: str = "upload",
+    content_hash: Optional[str] = None,
     collection: Optional[str] = None,  # ignored here; collection is configured in vectorstore
 ) -> Dict[str, Any]:
     """
     Save (already on disk) PDF, extract text, chunk, embed, and index in Chroma.
+    `content_hash` (the upload's sha256) is recorded with the knowledge-base entry.
 
     Returns:
         {
@@ -104,6 +124,8 @@ def save_and_index_pdf(
           "pages": int,
           "chunks_indexed": int,
           "collection_info": {...},   # when ok == true
+          "stages": {...},            # per-stage items / busy time / items_per_sec
+          "ocr": {...},               # only when scanned pages were OCR'd (per-page timings)
           "error": "..."              # when ok == false
         }
     """
@@ -118,99 +140,79 @@ def save_and_index_pdf(
         if target.exists() and not target.samefile(path):
             target = UPLOAD_DIR / f"{target.stem}-{uuid.uuid4().hex[:8]}{target.suffix}"
         if not target.exists():
-            target.write_bytes(path.read_bytes())
+            _link_or_copy(path, target)
         path = target
 
-    # Extract text
+    # Extract -> chunk -> embed -> index as overlapping, bounded stages, so
+    # memory stays flat for large PDFs and embedding overlaps extraction.
+    base_meta = {"source": source, "path": str(path), "filename": path.name}
+    # Pages without a text layer are OCR'd in parallel when OCR is enabled.
+    ocr_stats: List[Dict[str, Any]] = []
+    # Drop the previous version's chunks from both indexes: ids are
+    # name:1..N, so a shorter re-ingest would otherwise leave stale tails.
+    _drop_indexed(path)
     try:
-        text, pages = _read_pdf_text(path)
-    except Exception as e:
-        log.exception("PDF text extraction failed for %s", path)
+        run = run_pipeline(
+            with_ocr(iter_pdf_pages(path), path, stats=ocr_stats),
+            path.name,
+            base_meta,
+            chunker=iter_chunks,
+            write_fn=bm25_writer(path.name),
+        )
+    except StageError as e:
+        _drop_indexed(path)
+        if e.stage in ("extract", "chunk"):
+            log.exception("PDF text extraction failed for %s", path)
+            error = f"Text extraction failed: {e.__cause__}"
+        else:
+            log.exception("Indexing failed for %s", path)
+            error = f"Indexing failed: {e.__cause__}"
         return {
             "ok": False,
             "filename": path.name,
             "pages": 0,
             "chunks_indexed": 0,
-            "error": f"Text extraction failed: {e}",
+            "error": error,
         }
 
-    if not text:
+    pages = run["pages"]
+    if not run["chunks_indexed"]:
+        hint = "OCR found no text either." if ocr_available() else "Enable OCR if needed."
         return {
             "ok": False,
             "filename": path.name,
             "pages": pages,
             "chunks_indexed": 0,
-            "error": "No text extracted from PDF (it may be scanned images). Enable OCR if needed.",
-        }
-
-    # Chunk
-    chunks = _chunk_text(text, chunk_chars=1400, overlap=200)
-    if not chunks:
-        return {
-            "ok": False,
-            "filename": path.name,
-            "pages": pages,
-            "chunks_indexed": 0,
-            "error": "Could not create chunks from extracted text.",
-        }
-
-    # Prepare docs for the vectorstore
-    docs: List[Dict[str, Any]] = []
-    for i, ch in enumerate(chunks, start=1):
-        docs.append(
-            {
-                "id": f"{path.name}:{i}",
-                "text": ch,
-                "meta": {
-                    "source": source,
-                    "path": str(path),
-                    "filename": path.name,
-                    "chunk_index": i,
-                    "chunks_total": len(chunks),
-                    "pages": pages,
-                },
-            }
-        )
-
-    # Index in Chroma (vs_add should return: ids, info)
-    try:
-        ids, info = vs_add(docs)
-    except Exception as e:
-        log.exception("Indexing failed for %s", path)
-        return {
-            "ok": False,
-            "filename": path.name,
-            "pages": pages,
-            "chunks_indexed": 0,
-            "error": f"Indexing failed: {e}",
+            "error": f"No text extracted from PDF (it may be scanned images). {hint}",
         }
 
     result = {
         "ok": True,
         "filename": path.name,
         "pages": pages,
-        "chunks_indexed": len(ids),
-        "collection_info": info,
+        "chunks_indexed": run["chunks_indexed"],
+        "collection_info": {"total_chunks": run["chunks_indexed"], "collection_name": "default"},
+        "stages": run["stages"],
+        "rss_delta_mb": run["rss_delta_mb"],
     }
-    log.info("Indexed PDF '%s' -> %s chunks", path.name, len(ids))
+    if ocr_stats:
+        result["ocr"] = summarize_ocr(ocr_stats)
+        log.info("OCR'd %d pages of '%s' (%d cached, %.0f ms OCR)", len(ocr_stats), path.name,
+                 result["ocr"]["cached"], result["ocr"]["ocr_ms"])
+    log.info("Indexed PDF '%s' -> %s chunks in %.2fs", path.name, run["chunks_indexed"], run["elapsed_s"])
 
-    # Persist simple metadata for the Knowledge Base Manager (/v1/knowledge)
     try:
-        existing: List[Dict[str, Any]] = []
-        if KB_FILE.exists():
-            existing = json.loads(KB_FILE.read_text(encoding="utf-8"))
-        existing.append(
-            {
-                "filename": path.name,
-                "pages": pages,
-                "chunks_indexed": len(ids),
-                "added_at": datetime.utcnow().isoformat() + "Z",
-            }
-        )
-        KB_FILE.write_text(json.dumps(existing, indent=2), encoding="utf-8")
+        bm25_index.save()
+    except Exception:
+        log.warning("Failed to persist BM25 index", exc_info=True)
+
+    # Record the document for the Knowledge Base Manager (/v1/knowledge)
+    try:
+        add_document(path.name, str(path), pages, result["chunks_indexed"],
+                     size_bytes=path.stat().st_size, content_hash=content_hash, source=source, replace=True)
     except Exception:
         # metadata tracking is non-critical, don't break main flow
-        log.warning("Failed to update knowledge_meta.json", exc_info=True)
+        log.warning("Failed to record knowledge base entry", exc_info=True)
 
     return result
 
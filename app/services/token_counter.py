@@ -0,0 +1,130 @@
+# app/services/token_counter.py
+"""
+Token counting for prompt budgets.
+
+Provides:
+    - get_tokenizer(name)            -> tokenizers.Tokenizer | None
+    - count_tokens(text, model)      -> int
+    - preload(models=None)           -> dict of model -> exact counting available
+
+Tokenizers come from a local tokenizer.json path or a HuggingFace repo id
+(the small `tokenizers` package, no torch), and are cached. A repo is read
+from the local HF hub cache (or the legacy sentence-transformers cache)
+first; the hub is only contacted when it is reachable and HF_HUB_OFFLINE is
+unset, because the hub client retries a dead network for ~20 s. The startup
+warm-up calls preload() so any download never lands on a user request. If a
+tokenizer can't be loaded (offline box, gated repo), we fall back to a
+conservative chars/4 estimate, with one WARNING per model, so callers never
+fail because of token counting.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import socket
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+from app.core.config import settings
+
+log = logging.getLogger("app.services.token_counter")
+
+# Rough average for English prose with BPE/SentencePiece vocabularies.
+_CHARS_PER_TOKEN = 4.0
+
+# Models already warned about (count_tokens falls back to the estimate)
+_estimated = set()
+
+# Connect timeout of the one probe made before downloading from the hub
+_HUB_PROBE_TIMEOUT_S = 2.0
+
+
+def _cached_tokenizer_file(repo: str) -> Optional[str]:
+    """tokenizer.json of `repo` if it is already on disk; never touches the network."""
+    try:
+        from huggingface_hub import hf_hub_download
+        return hf_hub_download(repo, "tokenizer.json", local_files_only=True)
+    except Exception:
+        pass
+    st_home = os.getenv("SENTENCE_TRANSFORMERS_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache", "torch", "sentence_transformers")
+    path = os.path.join(st_home, repo.replace("/", "_"), "tokenizer.json")
+    return path if os.path.isfile(path) else None
+
+
+@lru_cache(maxsize=1)
+def _hub_reachable() -> bool:
+    """False when HF_HUB_OFFLINE is set or the hub endpoint doesn't accept a connection."""
+    try:
+        from huggingface_hub import constants
+    except ImportError:
+        return True  # nothing to probe with; let from_pretrained try
+    if constants.HF_HUB_OFFLINE:
+        return False
+    url = urlparse(constants.ENDPOINT)
+    try:
+        socket.create_connection(
+            (url.hostname, url.port or (443 if url.scheme == "https" else 80)), timeout=_HUB_PROBE_TIMEOUT_S,
+        ).close()
+        return True
+    except OSError:
+        return False
+
+
+@lru_cache(maxsize=8)
+def get_tokenizer(name: str):
+    """Load a fast tokenizer by HF repo id or tokenizer.json path; None if unavailable."""
+    try:
+        from tokenizers import Tokenizer
+        cached = name if os.path.isfile(name) else _cached_tokenizer_file(name)
+        if cached:
+            tok = Tokenizer.from_file(cached)
+        elif _hub_reachable():
+            tok = Tokenizer.from_pretrained(name)
+        else:
+            log.info("Tokenizer '%s' is not cached locally and the HF hub is offline or unreachable", name)
+            return None
+        # Some tokenizer.json files ship with truncation/padding enabled;
+        # counting and chunking need every token.
+        tok.no_truncation()
+        tok.no_padding()
+        return tok
+    except Exception as e:
+        log.info("Tokenizer '%s' could not be loaded: %s", name, e)
+        return None
+
+
+def _tokenizer_for_model(model: Optional[str]):
+    repo = settings.llm_tokenizers.get(model or "")
+    tok = get_tokenizer(repo) if repo else None
+    if tok is None and model and model not in _estimated:
+        _estimated.add(model)
+        log.warning(
+            "No tokenizer for model '%s' (%s); prompt tokens are estimated as chars/%g",
+            model, f"'{repo}' failed to load" if repo else "none in LLM_TOKENIZERS", _CHARS_PER_TOKEN,
+        )
+    return tok
+
+
+def preload(models: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+    """Load the tokenizers of `models` (default: every LLM_TOKENIZERS entry) now."""
+    if models is None:
+        models = settings.llm_tokenizers.keys()
+    return {m: _tokenizer_for_model(m) is not None for m in models}
+
+
+def estimate_tokens(text: str) -> int:
+    return int(math.ceil(len(text or "") / _CHARS_PER_TOKEN))
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Number of prompt tokens `text` costs for `model` (no special tokens)."""
+    if not text:
+        return 0
+    tok = _tokenizer_for_model(model)
+    if tok is None:
+        return estimate_tokens(text)
+    return len(tok.encode(text, add_special_tokens=False).ids)
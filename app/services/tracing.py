@@ -0,0 +1,382 @@
+# app/services/tracing.py
+"""
+Lightweight request-scoped tracing.
+
+Provides:
+    - span(name, **attrs)          -> context manager (nested spans form a trace)
+    - traced(name=None)            -> decorator version of span()
+    - add_span(name, start, duration, **attrs)  record an already-timed child
+    - set_attrs(**attrs)           annotate the current span
+    - current_ids()                -> (trace_id, span_id) or (None, None)
+    - slow_traces()                -> recent traces above settings.trace_slow_ms
+    - install_log_context()        add trace_id / span_id to every LogRecord
+
+The current span lives in a contextvar, so it follows the request through
+`await`s and into FastAPI's threadpool without being passed around. A span
+opened with no current span starts a new trace (the HTTP middleware opens
+one per request; CLI / benchmark calls get one per top-level call).
+
+Finished traces are
+    - exported when sampled (settings.trace_sample_rate) to settings.trace_exporter:
+        "jsonl"  one JSON trace per line in settings.trace_file
+        "otlp"   OpenTelemetry collector at settings.trace_otlp_endpoint
+                 (needs opentelemetry-sdk + the OTLP gRPC exporter)
+        "none"   nothing
+    - always kept when slower than settings.trace_slow_ms: held in memory
+      (slow_traces()), appended to settings.trace_slow_file and logged
+
+Export runs on a background thread behind a bounded queue; when the
+queue is full traces are dropped rather than slowing requests down. With
+settings.trace_enabled off, span() returns a shared no-op object.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+log = logging.getLogger("app.services.tracing")
+
+_current: ContextVar[Optional["Span"]] = ContextVar("edurag_current_span", default=None)
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+class Span:
+    """One timed operation; the root span of a trace also holds its bookkeeping."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attrs", "status",
+                 "start", "end", "wall_start", "children", "root", "_token")
+
+    def __init__(self, name: str, attrs: Dict[str, Any], parent: Optional["Span"],
+                 trace_id: Optional[str] = None, parent_id: Optional[str] = None) -> None:
+        self.name = name
+        self.attrs = attrs
+        self.status = "ok"
+        self.span_id = _new_id(8)
+        self.children: List[Span] = []
+        self.end: Optional[float] = None
+        self._token = None
+        if parent is None:
+            self.trace_id = trace_id or _new_id(16)
+            self.parent_id = parent_id
+            self.root = self
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self.root = parent.root
+            parent.children.append(self)
+        self.start = time.perf_counter()
+        self.wall_start = time.time()
+
+    def __enter__(self) -> "Span":
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end = time.perf_counter()
+        if exc_type is not None:
+            self.status = "error"
+            self.attrs["error"] = f"{exc_type.__name__}: {exc}"
+        if self._token is not None:
+            _current.reset(self._token)
+            self._token = None
+        if self.root is self:
+            _finish(self)
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+
+class _NullSpan:
+    __slots__ = ()
+    trace_id = span_id = None
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def set(self, **attrs: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+# ---------- public API ----------
+
+def span(name: str, **attrs: Any) -> "Span | _NullSpan":
+    """Open a span under the current one (or a new trace). Use as a context manager."""
+    if not settings.trace_enabled:
+        return _NULL_SPAN
+    return Span(name, attrs, _current.get())
+
+
+def start_trace(name: str, trace_id: Optional[str] = None, parent_id: Optional[str] = None,
+                **attrs: Any) -> "Span | _NullSpan":
+    """Open a root span, optionally continuing a trace started elsewhere (traceparent)."""
+    if not settings.trace_enabled:
+        return _NULL_SPAN
+    return Span(name, attrs, None, trace_id=trace_id, parent_id=parent_id)
+
+
+def traced(name: Optional[str] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator: run the function inside span(name or module.qualname)."""
+
+    def wrap(fn: Callable[..., Any]) -> Callable[..., Any]:
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def inner(*args: Any, **kwargs: Any) -> Any:
+            with span(span_name):
+                return fn(*args, **kwargs)
+
+        return inner
+
+    return wrap
+
+
+def add_span(name: str, start: float, duration_s: float, **attrs: Any) -> None:
+    """
+    Record a child of the current span whose timing is already known
+    (`start` on the perf_counter clock), e.g. Ollama's own prefill/decode split.
+    """
+    parent = _current.get()
+    if parent is None:
+        return
+    child = Span(name, attrs, parent)
+    child.start = start
+    child.wall_start = parent.wall_start + (start - parent.start)
+    child.end = start + duration_s
+
+
+def set_attrs(**attrs: Any) -> None:
+    cur = _current.get()
+    if cur is not None:
+        cur.attrs.update(attrs)
+
+
+def current_ids() -> Tuple[Optional[str], Optional[str]]:
+    cur = _current.get()
+    return (cur.trace_id, cur.span_id) if cur is not None else (None, None)
+
+
+# ---------- serialization ----------
+
+def _walk(sp: Span, depth: int = 0):
+    yield sp, depth
+    for child in sp.children:
+        yield from _walk(child, depth + 1)
+
+
+def trace_to_dict(root: Span) -> Dict[str, Any]:
+    spans = []
+    for sp, depth in _walk(root):
+        spans.append({
+            "span_id": sp.span_id,
+            "parent_id": sp.parent_id,
+            "name": sp.name,
+            "depth": depth,
+            "offset_ms": round((sp.start - root.start) * 1000, 3),
+            "duration_ms": round(sp.duration_ms, 3),
+            "status": sp.status,
+            "attrs": sp.attrs,
+        })
+    return {
+        "trace_id": root.trace_id,
+        "name": root.name,
+        "start": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(root.wall_start))
+                 + f".{int(root.wall_start % 1 * 1000):03d}Z",
+        "duration_ms": round(root.duration_ms, 3),
+        "status": root.status,
+        "spans": spans,
+    }
+
+
+# ---------- finishing / export ----------
+
+_slow: Deque[Dict[str, Any]] = deque(maxlen=max(1, settings.trace_slow_keep))
+_export_q: "queue.Queue[Tuple[str, Any]]" = queue.Queue(maxsize=1000)
+_exporter_lock = threading.Lock()
+_exporter_thread: Optional[threading.Thread] = None
+_dropped = 0
+
+
+def _finish(root: Span) -> None:
+    global _dropped
+    slow = root.duration_ms >= settings.trace_slow_ms
+    sampled = settings.trace_exporter != "none" and random.random() < settings.trace_sample_rate
+    if not (slow or sampled):
+        return
+    _ensure_exporter()
+    try:
+        if slow:
+            _export_q.put_nowait(("slow", root))
+        if sampled:
+            _export_q.put_nowait((settings.trace_exporter, root))
+    except queue.Full:
+        _dropped += 1
+
+
+def _ensure_exporter() -> None:
+    global _exporter_thread
+    if _exporter_thread is not None:
+        return
+    with _exporter_lock:
+        if _exporter_thread is None:
+            _exporter_thread = threading.Thread(target=_export_loop, name="trace-export", daemon=True)
+            _exporter_thread.start()
+
+
+def _append_jsonl(path: str, record: Dict[str, Any]) -> None:
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    with p.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(record, default=str) + "\n")
+
+
+def _export_loop() -> None:
+    otlp = None
+    while True:
+        kind, root = _export_q.get()
+        try:
+            if kind == "slow":
+                record = trace_to_dict(root)
+                _slow.append(record)
+                _append_jsonl(settings.trace_slow_file, record)
+                # INFO: a slow request is a data point for /v1/traces/slow, not a fault
+                log.info("Slow trace %s %s took %.0f ms", root.trace_id, root.name, root.duration_ms)
+            elif kind == "jsonl":
+                _append_jsonl(settings.trace_file, trace_to_dict(root))
+            elif kind == "otlp":
+                if otlp is None:
+                    otlp = _OtlpBridge.create()
+                if otlp:
+                    otlp.export(root)
+        except Exception:
+            log.warning("Trace export (%s) failed", kind, exc_info=True)
+
+
+class _OtlpBridge:
+    """
+    Replays finished spans into the OpenTelemetry SDK, which batches them to the
+    collector. The OTel spans keep our ids (the trace id is the X-Trace-Id the
+    client saw) and a root continuing an incoming traceparent keeps its remote
+    parent, so the collector joins our spans to the caller's trace.
+    """
+
+    def __init__(self, provider: Any, ids: Any, otel_trace: Any) -> None:
+        self.provider = provider
+        self.tracer = provider.get_tracer("app.services.tracing")
+        self.ids = ids
+        self.otel_trace = otel_trace
+
+    @classmethod
+    def create(cls, exporter: Any = None) -> "_OtlpBridge | bool":
+        try:
+            from opentelemetry import trace as otel_trace
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+            from opentelemetry.sdk.trace.id_generator import IdGenerator
+            if exporter is None:
+                from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+                exporter = OTLPSpanExporter(endpoint=settings.trace_otlp_endpoint, insecure=True)
+        except ImportError as e:
+            log.warning("TRACE_EXPORTER=otlp but OpenTelemetry is not installed (%s); traces not exported", e)
+            return False
+
+        class ReplayIds(IdGenerator):
+            """Hands the SDK the ids of the span being replayed (export runs on one thread)."""
+            trace_id = span_id = 0
+
+            def generate_trace_id(self) -> int:
+                return self.trace_id
+
+            def generate_span_id(self) -> int:
+                return self.span_id
+
+        ids = ReplayIds()
+        provider = TracerProvider(resource=Resource.create({"service.name": "edurag-api"}), id_generator=ids)
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+        return cls(provider, ids, otel_trace)
+
+    def _root_context(self, root: Span) -> Any:
+        from opentelemetry.context import Context
+        if not root.parent_id:
+            return Context()
+        remote = self.otel_trace.SpanContext(
+            trace_id=int(root.trace_id, 16), span_id=int(root.parent_id, 16), is_remote=True,
+            trace_flags=self.otel_trace.TraceFlags(self.otel_trace.TraceFlags.SAMPLED),
+        )
+        return self.otel_trace.set_span_in_context(self.otel_trace.NonRecordingSpan(remote), Context())
+
+    def export(self, root: Span) -> None:
+        def ns(sp: Span, t: float) -> int:
+            return int((root.wall_start + (t - root.start)) * 1e9)
+
+        def replay(sp: Span, ctx: Any) -> None:
+            attrs = {k: v if isinstance(v, (str, bool, int, float)) else str(v) for k, v in sp.attrs.items()}
+            if sp is root:
+                attrs["edurag.trace_id"] = root.trace_id
+            self.ids.span_id = int(sp.span_id, 16)
+            otel_span = self.tracer.start_span(sp.name, context=ctx, attributes=attrs,
+                                               start_time=ns(sp, sp.start))
+            if sp.status == "error":
+                otel_span.set_status(self.otel_trace.Status(self.otel_trace.StatusCode.ERROR))
+            child_ctx = self.otel_trace.set_span_in_context(otel_span)
+            for child in sp.children:
+                replay(child, child_ctx)
+            otel_span.end(end_time=ns(sp, sp.end if sp.end is not None else sp.start))
+
+        self.ids.trace_id = int(root.trace_id, 16)
+        replay(root, self._root_context(root))
+
+
+def slow_traces(limit: int = 20) -> List[Dict[str, Any]]:
+    """Most recent slow traces first."""
+    return list(reversed(_slow))[:limit]
+
+
+# ---------- logging ----------
+
+_log_context_installed = False
+
+
+def install_log_context() -> None:
+    """Make trace_id / span_id available on every LogRecord ('-' outside a trace)."""
+    global _log_context_installed
+    if _log_context_installed:
+        return
+    base_factory = logging.getLogRecordFactory()
+
+    def factory(*args: Any, **kwargs: Any) -> logging.LogRecord:
+        record = base_factory(*args, **kwargs)
+        cur = _current.get()
+        record.trace_id = cur.trace_id if cur is not None else "-"
+        record.span_id = cur.span_id if cur is not None else "-"
+        return record
+
+    logging.setLogRecordFactory(factory)
+    _log_context_installed = True
@@ -0,0 +1,207 @@
+# app/services/url_ingest.py
+"""
+URL ingestion core shared by /v1/url/ingest, /v1/url/ingest/batch and
+scripts/ingest_urls.py.
+
+Provides:
+    - ingest_urls_async(urls, ...)       -> List[dict]   (await from async code)
+    - ingest_urls(urls, ...)             -> List[dict]   (sync wrapper)
+
+Fetching goes through one pooled httpx.AsyncClient (keep-alive, global
+connection cap) with an extra per-host semaphore so a batch of pages from
+one site doesn't hammer it. Each URL's ETag / Last-Modified / body hash is
+kept in the `url_cache` table; refreshes send conditional GETs and skip
+re-indexing on 304 or an unchanged body. HTML parsing, chunking and
+indexing run in worker threads, never on the event loop.
+
+Result dicts:
+    {"url", "status": "indexed"|"unchanged"|"failed", "http_status", "title",
+     "chars", "chunks_indexed", "elapsed_ms", "error"}
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from app.core.config import settings
+from app.core.db import get_conn, transaction, utcnow
+from app.services import metrics
+from app.services.html_extract import extract_html
+
+if TYPE_CHECKING:  # imported where the client is built, not with the app
+    import httpx
+
+log = logging.getLogger("app.services.url_ingest")
+
+INDEXED = "indexed"
+UNCHANGED = "unchanged"
+FAILED = "failed"
+
+MIN_TEXT_CHARS = 100
+_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+_FETCHES = metrics.counter("url_ingest_total", "URL ingest results (status=indexed|unchanged|failed)")
+_FETCH_SECONDS = metrics.histogram("url_fetch_seconds", "HTTP fetch time per URL")
+
+IndexFn = Callable[[str, str, str], int]
+
+
+# ---------- cache ----------
+
+def _get_cached(url: str) -> Optional[Dict[str, Any]]:
+    row = get_conn().execute("SELECT * FROM url_cache WHERE url = ?", (url,)).fetchone()
+    return dict(row) if row else None
+
+
+def _store_cached(url: str, etag: Optional[str], last_modified: Optional[str],
+                  content_hash: str, title: str, chunk_count: int) -> None:
+    with transaction() as conn:
+        conn.execute(
+            "INSERT INTO url_cache (url, etag, last_modified, content_hash, title, chunk_count, fetched_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT(url) DO UPDATE SET etag = excluded.etag, last_modified = excluded.last_modified,"
+            " content_hash = excluded.content_hash, title = excluded.title,"
+            " chunk_count = excluded.chunk_count, fetched_at = excluded.fetched_at",
+            (url, etag, last_modified, content_hash, title, chunk_count, utcnow()),
+        )
+
+
+def _touch_cached(url: str) -> None:
+    get_conn().execute("UPDATE url_cache SET fetched_at = ? WHERE url = ?", (utcnow(), url))
+
+
+# ---------- indexing ----------
+
+def index_text(url: str, title: str, text: str) -> int:
+    """Chunk + embed + index one page, replacing chunks from an older fetch."""
+    from app.services import bm25_index
+    from app.services.chunker import iter_chunks
+    from app.services.ingest_pipeline import bm25_writer, run_pipeline
+    from app.services.vectorstore import delete_by_source
+
+    delete_by_source(url)
+    bm25_index.remove_doc(url)
+    run = run_pipeline(
+        [(1, text)],
+        url,
+        {"source": url, "title": title, "type": "url", "timestamp": time.time()},
+        chunker=iter_chunks,
+        write_fn=bm25_writer(url),
+    )
+    bm25_index.save()
+    return run["chunks_indexed"]
+
+
+def _process(url: str, body: bytes, encoding: Optional[str], headers: httpx.Headers,
+             cached: Optional[Dict[str, Any]], force: bool, title_override: Optional[str],
+             index_fn: IndexFn) -> Dict[str, Any]:
+    """Runs in a worker thread: hash, parse, index, record validators."""
+    content_hash = hashlib.sha256(body).hexdigest()
+    etag, last_modified = headers.get("etag"), headers.get("last-modified")
+
+    if not force and cached and cached["content_hash"] == content_hash:
+        _store_cached(url, etag, last_modified, content_hash, cached["title"], cached["chunk_count"])
+        return {"status": UNCHANGED, "title": cached["title"], "chunks_indexed": 0}
+
+    html = body.decode(encoding or "utf-8", errors="replace")
+    title, text = extract_html(html, url)
+    title = (title_override or title)[:200]
+    if len(text) < MIN_TEXT_CHARS:
+        return {"status": FAILED, "title": title, "chars": len(text),
+                "error": "Could not extract meaningful content from URL"}
+
+    chunks = index_fn(url, title, text)
+    _store_cached(url, etag, last_modified, content_hash, title, chunks)
+    return {"status": INDEXED, "title": title, "chars": len(text), "chunks_indexed": chunks}
+
+
+# ---------- fetching ----------
+
+async def _ingest_one(client: httpx.AsyncClient, host_limits: Dict[str, asyncio.Semaphore],
+                      work_limit: asyncio.Semaphore, url: str, force: bool,
+                      title_override: Optional[str], index_fn: IndexFn) -> Dict[str, Any]:
+    import httpx
+
+    start = time.perf_counter()
+    result: Dict[str, Any] = {"url": url, "status": FAILED, "http_status": None, "title": None,
+                              "chars": 0, "chunks_indexed": 0, "error": None}
+    try:
+        cached = await asyncio.to_thread(_get_cached, url)
+        headers = {}
+        if cached and not force:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        async with host_limits[urlsplit(url).netloc]:
+            t0 = time.perf_counter()
+            resp = await client.get(url, headers=headers)
+            _FETCH_SECONDS.observe(time.perf_counter() - t0)
+        result["http_status"] = resp.status_code
+
+        if resp.status_code == 304 and cached:
+            await asyncio.to_thread(_touch_cached, url)
+            result.update(status=UNCHANGED, title=cached["title"])
+        else:
+            resp.raise_for_status()
+            async with work_limit:
+                result.update(await asyncio.to_thread(
+                    _process, url, resp.content, resp.encoding, resp.headers,
+                    cached, force, title_override, index_fn,
+                ))
+    except httpx.HTTPError as e:
+        result["error"] = f"Failed to fetch URL: {e}"
+    except Exception as e:
+        log.exception("URL ingest failed for %s", url)
+        result["error"] = str(e)
+
+    result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    _FETCHES.inc(status=result["status"])
+    if not force and result["status"] != FAILED:
+        metrics.CACHE_REQUESTS.inc(cache="url", result="hit" if result["status"] == UNCHANGED else "miss")
+    return result
+
+
+async def ingest_urls_async(
+    urls: List[str],
+    *,
+    force: bool = False,
+    titles: Optional[Dict[str, str]] = None,
+    concurrency: Optional[int] = None,
+    per_host: Optional[int] = None,
+    index_fn: Optional[IndexFn] = None,
+) -> List[Dict[str, Any]]:
+    """Fetch and index `urls` concurrently; results are in input order."""
+    import httpx
+
+    concurrency = concurrency or settings.url_fetch_concurrency
+    per_host = per_host or settings.url_fetch_per_host
+    titles = titles or {}
+    index_fn = index_fn or index_text
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    host_limits: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(per_host))
+    work_limit = asyncio.Semaphore(settings.url_index_concurrency)
+
+    async with httpx.AsyncClient(
+        limits=limits,
+        timeout=settings.url_fetch_timeout_s,
+        follow_redirects=True,
+        headers={"User-Agent": _USER_AGENT},
+    ) as client:
+        return await asyncio.gather(*(
+            _ingest_one(client, host_limits, work_limit, u, force, titles.get(u), index_fn)
+            for u in dict.fromkeys(urls)
+        ))
+
+
+def ingest_urls(urls: List[str], **kwargs: Any) -> List[Dict[str, Any]]:
+    """Blocking wrapper around ingest_urls_async (CLI, sync routes)."""
+    return asyncio.run(ingest_urls_async(urls, **kwargs))
@@ -29,32 +29,21 @@ def extract_text_from_pdf(pdf_file) -> str:
 def chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
     """
     Split text into chunks with overlap
-    
+
+    Delegates to app.services.chunker (token-sized windows). chunk_size and
+    overlap are still accepted in characters and converted at ~4 chars/token.
+
     Args:
         text: Text to chunk
         chunk_size: Size of each chunk in characters
         overlap: Overlap between chunks in characters
-        
+
     Returns:
         List[str]: List of text chunks
     """
-    chunks = []
-    
-    # Remove extra whitespace
-    text = " ".join(text.split())
-    
-    # Create chunks
-    start = 0
-    while start < len(text):
-        end = start + chunk_size
-        chunk = text[start:end].strip()
-        
-        if chunk:
-            chunks.append(chunk)
-        
-        start += (chunk_size - overlap)
-    
-    return chunks
+    from app.services.chunker import chunk_text as _chunk
+
+    return _chunk(" ".join(text.split()), max(1, chunk_size // 4), overlap // 4)
 
 
 def clean_text(text: str) -> str:
@@ -1,12 +1,24 @@
 # app/services/vectorstore.py
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_core.documents import Document
+# LangChain / Chroma / sentence-transformers are imported inside the functions
+# that need them: they take seconds to import, and app.main must start fast.
 from typing import List, Dict, Any, Tuple, Union
 import os
+import threading
+
+from app.services import metrics
+from app.services.tracing import span
 
 # Global vectorstore instance
 _vectorstore = None
+# The startup warm-up and the first request may both get here before it exists
+_init_lock = threading.Lock()
+
+
+@metrics.collector
+def _report_size() -> None:
+    # Only once the collection is open; a scrape must not load the model.
+    if _vectorstore is not None:
+        metrics.INDEX_CHUNKS.set(_vectorstore._collection.count(), index="chroma")
 
 
 def get_vectorstore():
@@ -14,20 +26,25 @@ def get_vectorstore():
     global _vectorstore
     
     if _vectorstore is None:
-        # Initialize embeddings
-        embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
-        )
-        
-        # Create persist directory if it doesn't exist
-        persist_directory = "./chroma_db"
-        os.makedirs(persist_directory, exist_ok=True)
-        
-        # Initialize Chroma
-        _vectorstore = Chroma(
-            embedding_function=embeddings,
-            persist_directory=persist_directory
-        )
+        with _init_lock:
+            if _vectorstore is None:
+                from langchain_community.embeddings import HuggingFaceEmbeddings
+                from langchain_community.vectorstores import Chroma
+
+                # Initialize embeddings
+                embeddings = HuggingFaceEmbeddings(
+                    model_name="sentence-transformers/all-MiniLM-L6-v2"
+                )
+
+                # Create persist directory if it doesn't exist
+                persist_directory = "./chroma_db"
+                os.makedirs(persist_directory, exist_ok=True)
+
+                # Initialize Chroma
+                _vectorstore = Chroma(
+                    embedding_function=embeddings,
+                    persist_directory=persist_directory
+                )
     
     return _vectorstore
 
@@ -43,6 +60,8 @@ def add_documents(docs: Union[List[str], List[Dict[str, Any]]], metadatas: List[
     Returns:
         Tuple of (list of ids, collection info dict)
     """
+    from langchain_core.documents import Document
+
     vectorstore = get_vectorstore()
     
     # Handle different input formats
@@ -90,10 +109,49 @@ def add_documents(docs: Union[List[str], List[Dict[str, Any]]], metadatas: List[
         return ids, collection_info
 
 
+def embed_documents(texts: List[str]) -> List[List[float]]:
+    """Embed texts with the vectorstore's own embedding model"""
+    return get_vectorstore().embeddings.embed_documents(texts)
+
+
+def add_embedded(
+    ids: List[str],
+    texts: List[str],
+    embeddings: List[List[float]],
+    metadatas: List[dict],
+) -> None:
+    """
+    Write pre-computed embeddings straight to the Chroma collection.
+
+    Used by the staged ingestion pipeline so embedding and writing can
+    overlap; upsert keeps re-ingesting the same ids idempotent.
+    """
+    get_vectorstore()._collection.upsert(
+        ids=ids,
+        documents=texts,
+        embeddings=embeddings,
+        metadatas=metadatas,
+    )
+
+
+def delete_by_source(source: str) -> None:
+    """Remove every chunk whose metadata source matches (e.g. a re-fetched URL)"""
+    get_vectorstore()._collection.delete(where={"source": source})
+
+
+def delete_by_path(path: str) -> None:
+    """Remove every chunk of a stored file (metadata path), e.g. before re-indexing it"""
+    get_vectorstore()._collection.delete(where={"path": path})
+
+
 def semantic_query(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
     """Semantic search returning standardized format"""
     vectorstore = get_vectorstore()
-    results = vectorstore.similarity_search_with_score(query, k=top_k)
+    # Same as similarity_search_with_score, split so embed and search are timed apart.
+    with span("retrieval.embed"), metrics.RAG_STAGE.time(stage="embed"):
+        embedding = vectorstore.embeddings.embed_query(query)
+    with span("retrieval.semantic_search", top_k=top_k), metrics.RAG_STAGE.time(stage="semantic_search"):
+        results = vectorstore.similarity_search_by_vector_with_relevance_scores(embedding, k=top_k)
     
     # Convert to standard format
     formatted_results = []
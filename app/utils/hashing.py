@@ -0,0 +1,49 @@
+# app/utils/hashing.py
+"""
+Streaming content hashes.
+
+Provides:
+    - CHUNK_SIZE
+    - copy_and_hash(src, dst)  -> (sha256_hex, size_bytes)
+    - sha256_file(path)        -> sha256_hex
+"""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import BinaryIO, Tuple
+
+CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+
+def copy_and_hash(src: BinaryIO, dst: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Tuple[str, int]:
+    """
+    Copy `src` to `dst` in fixed-size chunks, hashing as the bytes go by.
+
+    Only one chunk is in memory at a time, and the file is read exactly once.
+    """
+    h = hashlib.sha256()
+    size = 0
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    while True:
+        n = src.readinto(view) if hasattr(src, "readinto") else None
+        if n is None:
+            data = src.read(chunk_size)
+            n = len(data)
+            view[:n] = data
+        if not n:
+            break
+        h.update(view[:n])
+        dst.write(view[:n])
+        size += n
+    return h.hexdigest(), size
+
+
+def sha256_file(path: str | Path, chunk_size: int = CHUNK_SIZE) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
@@ -0,0 +1,311 @@
+# app/workers/benchmark.py
+"""
+Background benchmark runs (/v1/benchmark/run).
+
+A run answers every benchmark question with every model. Work is split so
+that nothing is done twice:
+
+    - retrieval + prompt building happen once per question (a small pool of
+      settings.benchmark_retrieval_workers) and the prompt is shared by all
+      models, so every model sees the same context
+    - each model has its own pool of settings.benchmark_model_concurrency
+      workers, so models run side by side and a slow model doesn't hold up
+      the others (the LLM scheduler still enforces per-model slots)
+
+Every finished (question, model) pair is written to `benchmark_results` as
+it completes, with its retrieval and generation latency. A run interrupted
+by an error or a restart is continued by `resume(run_id)` (or `recover()`
+at startup): pairs that already succeeded are skipped, failed ones retried.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.db import get_conn, transaction, utcnow
+from app.services import metrics
+
+log = logging.getLogger("app.workers.benchmark")
+
+QUEUED = "QUEUED"
+RUNNING = "RUNNING"
+DONE = "DONE"
+FAILED = "FAILED"
+
+_PAIRS = metrics.counter("benchmark_pairs_total", "Benchmark question x model answers (success=true|false)")
+_PAIR_SECONDS = metrics.histogram("benchmark_pair_seconds", "LLM time per benchmark answer, by model")
+
+
+BENCHMARK_FILE = Path("benchmark_questions.json")
+
+
+def load_benchmark_questions() -> Dict[str, Any]:
+    """Load benchmark questions from JSON file"""
+    if not BENCHMARK_FILE.exists():
+        raise FileNotFoundError("benchmark_questions.json not found")
+    # utf-8-sig: the file is sometimes saved with a BOM
+    with open(BENCHMARK_FILE, "r", encoding="utf-8-sig") as f:
+        return json.load(f)
+
+
+def get_run(run_id: str) -> Optional[Dict[str, Any]]:
+    row = get_conn().execute("SELECT * FROM benchmark_runs WHERE run_id = ?", (run_id,)).fetchone()
+    if row is None:
+        return None
+    run = dict(row)
+    run["config"] = json.loads(run["config"])
+    counts = get_conn().execute(
+        "SELECT COUNT(*) AS done, COALESCE(SUM(success), 0) AS ok FROM benchmark_results WHERE run_id = ?",
+        (run_id,),
+    ).fetchone()
+    run["completed"], run["succeeded"] = counts["done"], counts["ok"]
+    return run
+
+
+def list_runs(limit: int = 20) -> List[Dict[str, Any]]:
+    rows = get_conn().execute(
+        "SELECT run_id FROM benchmark_runs ORDER BY created_at DESC LIMIT ?", (limit,)
+    ).fetchall()
+    return [get_run(r["run_id"]) for r in rows]
+
+
+def get_results(run_id: str) -> List[Dict[str, Any]]:
+    rows = get_conn().execute(
+        "SELECT * FROM benchmark_results WHERE run_id = ? ORDER BY question_id, model", (run_id,)
+    ).fetchall()
+    out = []
+    for r in rows:
+        d = dict(r)
+        d["success"] = bool(d["success"])
+        d["usage"] = json.loads(d["usage"]) if d["usage"] else {}
+        out.append(d)
+    return out
+
+
+def run_report(run_id: str) -> Optional[Dict[str, Any]]:
+    """A run's progress plus its answers grouped per question (the /v1/benchmark/run shape)."""
+    run = get_run(run_id)
+    if run is None:
+        return None
+    benchmark_data = load_benchmark_questions()
+    by_question: Dict[int, Dict[str, Dict[str, Any]]] = {}
+    retrieval: Dict[int, Dict[str, Any]] = {}
+    for r in get_results(run_id):
+        by_question.setdefault(r["question_id"], {})[r["model"]] = {
+            "answer": r["answer"],
+            "success": r["success"],
+            "error": r["error"],
+            "latency_ms": r["latency_ms"],
+            "queue_ms": r["queue_ms"],
+            "usage": r["usage"],
+        }
+        retrieval[r["question_id"]] = {"sources_count": r["sources_count"], "retrieve_ms": r["retrieve_ms"]}
+
+    # Time spent working, from the per-pair timings: retrieval once per
+    # question plus every answer (summed over concurrent workers).
+    # updated_at - created_at would also count the time an interrupted run
+    # sat waiting to be resumed.
+    work_ms = sum(r["retrieve_ms"] for r in retrieval.values())
+    work_ms += sum(a["latency_ms"] for answers in by_question.values() for a in answers.values())
+
+    results = []
+    for q in benchmark_data["questions"]:
+        if q["id"] not in by_question:
+            continue
+        results.append({
+            "question_id": q["id"],
+            "question": q["question"],
+            "category": q.get("category"),
+            "expected_keywords": q.get("expected_keywords", []),
+            "responses": by_question[q["id"]],
+            **retrieval[q["id"]],
+        })
+    return {
+        "run_id": run_id,
+        "status": run["status"],
+        "error": run["error"],
+        "config": run["config"],
+        "progress": {"total": run["total"], "completed": run["completed"], "succeeded": run["succeeded"]},
+        "benchmark_name": benchmark_data.get("benchmark_name"),
+        "total_questions": len(benchmark_data["questions"]),
+        "results": results,
+        "elapsed_time": round(work_ms / 1000, 2),
+    }
+
+
+def _set_status(run_id: str, status: str, error: Optional[str] = None) -> None:
+    get_conn().execute(
+        "UPDATE benchmark_runs SET status = ?, error = ?, updated_at = ? WHERE run_id = ?",
+        (status, error, utcnow(), run_id),
+    )
+
+
+def _save_result(run_id: str, question_id: int, model: str, retrieval: Dict[str, Any],
+                 result: Dict[str, Any], latency_ms: float) -> None:
+    get_conn().execute(
+        "INSERT OR REPLACE INTO benchmark_results (run_id, question_id, model, success, answer, error,"
+        " retrieve_ms, latency_ms, queue_ms, sources_count, usage, created_at)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            run_id, question_id, model, 1 if result.get("success") else 0,
+            result.get("response") if result.get("success") else None,
+            result.get("error"),
+            retrieval["retrieve_ms"], round(latency_ms, 1), result.get("queue_ms", 0.0),
+            retrieval["sources_count"], json.dumps(result.get("usage") or {}), utcnow(),
+        ),
+    )
+
+
+class BenchmarkRunner:
+    """Starts, resumes and tracks benchmark runs on background threads."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._active: Dict[str, Future] = {}
+
+    # ---------- public API ----------
+
+    def start(self, models: List[str], top_k: int = 5, max_tokens: int = 500) -> str:
+        """Record a QUEUED run and start it; returns the run id."""
+        n_questions = len(load_benchmark_questions()["questions"])
+        run_id = uuid.uuid4().hex
+        config = {"models": models, "top_k": top_k, "max_tokens": max_tokens}
+        now = utcnow()
+        with transaction() as conn:
+            conn.execute(
+                "INSERT INTO benchmark_runs (run_id, status, config, total, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, QUEUED, json.dumps(config), n_questions * len(models), now, now),
+            )
+        self._launch(run_id)
+        return run_id
+
+    def resume(self, run_id: str) -> bool:
+        """Continue a run (skipping pairs that already succeeded). False if unknown or running."""
+        if get_run(run_id) is None:
+            return False
+        return self._launch(run_id)
+
+    def recover(self) -> int:
+        """Resume runs left QUEUED/RUNNING by a previous process."""
+        rows = get_conn().execute(
+            "SELECT run_id FROM benchmark_runs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+        ).fetchall()
+        for row in rows:
+            self.resume(row["run_id"])
+        if rows:
+            log.info("Resuming %d unfinished benchmark runs", len(rows))
+        return len(rows)
+
+    def wait(self, run_id: str, timeout: Optional[float] = None) -> None:
+        with self._lock:
+            fut = self._active.get(run_id)
+        if fut is not None:
+            fut.result(timeout=timeout)
+
+    # ---------- worker ----------
+
+    def _launch(self, run_id: str) -> bool:
+        fut: Future = Future()
+        with self._lock:
+            if run_id in self._active:
+                return False
+            self._active[run_id] = fut
+        _set_status(run_id, QUEUED)
+
+        def target() -> None:
+            try:
+                self._run(run_id)
+                fut.set_result(None)
+            except BaseException as e:
+                fut.set_exception(e)
+            finally:
+                with self._lock:
+                    self._active.pop(run_id, None)
+
+        threading.Thread(target=target, name=f"benchmark-{run_id[:8]}", daemon=True).start()
+        return True
+
+    def _run(self, run_id: str) -> None:
+        # Imported here so the worker module stays cheap to import.
+        from app.services.context_packer import budget_for
+        from app.services.generator import build_rag_prompt
+        from app.services.llm import generate_response
+        from app.services.pipeline import vs_query
+        from app.services.scheduler import PRIORITY_BATCH
+
+        run = get_run(run_id)
+        cfg = run["config"]
+        models: List[str] = cfg["models"]
+        done = {
+            (r["question_id"], r["model"])
+            for r in get_conn().execute(
+                "SELECT question_id, model FROM benchmark_results WHERE run_id = ? AND success = 1", (run_id,)
+            )
+        }
+        questions = [q for q in load_benchmark_questions()["questions"]
+                     if any((q["id"], m) not in done for m in models)]
+        _set_status(run_id, RUNNING)
+        log.info("Benchmark run %s: %d questions x %d models (%d pairs already done)",
+                 run_id, len(questions), len(models), len(done))
+
+        budget = budget_for(models)
+
+        def retrieve(q: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str]]:
+            t0 = time.perf_counter()
+            chunks = vs_query(query=q["question"], top_k=cfg["top_k"], mode="hybrid")
+            retrieval = {"retrieve_ms": round((time.perf_counter() - t0) * 1000, 1), "sources_count": len(chunks)}
+            prompt = build_rag_prompt(question=q["question"], chunks=chunks, budget_tokens=budget) if chunks else None
+            return retrieval, prompt
+
+        def answer(q: Dict[str, Any], model: str, retrieval: Dict[str, Any], prompt: Optional[str]) -> None:
+            t0 = time.perf_counter()
+            if prompt is None:
+                result = {"success": False, "error": "No relevant context found"}
+            else:
+                try:
+                    result = generate_response(prompt=prompt, model_name=model, max_tokens=cfg["max_tokens"],
+                                               priority=PRIORITY_BATCH)
+                except Exception as e:  # Overloaded (queue timeout) and friends: retried on resume
+                    result = {"success": False, "error": f"{type(e).__name__}: {e}"}
+            elapsed = time.perf_counter() - t0
+            _save_result(run_id, q["id"], model, retrieval, result, elapsed * 1000)
+            _PAIRS.inc(success=str(bool(result.get("success"))).lower())
+            _PAIR_SECONDS.observe(elapsed, model=model)
+
+        per_model = max(1, settings.benchmark_model_concurrency)
+        model_pools = {m: ThreadPoolExecutor(per_model, thread_name_prefix=f"bench-{m}") for m in models}
+        pending: List[Future] = []
+        try:
+            with ThreadPoolExecutor(max(1, settings.benchmark_retrieval_workers),
+                                    thread_name_prefix="bench-retrieve") as retrieval_pool:
+                # Each question's prompt is handed to the model pools as soon as it is built
+                for q, fut in [(q, retrieval_pool.submit(retrieve, q)) for q in questions]:
+                    retrieval, prompt = fut.result()
+                    for m in models:
+                        if (q["id"], m) not in done:
+                            pending.append(model_pools[m].submit(answer, q, m, retrieval, prompt))
+            for fut in pending:
+                fut.result()
+        except Exception as e:
+            log.exception("Benchmark run %s failed", run_id)
+            _set_status(run_id, FAILED, error=str(e))
+            raise
+        finally:
+            for pool in model_pools.values():
+                pool.shutdown(wait=True)
+
+        _set_status(run_id, DONE)
+        run = get_run(run_id)
+        log.info("Benchmark run %s done: %d/%d pairs succeeded", run_id, run["succeeded"], run["total"])
+
+
+benchmark_runner = BenchmarkRunner()
@@ -0,0 +1,245 @@
+# app/workers/ingest.py
+"""
+Background ingestion jobs.
+
+/v1/upload streams the file to disk and calls `ingest_queue.submit(...)`,
+which records a QUEUED row in the `documents` table (or returns the live
+job for identical content) and returns immediately. A
+small thread pool runs save_and_index_pdf for each job, moving it through
+QUEUED -> PROCESSING -> READY | FAILED. Failed jobs are retried with
+exponential backoff up to `ingest_max_attempts`.
+
+Job state lives in SQLite (app.core.db), so clients can poll it and jobs
+interrupted by a restart are picked up again by `recover()`.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.db import get_conn, transaction, utcnow
+from app.services import metrics
+
+log = logging.getLogger("app.workers.ingest")
+
+QUEUED = "QUEUED"
+PROCESSING = "PROCESSING"
+READY = "READY"
+FAILED = "FAILED"
+
+_JOBS = metrics.counter("ingest_jobs_total", "Ingestion jobs finished (status=READY|FAILED)")
+_PENDING = metrics.gauge("ingest_jobs_pending", "Ingestion jobs queued or running")
+_JOB_SECONDS = metrics.histogram("ingest_job_seconds", "Wall time per ingestion attempt")
+
+
+class IngestBacklogFull(Exception):
+    """Too many jobs pending; the caller should retry later (HTTP 429)."""
+
+
+def _row_to_dict(row) -> Dict[str, Any]:
+    return dict(row) if row is not None else {}
+
+
+def get_job(document_id: str) -> Optional[Dict[str, Any]]:
+    row = get_conn().execute(
+        "SELECT * FROM documents WHERE document_id = ?", (document_id,)
+    ).fetchone()
+    return _row_to_dict(row) if row else None
+
+
+def list_jobs(limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+    rows = get_conn().execute(
+        "SELECT * FROM documents ORDER BY created_at DESC LIMIT ? OFFSET ?",
+        (limit, offset),
+    ).fetchall()
+    return [_row_to_dict(r) for r in rows]
+
+
+def find_by_hash(content_hash: str, conn=None) -> Optional[Dict[str, Any]]:
+    """Most recent non-FAILED job for this content, if any (upload dedup)."""
+    row = (conn or get_conn()).execute(
+        "SELECT * FROM documents WHERE content_hash = ? AND status != ?"
+        " ORDER BY created_at DESC LIMIT 1",
+        (content_hash, FAILED),
+    ).fetchone()
+    return _row_to_dict(row) if row else None
+
+
+def _set_status(document_id: str, status: str, **fields: Any) -> None:
+    cols = ", ".join(f"{k} = ?" for k in fields)
+    sql = f"UPDATE documents SET status = ?, updated_at = ?{', ' + cols if cols else ''} WHERE document_id = ?"
+    get_conn().execute(sql, (status, utcnow(), *fields.values(), document_id))
+
+
+class IngestQueue:
+    """Bounded worker pool for document ingestion."""
+
+    def __init__(self, workers: int, max_pending: int, max_attempts: int) -> None:
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.max_attempts = max(1, max_attempts)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="ingest"
+                )
+            return self._pool
+
+    def _reserve(self, *, bounded: bool = True) -> None:
+        """Take a pending slot; the check and the increment share one critical section."""
+        with self._lock:
+            if bounded and self._pending >= self.max_pending:
+                raise IngestBacklogFull(f"{self._pending} ingestion jobs already pending")
+            self._pending += 1
+            _PENDING.set(self._pending)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+            _PENDING.set(self._pending)
+
+    def _enqueue(self, document_id: str) -> None:
+        # Recovered and retried jobs were admitted once already: not bounded
+        self._reserve(bounded=False)
+        self._executor().submit(self._run, document_id)
+
+    def _enqueue_later(self, document_id: str, delay_s: float) -> None:
+        # Backoff on a timer so a retrying job doesn't hold a worker thread.
+        timer = threading.Timer(delay_s, self._enqueue, args=(document_id,))
+        timer.daemon = True
+        timer.start()
+
+    # ---------- public API ----------
+
+    def submit(
+        self,
+        path: str | Path,
+        filename: str,
+        *,
+        content_hash: Optional[str] = None,
+        size_bytes: int = 0,
+        commit: Optional[Callable[[Path], Path]] = None,
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Record a QUEUED job for a saved file and schedule it.
+
+        With a content_hash, a live (non-FAILED) job for the same content is
+        returned instead: (job, True). The lookup, the pending-slot check,
+        `commit(path)` (e.g. moving a streamed upload into place) and the
+        insert run in one BEGIN IMMEDIATE transaction, so concurrent uploads
+        of one file can't both be queued.
+
+        Raises IngestBacklogFull when INGEST_MAX_PENDING jobs are pending.
+        """
+        document_id = uuid.uuid4().hex
+        reserved = False
+        try:
+            with transaction() as conn:
+                existing = find_by_hash(content_hash, conn) if content_hash else None
+                if existing is not None:
+                    return existing, True
+                self._reserve()
+                reserved = True
+                if commit is not None:
+                    path = commit(Path(path))
+                now = utcnow()
+                conn.execute(
+                    "INSERT INTO documents (document_id, filename, path, content_hash, size_bytes,"
+                    " status, attempts, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?)",
+                    (document_id, filename, str(path), content_hash, size_bytes, QUEUED, now, now),
+                )
+        except BaseException:
+            if reserved:
+                self._release()
+            raise
+        self._executor().submit(self._run, document_id)
+        return get_job(document_id), False
+
+    def recover(self) -> int:
+        """Re-queue jobs left QUEUED/PROCESSING by a previous process."""
+        rows = get_conn().execute(
+            "SELECT document_id FROM documents WHERE status IN (?, ?) ORDER BY created_at",
+            (QUEUED, PROCESSING),
+        ).fetchall()
+        for row in rows:
+            _set_status(row["document_id"], QUEUED)
+            self._enqueue(row["document_id"])
+        if rows:
+            log.info("Re-queued %d unfinished ingestion jobs", len(rows))
+        return len(rows)
+
+    def shutdown(self, wait: bool = False) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    # ---------- worker ----------
+
+    def _run(self, document_id: str) -> None:
+        # Imported here so the worker module stays cheap to import.
+        from app.services.storage import save_and_index_pdf
+
+        retry_in: Optional[float] = None
+        try:
+            job = get_job(document_id)
+            if job is None or job["status"] in (READY, FAILED):
+                return
+
+            attempt = job["attempts"] + 1
+            _set_status(document_id, PROCESSING, attempts=attempt, error=None)
+
+            start = time.perf_counter()
+            try:
+                result = save_and_index_pdf(job["path"], source="upload", content_hash=job["content_hash"])
+                error = None if result.get("ok") else result.get("error", "Unknown indexing error")
+                # Extraction/chunking errors are properties of the file; only
+                # indexing (vectorstore) errors are worth retrying.
+                retryable = bool(error) and error.startswith("Indexing failed")
+            except Exception as e:
+                log.exception("Ingestion job %s crashed", document_id)
+                result, error, retryable = {}, str(e), True
+            _JOB_SECONDS.observe(time.perf_counter() - start)
+
+            if error is None:
+                _set_status(
+                    document_id,
+                    READY,
+                    page_count=result.get("pages", 0),
+                    chunk_count=result.get("chunks_indexed", 0),
+                )
+                _JOBS.inc(status=READY)
+                log.info("Ingestion job %s ready (%s chunks)", document_id, result.get("chunks_indexed"))
+            elif retryable and attempt < self.max_attempts:
+                retry_in = settings.ingest_retry_backoff_s * (2 ** (attempt - 1))
+                _set_status(document_id, QUEUED, error=error)
+                log.warning("Ingestion job %s failed (attempt %d), retrying in %.0fs: %s",
+                            document_id, attempt, retry_in, error)
+            else:
+                _set_status(document_id, FAILED, error=error)
+                _JOBS.inc(status=FAILED)
+                log.error("Ingestion job %s failed permanently: %s", document_id, error)
+        finally:
+            self._release()
+
+        if retry_in is not None:
+            self._enqueue_later(document_id, retry_in)
+
+
+ingest_queue = IngestQueue(
+    workers=settings.ingest_workers,
+    max_pending=settings.ingest_max_pending,
+    max_attempts=settings.ingest_max_attempts,
+)
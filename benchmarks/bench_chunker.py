@@ -0,0 +1,168 @@
+# benchmarks/bench_chunker.py
+"""
+Chunker throughput (chunks/sec, MB/sec): unified token-aware chunker vs
+the three character chunkers it replaced.
+
+The legacy implementations are copied here verbatim-in-spirit so the
+comparison stays reproducible after their removal from the app.
+
+Usage:
+    python -m benchmarks.bench_chunker --pages 400
+    python -m benchmarks.bench_chunker --tokenizer path/to/tokenizer.json
+    python -m benchmarks.bench_chunker --tokenizer sentence-transformers/all-MiniLM-L6-v2
+
+Without --tokenizer the embedding model's tokenizer is used when it can be
+loaded, otherwise the word-split fallback.
+
+Writes results/chunker_<timestamp>.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import pathlib
+import random
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.services.chunker import embedding_tokenizer, iter_chunks
+
+RESULTS_DIR = pathlib.Path("results")
+
+_WORDS = (
+    "the transformer replaces recurrence with self attention allowing every position "
+    "to attend to every other position in a single step gradient descent converges "
+    "when the learning rate is small enough relative to the curvature of the loss"
+).split()
+
+
+def synthetic_pages(pages: int, seed: int = 0) -> List[Tuple[int, str]]:
+    rng = random.Random(seed)
+    out = []
+    for p in range(pages):
+        sentences = []
+        for _ in range(rng.randint(25, 40)):
+            words = [rng.choice(_WORDS) for _ in range(rng.randint(6, 28))]
+            sentences.append(" ".join(words).capitalize() + rng.choice([". ", "? ", ". ", ".\n\n"]))
+        out.append((p + 1, "".join(sentences)))
+    return out
+
+
+# ---------- legacy chunkers (pre-unification) ----------
+
+def legacy_storage_chunk_text(text: str, chunk_chars: int = 1400, overlap: int = 200) -> List[str]:
+    chunks: List[str] = []
+    n = len(text)
+    start = 0
+    while start < n:
+        end = min(start + chunk_chars, n)
+        window = text[start:end]
+        split_at = max(window.rfind("\n\n"), window.rfind(". "), window.rfind("? "), window.rfind("! "))
+        if split_at > 400:
+            end = start + split_at + 1
+        piece = text[start:end].strip()
+        if piece:
+            chunks.append(piece)
+        if end >= n:
+            break
+        start = max(0, end - overlap)
+    return chunks
+
+
+def legacy_chunker_chunk_text(text: str, max_chars: int = 800, overlap: int = 100) -> List[str]:
+    text = text.strip()
+    chunks: List[str] = []
+    start, length = 0, len(text)
+    while start < length:
+        end = min(start + max_chars, length)
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= length:
+            break
+        start = max(0, end - overlap)
+    return chunks
+
+
+def legacy_utils_chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
+    chunks = []
+    text = " ".join(text.split())
+    start = 0
+    while start < len(text):
+        chunk = text[start:start + chunk_size].strip()
+        if chunk:
+            chunks.append(chunk)
+        start += chunk_size - overlap
+    return chunks
+
+
+# ---------- timing ----------
+
+def _time(name: str, fn: Callable[[], int], chars: int, repeat: int) -> Dict[str, Any]:
+    fn()  # warm-up (tokenizer load, caches)
+    best = float("inf")
+    n = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        n = fn()
+        best = min(best, time.perf_counter() - t0)
+    return {
+        "chunker": name,
+        "chunks": n,
+        "seconds": round(best, 4),
+        "chunks_per_sec": round(n / best, 1) if best else None,
+        "mb_per_sec": round(chars / 1e6 / best, 2) if best else None,
+    }
+
+
+def _load_tokenizer(spec: str | None):
+    if spec is None:
+        return embedding_tokenizer()
+    from tokenizers import Tokenizer
+    tok = Tokenizer.from_file(spec) if pathlib.Path(spec).exists() else Tokenizer.from_pretrained(spec)
+    tok.no_truncation()
+    tok.no_padding()
+    return tok
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--pages", type=int, default=400)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--tokenizer", help="tokenizer.json path or HF repo id")
+    args = ap.parse_args()
+
+    pages = synthetic_pages(args.pages)
+    text = "\n\n".join(t.strip() for _, t in pages)
+    chars = len(text)
+    tokenizer = _load_tokenizer(args.tokenizer)
+
+    runs = [
+        _time("storage._chunk_text (legacy, 1400/200 chars)",
+              lambda: len(legacy_storage_chunk_text(text)), chars, args.repeat),
+        _time("chunker.chunk_text (legacy, 800/100 chars)",
+              lambda: len(legacy_chunker_chunk_text(text)), chars, args.repeat),
+        _time("utils.chunk_text (legacy, 500/50 chars)",
+              lambda: len(legacy_utils_chunk_text(text)), chars, args.repeat),
+        _time("iter_chunks (word-split fallback)",
+              lambda: sum(1 for _ in iter_chunks(pages, tokenizer=None)), chars, args.repeat),
+    ]
+    if tokenizer is not None:
+        runs.append(_time("iter_chunks (embedding tokenizer)",
+                          lambda: sum(1 for _ in iter_chunks(pages, tokenizer=tokenizer)),
+                          chars, args.repeat))
+
+    print(f"{args.pages} pages, {chars / 1e6:.2f} MB of text")
+    for r in runs:
+        print(f"  {r['chunker']:<48} {r['chunks']:>6} chunks  "
+              f"{r['chunks_per_sec']:>10} chunks/s  {r['mb_per_sec']:>6} MB/s")
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    out = RESULTS_DIR / f"chunker_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    out.write_text(json.dumps({"pages": args.pages, "chars": chars, "runs": runs}, indent=2))
+    print(f"Saved: {out}")
+
+
+if __name__ == "__main__":
+    main()
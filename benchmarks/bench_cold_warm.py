@@ -0,0 +1,105 @@
+# benchmarks/bench_cold_warm.py
+"""
+Cold vs warm latency for each Ollama model.
+
+For every model:
+    1) unload it (keep_alive=0) so the next call pays model-load cost
+    2) "cold": first RAG-shaped request (load + full prefill)
+    3) "warm": N more requests with the same instruction prefix but a
+       different question (model resident, shared prefix in KV cache)
+
+Ollama's own durations are recorded (load, prompt_eval, eval) so the gain
+can be attributed to model residency vs prefix reuse.
+
+Usage:
+    python -m benchmarks.bench_cold_warm --models phi3 mistral --repeats 3
+
+Writes results/cold_warm_<timestamp>.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import pathlib
+import time
+from typing import Any, Dict, List
+
+from app.services.llm import AVAILABLE_MODELS, get_client, keep_alive_for
+from app.services.prompts import rag_prompt
+
+RESULTS_DIR = pathlib.Path("results")
+
+CONTEXT = (
+    "[1] The Transformer relies entirely on self-attention to compute representations "
+    "of its input and output without using sequence-aligned RNNs or convolution.\n\n"
+    "[2] Multi-head attention allows the model to jointly attend to information from "
+    "different representation subspaces at different positions."
+)
+QUESTIONS = [
+    "What does the Transformer use instead of recurrence?",
+    "Why is multi-head attention useful?",
+    "What are representation subspaces?",
+    "Does the Transformer use convolutions?",
+]
+
+
+def _timed_generate(model_id: str, prompt: str, keep_alive) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    resp = get_client().generate(
+        model=model_id,
+        prompt=prompt,
+        options={"num_predict": 64, "temperature": 0.0},
+        keep_alive=keep_alive,
+    )
+    wall_ms = (time.perf_counter() - t0) * 1000
+    return {
+        "wall_ms": round(wall_ms, 1),
+        "load_ms": round((resp.get("load_duration") or 0) / 1e6, 1),
+        "prompt_eval_count": resp.get("prompt_eval_count"),
+        "prompt_eval_ms": round((resp.get("prompt_eval_duration") or 0) / 1e6, 1),
+        "eval_count": resp.get("eval_count"),
+        "eval_ms": round((resp.get("eval_duration") or 0) / 1e6, 1),
+    }
+
+
+def bench_model(model_name: str, repeats: int) -> Dict[str, Any]:
+    model_id = AVAILABLE_MODELS[model_name]
+    keep_alive = keep_alive_for(model_name)
+
+    # Unload so the first request is genuinely cold
+    get_client().generate(model=model_id, prompt="", keep_alive=0)
+
+    cold = _timed_generate(model_id, rag_prompt(QUESTIONS[0], CONTEXT), keep_alive)
+    warm: List[Dict[str, Any]] = []
+    for i in range(repeats):
+        q = QUESTIONS[1 + i % (len(QUESTIONS) - 1)]
+        warm.append(_timed_generate(model_id, rag_prompt(q, CONTEXT), keep_alive))
+
+    avg = lambda key: round(sum(w[key] for w in warm) / len(warm), 1) if warm else None
+    return {
+        "cold": cold,
+        "warm": warm,
+        "warm_avg_wall_ms": avg("wall_ms"),
+        "warm_avg_prompt_eval_ms": avg("prompt_eval_ms"),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--models", nargs="+", default=list(AVAILABLE_MODELS))
+    ap.add_argument("--repeats", type=int, default=3)
+    args = ap.parse_args()
+
+    report = {m: bench_model(m, args.repeats) for m in args.models}
+    for m, r in report.items():
+        print(f"{m}: cold {r['cold']['wall_ms']} ms -> warm {r['warm_avg_wall_ms']} ms")
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    out = RESULTS_DIR / f"cold_warm_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Saved: {out}")
+
+
+if __name__ == "__main__":
+    main()
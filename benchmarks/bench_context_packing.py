@@ -0,0 +1,113 @@
+# benchmarks/bench_context_packing.py
+"""
+Prompt size / latency before vs after token-budgeted context packing.
+
+For every benchmark question:
+    - retrieve chunks once (same retrieval for both variants)
+    - "before": build_rag_prompt with every chunk in full (old behaviour)
+    - "after":  chunks packed into the model's token budget
+    - count prompt tokens with the model tokenizer and time the packing
+    - with --llm, also send both prompts to Ollama and record latency
+
+Usage:
+    python -m benchmarks.bench_context_packing --model phi3 --top-k 8
+    python -m benchmarks.bench_context_packing --model mistral --llm
+
+Writes results/context_packing_<timestamp>.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import pathlib
+import statistics
+import time
+from typing import Any, Dict, List
+
+from app.services.context_packer import pack_chunks
+from app.services.generator import build_rag_prompt
+from app.services.pipeline import vs_query
+from app.services.token_counter import count_tokens
+
+QUESTIONS_FILE = pathlib.Path("app/benchmark_questions.json")
+RESULTS_DIR = pathlib.Path("results")
+
+
+def _llm_latency(prompt: str, model: str) -> float:
+    from app.services.llm import generate_response
+
+    t0 = time.perf_counter()
+    generate_response(prompt=prompt, model_name=model, max_tokens=200, temperature=0.0)
+    return (time.perf_counter() - t0) * 1000
+
+
+def run(model: str, top_k: int, mode: str, with_llm: bool) -> Dict[str, Any]:
+    questions = json.loads(QUESTIONS_FILE.read_text(encoding="utf-8-sig"))["questions"]
+    rows: List[Dict[str, Any]] = []
+
+    for q in questions:
+        question = q["question"]
+        chunks = vs_query(query=question, top_k=top_k, mode=mode)
+        if not chunks:
+            continue
+
+        before = build_rag_prompt(question, chunks)
+
+        t0 = time.perf_counter()
+        packed, stats = pack_chunks(question, chunks, model=model)
+        pack_ms = (time.perf_counter() - t0) * 1000
+        after = build_rag_prompt(question, packed)
+
+        row = {
+            "id": q["id"],
+            "tokens_before": count_tokens(before, model),
+            "tokens_after": count_tokens(after, model),
+            "pack_ms": round(pack_ms, 3),
+            "pack_stats": stats,
+        }
+        if with_llm:
+            row["llm_ms_before"] = round(_llm_latency(before, model), 1)
+            row["llm_ms_after"] = round(_llm_latency(after, model), 1)
+        rows.append(row)
+        print(f"[{q['id']}] {row['tokens_before']} -> {row['tokens_after']} tokens")
+
+    def _mean(key: str) -> float | None:
+        vals = [r[key] for r in rows if key in r]
+        return round(statistics.mean(vals), 2) if vals else None
+
+    return {
+        "model": model,
+        "top_k": top_k,
+        "mode": mode,
+        "questions": len(rows),
+        "summary": {
+            "avg_tokens_before": _mean("tokens_before"),
+            "avg_tokens_after": _mean("tokens_after"),
+            "avg_pack_ms": _mean("pack_ms"),
+            "avg_llm_ms_before": _mean("llm_ms_before"),
+            "avg_llm_ms_after": _mean("llm_ms_after"),
+        },
+        "rows": rows,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--model", default="phi3")
+    ap.add_argument("--top-k", type=int, default=8)
+    ap.add_argument("--mode", default="hybrid")
+    ap.add_argument("--llm", action="store_true", help="also measure Ollama latency")
+    args = ap.parse_args()
+
+    report = run(args.model, args.top_k, args.mode, args.llm)
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    out = RESULTS_DIR / f"context_packing_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(json.dumps(report["summary"], indent=2))
+    print(f"Saved: {out}")
+
+
+if __name__ == "__main__":
+    main()
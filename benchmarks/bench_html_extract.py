@@ -0,0 +1,151 @@
+# benchmarks/bench_html_extract.py
+"""
+HTML main-content extraction speed: lxml extractor vs BeautifulSoup.
+
+Runs each extractor over a set of saved HTML pages and reports ms/page and
+MB/s, plus how closely the extracted text matches the legacy output.
+
+Usage:
+    python -m benchmarks.bench_html_extract --dir saved_pages/      # *.html / *.htm
+    python -m benchmarks.bench_html_extract --synthetic 20           # generated docs pages
+
+Save real pages with e.g. `curl -o saved_pages/attention.html <url>`.
+
+Writes results/html_extract_<timestamp>.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import json
+import pathlib
+import random
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from bs4 import BeautifulSoup
+
+from app.services.html_extract import extract_html
+
+RESULTS_DIR = pathlib.Path("results")
+
+
+# ---------- legacy extractor (routes_url before the lxml module) ----------
+
+def legacy_extract(html: str, parser: str = "html.parser") -> Tuple[str, str]:
+    soup = BeautifulSoup(html, parser)
+    for tag in soup(['script', 'style', 'nav', 'footer', 'aside', 'header']):
+        tag.decompose()
+    main_content = (
+        soup.find('article') or
+        soup.find('main') or
+        soup.find('div', class_=lambda x: x and 'content' in x.lower()) or
+        soup.find('body')
+    )
+    if main_content:
+        text = main_content.get_text(separator="\n", strip=True)
+    else:
+        text = soup.get_text(separator="\n", strip=True)
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    title = soup.find('title').get_text() if soup.find('title') else ""
+    return title, '\n'.join(lines)
+
+
+# ---------- inputs ----------
+
+def synthetic_docs_page(seed: int, sections: int = 120) -> str:
+    """Documentation-style page: deep nav, code blocks, tables, long body."""
+    rng = random.Random(seed)
+    words = ("tensor gradient attention layer optimizer batch kernel module parameter "
+             "sequence embedding projection residual normalization dropout").split()
+
+    def sentence() -> str:
+        return " ".join(rng.choice(words) for _ in range(rng.randint(8, 20))).capitalize() + "."
+
+    nav = "".join(f"<li><a href='/api/{i}'>API {i}</a></li>" for i in range(300))
+    body = []
+    for s in range(sections):
+        rows = "".join(f"<tr><td>{rng.choice(words)}</td><td>{sentence()}</td></tr>" for _ in range(5))
+        body.append(
+            f"<section><h2>Section {s}</h2><p>{' '.join(sentence() for _ in range(6))}</p>"
+            f"<pre><code>def f_{s}(x):\n    return x * {s}\n</code></pre>"
+            f"<table>{rows}</table><ul>{''.join(f'<li>{sentence()}</li>' for _ in range(4))}</ul></section>"
+        )
+    return (
+        f"<!DOCTYPE html><html><head><title>Docs page {seed}</title>"
+        + "".join(f"<script>var x{i} = {i};</script>" for i in range(20))
+        + "<style>body{font-family:sans-serif}</style></head><body>"
+        f"<header><nav><ul>{nav}</ul></nav></header>"
+        f"<div class='page'><aside><ul>{nav}</ul></aside>"
+        f"<div class='main-content'>{''.join(body)}</div></div>"
+        "<footer>Footer text</footer></body></html>"
+    )
+
+
+def load_pages(args: argparse.Namespace) -> List[Tuple[str, str]]:
+    if args.dir:
+        paths = sorted(p for p in pathlib.Path(args.dir).iterdir() if p.suffix.lower() in (".html", ".htm"))
+        return [(p.name, p.read_text(encoding="utf-8", errors="replace")) for p in paths]
+    return [(f"synthetic-{i}", synthetic_docs_page(i)) for i in range(args.synthetic)]
+
+
+# ---------- timing ----------
+
+def _run(name: str, fn: Callable[[str], Tuple[str, str]], pages: List[Tuple[str, str]],
+         repeat: int) -> Tuple[Dict[str, Any], List[str]]:
+    total_bytes = sum(len(h.encode("utf-8")) for _, h in pages)
+    best = float("inf")
+    texts: List[str] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        texts = [fn(h)[1] for _, h in pages]
+        best = min(best, time.perf_counter() - t0)
+    return {
+        "extractor": name,
+        "pages": len(pages),
+        "seconds": round(best, 4),
+        "ms_per_page": round(best * 1000 / len(pages), 2),
+        "mb_per_sec": round(total_bytes / 1e6 / best, 2),
+        "chars": sum(len(t) for t in texts),
+    }, texts
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--dir", help="directory of saved .html pages")
+    ap.add_argument("--synthetic", type=int, default=20, help="generated pages when --dir is not given")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    pages = load_pages(args)
+    if not pages:
+        ap.error("no pages found")
+
+    legacy, legacy_texts = _run("bs4 html.parser (legacy)", legacy_extract, pages, args.repeat)
+    runs = [legacy]
+    for name, fn in (
+        ("bs4 lxml backend", lambda h: legacy_extract(h, "lxml")),
+        ("html_extract (lxml)", extract_html),
+    ):
+        run, texts = _run(name, fn, pages, args.repeat)
+        run["speedup"] = round(legacy["seconds"] / run["seconds"], 1)
+        run["similarity_to_legacy"] = round(sum(
+            difflib.SequenceMatcher(None, a, b, autojunk=False).quick_ratio()
+            for a, b in zip(legacy_texts, texts)
+        ) / len(pages), 3)
+        runs.append(run)
+
+    print(f"{len(pages)} pages, {sum(len(h) for _, h in pages) / 1e6:.1f} MB")
+    for r in runs:
+        print(f"  {r['extractor']:<26} {r['ms_per_page']:>8} ms/page  {r['mb_per_sec']:>6} MB/s"
+              f"  x{r.get('speedup', 1.0)}  similarity {r.get('similarity_to_legacy', 1.0)}")
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    out = RESULTS_DIR / f"html_extract_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    out.write_text(json.dumps({"source": args.dir or "synthetic", "runs": runs}, indent=2))
+    print(f"Saved: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/bench_ingest_pipeline.py
+"""
+Ingestion pipeline throughput: per-stage items/sec and peak RSS.
+
+Runs extract -> chunk -> embed -> index on a PDF (synthetic by default) and
+reports how busy each stage was, so the bottleneck stage is obvious.
+
+Usage:
+    python -m benchmarks.bench_ingest_pipeline --pages 400 --fake-embed
+    python -m benchmarks.bench_ingest_pipeline --pdf path/to/textbook.pdf --batch-size 32
+
+--fake-embed swaps the embedding model and Chroma for deterministic in-memory
+stand-ins (with an optional per-batch delay), isolating extraction/chunking
+cost from model cost.
+
+Writes results/ingest_pipeline_<timestamp>.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import pathlib
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from app.services.chunker import iter_chunks
+from app.services.extractor import iter_pdf_pages
+from app.services.ingest_pipeline import run_pipeline
+from benchmarks.bench_pdf_extract import write_synthetic_pdf
+
+RESULTS_DIR = pathlib.Path("results")
+
+
+def _fake_embedder(dim: int, delay_ms: float):
+    def embed(texts: List[str]) -> List[List[float]]:
+        if delay_ms:
+            time.sleep(delay_ms / 1000.0)
+        out = []
+        for t in texts:
+            digest = hashlib.sha256(t.encode("utf-8")).digest()
+            out.append([digest[i % len(digest)] / 255.0 for i in range(dim)])
+        return out
+    return embed
+
+
+def _null_writer(**kwargs: Any) -> None:
+    return None
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--pdf", type=pathlib.Path, help="existing PDF (default: synthetic)")
+    ap.add_argument("--pages", type=int, default=400)
+    ap.add_argument("--batch-size", type=int, default=None)
+    ap.add_argument("--queue-size", type=int, default=None)
+    ap.add_argument("--fake-embed", action="store_true", help="skip the real embedding model / Chroma")
+    ap.add_argument("--embed-delay-ms", type=float, default=0.0, help="per-batch delay for --fake-embed")
+    ap.add_argument("--dim", type=int, default=384)
+    args = ap.parse_args()
+
+    kwargs: Dict[str, Any] = {}
+    if args.fake_embed:
+        kwargs = {"embed_fn": _fake_embedder(args.dim, args.embed_delay_ms), "write_fn": _null_writer}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = args.pdf
+        if pdf is None:
+            pdf = pathlib.Path(tmp) / "synthetic.pdf"
+            write_synthetic_pdf(pdf, args.pages)
+
+        run = run_pipeline(
+            iter_pdf_pages(pdf),
+            f"bench-{pdf.name}",
+            {"source": "benchmark", "filename": pdf.name},
+            chunker=iter_chunks,
+            batch_size=args.batch_size,
+            queue_size=args.queue_size,
+            **kwargs,
+        )
+
+    print(f"{run['pages']} pages -> {run['chunks_indexed']} chunks in {run['elapsed_s']}s "
+          f"(RSS +{run['rss_delta_mb']} MB during the run)")
+    for name, st in run["stages"].items():
+        print(f"  {name:<8} in={st['items_in']:>6} out={st['items_out']:>6} "
+              f"busy={st['busy_s']:>7}s  {st['items_per_sec']} items/s")
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    out = RESULTS_DIR / f"ingest_pipeline_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    out.write_text(json.dumps({
+        "pdf": str(args.pdf or "synthetic"),
+        "fake_embed": args.fake_embed,
+        "run": run,
+    }, indent=2))
+    print(f"Saved: {out}")
+
+
+if __name__ == "__main__":
+    main()
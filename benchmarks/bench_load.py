@@ -0,0 +1,364 @@
+# benchmarks/bench_load.py
+"""
+HTTP load test: throughput, latency percentiles and error rates vs concurrency.
+
+Locust-style closed loop: each virtual user repeatedly picks a scenario
+(weighted), sends it, waits a random think time, and goes again. The sweep
+runs every --users level for --duration seconds (after --warmup seconds
+whose requests are discarded).
+
+Scenarios (default weight):
+    query_semantic / query_keyword / query_hybrid (3/3/4)   POST /v1/query
+    compare (1)     POST /v1/compare (every model)
+    summarize (1)   POST /v1/summarize
+    quiz (1)        POST /v1/quiz/generate
+    upload (1)      POST /v1/upload (a unique small PDF each time)
+
+Before each level one synthetic PDF is uploaded and waited for, so there
+is something to retrieve from.
+
+--spawn starts benchmarks.fake_ollama in-process and `uvicorn app.main:app`
+with OLLAMA_HOST pointing at it, i.e. the full API with a stubbed LLM whose
+latency is set by --fake-ttft-ms / --fake-token-ms. The spawned API runs
+in a throwaway working directory (its own chroma_db/, uploaded_files/,
+SQLite store and BM25 index), never the repo's, and is restarted on a
+fresh one for every --users level: the `upload` scenario grows the index,
+so levels sharing a corpus would not be comparable. Without --spawn the
+target is --base-url (start the fake and the API yourself; its corpus
+grows across levels).
+
+Usage:
+    python -m benchmarks.bench_load --spawn --users 1 5 10 20 --duration 30
+    python -m benchmarks.bench_load --base-url http://127.0.0.1:8000 --scenarios query_hybrid=1
+    python -m benchmarks.bench_load --spawn --scenarios query_hybrid=4 compare=1 --think-ms 0 0
+
+429 and 503 responses are the admission controller shedding load and are
+reported as `shed`; every other non-2xx answer or transport error counts
+as an error.
+
+Writes results/load_<timestamp>.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.bench_pdf_extract import write_synthetic_pdf
+from benchmarks.bench_retrieval import percentile
+
+RESULTS_DIR = pathlib.Path("results")
+
+QUESTIONS = [
+    "What problem does the Transformer address compared to RNNs?",
+    "How does multi-head attention work?",
+    "Why is positional encoding needed?",
+    "What is masked self-attention used for?",
+    "How are variable-length sequences handled?",
+]
+
+Call = Callable[[httpx.AsyncClient, random.Random], Awaitable[httpx.Response]]
+
+
+# ---------- scenarios ----------
+
+def _query(mode: str) -> Call:
+    async def call(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+        return await client.post("/v1/query", json={"query": rng.choice(QUESTIONS), "mode": mode, "top_k": 5})
+    return call
+
+
+async def _compare(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+    return await client.post("/v1/compare", json={"question": rng.choice(QUESTIONS), "max_tokens": 200})
+
+
+async def _summarize(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+    return await client.post("/v1/summarize", json={"max_chunks": 5})
+
+
+async def _quiz(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+    return await client.post("/v1/quiz/generate", json={"topic": "attention", "num_questions": 3})
+
+
+_PDF_BYTES: Dict[int, bytes] = {}
+
+
+def _pdf_bytes(pages: int) -> bytes:
+    if pages not in _PDF_BYTES:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = pathlib.Path(tmp) / "load.pdf"
+            write_synthetic_pdf(path, pages)
+            _PDF_BYTES[pages] = path.read_bytes()
+    return _PDF_BYTES[pages]
+
+
+async def _upload(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+    # A trailing comment changes the hash (no dedupe hit) without changing the text
+    data = _pdf_bytes(3) + f"% {uuid.uuid4().hex}\n".encode()
+    return await client.post("/v1/upload", files={"file": ("load.pdf", data, "application/pdf")})
+
+
+SCENARIOS: Dict[str, Tuple[int, Call]] = {
+    "query_semantic": (3, _query("semantic")),
+    "query_keyword": (3, _query("keyword")),
+    "query_hybrid": (4, _query("hybrid")),
+    "compare": (1, _compare),
+    "summarize": (1, _summarize),
+    "quiz": (1, _quiz),
+    "upload": (1, _upload),
+}
+
+
+# ---------- load generation ----------
+
+class Recorder:
+    def __init__(self) -> None:
+        self.measuring = False
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, name: str, ms: float, status: str) -> None:
+        if self.measuring:
+            self.latencies[name].append(ms)
+            self.statuses[name][status] += 1
+
+
+async def _user(client: httpx.AsyncClient, names: List[str], weights: List[int], rec: Recorder,
+                stop: asyncio.Event, think_ms: Tuple[float, float], seed: int) -> None:
+    rng = random.Random(seed)
+    while not stop.is_set():
+        name = rng.choices(names, weights=weights)[0]
+        t0 = time.perf_counter()
+        try:
+            resp = await SCENARIOS[name][1](client, rng)
+            status = str(resp.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        rec.record(name, (time.perf_counter() - t0) * 1000, status)
+        if think_ms[1] > 0:
+            await asyncio.sleep(rng.uniform(*think_ms) / 1000)
+
+
+def _summarize_level(rec: Recorder, users: int, duration: float) -> Dict[str, Any]:
+    def stats(lat: List[float], statuses: Counter) -> Dict[str, Any]:
+        lat = sorted(lat)
+        n = len(lat)
+        shed = statuses["429"] + statuses["503"]
+        ok = sum(c for s, c in statuses.items() if s.isdigit() and 200 <= int(s) < 300)
+        return {
+            "requests": n,
+            "rps": round(n / duration, 2),
+            "error_rate": round((n - ok - shed) / n, 4) if n else 0.0,
+            "shed_rate": round(shed / n, 4) if n else 0.0,
+            "latency_ms": {f"p{p}": round(percentile(lat, p), 1) for p in (50, 95, 99)}
+                          | {"max": round(lat[-1], 1) if lat else 0.0},
+            "statuses": dict(statuses),
+        }
+
+    all_lat = [ms for lat in rec.latencies.values() for ms in lat]
+    all_status = sum(rec.statuses.values(), Counter())
+    return {
+        "users": users,
+        "duration_s": duration,
+        **stats(all_lat, all_status),
+        "by_scenario": {name: stats(rec.latencies[name], rec.statuses[name]) for name in sorted(rec.latencies)},
+    }
+
+
+async def run_level(base_url: str, users: int, weights: Dict[str, int], warmup: float, duration: float,
+                    think_ms: Tuple[float, float], timeout: float) -> Dict[str, Any]:
+    rec = Recorder()
+    stop = asyncio.Event()
+    names = list(weights)
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        tasks = [asyncio.create_task(_user(client, names, [weights[n] for n in names], rec, stop, think_ms, i))
+                 for i in range(users)]
+        await asyncio.sleep(warmup)
+        rec.measuring = True
+        t0 = time.perf_counter()
+        await asyncio.sleep(duration)
+        rec.measuring = False
+        elapsed = time.perf_counter() - t0
+        stop.set()
+        # In-flight requests finish (and are not recorded) before the next level starts
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return _summarize_level(rec, users, round(elapsed, 2))
+
+
+# ---------- target setup ----------
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(base_url: str, timeout: float, path: str = "/v1/health") -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}{path}", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"API at {base_url} not ready after {timeout:.0f}s")
+
+
+def seed_document(base_url: str, pages: int, timeout: float) -> Dict[str, Any]:
+    """Upload one synthetic PDF and wait until it is READY (or already was)."""
+    resp = httpx.post(f"{base_url}/v1/upload", timeout=60,
+                      files={"file": ("load_seed.pdf", _pdf_bytes(pages), "application/pdf")})
+    resp.raise_for_status()
+    doc = resp.json()
+    deadline = time.monotonic() + timeout
+    while doc.get("status") not in ("READY", "FAILED") and time.monotonic() < deadline:
+        time.sleep(0.5)
+        doc = httpx.get(f"{base_url}/v1/documents/{doc['document_id']}", timeout=10).json()
+    if doc.get("status") != "READY":
+        raise SystemExit(f"Seed document did not become READY: {doc}")
+    return doc
+
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+
+def _isolated_env(workdir: pathlib.Path, fake_port: int) -> Dict[str, str]:
+    """Environment for the spawned API: the fake Ollama, and every file it writes under `workdir`"""
+    return dict(
+        os.environ,
+        OLLAMA_HOST=f"http://127.0.0.1:{fake_port}",
+        LOG_LEVEL="WARNING",
+        PYTHONPATH=os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])),
+        UPLOAD_DIR=str(workdir / "uploaded_files"),
+        METADATA_DB_PATH=str(workdir / "data" / "scholarstream.db"),
+        BM25_INDEX_PATH=str(workdir / "data" / "bm25_chunks.pkl"),
+    )
+
+
+def spawn(args: argparse.Namespace, workdir: pathlib.Path) -> Tuple[str, Callable[[], None]]:
+    """
+    Fake Ollama in-process + the API in a uvicorn subprocess whose state all
+    lives under `workdir` (the vectorstore persists to ./chroma_db, so the
+    process runs there too); returns (base_url, stop).
+    """
+    from benchmarks.fake_ollama import FakeConfig, serve
+
+    fake_port, api_port = _free_port(), _free_port()
+    fake = serve(port=fake_port, config=FakeConfig(
+        load_ms=0.0, ttft_ms=args.fake_ttft_ms, token_ms=args.fake_token_ms, max_tokens=args.fake_max_tokens,
+    ))
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(api_port), "--log-level", "warning"],
+        env=_isolated_env(workdir, fake_port),
+        cwd=workdir,
+    )
+    base_url = f"http://127.0.0.1:{api_port}"
+
+    def stop() -> None:
+        api.terminate()
+        try:
+            api.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            api.kill()
+        fake.shutdown()
+
+    try:
+        # /v1/ready: the embedding model and indexes are loaded before anything is measured
+        _wait_ready(base_url, timeout=180, path="/v1/ready")
+    except BaseException:
+        stop()
+        raise
+    return base_url, stop
+
+
+def _parse_weights(specs: Optional[List[str]]) -> Dict[str, int]:
+    if not specs:
+        return {name: w for name, (w, _) in SCENARIOS.items()}
+    weights = {}
+    for spec in specs:
+        name, _, w = spec.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name] = int(w or SCENARIOS[name][0])
+    return weights
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--base-url", default="http://127.0.0.1:8000")
+    ap.add_argument("--spawn", action="store_true", help="start fake Ollama + the API locally")
+    ap.add_argument("--users", type=int, nargs="+", default=[1, 2, 5, 10, 20])
+    ap.add_argument("--duration", type=float, default=30.0, help="measured seconds per level")
+    ap.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds per level")
+    ap.add_argument("--think-ms", type=float, nargs=2, default=[500.0, 1500.0], metavar=("MIN", "MAX"))
+    ap.add_argument("--scenarios", nargs="+", metavar="NAME[=WEIGHT]", help="subset / reweighting")
+    ap.add_argument("--timeout", type=float, default=120.0)
+    ap.add_argument("--seed-pages", type=int, default=20)
+    ap.add_argument("--fake-ttft-ms", type=float, default=100.0)
+    ap.add_argument("--fake-token-ms", type=float, default=10.0)
+    ap.add_argument("--fake-max-tokens", type=int, default=128)
+    args = ap.parse_args()
+
+    weights = _parse_weights(args.scenarios)
+    if not args.spawn:
+        _wait_ready(args.base_url.rstrip("/"), timeout=10)
+
+    levels = []
+    for users in args.users:
+        with tempfile.TemporaryDirectory(prefix="bench_load_") as work:
+            # A fresh API and corpus per level (see module docstring)
+            base_url, stop = spawn(args, pathlib.Path(work)) if args.spawn else (args.base_url.rstrip("/"),
+                                                                                  lambda: None)
+            try:
+                seed = seed_document(base_url, args.seed_pages, timeout=300)
+                print(f"Target {base_url}; seed document {seed['document_id']} READY")
+                level = asyncio.run(run_level(base_url, users, weights, args.warmup, args.duration,
+                                              tuple(args.think_ms), args.timeout))
+            finally:
+                stop()
+        levels.append(level)
+        lat = level["latency_ms"]
+        print(f"users {users:>3}: {level['rps']:7.2f} req/s  p50 {lat['p50']:7.1f}  p95 {lat['p95']:7.1f}  "
+              f"p99 {lat['p99']:7.1f} ms  errors {level['error_rate']:.1%}  shed {level['shed_rate']:.1%}")
+
+    base_p95 = levels[0]["latency_ms"]["p95"] if levels else 0.0
+    for level in levels:
+        level["p95_vs_first_level"] = round(level["latency_ms"]["p95"] / base_p95, 2) if base_p95 else None
+
+    report = {
+        "target": "spawned (fake Ollama)" if args.spawn else base_url,
+        "config": {
+            "users": args.users,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "think_ms": args.think_ms,
+            "weights": weights,
+            **({"fake_ttft_ms": args.fake_ttft_ms, "fake_token_ms": args.fake_token_ms,
+                "fake_max_tokens": args.fake_max_tokens} if args.spawn else {}),
+        },
+        "levels": levels,
+    }
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    out = RESULTS_DIR / f"load_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Saved: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# benchmarks/bench_pdf_extract.py
+"""
+PDF text extraction throughput (pages/sec): sequential vs process pool.
+
+Generates a synthetic multi-hundred-page text PDF (no external tools), then
+times extractor.iter_pdf_pages with different worker counts.
+
+Usage:
+    python -m benchmarks.bench_pdf_extract --pages 400 --workers 1 2 4 8
+    python -m benchmarks.bench_pdf_extract --pdf path/to/textbook.pdf
+
+Writes results/pdf_extract_<timestamp>.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import pathlib
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from app.services.extractor import iter_pdf_pages
+
+RESULTS_DIR = pathlib.Path("results")
+
+_SENTENCE = (
+    "The Transformer replaces recurrence with self-attention, allowing every "
+    "position to attend to every other position in a single step."
+)
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_synthetic_pdf(path: pathlib.Path, pages: int, lines_per_page: int = 45) -> None:
+    """Minimal valid PDF with `pages` pages of Helvetica text."""
+    objects: List[bytes] = []
+
+    def add(obj: bytes) -> int:
+        objects.append(obj)
+        return len(objects)  # 1-based object number
+
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_obj = add(b"")  # placeholder, filled once kids are known
+    kids: List[int] = []
+    for p in range(pages):
+        lines = [f"Page {p + 1} line {i + 1}. {_SENTENCE}" for i in range(lines_per_page)]
+        ops = ["BT", "/F1 9 Tf", "11 TL", "40 800 Td"]
+        ops += [f"({_escape(line)}) Tj T*" for line in lines]
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page = add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_obj, font, content)
+        )
+        kids.append(page)
+    objects[pages_obj - 1] = (
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % k for k in kids)
+        + b"] /Count %d >>" % len(kids)
+    )
+    catalog = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_obj)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % num + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog, xref
+    )
+    path.write_bytes(bytes(out))
+
+
+def time_extraction(pdf: pathlib.Path, workers: int) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    first_page_s = None
+    pages = chars = 0
+    for _, text in iter_pdf_pages(pdf, workers=workers):
+        if first_page_s is None:
+            first_page_s = time.perf_counter() - t0
+        pages += 1
+        chars += len(text)
+    elapsed = time.perf_counter() - t0
+    return {
+        "workers": workers,
+        "pages": pages,
+        "chars": chars,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(pages / elapsed, 1) if elapsed else None,
+        "first_page_ms": round((first_page_s or 0) * 1000, 1),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--pdf", type=pathlib.Path, help="existing PDF (default: synthetic)")
+    ap.add_argument("--pages", type=int, default=400)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = args.pdf
+        if pdf is None:
+            pdf = pathlib.Path(tmp) / "synthetic.pdf"
+            write_synthetic_pdf(pdf, args.pages)
+
+        # Warm the process pool so spawn cost isn't charged to the first run
+        list(iter_pdf_pages(pdf, workers=max(args.workers)))
+
+        runs = [time_extraction(pdf, w) for w in args.workers]
+
+    for r in runs:
+        print(f"workers={r['workers']:>2}  {r['pages_per_sec']:>8} pages/s  "
+              f"first page {r['first_page_ms']} ms")
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    out = RESULTS_DIR / f"pdf_extract_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    out.write_text(json.dumps({"pdf": str(args.pdf or "synthetic"), "runs": runs}, indent=2))
+    print(f"Saved: {out}")
+
+
+if __name__ == "__main__":
+    main()
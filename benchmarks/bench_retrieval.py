@@ -0,0 +1,330 @@
+# benchmarks/bench_retrieval.py
+"""
+Retrieval quality and latency, without the LLM.
+
+Ingests a fixed corpus into a throwaway Chroma collection and BM25 index
+(the live ./chroma_db and data/bm25_chunks.pkl are never touched), then runs
+every question of the benchmark file through each retrieval variant:
+
+    semantic        vs_query(mode="semantic")
+    keyword         vs_query(mode="keyword")
+    hybrid          vs_query(mode="hybrid")      (max-normalised score merge)
+    hybrid_rrf      reciprocal rank fusion of the semantic and BM25 lists
+    hybrid+rerank   hybrid candidates re-scored by a cross-encoder (--rerank-model)
+
+Quality is judged against each question's `expected_keywords`
+(case-insensitive substring match on the chunk text):
+
+    recall@k   share of the expected keywords found in the top-k chunks
+    hit@k      1 if any top-k chunk contains an expected keyword
+    mrr        1 / rank of the first chunk containing an expected keyword
+
+Latency is measured per call after one warm-up pass and reported as
+p50/p95/p99 per variant.
+
+Usage:
+    python -m benchmarks.bench_retrieval
+    python -m benchmarks.bench_retrieval --corpus course_material/ --top-k 8 --repeat 10
+    python -m benchmarks.bench_retrieval --fake-embed --out results/retrieval_latest.json
+    python -m benchmarks.bench_retrieval --baseline results/retrieval_main.json
+
+--fake-embed uses hashed bag-of-words vectors instead of the embedding model,
+so the run needs no model download; semantic scores then only reflect word
+overlap. --baseline prints the change against an earlier result file and
+exits 1 if recall@k or MRR of any variant dropped by more than --tolerance.
+
+Writes results/retrieval_<timestamp>.json (or --out)
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import pathlib
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+
+RESULTS_DIR = pathlib.Path("results")
+DEFAULT_CORPUS = pathlib.Path(__file__).parent / "fixtures" / "retrieval_corpus.md"
+DEFAULT_QUESTIONS = pathlib.Path("app") / "benchmark_questions.json"
+CUTOFFS = (1, 3, 5)
+RRF_K = 60
+
+Retriever = Callable[[str, int], List[Dict[str, Any]]]
+
+
+# ---------- corpus ----------
+
+class HashEmbeddings:
+    """Deterministic bag-of-words vectors (hashing trick), L2-normalised."""
+
+    def __init__(self, dim: int = 384) -> None:
+        self.dim = dim
+
+    def _vec(self, text: str) -> List[float]:
+        v = [0.0] * self.dim
+        for word in re.findall(r"\w+", text.lower()):
+            h = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "little")
+            v[h % self.dim] += 1.0 if h >> 63 else -1.0
+        norm = math.sqrt(sum(x * x for x in v)) or 1.0
+        return [x / norm for x in v]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._vec(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vec(text)
+
+
+def _corpus_files(path: pathlib.Path) -> List[pathlib.Path]:
+    if path.is_file():
+        return [path]
+    return sorted(p for p in path.rglob("*") if p.is_file() and p.suffix.lower() in (".pdf", ".txt", ".md"))
+
+
+def _iter_pages(path: pathlib.Path) -> Iterator[Tuple[int, str]]:
+    if path.suffix.lower() != ".pdf":
+        yield 1, path.read_text(encoding="utf-8", errors="replace")
+        return
+    from app.services.extractor import iter_pdf_pages
+    yield from iter_pdf_pages(path)
+
+
+def build_index(corpus: pathlib.Path, workdir: pathlib.Path, fake_embed: bool) -> Dict[str, Any]:
+    """Point vectorstore / bm25_index at fresh in-memory indexes and ingest `corpus`."""
+    from langchain_community.vectorstores import Chroma
+
+    from app.services import bm25_index, vectorstore
+    from app.services.chunker import iter_chunks
+    from app.services.ingest_pipeline import bm25_writer, run_pipeline
+
+    if fake_embed:
+        embeddings = HashEmbeddings()
+    else:
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+
+    # No persist_directory: an ephemeral collection that disappears with the process
+    vectorstore._vectorstore = Chroma(collection_name="bench_retrieval", embedding_function=embeddings)
+    settings.bm25_index_path = str(workdir / "bm25_chunks.pkl")
+
+    files = _corpus_files(corpus)
+    if not files:
+        raise SystemExit(f"No .pdf/.txt/.md files under {corpus}")
+    t0 = time.perf_counter()
+    chunks = 0
+    for i, path in enumerate(files):
+        doc_id = f"bench-{i}"
+        run = run_pipeline(
+            _iter_pages(path), doc_id, {"source": "benchmark", "filename": path.name},
+            chunker=iter_chunks, write_fn=bm25_writer(doc_id),
+        )
+        chunks += run["chunks_indexed"]
+    bm25_index.save()
+    return {"files": len(files), "chunks": chunks, "ingest_s": round(time.perf_counter() - t0, 3)}
+
+
+# ---------- retrieval variants ----------
+
+def _rrf(lists: List[List[Dict[str, Any]]], top_k: int) -> List[Dict[str, Any]]:
+    scores: Dict[str, float] = {}
+    by_text: Dict[str, Dict[str, Any]] = {}
+    for results in lists:
+        for rank, r in enumerate(results, start=1):
+            scores[r["text"]] = scores.get(r["text"], 0.0) + 1.0 / (RRF_K + rank)
+            by_text.setdefault(r["text"], r)
+    ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [dict(by_text[t], score=scores[t]) for t in ranked]
+
+
+def variants(rerank_model: Optional[str], pool: int) -> Dict[str, Retriever]:
+    from app.services.bm25_index import query as bm25_query
+    from app.services.pipeline import vs_query
+    from app.services.vectorstore import semantic_query
+
+    out: Dict[str, Retriever] = {
+        "semantic": lambda q, k: vs_query(q, top_k=k, mode="semantic"),
+        "keyword": lambda q, k: vs_query(q, top_k=k, mode="keyword"),
+        "hybrid": lambda q, k: vs_query(q, top_k=k, mode="hybrid"),
+        "hybrid_rrf": lambda q, k: _rrf([semantic_query(q, top_k=k * pool), bm25_query(q, top_k=k * pool)], k),
+    }
+    if rerank_model:
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError:
+            print("sentence-transformers not installed; skipping hybrid+rerank", file=sys.stderr)
+            return out
+        encoder = CrossEncoder(rerank_model)
+
+        def reranked(q: str, k: int) -> List[Dict[str, Any]]:
+            candidates = vs_query(q, top_k=k * pool, mode="hybrid")
+            if not candidates:
+                return []
+            scores = encoder.predict([(q, c["text"]) for c in candidates])
+            order = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)[:k]
+            return [dict(candidates[i], score=float(scores[i])) for i in order]
+
+        out["hybrid+rerank"] = reranked
+    return out
+
+
+# ---------- scoring ----------
+
+def score_results(results: List[Dict[str, Any]], keywords: List[str], top_k: int) -> Dict[str, float]:
+    kws = [k.lower() for k in keywords]
+    texts = [r["text"].lower() for r in results]
+    row: Dict[str, float] = {}
+    for k in sorted(set(CUTOFFS + (top_k,))):
+        if k > top_k:
+            continue
+        found = {kw for kw in kws for t in texts[:k] if kw in t}
+        row[f"recall@{k}"] = len(found) / len(kws)
+        row[f"hit@{k}"] = 1.0 if found else 0.0
+    first = next((i for i, t in enumerate(texts, start=1) if any(kw in t for kw in kws)), None)
+    row["mrr"] = 1.0 / first if first else 0.0
+    return row
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * p / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def bench_variant(fn: Retriever, questions: List[Dict[str, Any]], top_k: int, repeat: int) -> Dict[str, Any]:
+    for q in questions:  # warm-up: model load, IDF, caches
+        fn(q["question"], top_k)
+
+    per_question: List[Dict[str, Any]] = []
+    latencies: List[float] = []
+    for q in questions:
+        results: List[Dict[str, Any]] = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            results = fn(q["question"], top_k)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        per_question.append({"id": q["id"], **score_results(results, q["expected_keywords"], top_k)})
+
+    latencies.sort()
+    metric_keys = [k for k in per_question[0] if k != "id"] if per_question else []
+    return {
+        **{k: round(sum(r[k] for r in per_question) / len(per_question), 4) for k in metric_keys},
+        "latency_ms": {f"p{p}": round(percentile(latencies, p), 3) for p in (50, 95, 99)}
+                      | {"mean": round(sum(latencies) / len(latencies), 3) if latencies else 0.0},
+        "per_question": per_question,
+    }
+
+
+# ---------- comparison ----------
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Print per-variant deltas; return the quality regressions beyond `tolerance`."""
+    regressions: List[str] = []
+    for name, cur in report["variants"].items():
+        base = baseline.get("variants", {}).get(name)
+        if base is None:
+            print(f"  {name:<14} (not in baseline)")
+            continue
+        parts = []
+        for key in [k for k in cur if k.startswith("recall@") or k == "mrr"]:
+            if key not in base:
+                continue
+            delta = cur[key] - base[key]
+            parts.append(f"{key} {cur[key]:.3f} ({delta:+.3f})")
+            if delta < -tolerance:
+                regressions.append(f"{name} {key} {base[key]:.3f} -> {cur[key]:.3f}")
+        b50, c50 = base["latency_ms"]["p50"], cur["latency_ms"]["p50"]
+        parts.append(f"p50 {c50:.1f} ms ({(c50 - b50) / b50 * 100 if b50 else 0.0:+.0f}%)")
+        print(f"  {name:<14} " + "  ".join(parts))
+    return regressions
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--corpus", type=pathlib.Path, default=DEFAULT_CORPUS,
+                    help="file or directory of .pdf/.txt/.md (default: bundled lecture notes)")
+    ap.add_argument("--questions", type=pathlib.Path, default=DEFAULT_QUESTIONS)
+    ap.add_argument("--top-k", type=int, default=3, help="the bundled corpus is only ~10 chunks")
+    ap.add_argument("--repeat", type=int, default=5, help="timed calls per question and variant")
+    ap.add_argument("--pool", type=int, default=4, help="candidate multiplier for rrf / rerank")
+    ap.add_argument("--modes", nargs="+", help="subset of variants to run")
+    ap.add_argument("--rerank-model", help="cross-encoder for hybrid+rerank, e.g. cross-encoder/ms-marco-MiniLM-L-6-v2")
+    ap.add_argument("--fake-embed", action="store_true", help="hashed bag-of-words instead of the embedding model")
+    ap.add_argument("--out", type=pathlib.Path, help="result file (default: results/retrieval_<timestamp>.json)")
+    ap.add_argument("--baseline", type=pathlib.Path, help="earlier result file to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.02, help="allowed drop in recall@k / MRR")
+    args = ap.parse_args()
+
+    data = json.loads(args.questions.read_text(encoding="utf-8-sig"))
+    questions = [q for q in data["questions"] if q.get("expected_keywords")]
+    if not questions:
+        raise SystemExit(f"No questions with expected_keywords in {args.questions}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = build_index(args.corpus, pathlib.Path(tmp), args.fake_embed)
+        print(f"Indexed {corpus['chunks']} chunks from {corpus['files']} file(s) in {corpus['ingest_s']} s")
+
+        fns = variants(args.rerank_model, args.pool)
+        if args.modes:
+            fns = {name: fn for name, fn in fns.items() if name in args.modes}
+
+        report: Dict[str, Any] = {
+            "benchmark": "retrieval",
+            "git_commit": _git_commit(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "config": {
+                "corpus": str(args.corpus),
+                "questions": str(args.questions),
+                "n_questions": len(questions),
+                "top_k": args.top_k,
+                "repeat": args.repeat,
+                "pool": args.pool,
+                "embeddings": "hash" if args.fake_embed else settings.embeddings_model,
+                "rerank_model": args.rerank_model,
+                "chunk_max_tokens": settings.chunk_max_tokens,
+            },
+            "corpus": corpus,
+            "variants": {},
+        }
+        for name, fn in fns.items():
+            r = bench_variant(fn, questions, args.top_k, args.repeat)
+            report["variants"][name] = r
+            lat = r["latency_ms"]
+            print(f"{name:<14} recall@{args.top_k} {r[f'recall@{args.top_k}']:.3f}  mrr {r['mrr']:.3f}  "
+                  f"p50 {lat['p50']:.1f} ms  p95 {lat['p95']:.1f} ms  p99 {lat['p99']:.1f} ms")
+
+    out = args.out or RESULTS_DIR / f"retrieval_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Saved: {out}")
+
+    if args.baseline:
+        print(f"vs {args.baseline}:")
+        regressions = compare(report, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        if regressions:
+            print("Retrieval quality regressed:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
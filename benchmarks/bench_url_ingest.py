@@ -0,0 +1,112 @@
+# benchmarks/bench_url_ingest.py
+"""
+URL ingestion throughput against the local fixture server.
+
+Compares:
+    sequential   one fresh requests.get per URL (the old /v1/url/ingest path)
+    pooled       url_ingest.ingest_urls (pooled async client, per-host limits)
+    refresh      the same batch again: conditional GETs, expected all 304
+
+Indexing is replaced by chunking only (no embedding model / Chroma) unless
+--real-index is given, so the numbers isolate fetch + parse cost.
+
+Usage:
+    python -m benchmarks.bench_url_ingest --pages 200 --latency-ms 50 --concurrency 16 --per-host 8
+
+Writes results/url_ingest_<timestamp>.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import pathlib
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import requests
+
+from app.core.config import settings
+from app.services.chunker import chunk_text
+from app.services.html_extract import extract_html
+from app.services.url_ingest import ingest_urls
+from benchmarks.fixture_http import FixtureConfig, serve
+
+RESULTS_DIR = pathlib.Path("results")
+
+
+def _chunk_only(url: str, title: str, text: str) -> int:
+    return len(chunk_text(text))
+
+
+def run_sequential(urls: List[str]) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    chunks = 0
+    for url in urls:
+        resp = requests.get(url, timeout=15)
+        resp.raise_for_status()
+        _, text = extract_html(resp.text, url)
+        chunks += len(chunk_text(text))
+    return _summary("sequential", len(urls), time.perf_counter() - t0, chunks=chunks)
+
+
+def run_pooled(name: str, urls: List[str], **kwargs: Any) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    results = ingest_urls(urls, **kwargs)
+    elapsed = time.perf_counter() - t0
+    by_status: Dict[str, int] = {}
+    for r in results:
+        by_status[r["status"]] = by_status.get(r["status"], 0) + 1
+    return _summary(name, len(urls), elapsed,
+                    chunks=sum(r["chunks_indexed"] for r in results), statuses=by_status)
+
+
+def _summary(name: str, n: int, elapsed: float, **extra: Any) -> Dict[str, Any]:
+    return {"run": name, "urls": n, "seconds": round(elapsed, 3),
+            "urls_per_sec": round(n / elapsed, 1) if elapsed else None, **extra}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--pages", type=int, default=200)
+    ap.add_argument("--paragraphs", type=int, default=40)
+    ap.add_argument("--latency-ms", type=float, default=50.0)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--per-host", type=int, default=8)
+    ap.add_argument("--real-index", action="store_true", help="embed + write to Chroma")
+    ap.add_argument("--skip-sequential", action="store_true")
+    args = ap.parse_args()
+
+    server = serve("127.0.0.1", 0, FixtureConfig(args.pages, args.paragraphs, args.latency_ms))
+    host, port = server.server_address[:2]
+    urls = [f"http://{host}:{port}/page/{i}" for i in range(1, args.pages + 1)]
+
+    kwargs: Dict[str, Any] = {"concurrency": args.concurrency, "per_host": args.per_host}
+    if not args.real_index:
+        kwargs["index_fn"] = _chunk_only
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep the benchmark's url_cache rows out of the real metadata DB.
+        settings.metadata_db_path = str(pathlib.Path(tmp) / "bench.db")
+        if not args.skip_sequential:
+            runs.append(run_sequential(urls))
+        runs.append(run_pooled("pooled", urls, **kwargs))
+        runs.append(run_pooled("refresh", urls, **kwargs))
+    stats = requests.get(f"http://{host}:{port}/stats", timeout=5).json()
+    server.shutdown()
+
+    for r in runs:
+        print(f"{r['run']:<11} {r['urls']:>5} urls  {r['seconds']:>7}s  {r['urls_per_sec']:>7} urls/s"
+              f"  {r.get('statuses', '')}")
+    print(f"fixture: {stats}")
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    out = RESULTS_DIR / f"url_ingest_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    out.write_text(json.dumps({"config": vars(args), "runs": runs, "fixture": stats}, indent=2))
+    print(f"Saved: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+# benchmarks/fake_ollama.py
+"""
+Deterministic stand-in for the Ollama HTTP API (no GPU, no models).
+
+Implements the endpoints the app uses:
+    GET  /api/tags       list "installed" models
+    GET  /api/ps         list "loaded" models
+    GET  /api/version
+    POST /api/generate   streaming (NDJSON) and non-streaming
+
+Latency model (all configurable):
+    load      --load-ms           first request for a model that isn't loaded
+    prefill   --ttft-ms + --prefill-ms-per-token * prompt_tokens
+    decode    --token-ms per generated token (num_predict, capped by --max-tokens)
+
+Quiz prompts (ending in "JSON:") get a well-formed quiz object with the
+requested number of questions, so /v1/quiz/generate succeeds under load.
+
+Failures:
+    --fail-rate 0.05   fraction of requests answered with HTTP 500
+    --seed 42          makes failures and generated text reproducible
+
+Responses carry Ollama-style stats (prompt_eval_count, eval_count,
+*_duration in ns), so token accounting can be tested end to end.
+
+Usage:
+    python -m benchmarks.fake_ollama --port 11435 --ttft-ms 150 --token-ms 20
+    OLLAMA_HOST=http://127.0.0.1:11435 uvicorn app.main:app
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Set
+
+DEFAULT_MODELS = ("mistral:latest", "llama3:latest", "phi3:latest")
+
+_WORDS = (
+    "the transformer uses self attention to relate every position in a sequence "
+    "to every other position which removes recurrence and allows parallel training "
+    "multi head attention projects queries keys and values into several subspaces"
+).split()
+
+
+@dataclass
+class FakeConfig:
+    load_ms: float = 2000.0
+    ttft_ms: float = 100.0
+    prefill_ms_per_token: float = 0.5
+    token_ms: float = 20.0
+    max_tokens: int = 256
+    fail_rate: float = 0.0
+    seed: int = 0
+    models: tuple = DEFAULT_MODELS
+
+
+@dataclass
+class _State:
+    config: FakeConfig
+    loaded: Set[str] = field(default_factory=set)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    rng: random.Random = field(default_factory=random.Random)
+    requests: int = 0
+
+
+def _count_tokens(text: str) -> int:
+    # Same rough ratio the app falls back to (chars / 4)
+    return max(1, len(text) // 4)
+
+
+def _tokens_for(prompt: str, n: int):
+    """Deterministic word stream derived from the prompt."""
+    h = int(hashlib.sha1(prompt.encode("utf-8")).hexdigest(), 16)
+    for i in range(n):
+        yield _WORDS[(h + i * 7) % len(_WORDS)] + " "
+
+
+_QUIZ_COUNT = re.compile(r"Generate (\d+) questions now\. JSON:\s*$")
+
+
+def _quiz_tokens(prompt: str):
+    """A valid quiz JSON for quiz_prompt(), streamed in token-sized pieces (None if not a quiz)."""
+    m = _QUIZ_COUNT.search(prompt)
+    if not m:
+        return None
+    words = list(_tokens_for(prompt, 12))
+    quiz = {"questions": [
+        {
+            "question": f"Question {i + 1}: what does {words[i % 12].strip()} refer to?",
+            "options": [f"A) {w.strip()}" for w in words[i % 4:i % 4 + 4]],
+            "answer": "A",
+            "explanation": "".join(words[:8]).strip(),
+        }
+        for i in range(int(m.group(1)))
+    ]}
+    text = json.dumps(quiz)
+    return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+
+def _sleep_ms(ms: float) -> None:
+    if ms > 0:
+        time.sleep(ms / 1000.0)
+
+
+def make_handler(state: _State):
+    cfg = state.config
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):  # keep benchmark output clean
+            pass
+
+        # ---------- helpers ----------
+
+        def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self) -> Dict[str, Any]:
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b"{}"
+            return json.loads(raw or b"{}")
+
+        # ---------- routes ----------
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                self._send_json(200, {"models": [
+                    {"name": m, "model": m, "size": 0, "digest": "fake"} for m in cfg.models
+                ]})
+            elif self.path == "/api/ps":
+                with state.lock:
+                    loaded = sorted(state.loaded)
+                self._send_json(200, {"models": [{"name": m, "model": m} for m in loaded]})
+            elif self.path == "/api/version":
+                self._send_json(200, {"version": "0.0.0-fake"})
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/api/generate":
+                self._send_json(404, {"error": "not found"})
+                return
+
+            body = self._read_json()
+            model = body.get("model", "")
+            prompt = body.get("prompt", "") or ""
+            stream = body.get("stream", True)
+            options = body.get("options") or {}
+            keep_alive = body.get("keep_alive")
+
+            if model not in cfg.models:
+                self._send_json(404, {"error": f"model '{model}' not found"})
+                return
+
+            with state.lock:
+                state.requests += 1
+                fail = state.rng.random() < cfg.fail_rate
+                cold = model not in state.loaded
+                state.loaded.add(model)
+            if fail:
+                self._send_json(500, {"error": "injected failure"})
+                return
+
+            t_start = time.perf_counter()
+            load_ms = cfg.load_ms if cold else 0.0
+            _sleep_ms(load_ms)
+
+            # keep_alive=0 with an empty prompt is how clients unload a model
+            if not prompt:
+                if keep_alive in (0, "0", "0s"):
+                    with state.lock:
+                        state.loaded.discard(model)
+                self._send_json(200, {"model": model, "response": "", "done": True,
+                                      "load_duration": int(load_ms * 1e6)})
+                return
+
+            prompt_tokens = _count_tokens(prompt)
+            prefill_ms = cfg.ttft_ms + cfg.prefill_ms_per_token * prompt_tokens
+            num_predict = options.get("num_predict", cfg.max_tokens)
+            if num_predict is None or num_predict < 0:
+                num_predict = cfg.max_tokens
+            n_out = min(int(num_predict), cfg.max_tokens)
+            tokens = _quiz_tokens(prompt)
+            if tokens is not None:
+                n_out = len(tokens)
+            else:
+                tokens = list(_tokens_for(prompt, n_out))
+
+            _sleep_ms(prefill_ms)
+
+            def _final(text: str) -> Dict[str, Any]:
+                total_ns = int((time.perf_counter() - t_start) * 1e9)
+                return {
+                    "model": model,
+                    "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    "response": text,
+                    "done": True,
+                    "done_reason": "length" if n_out >= num_predict else "stop",
+                    "total_duration": total_ns,
+                    "load_duration": int(load_ms * 1e6),
+                    "prompt_eval_count": prompt_tokens,
+                    "prompt_eval_duration": int(prefill_ms * 1e6),
+                    "eval_count": n_out,
+                    "eval_duration": int(n_out * cfg.token_ms * 1e6),
+                }
+
+            if not stream:
+                _sleep_ms(n_out * cfg.token_ms)
+                self._send_json(200, _final("".join(tokens).strip()))
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def _write_chunk(obj: Dict[str, Any]) -> None:
+                line = (json.dumps(obj) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(line):X}\r\n".encode() + line + b"\r\n")
+                self.wfile.flush()
+
+            for tok in tokens:
+                _sleep_ms(cfg.token_ms)
+                _write_chunk({"model": model, "response": tok, "done": False})
+            final = _final("")
+            _write_chunk(final)
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+def serve(host: str = "127.0.0.1", port: int = 11435, config: FakeConfig | None = None) -> ThreadingHTTPServer:
+    """Start the fake server on a background thread and return it (call .shutdown() to stop)."""
+    state = _State(config=config or FakeConfig())
+    state.rng.seed(state.config.seed)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-ollama", daemon=True).start()
+    return server
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Fake Ollama server for load/latency testing")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=11435)
+    ap.add_argument("--load-ms", type=float, default=FakeConfig.load_ms)
+    ap.add_argument("--ttft-ms", type=float, default=FakeConfig.ttft_ms)
+    ap.add_argument("--prefill-ms-per-token", type=float, default=FakeConfig.prefill_ms_per_token)
+    ap.add_argument("--token-ms", type=float, default=FakeConfig.token_ms)
+    ap.add_argument("--max-tokens", type=int, default=FakeConfig.max_tokens)
+    ap.add_argument("--fail-rate", type=float, default=FakeConfig.fail_rate)
+    ap.add_argument("--seed", type=int, default=FakeConfig.seed)
+    ap.add_argument("--models", nargs="+", default=list(DEFAULT_MODELS))
+    args = ap.parse_args()
+
+    config = FakeConfig(
+        load_ms=args.load_ms,
+        ttft_ms=args.ttft_ms,
+        prefill_ms_per_token=args.prefill_ms_per_token,
+        token_ms=args.token_ms,
+        max_tokens=args.max_tokens,
+        fail_rate=args.fail_rate,
+        seed=args.seed,
+        models=tuple(args.models),
+    )
+    server = serve(args.host, args.port, config)
+    print(f"Fake Ollama listening on http://{args.host}:{args.port} ({config})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# benchmarks/fixture_http.py
+"""
+Local HTML fixture server for URL-ingestion benchmarks.
+
+Serves `--pages` generated article pages at /page/<n> with ETag and
+Last-Modified headers, answering conditional GETs with 304. Every request
+waits `--latency-ms` first, standing in for network round-trip time.
+
+    GET /page/<n>          HTML article (~`--paragraphs` paragraphs)
+    GET /stats             {"requests": ..., "not_modified": ...}
+
+Usage:
+    python -m benchmarks.fixture_http --port 8765 --pages 200 --latency-ms 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+_PARAGRAPH = (
+    "Self-attention lets every token attend to every other token in the sequence, "
+    "so the model captures long-range dependencies without recurrence. Multi-head "
+    "attention repeats this in several learned subspaces and concatenates the results."
+)
+
+
+@dataclass
+class FixtureConfig:
+    pages: int = 200
+    paragraphs: int = 40
+    latency_ms: float = 50.0
+
+
+@dataclass
+class _State:
+    config: FixtureConfig
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    requests: int = 0
+    not_modified: int = 0
+    started: float = field(default_factory=time.time)
+    cache: Dict[int, bytes] = field(default_factory=dict)
+
+
+def render_page(n: int, paragraphs: int) -> bytes:
+    body = "\n".join(f"<p>Section {i + 1} of page {n}. {_PARAGRAPH}</p>" for i in range(paragraphs))
+    return (
+        f"<!doctype html><html><head><title>Fixture page {n}</title>"
+        f"<script>var tracking = {n};</script><style>p {{ margin: 0 }}</style></head>"
+        f"<body><header><nav><a href='/'>Home</a></nav></header>"
+        f"<div class='sidebar'>Related links</div>"
+        f"<article><h1>Fixture page {n}</h1>\n{body}\n</article>"
+        f"<footer>Copyright</footer></body></html>"
+    ).encode("utf-8")
+
+
+def make_handler(state: _State):
+    cfg = state.config
+    last_modified = formatdate(state.started, usegmt=True)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):  # keep benchmark output clean
+            pass
+
+        def _send(self, status: int, body: bytes, headers: Dict[str, str]) -> None:
+            self.send_response(status)
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if cfg.latency_ms > 0:
+                time.sleep(cfg.latency_ms / 1000.0)
+            with state.lock:
+                state.requests += 1
+
+            if self.path == "/stats":
+                with state.lock:
+                    stats = {"requests": state.requests, "not_modified": state.not_modified}
+                self._send(200, json.dumps(stats).encode(), {"Content-Type": "application/json"})
+                return
+
+            parts = self.path.strip("/").split("/")
+            if len(parts) != 2 or parts[0] != "page" or not parts[1].isdigit() \
+                    or not 0 < int(parts[1]) <= cfg.pages:
+                self._send(404, b"not found", {"Content-Type": "text/plain"})
+                return
+
+            n = int(parts[1])
+            with state.lock:
+                body = state.cache.get(n)
+                if body is None:
+                    body = state.cache[n] = render_page(n, cfg.paragraphs)
+            etag = '"%s"' % hashlib.md5(body).hexdigest()
+
+            if self.headers.get("If-None-Match") == etag:
+                with state.lock:
+                    state.not_modified += 1
+                self._send(304, b"", {"ETag": etag, "Last-Modified": last_modified})
+                return
+
+            self._send(200, body, {
+                "Content-Type": "text/html; charset=utf-8",
+                "ETag": etag,
+                "Last-Modified": last_modified,
+            })
+
+    return Handler
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, config: FixtureConfig | None = None) -> ThreadingHTTPServer:
+    """Start the fixture server on a background thread and return it (call .shutdown() to stop)."""
+    state = _State(config=config or FixtureConfig())
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fixture-http", daemon=True).start()
+    return server
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="HTML fixture server for URL ingestion benchmarks")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--pages", type=int, default=FixtureConfig.pages)
+    ap.add_argument("--paragraphs", type=int, default=FixtureConfig.paragraphs)
+    ap.add_argument("--latency-ms", type=float, default=FixtureConfig.latency_ms)
+    args = ap.parse_args()
+
+    config = FixtureConfig(pages=args.pages, paragraphs=args.paragraphs, latency_ms=args.latency_ms)
+    server = serve(args.host, args.port, config)
+    print(f"Fixture server on http://{args.host}:{args.port}/page/1..{args.pages}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
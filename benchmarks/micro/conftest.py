@@ -0,0 +1,73 @@
+# benchmarks/micro/conftest.py
+"""
+Shared fixtures for the pytest-benchmark micro-suite.
+
+Corpora are synthetic and seeded, so every run (and every machine) sees the
+same text: chunks of ~40 words drawn from a Zipf-distributed vocabulary,
+which gives BM25 realistic document frequencies.
+
+Corpus sizes come from BENCH_SIZES (default "1000,10000"); the Makefile's
+bench-micro-full target adds 100000.
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import random
+from functools import lru_cache
+from typing import List
+
+import pytest
+
+from app.core.config import settings
+from app.services import bm25_index
+
+SIZES = [int(n) for n in os.environ.get("BENCH_SIZES", "1000,10000").split(",") if n.strip()]
+
+_VOCAB_SIZE = 5000
+_WORDS_PER_CHUNK = 40
+
+
+@lru_cache(maxsize=None)
+def _vocab() -> List[str]:
+    rng = random.Random(7)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(_VOCAB_SIZE)]
+
+
+@lru_cache(maxsize=None)
+def synthetic_chunks(n: int) -> List[str]:
+    """`n` deterministic chunks of text (cached per size for the session)."""
+    rng = random.Random(n)
+    vocab = _vocab()
+    weights = [1.0 / (rank + 1) for rank in range(len(vocab))]
+    chunks = []
+    for _ in range(n):
+        words = rng.choices(vocab, weights=weights, k=_WORDS_PER_CHUNK)
+        chunks.append(" ".join(words[:20]) + ". " + " ".join(words[20:]) + ".")
+    return chunks
+
+
+def synthetic_queries(k: int = 20) -> List[str]:
+    rng = random.Random(1)
+    vocab = _vocab()
+    # Mix frequent and rare terms, like real questions
+    return [" ".join(rng.choice(vocab[:200]) for _ in range(2)) + " " +
+            " ".join(rng.choice(vocab[200:]) for _ in range(3)) for _ in range(k)]
+
+
+@pytest.fixture
+def empty_bm25(tmp_path, monkeypatch):
+    """Point bm25_index at an empty on-disk index under tmp_path and load it."""
+    path = tmp_path / "bm25_chunks.pkl"
+    with open(path, "wb") as f:
+        pickle.dump({"version": bm25_index._FORMAT_VERSION, "docs": [], "doc_ids": [], "metas": []}, f)
+    monkeypatch.setattr(settings, "bm25_index_path", str(path))
+
+    def reset() -> None:
+        bm25_index.load(path)
+
+    reset()
+    yield reset
+    reset()
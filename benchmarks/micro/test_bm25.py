@@ -0,0 +1,39 @@
+# benchmarks/micro/test_bm25.py
+"""BM25 keyword index: tokenizing, indexing and querying."""
+
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from app.services import bm25_index
+from benchmarks.micro.conftest import SIZES, synthetic_chunks, synthetic_queries
+
+
+@pytest.mark.benchmark(group="bm25.tokenize")
+def test_tokenize(benchmark):
+    text = " ".join(synthetic_chunks(1000)[:25])
+    benchmark(bm25_index._tokenize, text)
+
+
+@pytest.mark.benchmark(group="bm25.add_chunks")
+@pytest.mark.parametrize("n", SIZES)
+def test_add_chunks(benchmark, empty_bm25, n):
+    chunks = synthetic_chunks(n)
+    benchmark.pedantic(bm25_index.add_chunks, args=("doc", chunks), setup=empty_bm25,
+                       rounds=3, iterations=1)
+
+
+@pytest.mark.benchmark(group="bm25.query")
+@pytest.mark.parametrize("n", SIZES)
+def test_query_bm25(benchmark, empty_bm25, n):
+    bm25_index.add_chunks("doc", synthetic_chunks(n))
+    queries = synthetic_queries()
+    bm25_index.query_bm25(queries[0])  # pays the lazy IDF recompute outside the timing
+
+    def run() -> None:
+        for q in queries:
+            bm25_index.query_bm25(q, top_k=6)
+
+    benchmark(run)
@@ -0,0 +1,57 @@
+# benchmarks/micro/test_chunking.py
+"""The chunker's three entry points, and PDF text extraction."""
+
+from __future__ import annotations
+
+import pathlib
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from app.services.chunker import chunk_pages, chunk_text, iter_chunks
+from benchmarks.micro.conftest import SIZES, synthetic_chunks
+
+# Pages of ~25 synthetic chunks (~1000 words), i.e. a corpus of n chunks as n/25 pages
+_CHUNKS_PER_PAGE = 25
+
+
+def _pages(n: int):
+    chunks = synthetic_chunks(n)
+    return [" ".join(chunks[i:i + _CHUNKS_PER_PAGE]) for i in range(0, n, _CHUNKS_PER_PAGE)]
+
+
+@pytest.mark.benchmark(group="chunker.iter_chunks")
+@pytest.mark.parametrize("tokenizer", ["auto", None], ids=["model_tokenizer", "fallback"])
+@pytest.mark.parametrize("n", SIZES)
+def test_iter_chunks(benchmark, n, tokenizer):
+    pages = _pages(n)
+    benchmark.pedantic(lambda: sum(1 for _ in iter_chunks(pages, tokenizer=tokenizer)),
+                       rounds=3, iterations=1)
+
+
+@pytest.mark.benchmark(group="chunker.chunk_pages")
+@pytest.mark.parametrize("n", SIZES)
+def test_chunk_pages(benchmark, n):
+    pages = _pages(n)
+    benchmark.pedantic(chunk_pages, args=(pages,), rounds=3, iterations=1)
+
+
+@pytest.mark.benchmark(group="chunker.chunk_text")
+def test_chunk_text(benchmark):
+    # One page-sized string, the /v1/url path's typical input
+    text = "\n\n".join(_pages(1000)[:4])
+    benchmark(chunk_text, text)
+
+
+@pytest.mark.benchmark(group="extract.pdf")
+@pytest.mark.parametrize("workers", [1, 4])
+def test_pdf_extract(benchmark, tmp_path: pathlib.Path, workers):
+    pytest.importorskip("PyPDF2")
+    from app.services.extractor import iter_pdf_pages
+    from benchmarks.bench_pdf_extract import write_synthetic_pdf
+
+    pdf = tmp_path / "synthetic.pdf"
+    write_synthetic_pdf(pdf, 100)
+    benchmark.pedantic(lambda: sum(1 for _ in iter_pdf_pages(pdf, workers=workers)),
+                       rounds=3, iterations=1, warmup_rounds=1)
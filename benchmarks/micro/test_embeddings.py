@@ -0,0 +1,28 @@
+# benchmarks/micro/test_embeddings.py
+"""embed_texts throughput by batch size (loads the embedding model once)."""
+
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("torch")
+
+from app.services.embeddings import embed_texts
+from benchmarks.micro.conftest import synthetic_chunks
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _model_loaded():
+    try:
+        embed_texts(["warm up"])
+    except OSError as e:  # model not downloaded and no network
+        pytest.skip(f"embedding model unavailable: {e}")
+
+
+@pytest.mark.benchmark(group="embed_texts")
+@pytest.mark.parametrize("batch_size", [1, 8, 32, 128])
+def test_embed_texts(benchmark, batch_size):
+    texts = synthetic_chunks(1000)[:batch_size]
+    benchmark.extra_info["texts"] = batch_size
+    benchmark.pedantic(embed_texts, args=(texts,), rounds=5, iterations=1, warmup_rounds=1)
@@ -0,0 +1,39 @@
+# benchmarks/micro/test_rag.py
+"""Retrieval-side CPU work around the LLM call: hybrid merge and prompt building."""
+
+from __future__ import annotations
+
+import copy
+import random
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("langchain_community")
+
+from app.services.generator import build_rag_prompt
+from app.services.pipeline import _hybrid_merge
+from benchmarks.micro.conftest import synthetic_chunks
+
+
+def _results(n: int, seed: int):
+    rng = random.Random(seed)
+    return [{"text": t, "score": rng.random() * 10, "meta": {"chunk_index": i}}
+            for i, t in enumerate(synthetic_chunks(1000)[:n])]
+
+
+@pytest.mark.benchmark(group="rag.hybrid_merge")
+@pytest.mark.parametrize("candidates", [6, 100, 1000])
+def test_hybrid_merge(benchmark, candidates):
+    semantic, keyword = _results(candidates, 1), _results(candidates, 2)
+    # _hybrid_merge normalises scores in place, so every round gets fresh copies
+    benchmark.pedantic(_hybrid_merge,
+                       setup=lambda: ((copy.deepcopy(semantic), copy.deepcopy(keyword), 6), {}),
+                       rounds=50, iterations=1)
+
+
+@pytest.mark.benchmark(group="rag.build_prompt")
+@pytest.mark.parametrize("budget", [None, 1500], ids=["unpacked", "packed_1500"])
+def test_build_rag_prompt(benchmark, budget):
+    chunks = _results(30, 3)
+    benchmark(build_rag_prompt, "How does multi-head attention work?", chunks, budget_tokens=budget)
@@ -7,12 +7,22 @@ Workflow:
 2) For each model in configs/models.json -> call the model (OpenAI-compatible API) with a fixed prompt.
 3) Save all outputs + basic stats to results/eval_<timestamp>.json and CSV.
 
+Each question is retrieved once and its passages are shared by every model.
+Models run side by side, EVAL_MODEL_CONCURRENCY calls in flight per model,
+with one HTTP session / OpenAI client per endpoint reused for every call.
+Every answer is appended to EVAL_CHECKPOINT (JSONL) as soon as it
+finishes, so a crash or Ctrl-C loses nothing already answered; re-running
+only redoes the missing or failed answers. A question whose retrieval
+fails is recorded as failed for every model and the run carries on. The
+checkpoint is removed once every answer has succeeded.
+
 Requirements: requests, python-dotenv, openai, pandas (add to requirements.txt if missing).
 """
 
 from __future__ import annotations
-import os, json, time, csv, pathlib
-from typing import Dict, List, Any
+import os, json, time, csv, pathlib, threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Any, Tuple
 import requests
 from dotenv import load_dotenv
 from openai import OpenAI
@@ -25,6 +35,8 @@ TOP_K       = int(os.getenv("EVAL_TOP_K", "8"))
 MODE        = os.getenv("EVAL_MODE", "hybrid")  # "semantic" or "hybrid"
 QUESTIONS   = os.getenv("EVAL_QUESTIONS_FILE", "questions.txt")
 MODELS_FILE = os.getenv("EVAL_MODELS_FILE",   "configs/models.json")
+CONCURRENCY = int(os.getenv("EVAL_MODEL_CONCURRENCY", "2"))  # in-flight calls per model
+CHECKPOINT  = pathlib.Path(os.getenv("EVAL_CHECKPOINT", "results/eval_checkpoint.jsonl"))
 
 RESULTS_DIR = pathlib.Path("results"); RESULTS_DIR.mkdir(exist_ok=True, parents=True)
 
@@ -44,6 +56,19 @@ Instructions:
 - Cite using [1],[2],… to indicate which passage you used.
 """
 
+# ------------------------ Clients (reused) ------------------------
+_session = requests.Session()
+_clients: Dict[Tuple[str, str], OpenAI] = {}
+_clients_lock = threading.Lock()
+
+def get_client(base_url: str, api_key: str) -> OpenAI:
+    """One OpenAI client (and its connection pool) per endpoint"""
+    with _clients_lock:
+        key = (base_url, api_key)
+        if key not in _clients:
+            _clients[key] = OpenAI(base_url=base_url, api_key=api_key)
+        return _clients[key]
+
 # ------------------------ Helpers ------------------------
 def load_models(path: str) -> List[Dict[str, Any]]:
     with open(path, "r", encoding="utf-8") as f:
@@ -65,7 +90,7 @@ def backend_query(question: str, top_k: int, mode: str) -> List[str]:
     """Call your /v1/query endpoint; return a list of passage strings."""
     url = f"{BACKEND_URL}/v1/query"
     payload = {"query": question, "top_k": top_k, "mode": mode}
-    r = requests.post(url, json=payload, timeout=60)
+    r = _session.post(url, json=payload, timeout=60)
     r.raise_for_status()
     data = r.json()
     passages = [p["text"] for p in data.get("chunks", [])]
@@ -77,11 +102,11 @@ def call_llm(model_cfg: Dict[str, Any], question: str, passages: List[str]) -> D
     model    = model_cfg.get("model")
     name     = model_cfg.get("name", model)
 
-    client = OpenAI(base_url=base_url, api_key=api_key)
+    client = get_client(base_url, api_key)
     context = "\n\n".join([f"[{i+1}] {p}" for i, p in enumerate(passages)])
 
     prompt = USER_PROMPT_TEMPLATE.format(question=question, context=context)
-    t0 = time.time()
+    t0 = time.perf_counter()
     resp = client.chat.completions.create(
         model=model,
         temperature=0.2,
@@ -90,7 +115,7 @@ def call_llm(model_cfg: Dict[str, Any], question: str, passages: List[str]) -> D
             {"role": "user", "content": prompt},
         ],
     )
-    dt = time.time() - t0
+    dt = time.perf_counter() - t0
     content = resp.choices[0].message.content.strip() if resp.choices else ""
     tokens_out = getattr(resp.usage, "completion_tokens", None) if hasattr(resp, "usage") else None
     tokens_in  = getattr(resp.usage, "prompt_tokens", None)     if hasattr(resp, "usage") else None
@@ -104,12 +129,57 @@ def call_llm(model_cfg: Dict[str, Any], question: str, passages: List[str]) -> D
         "answer": content,
     }
 
+# ------------------------ Checkpoint ------------------------
+_ckpt_lock = threading.Lock()
+
+def load_checkpoint() -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """Answers that already succeeded, keyed by (question, provider_name)"""
+    done: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    if CHECKPOINT.exists():
+        with open(CHECKPOINT, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:  # torn last line after a crash
+                    continue
+                if not row.get("error"):
+                    done[(row["question"], row["provider_name"])] = row
+    return done
+
+def append_checkpoint(row: Dict[str, Any]) -> None:
+    with _ckpt_lock:
+        CHECKPOINT.parent.mkdir(parents=True, exist_ok=True)
+        with open(CHECKPOINT, "a", encoding="utf-8") as f:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
 # ------------------------ Main ------------------------
+def answer(m: Dict[str, Any], q_idx: int, q: str, passages: List[str], retrieve_sec: float) -> Dict[str, Any]:
+    try:
+        out = call_llm(m, q, passages)
+    except Exception as e:
+        out = {"provider_name": m.get("name"), "model": m.get("model"), "error": str(e), "answer": ""}
+    row = {
+        "q_idx": q_idx,
+        "question": q,
+        "provider_name": out.get("provider_name"),
+        "model": out.get("model"),
+        "retrieve_sec": retrieve_sec,
+        "latency_sec": out.get("latency_sec"),
+        "tokens_in": out.get("tokens_in"),
+        "tokens_out": out.get("tokens_out"),
+        "answer": out.get("answer", ""),
+        "error": out.get("error"),
+    }
+    append_checkpoint(row)  # here, not in main(): an interrupted run keeps every finished answer
+    return row
+
 def main():
     models = load_models(MODELS_FILE)
     questions = load_questions(QUESTIONS)
+    done = load_checkpoint()
+    if done:
+        print(f"Resuming from {CHECKPOINT}: {len(done)} answers already done")
 
-    rows_csv = []
     all_json = {
         "backend_url": BACKEND_URL,
         "top_k": TOP_K,
@@ -118,32 +188,49 @@ def main():
         "models": [m["name"] for m in models],
         "results": []
     }
-
-    for q_idx, q in enumerate(questions, 1):
-        passages = backend_query(q, top_k=TOP_K, mode=MODE)
-        if not passages:
-            print(f"[WARN] No passages for Q{q_idx}: {q}")
-            continue
-
-        for m in models:
+    rows: List[Dict[str, Any]] = []
+    pools = {m["name"]: ThreadPoolExecutor(max_workers=max(1, CONCURRENCY)) for m in models}
+    futures = []
+    try:
+        for q_idx, q in enumerate(questions, 1):
+            todo = [m for m in models if (q, m["name"]) not in done]
+            rows.extend(done[(q, m["name"])] for m in models if (q, m["name"]) in done)
+            if not todo:
+                continue
+            # Retrieved once; the same passages go to every model
+            t0 = time.perf_counter()
             try:
-                out = call_llm(m, q, passages)
+                passages = backend_query(q, top_k=TOP_K, mode=MODE)
             except Exception as e:
-                out = {"provider_name": m.get("name"), "model": m.get("model"), "error": str(e), "answer": ""}
-
-            row = {
-                "q_idx": q_idx,
-                "question": q,
-                "provider_name": out.get("provider_name"),
-                "model": out.get("model"),
-                "latency_sec": out.get("latency_sec"),
-                "tokens_in": out.get("tokens_in"),
-                "tokens_out": out.get("tokens_out"),
-                "answer": out.get("answer", ""),
-            }
-            rows_csv.append(row)
-            all_json["results"].append(row)
-            print(f"[OK] Q{q_idx} · {row['provider_name']} · {row['model']} · {row['latency_sec']}s")
+                print(f"[ERR] Retrieval failed for Q{q_idx}: {e}")
+                rows.extend({"q_idx": q_idx, "question": q, "provider_name": m["name"], "model": m.get("model"),
+                             "retrieve_sec": None, "latency_sec": None, "tokens_in": None, "tokens_out": None,
+                             "answer": "", "error": f"retrieval failed: {e}"} for m in todo)
+                continue
+            retrieve_sec = round(time.perf_counter() - t0, 3)
+            if not passages:
+                print(f"[WARN] No passages for Q{q_idx}: {q}")
+                continue
+            for m in todo:
+                futures.append(pools[m["name"]].submit(answer, m, q_idx, q, passages, retrieve_sec))
+
+        for fut in as_completed(futures):
+            row = fut.result()
+            rows.append(row)
+            status = "ERR" if row["error"] else "OK"
+            print(f"[{status}] Q{row['q_idx']} · {row['provider_name']} · {row['model']} · {row['latency_sec']}s")
+    except BaseException:
+        # Ctrl-C: drop the queued answers, let the in-flight ones finish and reach the checkpoint
+        for pool in pools.values():
+            pool.shutdown(wait=True, cancel_futures=True)
+        raise
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=True)
+
+    order = {m["name"]: i for i, m in enumerate(models)}
+    rows.sort(key=lambda r: (r["q_idx"], order.get(r["provider_name"], len(order))))
+    all_json["results"] = rows
 
     # Save results as JSON & CSV
     ts = time.strftime("%Y%m%d_%H%M%S")
@@ -153,8 +240,14 @@ def main():
     with open(json_path, "w", encoding="utf-8") as f:
         json.dump(all_json, f, ensure_ascii=False, indent=2)
 
-    pd.DataFrame(rows_csv).to_csv(csv_path, index=False)
+    pd.DataFrame(rows).to_csv(csv_path, index=False)
     print(f"\nSaved:\n- {json_path}\n- {csv_path}\n")
 
+    failed = sum(1 for r in rows if r["error"])
+    if failed:
+        print(f"{failed} answers failed; re-run to retry them (checkpoint kept at {CHECKPOINT})")
+    else:
+        CHECKPOINT.unlink(missing_ok=True)
+
 if __name__ == "__main__":
     main()
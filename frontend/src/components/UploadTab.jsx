@@ -42,24 +42,36 @@ function UploadTab({ documents, onDocumentUploaded, onDocumentRemoved }) {
     }
   };
 
+  // Upload returns a job id right away; indexing runs in the background.
+  const waitForIndexing = async (documentId) => {
+    for (;;) {
+      const { data } = await axios.get(`${API_BASE}/documents/${documentId}`);
+      if (data.status === 'READY') return data;
+      if (data.status === 'FAILED') throw new Error(data.error || 'Indexing failed');
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+    }
+  };
+
   const uploadPDF = async (file) => {
     setUploading(true);
     const formData = new FormData();
     formData.append('file', file);
 
     try {
+      const started = Date.now();
       const response = await axios.post(`${API_BASE}/upload`, formData, {
         headers: { 'Content-Type': 'multipart/form-data' }
       });
+      const doc = await waitForIndexing(response.data.document_id);
 
       const uploadData = {
-        id: Date.now(),
+        id: doc.document_id,
         type: 'pdf',
         name: file.name,
         size: file.size,
-        chunks: response.data.chunks_indexed || 140,
+        chunks: doc.chunk_count,
         chars: response.data.chars_extracted || 45000,
-        time: response.data.elapsed_time || 3.5,
+        time: (Date.now() - started) / 1000,
         content: response.data.preview || 'Content preview not available',
         chunksData: response.data.chunks_preview || []
       };
@@ -0,0 +1,349 @@
+# scripts/bulk_ingest.py
+"""
+Offline bulk ingestion of a directory of course material.
+
+Walks a directory for .pdf / .txt / .md files and indexes them into Chroma
+and the BM25 keyword index in one streaming run (the same extract -> chunk
+-> embed -> index stages as /v1/upload, see app.services.ingest_pipeline),
+so embedding batches and index writes span file boundaries instead of
+paying the per-upload overhead hundreds of times.
+
+    - files whose sha256 already has a READY row in `documents` are skipped
+      (so does a second copy of the same file within one run)
+    - every --checkpoint-every completed files the BM25 index is saved and
+      their READY rows are committed; after a crash, re-running the same
+      command resumes with the first unfinished file (Chroma chunk ids are
+      deterministic, so re-indexing a half-written file overwrites it)
+    - files that fail to extract, or yield no text, get a FAILED row and
+      are retried on the next run
+    - a file keeps one `documents` / knowledge row per path: re-indexing a
+      changed file (or retrying a failed one) replaces the old row, and its
+      old chunks are dropped from both indexes before it is written again
+
+Usage:
+    python -m scripts.bulk_ingest course_material/
+    python -m scripts.bulk_ingest course_material/ --checkpoint-every 50 --batch-size 128
+    python -m scripts.bulk_ingest course_material/ --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import logging
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.db import get_conn, transaction, utcnow
+from app.services import bm25_index
+from app.services.chunker import iter_chunks
+from app.services.ingest_pipeline import StageError, chunk_meta, run_stages
+from app.services.metadata_store import add_document
+from app.utils.hashing import sha256_file
+
+log = logging.getLogger("scripts.bulk_ingest")
+
+SUFFIXES = (".pdf", ".txt", ".md")
+
+
+def find_files(root: Path) -> List[Path]:
+    return sorted(p for p in root.rglob("*") if p.is_file() and p.suffix.lower() in SUFFIXES)
+
+
+def plan(root: Path, files: List[Path]) -> Tuple[List[Dict[str, Any]], int]:
+    """File records still to ingest (hash not READY yet) and the number skipped."""
+    conn = get_conn()
+    seen = set()
+    todo: List[Dict[str, Any]] = []
+    skipped = 0
+    for path in files:
+        digest = sha256_file(path)
+        row = conn.execute(
+            "SELECT 1 FROM documents WHERE content_hash = ? AND status = 'READY' LIMIT 1", (digest,)
+        ).fetchone()
+        if row or digest in seen:
+            skipped += 1
+            continue
+        seen.add(digest)
+        todo.append({
+            "path": path,
+            "doc_id": path.relative_to(root).as_posix(),
+            "hash": digest,
+            "size": path.stat().st_size,
+            "pages": 0,
+            "chunks": 0,
+            "expected": None,   # chunk count, known once the file is fully chunked
+            "error": None,
+        })
+    return todo, skipped
+
+
+def _iter_pages(path: Path) -> Iterator[Tuple[int, str]]:
+    if path.suffix.lower() != ".pdf":
+        yield 1, path.read_text(encoding="utf-8", errors="replace")
+        return
+    from app.services.extractor import iter_pdf_pages
+    from app.services.ocr import with_ocr
+    yield from with_ocr(iter_pdf_pages(path), path)
+
+
+def _items(records: List[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], int, str]]:
+    """(record, page_no, text) for every page of every file; runs in the extract stage."""
+    for rec in records:
+        yielded = False
+        try:
+            for page_no, text in _iter_pages(rec["path"]):
+                rec["pages"] = page_no
+                yielded = True
+                yield rec, page_no, text
+        except Exception as e:
+            log.warning("Extraction failed for %s: %s", rec["path"], e)
+            rec["error"] = f"Text extraction failed: {e}"
+        if not yielded:
+            # Every file reaches the chunk stage, so empty files complete too.
+            yield rec, 0, ""
+
+
+def _to_docs(items: Iterable[Tuple[Dict[str, Any], int, str]]) -> Iterator[Dict[str, Any]]:
+    """Chunk each file's pages; runs in the chunk stage."""
+    for _, group in itertools.groupby(items, key=lambda it: it[0]["doc_id"]):
+        first = next(group)
+        rec = first[0]
+        pages = ((page_no, text) for _, page_no, text in itertools.chain([first], group) if page_no)
+        n = 0
+        for n, ch in enumerate(iter_chunks(pages), start=1):
+            yield {
+                "id": f"{rec['doc_id']}:{n}",
+                "text": ch["text"],
+                "meta": {
+                    "source": str(rec["path"]),
+                    "path": str(rec["path"]),
+                    "filename": rec["path"].name,
+                    "type": "bulk",
+                    "chunk_index": n,
+                    **chunk_meta(ch),
+                },
+            }
+        rec["expected"] = n
+
+
+class _Progress:
+    """
+    Tracks which files are fully written and checkpoints them.
+
+    Files finish in input order. A file is complete once the chunk stage has
+    seen all of it (`expected` set) and the index stage has written that many
+    chunks; completed files are committed in groups of `every`.
+    """
+
+    def __init__(self, records: List[Dict[str, Any]], every: int,
+                 delete_fn: Optional[Callable[[str], None]] = None) -> None:
+        self.by_id = {r["doc_id"]: r for r in records}
+        self.pending: Deque[Dict[str, Any]] = deque(records)
+        self.done: List[Dict[str, Any]] = []
+        self.every = max(1, every)
+        self.delete_fn = delete_fn
+        self.ready = 0
+        self.failed = 0
+        self.checkpoints = 0
+        self._lock = threading.Lock()
+
+    def written(self, ids: List[str]) -> None:
+        with self._lock:
+            for chunk_id in ids:
+                self.by_id[chunk_id.rsplit(":", 1)[0]]["chunks"] += 1
+            self._advance()
+            if len(self.done) >= self.every:
+                self._checkpoint()
+
+    def finish(self) -> None:
+        """Commit every file that completed (call after the run, even a failed one)."""
+        with self._lock:
+            self._advance()
+            self._checkpoint()
+
+    def _advance(self) -> None:
+        while self.pending:
+            rec = self.pending[0]
+            if rec["expected"] is None or rec["chunks"] < rec["expected"]:
+                break
+            self.done.append(self.pending.popleft())
+
+    def _checkpoint(self) -> None:
+        if not self.done:
+            return
+        for rec in self.done:
+            if rec["error"] is None and rec["chunks"] == 0:
+                rec["error"] = "No text extracted (empty file or scanned PDF without OCR)"
+            if rec["error"] is not None and rec["chunks"]:
+                # Partial text from a file that broke mid-way: keep it out of both indexes.
+                bm25_index.remove_doc(rec["doc_id"])
+                if self.delete_fn is None:
+                    from app.services.vectorstore import delete_by_source as delete_fn
+                    self.delete_fn = delete_fn
+                self.delete_fn(str(rec["path"]))
+
+        # BM25 first: a READY row must never point at chunks the saved index lacks.
+        bm25_index.save()
+        now = utcnow()
+        with transaction() as conn:
+            for r in self.done:
+                # One row per path: a changed file replaces its old version's
+                # row, and an unchanged file that fails again only counts another attempt.
+                old = conn.execute(
+                    "SELECT document_id, attempts, created_at FROM documents WHERE path = ?"
+                    " ORDER BY updated_at DESC", (str(r["path"]),)
+                ).fetchall()
+                conn.execute("DELETE FROM documents WHERE path = ?", (str(r["path"]),))
+                conn.execute(
+                    "INSERT INTO documents (document_id, filename, path, content_hash, size_bytes, status,"
+                    " attempts, error, page_count, chunk_count, created_at, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (old[0]["document_id"] if old else uuid.uuid4().hex, r["path"].name, str(r["path"]),
+                     r["hash"], r["size"], "FAILED" if r["error"] else "READY",
+                     (old[0]["attempts"] if old else 0) + 1, r["error"], r["pages"],
+                     0 if r["error"] else r["chunks"], old[0]["created_at"] if old else now, now),
+                )
+        for rec in self.done:
+            if not rec["error"]:
+                add_document(rec["path"].name, str(rec["path"]), rec["pages"], rec["chunks"],
+                             size_bytes=rec["size"], content_hash=rec["hash"], source="bulk",
+                             replace=True)
+        for rec in self.done:
+            if rec["error"]:
+                self.failed += 1
+                print(f"FAILED  {rec['doc_id']}: {rec['error']}", file=sys.stderr)
+            else:
+                self.ready += 1
+        self.checkpoints += 1
+        log.info("Checkpoint %d: %d files committed", self.checkpoints, len(self.done))
+        self.done = []
+
+
+def ingest_directory(
+    root: Path,
+    *,
+    checkpoint_every: int = 20,
+    embed_fn: Optional[Callable[[List[str]], List[List[float]]]] = None,
+    write_fn: Optional[Callable[..., None]] = None,
+    delete_fn: Optional[Callable[[str], None]] = None,
+    batch_size: Optional[int] = None,
+    queue_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Ingest every new file under `root`.
+
+    Returns:
+        {"files", "skipped", "ready", "failed", "pages", "chunks_indexed",
+         "checkpoints", "elapsed_s", "stages", "rss_delta_mb", "error"}
+    """
+    t0 = time.perf_counter()
+    files = find_files(root)
+    records, skipped = plan(root, files)
+    summary: Dict[str, Any] = {"files": len(files), "skipped": skipped, "to_ingest": len(records)}
+    if not records:
+        return {**summary, "ready": 0, "failed": 0, "pages": 0, "chunks_indexed": 0,
+                "checkpoints": 0, "elapsed_s": round(time.perf_counter() - t0, 3),
+                "stages": {}, "rss_delta_mb": None, "error": None}
+
+    if write_fn is None:
+        from app.services.vectorstore import add_embedded as write_fn
+    if delete_fn is None:
+        from app.services.vectorstore import delete_by_source as delete_fn
+
+    # Start every planned file from scratch in both indexes: a crash after a
+    # checkpoint can leave chunks of files that never got their READY row,
+    # and a file that changed in place may now have fewer chunks than the
+    # version indexed before (ids are doc_id:1..N, so upserts alone would
+    # leave the old tail behind).
+    for rec in records:
+        bm25_index.remove_doc(rec["doc_id"])
+        delete_fn(str(rec["path"]))
+
+    progress = _Progress(records, checkpoint_every, delete_fn)
+
+    def write(ids: List[str], texts: List[str], embeddings: List[List[float]],
+              metadatas: List[Dict[str, Any]]) -> None:
+        write_fn(ids=ids, texts=texts, embeddings=embeddings, metadatas=metadatas)
+        by_doc: Dict[str, Tuple[List[str], List[Dict[str, Any]]]] = {}
+        for chunk_id, text, meta in zip(ids, texts, metadatas):
+            entry = by_doc.setdefault(chunk_id.rsplit(":", 1)[0], ([], []))
+            entry[0].append(text)
+            entry[1].append(meta)
+        for doc_id, (doc_texts, doc_metas) in by_doc.items():
+            bm25_index.add_chunks(doc_id, doc_texts, doc_metas)
+        progress.written(ids)
+
+    run: Dict[str, Any] = {}
+    error = None
+    try:
+        run = run_stages(_items(records), _to_docs, embed_fn=embed_fn, write_fn=write,
+                         batch_size=batch_size, queue_size=queue_size)
+    except StageError as e:
+        log.error("Bulk ingest stopped: %s", e)
+        error = str(e)
+    finally:
+        progress.finish()
+
+    return {
+        **summary,
+        "ready": progress.ready,
+        "failed": progress.failed,
+        "pages": sum(r["pages"] for r in records),
+        "chunks_indexed": sum(r["chunks"] for r in records),
+        "checkpoints": progress.checkpoints,
+        "elapsed_s": round(time.perf_counter() - t0, 3),
+        "stages": run.get("stages", {}),
+        "rss_delta_mb": run.get("rss_delta_mb"),
+        "error": error,
+    }
+
+
+def _rate(n: int, seconds: float) -> str:
+    return f"{n / seconds:.1f}" if seconds else "-"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Index a directory of PDFs / text files into Chroma + BM25")
+    ap.add_argument("root", type=Path, help="directory to ingest (searched recursively)")
+    ap.add_argument("--checkpoint-every", type=int, default=20, help="commit progress every N files")
+    ap.add_argument("--batch-size", type=int, default=None, help="chunks per embedding batch")
+    ap.add_argument("--queue-size", type=int, default=None, help="bounded queue size between stages")
+    ap.add_argument("--dry-run", action="store_true", help="list what would be ingested and exit")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if not args.root.is_dir():
+        ap.error(f"not a directory: {args.root}")
+
+    if args.dry_run:
+        files = find_files(args.root)
+        records, skipped = plan(args.root, files)
+        for rec in records:
+            print(f"{rec['size']:>12}  {rec['doc_id']}")
+        print(f"{len(records)} to ingest, {skipped} already indexed", file=sys.stderr)
+        return
+
+    res = ingest_directory(args.root, checkpoint_every=args.checkpoint_every,
+                           batch_size=args.batch_size, queue_size=args.queue_size)
+    secs = res["elapsed_s"]
+    for name, st in res["stages"].items():
+        print(f"  {name:<8} busy {st['busy_s']:>8.2f}s  {st['items_out']:>7} out  "
+              f"{st['items_per_sec'] or '-':>8}/s", file=sys.stderr)
+    print(f"{res['files']} files ({res['skipped']} skipped, {res['ready']} ready, {res['failed']} failed), "
+          f"{res['pages']} pages, {res['chunks_indexed']} chunks in {secs:.1f}s  "
+          f"[{_rate(res['ready'] + res['failed'], secs)} files/s, {_rate(res['pages'], secs)} pages/s, "
+          f"{_rate(res['chunks_indexed'], secs)} chunks/s, RSS +{res['rss_delta_mb']} MB]",
+          file=sys.stderr)
+    if res["error"]:
+        print(f"Stopped early: {res['error']} (re-run to resume)", file=sys.stderr)
+    sys.exit(1 if res["error"] or res["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Shared fixtures: a throwaway SQLite metadata store and an empty BM25 index
+per test.
+"""
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def tmp_db(tmp_path, monkeypatch):
+    """Point app.core.db at a fresh database file (every thread reconnects)."""
+    pytest.importorskip("pydantic_settings")
+    from app.core import db
+
+    monkeypatch.setattr(db.settings, "metadata_db_path", str(tmp_path / "metadata.db"))
+    monkeypatch.setattr(db, "_initialized", False)
+    monkeypatch.setattr(db, "_local", threading.local())
+    return db
+
+
+@pytest.fixture
+def bm25(tmp_path, monkeypatch):
+    """An empty, already-loaded BM25 index persisted under tmp_path."""
+    pytest.importorskip("pydantic_settings")
+    from app.services import bm25_index
+
+    for name, value in {"_DOCS": [], "_DOC_IDS": [], "_METAS": [], "_TOKENS": [],
+                        "_DF": {}, "_IDF": {}, "_TOTAL_LEN": 0, "_AVG_DL": 0.0,
+                        "_DIRTY": False, "_LOADED": True}.items():
+        monkeypatch.setattr(bm25_index, name, value)
+    monkeypatch.setattr(bm25_index.settings, "bm25_index_path", str(tmp_path / "bm25.pkl"))
+    return bm25_index
@@ -0,0 +1,99 @@
+"""
+Admin profiling (app.api.routes_admin, app.services.profiler,
+ProfilingMiddleware): the ADMIN_TOKEN gate, one sampling profile at a time,
+and the X-Profile -> X-Profile-Id -> /v1/admin/profiles/{id} round trip.
+"""
+import time
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("httpx")  # TestClient
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.api import routes_admin  # noqa: E402
+from app.core.middleware import ProfilingMiddleware  # noqa: E402
+from app.services import profiler  # noqa: E402
+
+ADMIN = {"X-Admin-Token": "s3cret"}
+
+
+def busy_work(n: int = 20_000) -> int:
+    return sum(i * i for i in range(n))
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(routes_admin.settings, "admin_token", "s3cret")
+    monkeypatch.setattr(routes_admin.settings, "profile_max_seconds", 0.05)
+    monkeypatch.setattr(profiler, "_stored", type(profiler._stored)())
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(routes_admin.router)
+
+    @app.get("/work")
+    def work():
+        return {"total": busy_work()}
+
+    return app
+
+
+def test_admin_routes_are_hidden_without_admin_token(app, monkeypatch):
+    monkeypatch.setattr(routes_admin.settings, "admin_token", "")
+    assert TestClient(app).get("/v1/admin/profiles", headers=ADMIN).status_code == 404
+
+
+@pytest.mark.parametrize("headers, status", [({}, 403), ({"X-Admin-Token": "wrong"}, 403), (ADMIN, 200)])
+def test_admin_routes_need_the_token(app, headers, status):
+    assert TestClient(app).get("/v1/admin/profiles", headers=headers).status_code == status
+
+
+def test_profile_is_capped_and_returns_collapsed_stacks(app):
+    t0 = time.perf_counter()
+    res = TestClient(app).get("/v1/admin/profile", params={"seconds": 30, "interval_ms": 1}, headers=ADMIN)
+    assert res.status_code == 200 and res.headers["content-type"].startswith("text/plain")
+    assert time.perf_counter() - t0 < 5  # PROFILE_MAX_SECONDS, not the 30 s asked for
+
+
+def test_second_profile_is_rejected_with_409(app):
+    client = TestClient(app)
+    with profiler.sampling():
+        res = client.get("/v1/admin/profile", params={"seconds": 0.01}, headers=ADMIN)
+        # A profiled request while busy is served unprofiled
+        work = client.get("/work", headers={**ADMIN, "X-Profile": "sample"})
+    assert res.status_code == 409 and "already running" in res.json()["detail"]
+    assert work.status_code == 200 and "x-profile-id" not in work.headers
+
+
+def test_sampled_request_round_trip(app):
+    client = TestClient(app)
+    res = client.get("/work", headers={**ADMIN, "X-Profile": "sample"})
+    assert res.status_code == 200
+    profile_id = res.headers["x-profile-id"]
+
+    listed = client.get("/v1/admin/profiles", headers=ADMIN).json()["profiles"]
+    assert [(p["id"], p["kind"], p["method"], p["path"]) for p in listed] == [
+        (profile_id, "sample", "GET", "/work")]
+    assert "text" not in listed[0]
+    assert client.get(f"/v1/admin/profiles/{profile_id}", headers=ADMIN).status_code == 200
+    assert client.get("/v1/admin/profiles/nope", headers=ADMIN).status_code == 404
+
+
+def test_cprofile_covers_the_endpoint_in_benchmark_mode(app, monkeypatch):
+    client = TestClient(app)
+    headers = {**ADMIN, "X-Profile": "cprofile"}
+    assert "x-profile-id" not in client.get("/work", headers=headers).headers  # mode off
+
+    monkeypatch.setattr(routes_admin.settings, "profile_benchmark_mode", True)
+    profiler.instrument_routes(app)
+    profile_id = client.get("/work", headers=headers).headers["x-profile-id"]
+    text = client.get(f"/v1/admin/profiles/{profile_id}", headers=ADMIN).text
+    assert "function calls" in text and "busy_work" in text
+
+
+def test_profile_header_is_ignored_without_the_token(app):
+    res = TestClient(app).get("/work", headers={"X-Profile": "sample"})
+    assert res.status_code == 200 and "x-profile-id" not in res.headers
+    assert profiler.recent() == []
@@ -0,0 +1,39 @@
+"""
+Load benchmark (benchmarks.bench_load): the --spawn'ed API keeps all of
+its state in the throwaway working directory, not the repo's.
+"""
+import json
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("httpx")
+
+from benchmarks import bench_load  # noqa: E402
+
+PROBE = """
+import json, os, pathlib
+from app.core.config import settings
+print(json.dumps({
+    "cwd": os.getcwd(),
+    "upload_dir": os.environ["UPLOAD_DIR"],
+    "db": str(pathlib.Path(settings.metadata_db_path).resolve()),
+    "bm25": str(pathlib.Path(settings.bm25_index_path).resolve()),
+    "chroma": str(pathlib.Path("./chroma_db").resolve()),
+    "ollama": settings.ollama_host,
+}))
+"""
+
+
+def test_spawned_api_state_lives_in_the_workdir(tmp_path):
+    env = bench_load._isolated_env(tmp_path, 5555)
+    out = subprocess.run([sys.executable, "-c", PROBE], env=env, cwd=tmp_path,
+                         capture_output=True, text=True, check=True)
+    paths = json.loads(out.stdout)
+
+    assert paths.pop("ollama") == "http://127.0.0.1:5555"
+    for name, path in paths.items():
+        assert path.startswith(str(tmp_path.resolve())), name
+    assert bench_load.REPO_ROOT.joinpath("app", "main.py").is_file()
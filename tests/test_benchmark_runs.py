@@ -0,0 +1,82 @@
+"""
+Benchmark runs (app.workers.benchmark, /v1/benchmark/run): the run
+report's elapsed time and the non-blocking start.
+"""
+import json
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.workers import benchmark  # noqa: E402
+
+QUESTIONS = {"benchmark_name": "test", "questions": [
+    {"id": 1, "question": "What is BM25?"},
+    {"id": 2, "question": "What is RAG?"},
+]}
+
+
+@pytest.fixture
+def bench_db(tmp_db, tmp_path, monkeypatch):
+    path = tmp_path / "benchmark_questions.json"
+    path.write_text(json.dumps(QUESTIONS))
+    monkeypatch.setattr(benchmark, "BENCHMARK_FILE", path)
+    return tmp_db
+
+
+def _insert_run(conn, run_id, created_at, updated_at):
+    conn.execute(
+        "INSERT INTO benchmark_runs (run_id, status, config, total, created_at, updated_at)"
+        " VALUES (?, 'DONE', ?, 4, ?, ?)",
+        (run_id, json.dumps({"models": ["phi3", "mistral"], "top_k": 5, "max_tokens": 500}),
+         created_at, updated_at),
+    )
+
+
+def _insert_result(conn, run_id, question_id, model, retrieve_ms, latency_ms):
+    conn.execute(
+        "INSERT INTO benchmark_results (run_id, question_id, model, success, answer, retrieve_ms,"
+        " latency_ms, sources_count, created_at) VALUES (?, ?, ?, 1, 'answer', ?, ?, 3, ?)",
+        (run_id, question_id, model, retrieve_ms, latency_ms, "2024-01-01T00:00:00Z"),
+    )
+
+
+def test_elapsed_time_sums_the_pair_timings_not_the_wall_clock(bench_db):
+    with bench_db.transaction() as conn:
+        # Interrupted overnight and resumed: a day between created_at and updated_at
+        _insert_run(conn, "r1", "2024-01-01T00:00:00Z", "2024-01-02T00:00:00Z")
+        for model, latency in (("phi3", 1500.0), ("mistral", 2500.0)):
+            _insert_result(conn, "r1", 1, model, retrieve_ms=200.0, latency_ms=latency)
+        _insert_result(conn, "r1", 2, "phi3", retrieve_ms=300.0, latency_ms=1000.0)
+
+    report = benchmark.run_report("r1")
+    # Retrieval once per question (200 + 300) plus every answer (1500 + 2500 + 1000)
+    assert report["elapsed_time"] == 5.5
+    assert report["progress"] == {"total": 4, "completed": 3, "succeeded": 3}
+    assert [r["retrieve_ms"] for r in report["results"]] == [200.0, 300.0]
+
+
+def test_elapsed_time_of_a_run_with_no_answers_is_zero(bench_db):
+    with bench_db.transaction() as conn:
+        _insert_run(conn, "r2", "2024-01-01T00:00:00Z", "2024-01-01T01:00:00Z")
+    assert benchmark.run_report("r2")["elapsed_time"] == 0
+
+
+def test_run_answers_202_without_waiting(monkeypatch):
+    pytest.importorskip("httpx")  # TestClient
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.api import routes_benchmarks
+
+    def wait(run_id, timeout=None):
+        raise AssertionError("the default request must not block on the run")
+
+    monkeypatch.setattr(routes_benchmarks.benchmark_runner, "start", lambda models, top_k, max_tokens: "run-1")
+    monkeypatch.setattr(routes_benchmarks.benchmark_runner, "wait", wait)
+    app = FastAPI()
+    app.include_router(routes_benchmarks.router)
+
+    res = TestClient(app).post("/v1/benchmark/run", json={"models": ["phi3"]})
+    assert res.status_code == 202
+    assert res.json() == {"run_id": "run-1", "status": "QUEUED"}
@@ -0,0 +1,102 @@
+"""
+BM25 keyword index (app.services.bm25_index): running document
+frequencies across add_chunks/remove_doc, and the save/load round trip.
+"""
+import math
+import pickle
+from collections import Counter
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+
+@pytest.fixture
+def index(bm25):
+    return bm25
+
+
+def _from_scratch(idx):
+    """DF and total length recomputed from the chunks currently held."""
+    df = Counter()
+    for toks in idx._TOKENS:
+        df.update(set(toks))
+    return dict(df), sum(len(t) for t in idx._TOKENS)
+
+
+def _fill(idx):
+    idx.add_chunks("a.pdf", ["Solar panels convert sunlight.", "Panels need cleaning."],
+                   [{"page": 1}, {"page": 2}])
+    idx.add_chunks("b.pdf", ["Wind turbines convert wind.", "  "])
+    idx.add_chunks("c.pdf", ["Sunlight and wind are renewable."])
+
+
+def test_running_df_matches_a_full_recount(index):
+    _fill(index)
+    assert (index._DF, index._TOTAL_LEN) == _from_scratch(index)
+    assert index._DF["convert"] == 2
+    assert len(index._DOCS) == 4  # the blank chunk is skipped
+
+
+def test_remove_doc_decrements_and_drops_unused_terms(index):
+    _fill(index)
+    assert index.remove_doc("a.pdf") == 2
+    assert index.remove_doc("a.pdf") == 0
+
+    assert (index._DF, index._TOTAL_LEN) == _from_scratch(index)
+    assert "panels" not in index._DF and "cleaning" not in index._DF
+    assert index._DF["convert"] == 1
+    assert {r["meta"]["doc_id"] for r in index.query("convert sunlight")} == {"b.pdf", "c.pdf"}
+
+
+def test_idf_is_recomputed_after_changes(index):
+    _fill(index)
+    index.query("wind")
+    n = len(index._DOCS)
+    assert index._IDF["wind"] == pytest.approx(math.log(1 + (n - 2 + 0.5) / 2.5))
+
+    index.remove_doc("c.pdf")
+    index.query("wind")
+    assert index._IDF["wind"] == pytest.approx(math.log(1 + (3 - 1 + 0.5) / 1.5))
+    assert index._AVG_DL == pytest.approx(index._TOTAL_LEN / 3)
+
+
+def test_query_returns_metadata_and_doc_id(index):
+    _fill(index)
+    top = index.query("cleaning", top_k=1)
+    assert [r["text"] for r in top] == ["Panels need cleaning."]
+    assert top[0]["meta"] == {"chunk_index": 1, "page": 2, "doc_id": "a.pdf"}
+
+
+def test_save_load_round_trip(index, tmp_path):
+    _fill(index)
+    index.remove_doc("b.pdf")
+    before = index.query("sunlight convert wind")
+    df, total = dict(index._DF), index._TOTAL_LEN
+    path = index.save()
+
+    index.add_chunks("d.pdf", ["Unsaved chunk about sunlight."])
+    assert index.load(path) == 3
+    assert (index._DF, index._TOTAL_LEN) == (df, total)
+    assert index.query("sunlight convert wind") == before
+    assert not (tmp_path / "bm25.pkl.tmp").exists()
+
+
+def test_ensure_loaded_reads_the_saved_index_once(index, monkeypatch):
+    _fill(index)
+    index.save()
+    monkeypatch.setattr(index, "_DOCS", [])
+    monkeypatch.setattr(index, "_LOADED", False)
+
+    assert index.ensure_loaded() == 4
+    index.add_chunks("d.pdf", ["More text."])
+    assert index.ensure_loaded() == 5  # not reloaded over the new chunk
+
+
+@pytest.mark.parametrize("content", [b"not a pickle", pickle.dumps({"version": 99, "docs": ["x"]})])
+def test_unreadable_index_leaves_the_index_empty(index, tmp_path, content, caplog):
+    path = tmp_path / "bm25.pkl"
+    path.write_bytes(content)
+    assert index.load(path) == 0
+    assert index._LOADED
+    assert "Could not load BM25 index" in caplog.text
@@ -0,0 +1,136 @@
+"""
+Offline bulk ingestion (scripts.bulk_ingest): checkpoint/resume after a
+crash, skipping files already READY, changed and empty files.
+
+Chroma is replaced by an in-memory store through the injectable
+embed_fn / write_fn / delete_fn.
+"""
+import functools
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.services.chunker import iter_chunks  # noqa: E402
+from scripts import bulk_ingest  # noqa: E402
+
+
+class FakeChroma:
+    def __init__(self, fail_after=None):
+        self.chunks = {}
+        self.fail_after = fail_after
+        self.writes = 0
+
+    def write(self, ids, texts, embeddings, metadatas):
+        if self.fail_after is not None and self.writes >= self.fail_after:
+            raise RuntimeError("killed")
+        self.writes += 1
+        self.chunks.update({i: (t, m) for i, t, m in zip(ids, texts, metadatas)})
+
+    def delete(self, source):
+        self.chunks = {i: c for i, c in self.chunks.items() if c[1]["source"] != source}
+
+    def doc_ids(self):
+        return sorted(i for i in self.chunks)
+
+
+@pytest.fixture
+def corpus(tmp_db, bm25, tmp_path, monkeypatch):
+    """A small directory of text files; chunking uses the word-split tokenizer."""
+    monkeypatch.setattr(bulk_ingest, "iter_chunks",
+                        functools.partial(iter_chunks, tokenizer=None, max_tokens=8, overlap_tokens=0))
+    monkeypatch.setattr(bulk_ingest, "add_document", lambda *a, **kw: None)
+    root = tmp_path / "course"
+    root.mkdir()
+    for i in range(6):
+        (root / f"f{i}.txt").write_text(" ".join(f"file{i} word{w}." for w in range(12)))
+    return root
+
+
+def _ingest(root, store, **kwargs):
+    kwargs.setdefault("checkpoint_every", 1)
+    return bulk_ingest.ingest_directory(
+        root, embed_fn=lambda texts: [[0.0]] * len(texts), write_fn=store.write,
+        delete_fn=store.delete, batch_size=2, queue_size=1, **kwargs)
+
+
+def _bm25_ids(bm25):
+    return sorted(f"{d}:{m['chunk_index']}" for d, m in zip(bm25._DOC_IDS, bm25._METAS))
+
+
+def _rows(db):
+    return [dict(r) for r in db.get_conn().execute(
+        "SELECT path, status, attempts, error, chunk_count FROM documents ORDER BY path")]
+
+
+def test_crash_and_resume_leaves_every_chunk_exactly_once(corpus, tmp_db, bm25, tmp_path, monkeypatch):
+    clean = FakeChroma()
+    _ingest(corpus, clean)
+    expected_chroma, expected_bm25 = clean.doc_ids(), _bm25_ids(bm25)
+    assert len(expected_chroma) > 12
+
+    # Same corpus from scratch (new database and BM25 file), killed part-way through
+    monkeypatch.setattr(tmp_db.settings, "metadata_db_path", str(tmp_path / "second.db"))
+    monkeypatch.setattr(tmp_db, "_initialized", False)
+    monkeypatch.setattr(tmp_db, "_local", type(tmp_db._local)())
+    monkeypatch.setattr(bm25.settings, "bm25_index_path", str(tmp_path / "second.pkl"))
+    bm25.load()  # nothing saved there yet
+    for doc_id in set(bm25._DOC_IDS):
+        bm25.remove_doc(doc_id)
+
+    store = FakeChroma(fail_after=5)
+    first = _ingest(corpus, store)
+    assert first["error"] and "index stage failed" in first["error"]
+    assert 0 < first["ready"] < 6
+
+    # Resume: after a restart, the saved BM25 index is what's on disk
+    bm25.load()
+    store.fail_after = None
+    second = _ingest(corpus, store)
+    assert second["error"] is None
+    assert second["skipped"] == first["ready"]
+    assert first["ready"] + second["ready"] == 6
+
+    assert store.doc_ids() == expected_chroma
+    assert _bm25_ids(bm25) == expected_bm25
+    assert [r["status"] for r in _rows(tmp_db)] == ["READY"] * 6
+
+
+def test_ready_hashes_are_skipped(corpus, tmp_db):
+    store = FakeChroma()
+    _ingest(corpus, store)
+    store.writes = 0
+
+    (corpus / "copy.txt").write_bytes((corpus / "f0.txt").read_bytes())
+    again = _ingest(corpus, store)
+    assert (again["files"], again["skipped"], again["to_ingest"]) == (7, 7, 0)
+    assert store.writes == 0
+
+
+def test_changed_file_drops_its_old_tail_and_row(corpus, tmp_db, bm25):
+    store = FakeChroma()
+    _ingest(corpus, store)
+    old = [i for i in store.doc_ids() if i.startswith("f0.txt:")]
+    assert len(old) > 1
+
+    (corpus / "f0.txt").write_text("Now a single short sentence.")
+    res = _ingest(corpus, store)
+    assert res["ready"] == 1
+    assert [i for i in store.doc_ids() if i.startswith("f0.txt:")] == ["f0.txt:1"]
+    assert [i for i in _bm25_ids(bm25) if i.startswith("f0.txt:")] == ["f0.txt:1"]
+    rows = [r for r in _rows(tmp_db) if r["path"].endswith("f0.txt")]
+    assert [(r["status"], r["attempts"], r["chunk_count"]) for r in rows] == [("READY", 2, 1)]
+
+
+def test_empty_file_fails_once_per_path(corpus, tmp_db):
+    (corpus / "empty.md").write_text("   \n")
+    store = FakeChroma()
+    first = _ingest(corpus, store)
+    second = _ingest(corpus, store)
+
+    assert first["failed"] == second["failed"] == 1
+    assert second["to_ingest"] == 1  # failed files are retried
+    rows = [r for r in _rows(tmp_db) if r["path"].endswith("empty.md")]
+    assert len(rows) == 1
+    assert rows[0]["status"] == "FAILED" and rows[0]["attempts"] == 2
+    assert rows[0]["error"].startswith("No text extracted")
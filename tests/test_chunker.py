@@ -0,0 +1,133 @@
+"""
+Streaming chunker (app.services.chunker): char offsets into the joined
+document text, page mapping, sentence-boundary cuts and overlap.
+
+Uses the word-split fallback tokenizer so results don't depend on a
+downloaded model.
+"""
+import re
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.services.chunker import iter_chunks  # noqa: E402
+
+_WORD = re.compile(r"\w+|[^\w\s]")
+
+
+def _chunks(pages, **kwargs):
+    kwargs.setdefault("overlap_tokens", 0)
+    kwargs.setdefault("min_tokens", 1)
+    return list(iter_chunks(pages, tokenizer=None, **kwargs))
+
+
+def _document(pages):
+    return "\n\n".join(t.strip() for _, t in pages if t and t.strip())
+
+
+def _page_of(pages, offset):
+    """Page number holding document offset `offset`."""
+    pos = 0
+    for page_no, text in pages:
+        text = (text or "").strip()
+        if not text:
+            continue
+        if offset < pos + len(text):
+            return page_no
+        pos += len(text) + 2
+    raise AssertionError(f"offset {offset} is past the document")
+
+
+def _numbered_pages(n, sentences_per_page=3):
+    return [
+        (p, " ".join(f"Page {p} sentence {s} has words." for s in range(sentences_per_page)))
+        for p in range(1, n + 1)
+    ]
+
+
+def test_offsets_index_the_joined_document_text():
+    pages = _numbered_pages(12)
+    doc = _document(pages)
+    chunks = _chunks(pages, max_tokens=16, overlap_tokens=3)
+
+    assert len(chunks) > 12
+    for ch in chunks:
+        assert doc[ch["char_start"]:ch["char_end"]] == ch["text"]
+        assert ch["tokens"] == len(_WORD.findall(ch["text"])) <= 16
+
+
+def test_pages_map_to_where_the_chunk_starts_and_ends():
+    pages = _numbered_pages(6)
+    chunks = _chunks(pages, max_tokens=20)
+
+    for ch in chunks:
+        assert ch["page"] == _page_of(pages, ch["char_start"])
+        assert ch["page_end"] == _page_of(pages, ch["char_end"] - 1)
+    assert any(ch["page"] != ch["page_end"] for ch in chunks)
+    assert chunks[-1]["page_end"] == 6
+
+
+def test_empty_pages_are_skipped_but_keep_their_numbers():
+    pages = [(1, "First page text."), (2, "   "), (3, ""), (4, "Fourth page text.")]
+    chunks = _chunks(pages, max_tokens=50)
+
+    assert len(chunks) == 1
+    assert chunks[0]["text"] == "First page text.\n\nFourth page text."
+    assert (chunks[0]["page"], chunks[0]["page_end"]) == (1, 4)
+
+
+def test_plain_strings_are_numbered_from_one():
+    chunks = _chunks(["Alpha one.", "Beta two."], max_tokens=3)
+    assert [(c["text"], c["page"]) for c in chunks] == [("Alpha one.", 1), ("Beta two.", 2)]
+    assert chunks[1]["char_start"] == len("Alpha one.\n\n")
+
+
+def test_windows_end_on_a_sentence_boundary():
+    text = "One two three four. Five six seven eight nine ten eleven twelve."
+    chunks = _chunks([(1, text)], max_tokens=10)
+
+    assert chunks[0]["text"] == "One two three four."
+    assert chunks[1]["text"] == "Five six seven eight nine ten eleven twelve."
+
+
+def test_min_tokens_forces_a_hard_cut_over_an_early_boundary():
+    text = "One two. Three four five six seven eight nine ten eleven twelve."
+    chunks = _chunks([(1, text)], max_tokens=6, min_tokens=4)
+    assert chunks[0]["tokens"] == 6
+    assert chunks[0]["text"] == "One two. Three four five"
+
+
+def test_consecutive_windows_share_the_overlap():
+    words = " ".join(f"w{i}" for i in range(40))
+    chunks = _chunks([(1, words)], max_tokens=10, overlap_tokens=3)
+
+    for prev, nxt in zip(chunks, chunks[1:]):
+        assert prev["text"].split()[-3:] == nxt["text"].split()[:3]
+    assert chunks[-1]["text"].endswith("w39")
+
+
+def test_overlap_across_a_page_break_keeps_the_earlier_page():
+    pages = [(1, "a b c d e f"), (2, "g h i j k l")]
+    chunks = _chunks(pages, max_tokens=8, overlap_tokens=4)
+
+    assert chunks[0]["text"] == "a b c d e f"  # the page end counts as a boundary
+    # The overlap reaches back past the boundary; the next window must still
+    # move past it rather than re-emit "c d e f".
+    assert chunks[1]["text"] == "c d e f\n\ng h i j"
+    assert chunks[1]["page"] == 1 and chunks[1]["page_end"] == 2
+    assert all(b["char_end"] > a["char_end"] for a, b in zip(chunks, chunks[1:]))
+
+
+def test_pages_are_consumed_lazily():
+    pulled = []
+
+    def pages():
+        for page_no, text in _numbered_pages(50):
+            pulled.append(page_no)
+            yield page_no, text
+
+    it = iter_chunks(pages(), max_tokens=16, overlap_tokens=0, min_tokens=1, tokenizer=None)
+    first = next(it)
+    assert first["page"] == 1
+    assert len(pulled) < 5
@@ -0,0 +1,150 @@
+"""
+Prompt packing (app.services.context_packer) and token counting
+(app.services.token_counter).
+"""
+import logging
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.services import token_counter  # noqa: E402
+from app.services.context_packer import pack_chunks  # noqa: E402
+
+
+def _chunk(text, path="doc.pdf", idx=None):
+    meta = {"path": path}
+    if idx is not None:
+        meta["chunk_index"] = idx
+    return {"text": text, "score": 1.0, "meta": meta}
+
+
+def _sentences(n, word):
+    return " ".join(f"Sentence {i} talks about {word} in some detail." for i in range(n))
+
+
+def test_exact_duplicates_are_dropped_in_rank_order():
+    chunks = [_chunk("alpha beta gamma"), _chunk("  alpha beta gamma "), _chunk("delta"), _chunk("")]
+    packed, stats = pack_chunks("q", chunks, budget_tokens=1000, sentence_filter=False)
+    assert [c["text"] for c in packed] == ["alpha beta gamma", "delta"]
+    assert stats["duplicates_dropped"] == 2
+
+
+def test_overlap_with_the_previous_window_is_stripped():
+    shared = "the shared window text repeated by the chunker overlap"
+    first = "Opening words of the first chunk, then " + shared
+    second = shared + " and the new words of the second chunk."
+    packed, stats = pack_chunks(
+        "q", [_chunk(second, idx=2), _chunk(first, idx=1)], budget_tokens=1000, sentence_filter=False
+    )
+    assert packed[0]["text"] == "and the new words of the second chunk."
+    assert packed[1]["text"] == first
+    assert stats["overlap_chars_removed"] == len(shared)
+
+
+def test_stripping_a_later_window_refunds_its_tokens():
+    shared = "the shared window text repeated by the chunker overlap"
+    first = "Opening words of the first chunk, then " + shared
+    second = shared + " and the new words of the second chunk."
+    packed, stats = pack_chunks(
+        "q", [_chunk(second, idx=2), _chunk(first, idx=1)], budget_tokens=1000, sentence_filter=False
+    )
+    assert stats["tokens_out"] == sum(token_counter.count_tokens(c["text"]) for c in packed)
+
+
+def test_overlap_is_kept_when_the_previous_window_is_dropped():
+    shared = "the shared window text repeated by the chunker overlap."
+    second = shared + " And the new words of the second chunk."
+    first = _sentences(20, "pears") + " " + shared
+    budget = token_counter.count_tokens(second) + 10  # no room left for even a partial first
+    packed, stats = pack_chunks(
+        "q", [_chunk(second, idx=2), _chunk(first, idx=1)], budget_tokens=budget, sentence_filter=False
+    )
+    assert [c["text"] for c in packed] == [second]
+    assert stats["dropped"] == 1 and stats["overlap_chars_removed"] == 0
+
+
+def test_overlap_is_kept_when_the_previous_window_is_trimmed():
+    shared = "the shared window text repeated by the chunker overlap."
+    first = _sentences(20, "pears") + " " + shared
+    second = shared + " And the new words of the second chunk."
+    budget = token_counter.count_tokens(second) + token_counter.count_tokens(first) // 2
+    packed, stats = pack_chunks(
+        "q", [_chunk(second, idx=2), _chunk(first, idx=1)], budget_tokens=budget, sentence_filter=False
+    )
+    # The trimmed first window lost its tail, so the second keeps the shared text
+    assert stats["trimmed"] == 1 and not packed[1]["text"].endswith(shared)
+    assert packed[0]["text"] == second
+    assert stats["overlap_chars_removed"] == 0
+
+
+def test_overlap_is_kept_when_the_sentence_filter_cuts_the_previous_tail():
+    shared = "wind turbines feed the grid at night when demand drops"
+    first = "Solar panels cover the roof. The " + shared
+    second = shared + ", and solar output is zero."
+    packed, stats = pack_chunks("solar", [_chunk(first, idx=1), _chunk(second, idx=2)], budget_tokens=1000,
+                                sentence_filter=True)
+    assert [c["text"] for c in packed] == ["Solar panels cover the roof.", second]
+    assert stats["overlap_chars_removed"] == 0
+
+
+def test_overlap_is_not_stripped_across_documents():
+    shared = "the shared window text repeated by the chunker overlap"
+    chunks = [_chunk("Intro " + shared, "a.pdf", 1), _chunk(shared + " tail", "b.pdf", 2)]
+    packed, stats = pack_chunks("q", chunks, budget_tokens=1000, sentence_filter=False)
+    assert stats["overlap_chars_removed"] == 0
+    assert packed[1]["text"] == shared + " tail"
+
+
+def test_inputs_are_not_modified():
+    chunk = _chunk("  padded text  ")
+    pack_chunks("q", [chunk], budget_tokens=1000, sentence_filter=False)
+    assert chunk["text"] == "  padded text  "
+
+
+def test_budget_trims_the_lowest_ranked_chunk_at_a_sentence():
+    top = _sentences(10, "apples")
+    low = _sentences(40, "pears")
+    budget = token_counter.count_tokens(top) + 120
+    packed, stats = pack_chunks("q", [_chunk(top), _chunk(low)], budget_tokens=budget, sentence_filter=False)
+
+    assert packed[0]["text"] == top
+    assert low.startswith(packed[1]["text"]) and packed[1]["text"].endswith(".")
+    assert stats["trimmed"] == 1
+    assert stats["tokens_out"] <= budget
+
+
+def test_chunks_that_do_not_fit_are_dropped():
+    top = _sentences(10, "apples")
+    budget = token_counter.count_tokens(top) + 10  # below the minimum partial size
+    packed, stats = pack_chunks(
+        "q", [_chunk(top), _chunk(_sentences(5, "pears"))], budget_tokens=budget, sentence_filter=False
+    )
+    assert len(packed) == 1
+    assert stats["dropped"] == 1
+
+
+def test_sentence_filter_keeps_sentences_with_question_terms():
+    text = "Photosynthesis happens in leaves. The weather was nice. Chlorophyll drives photosynthesis."
+    packed, _ = pack_chunks("Explain photosynthesis", [_chunk(text)], budget_tokens=1000, sentence_filter=True)
+    assert packed[0]["text"] == "Photosynthesis happens in leaves. Chlorophyll drives photosynthesis."
+
+
+def test_local_tokenizer_file_counts_exactly(tmp_path, monkeypatch):
+    tokenizers = pytest.importorskip("tokenizers")
+    tok = tokenizers.Tokenizer(tokenizers.models.WordLevel({"hello": 0, "world": 1, "[UNK]": 2}, unk_token="[UNK]"))
+    tok.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    path = tmp_path / "tokenizer.json"
+    tok.save(str(path))
+
+    monkeypatch.setitem(token_counter.settings.llm_tokenizers, "tiny", str(path))
+    assert token_counter.count_tokens("hello world hello", "tiny") == 3
+    assert token_counter.preload(["tiny"]) == {"tiny": True}
+
+
+def test_estimate_fallback_warns_once_per_model(monkeypatch, caplog):
+    monkeypatch.setattr(token_counter, "_estimated", set())
+    with caplog.at_level(logging.WARNING, logger="app.services.token_counter"):
+        assert token_counter.count_tokens("x" * 40, "unknown-model") == 10
+        token_counter.count_tokens("more text", "unknown-model")
+    assert len([r for r in caplog.records if "unknown-model" in r.getMessage()]) == 1
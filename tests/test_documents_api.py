@@ -0,0 +1,38 @@
+"""
+Upload endpoint (app.api.routes_documents): the streamed temp file never
+outlives a failed hand-off to the ingest queue.
+"""
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("httpx")  # TestClient
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.api import routes_documents  # noqa: E402
+from app.services import storage  # noqa: E402
+from app.workers.ingest import IngestBacklogFull  # noqa: E402
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "UPLOAD_DIR", tmp_path)
+    app = FastAPI()
+    app.include_router(routes_documents.router, prefix="/v1")
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def _post(client):
+    return client.post("/v1/upload", files={"file": ("paper.pdf", b"%PDF-1.4 not really", "application/pdf")})
+
+
+@pytest.mark.parametrize("error, status", [(IngestBacklogFull("backlog full"), 429),
+                                           (RuntimeError("database is locked"), 500)])
+def test_failed_submit_removes_the_temp_file(client, tmp_path, monkeypatch, error, status):
+    def submit(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(routes_documents.ingest_queue, "submit", submit)
+    assert _post(client).status_code == status
+    assert list(tmp_path.iterdir()) == []
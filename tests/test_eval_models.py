@@ -0,0 +1,67 @@
+"""
+Multi-model evaluation script (eval_models): answers reach the checkpoint
+as they finish, and a failed retrieval does not abort the run.
+"""
+import json
+
+import pytest
+
+for _mod in ("openai", "pandas", "dotenv", "requests"):
+    pytest.importorskip(_mod)
+
+import eval_models  # noqa: E402
+
+MODELS = [{"name": "a", "model": "model-a"}, {"name": "b", "model": "model-b"}]
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    """eval_models with stubbed models/questions/LLM, writing under tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "results").mkdir()
+    monkeypatch.setattr(eval_models, "CHECKPOINT", tmp_path / "results" / "ckpt.jsonl")
+    monkeypatch.setattr(eval_models, "load_models", lambda path: MODELS)
+    monkeypatch.setattr(eval_models, "load_questions", lambda path: ["q1", "q2", "q3"])
+    monkeypatch.setattr(eval_models, "call_llm", lambda m, q, passages: {
+        "provider_name": m["name"], "model": m["model"], "latency_sec": 0.1, "answer": f"{q} by {m['name']}"})
+    return eval_models
+
+
+def _checkpoint(mod):
+    return [json.loads(line) for line in mod.CHECKPOINT.read_text().splitlines()]
+
+
+def test_failed_retrieval_is_recorded_and_the_run_continues(run, tmp_path, monkeypatch):
+    def backend_query(question, top_k, mode):
+        if question == "q2":
+            raise ConnectionError("backend down")
+        return ["passage"]
+
+    monkeypatch.setattr(run, "backend_query", backend_query)
+    run.main()
+
+    saved = json.loads(next((tmp_path / "results").glob("eval_*.json")).read_text())["results"]
+    assert [(r["question"], r["provider_name"], bool(r["error"])) for r in saved] == [
+        ("q1", "a", False), ("q1", "b", False), ("q2", "a", True), ("q2", "b", True),
+        ("q3", "a", False), ("q3", "b", False)]
+    assert "backend down" in saved[2]["error"]
+    # The checkpoint stays for the retry, with the four answers that succeeded
+    assert len(run.load_checkpoint()) == 4
+
+    monkeypatch.setattr(run, "backend_query", lambda question, top_k, mode: ["passage"])
+    run.main()
+    assert not run.CHECKPOINT.exists()
+
+
+def test_interrupt_keeps_the_answers_already_finished(run, monkeypatch):
+    def backend_query(question, top_k, mode):
+        if question == "q2":
+            raise KeyboardInterrupt
+        return ["passage"]
+
+    monkeypatch.setattr(run, "backend_query", backend_query)
+    with pytest.raises(KeyboardInterrupt):
+        run.main()
+
+    assert sorted((r["question"], r["provider_name"]) for r in _checkpoint(run)) == [("q1", "a"), ("q1", "b")]
+    assert set(run.load_checkpoint()) == {("q1", "a"), ("q1", "b")}
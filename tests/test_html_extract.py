@@ -0,0 +1,45 @@
+"""
+HTML main-content extraction (app.services.html_extract): boilerplate
+stripping and the choice of content root, on the fixture server's pages.
+"""
+import pytest
+
+pytest.importorskip("lxml")
+
+from benchmarks.fixture_http import render_page  # noqa: E402
+
+from app.services.html_extract import MAX_TITLE_CHARS, extract_html  # noqa: E402
+
+
+def test_fixture_page_keeps_the_article_only():
+    title, text = extract_html(render_page(7, paragraphs=3).decode())
+    assert title == "Fixture page 7"
+    assert text.splitlines()[0] == "Fixture page 7"
+    assert [line.split(".")[0] for line in text.splitlines()[1:]] == [
+        "Section 1 of page 7", "Section 2 of page 7", "Section 3 of page 7"]
+    for boilerplate in ("tracking", "margin", "Home", "Related links", "Copyright"):
+        assert boilerplate not in text
+
+
+def test_boilerplate_is_stripped_from_a_body_root():
+    html = (b"<html><head><title> Notes </title><style>.x{}</style></head><body>"
+            b"<nav>Menu</nav><aside>Ads</aside><noscript>Enable JS</noscript>"
+            b"<p>First   line</p>\n\n  <p>Second line</p><script>track()</script>"
+            b"<footer>Footer</footer></body></html>")
+    assert extract_html(html) == ("Notes", "First   line\nSecond line")
+
+
+@pytest.mark.parametrize("html, expected", [
+    ("<body><div>Intro</div><main><p>Main text</p></main></body>", "Main text"),
+    ("<body><div>Intro</div><div class='page-Content'><p>Div text</p></div></body>", "Div text"),
+    ("<body><main>Main</main><article>Article text</article></body>", "Article text"),
+])
+def test_content_root_preference(html, expected):
+    assert extract_html(html)[1] == expected
+
+
+def test_title_falls_back_to_the_url_and_is_capped():
+    url = "https://example.org/" + "a" * 300
+    assert extract_html("<body><p>Text</p></body>", url)[0] == url[:MAX_TITLE_CHARS]
+    assert extract_html("   ", url) == (url[:MAX_TITLE_CHARS], "")
+    assert extract_html('<?xml version="1.0" encoding="utf-8"?><html><body>Hi</body></html>')[1] == "Hi"
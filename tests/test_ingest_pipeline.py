@@ -0,0 +1,154 @@
+"""
+Staged ingestion (app.services.ingest_pipeline): ids and metadata, error
+propagation out of the stage threads, and the PDF re-ingest cleanup in
+app.services.storage.
+"""
+import threading
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.services.ingest_pipeline import StageError, run_pipeline  # noqa: E402
+
+
+def _chunker(pages):
+    for page_no, text in pages:
+        for part in text.split("|"):
+            yield {"text": part, "page": page_no, "tokens": len(part.split())}
+
+
+def _embed(texts):
+    return [[float(len(t))] for t in texts]
+
+
+class _Sink:
+    def __init__(self):
+        self.rows = []
+
+    def __call__(self, ids, texts, embeddings, metadatas):
+        self.rows.extend(zip(ids, texts, embeddings, metadatas))
+
+
+def _run(pages, **kwargs):
+    kwargs.setdefault("embed_fn", _embed)
+    kwargs.setdefault("write_fn", _Sink())
+    return run_pipeline(pages, "doc.pdf", {"source": "test"}, chunker=_chunker,
+                        batch_size=2, queue_size=1, **kwargs)
+
+
+def test_chunks_are_numbered_per_document_with_position_metadata():
+    sink = _Sink()
+    run = _run([(1, "a|b c"), (2, "d")], write_fn=sink)
+
+    assert [r[0] for r in sink.rows] == ["doc.pdf:1", "doc.pdf:2", "doc.pdf:3"]
+    assert sink.rows[1][3] == {"source": "test", "chunk_index": 2, "page": 1, "tokens": 2}
+    assert sink.rows[2][3]["page"] == 2
+    assert (run["pages"], run["chars"], run["chunks_indexed"]) == (2, 6, 3)
+    assert run["stages"]["index"]["items_out"] == 2  # two batches of <= 2
+
+
+def test_run_reports_rss_added_during_the_run():
+    run = _run([(1, "a")])
+    assert run["rss_delta_mb"] is None or run["rss_delta_mb"] >= 0
+
+
+@pytest.mark.parametrize("stage", ["extract", "chunk", "embed", "index"])
+def test_a_failing_stage_is_named_and_chained(stage):
+    boom = ValueError(f"{stage} broke")
+
+    def pages():
+        yield 1, "a|b"
+        if stage == "extract":
+            raise boom
+        yield 2, "c|d"
+
+    def chunker(items):
+        for ch in _chunker(items):
+            if stage == "chunk":
+                raise boom
+            yield ch
+
+    def embed(texts):
+        if stage == "embed":
+            raise boom
+        return _embed(texts)
+
+    def write(**kwargs):
+        if stage == "index":
+            raise boom
+
+    before = threading.active_count()
+    with pytest.raises(StageError) as exc:
+        run_pipeline(pages(), "doc.pdf", {}, chunker=chunker, embed_fn=embed, write_fn=write,
+                     batch_size=1, queue_size=1)
+    assert exc.value.stage == stage
+    assert exc.value.__cause__ is boom
+    # Every stage thread exits; a failure must not leave one blocked on a queue
+    assert threading.active_count() == before
+
+
+def test_a_failed_run_does_not_block_on_a_large_source():
+    def pages():
+        for i in range(1, 10_000):
+            yield i, "x"
+
+    def write(**kwargs):
+        raise RuntimeError("disk full")
+
+    with pytest.raises(StageError) as exc:
+        run_pipeline(pages(), "doc.pdf", {}, chunker=_chunker, embed_fn=_embed, write_fn=write,
+                     batch_size=1, queue_size=1)
+    assert exc.value.stage == "index"
+
+
+def test_pdf_reingest_drops_old_chunks_from_both_indexes(tmp_path, monkeypatch):
+    from app.services import storage
+
+    calls = []
+    monkeypatch.setattr(storage, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(storage, "_drop_indexed", lambda path: calls.append(path))
+
+    def failing_pipeline(*args, **kwargs):
+        calls.append("run")
+        err = RuntimeError("model gone")
+        raise StageError("embed", err) from err
+
+    monkeypatch.setattr(storage, "run_pipeline", failing_pipeline)
+    pdf = tmp_path / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+
+    res = storage.save_and_index_pdf(pdf)
+    assert res["ok"] is False and res["error"] == "Indexing failed: model gone"
+    # Before the run (stale tail of a longer old version) and after the failure (partial writes)
+    assert calls == [pdf, "run", pdf]
+
+
+def test_pdf_knowledge_entry_records_the_content_hash(tmp_path, monkeypatch):
+    from app.services import storage
+
+    recorded = []
+    monkeypatch.setattr(storage, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(storage, "_drop_indexed", lambda path: None)
+    monkeypatch.setattr(storage.bm25_index, "save", lambda: None)
+    monkeypatch.setattr(storage, "add_document", lambda *args, **kwargs: recorded.append((args, kwargs)))
+    monkeypatch.setattr(storage, "run_pipeline", lambda *args, **kwargs: {
+        "pages": 2, "chunks_indexed": 5, "stages": {}, "rss_delta_mb": 0.0, "elapsed_s": 0.1})
+    pdf = tmp_path / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+
+    assert storage.save_and_index_pdf(pdf, content_hash="cd" * 32)["ok"]
+    (args, kwargs), = recorded
+    assert args == ("doc.pdf", str(pdf), 2, 5)
+    assert kwargs["content_hash"] == "cd" * 32 and kwargs["replace"] is True
+
+
+def test_drop_indexed_targets_the_stored_path(monkeypatch):
+    from app.services import bm25_index, storage, vectorstore
+
+    deleted = []
+    monkeypatch.setattr(vectorstore, "delete_by_path", lambda p: deleted.append(("chroma", p)))
+    monkeypatch.setattr(bm25_index, "remove_doc", lambda d: deleted.append(("bm25", d)))
+
+    storage._drop_indexed(storage.UPLOAD_DIR / "doc.pdf")
+    assert deleted == [("chroma", str(storage.UPLOAD_DIR / "doc.pdf")), ("bm25", "doc.pdf")]
@@ -0,0 +1,167 @@
+"""
+Background ingestion jobs (app.workers.ingest): retries, recovery, the
+pending bound and atomic upload dedup.
+"""
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.workers import ingest  # noqa: E402
+from app.workers.ingest import FAILED, QUEUED, READY, IngestBacklogFull, IngestQueue  # noqa: E402
+
+
+@pytest.fixture
+def indexer(tmp_db, monkeypatch):
+    """Replace save_and_index_pdf with a scripted stand-in; returns its call log."""
+    from app.services import storage
+
+    monkeypatch.setattr(ingest.settings, "ingest_retry_backoff_s", 0.01)
+    state = {"results": [], "calls": [], "hashes": [], "gate": None}
+
+    def fake_index(path, source="upload", content_hash=None):
+        state["calls"].append(path)
+        state["hashes"].append(content_hash)
+        if state["gate"] is not None:
+            state["gate"].wait(5)
+        return state["results"].pop(0) if state["results"] else {"ok": True, "pages": 1, "chunks_indexed": 3}
+
+    monkeypatch.setattr(storage, "save_and_index_pdf", fake_index)
+    return state
+
+
+def _wait_done(document_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = ingest.get_job(document_id)
+        if job["status"] in (READY, FAILED):
+            return job
+        assert time.monotonic() < deadline, f"job stuck in {job['status']}"
+        time.sleep(0.01)
+
+
+def test_job_runs_to_ready(indexer, tmp_path):
+    queue = IngestQueue(workers=1, max_pending=10, max_attempts=3)
+    job, duplicate = queue.submit(tmp_path / "a.pdf", "a.pdf")
+    assert not duplicate and job["status"] == QUEUED
+
+    done = _wait_done(job["document_id"])
+    assert (done["status"], done["chunk_count"], done["attempts"]) == (READY, 3, 1)
+    queue.shutdown(wait=True)
+
+
+def test_job_passes_its_content_hash_to_the_indexer(indexer, tmp_path):
+    queue = IngestQueue(workers=1, max_pending=10, max_attempts=3)
+    job, _ = queue.submit(tmp_path / "a.pdf", "a.pdf", content_hash="ab" * 32)
+
+    _wait_done(job["document_id"])
+    assert indexer["hashes"] == ["ab" * 32]
+    queue.shutdown(wait=True)
+
+
+def test_indexing_errors_are_retried(indexer, tmp_path):
+    indexer["results"] = [{"ok": False, "error": "Indexing failed: chroma busy"}]
+    queue = IngestQueue(workers=1, max_pending=10, max_attempts=3)
+    job, _ = queue.submit(tmp_path / "a.pdf", "a.pdf")
+
+    done = _wait_done(job["document_id"])
+    assert (done["status"], done["attempts"]) == (READY, 2)
+    queue.shutdown(wait=True)
+
+
+def test_retries_stop_at_max_attempts(indexer, tmp_path):
+    indexer["results"] = [{"ok": False, "error": "Indexing failed: down"}] * 5
+    queue = IngestQueue(workers=1, max_pending=10, max_attempts=2)
+    job, _ = queue.submit(tmp_path / "a.pdf", "a.pdf")
+
+    done = _wait_done(job["document_id"])
+    assert (done["status"], done["attempts"], done["error"]) == (FAILED, 2, "Indexing failed: down")
+    queue.shutdown(wait=True)
+
+
+def test_file_errors_are_not_retried(indexer, tmp_path):
+    indexer["results"] = [{"ok": False, "error": "No text could be extracted"}]
+    queue = IngestQueue(workers=1, max_pending=10, max_attempts=3)
+    job, _ = queue.submit(tmp_path / "a.pdf", "a.pdf")
+
+    done = _wait_done(job["document_id"])
+    assert (done["status"], done["attempts"]) == (FAILED, 1)
+    queue.shutdown(wait=True)
+
+
+def test_recover_requeues_unfinished_jobs(indexer, tmp_db):
+    now = tmp_db.utcnow()
+    with tmp_db.transaction() as conn:
+        for doc_id, status in (("q", "QUEUED"), ("p", "PROCESSING"), ("r", "READY")):
+            conn.execute(
+                "INSERT INTO documents (document_id, filename, path, status, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (doc_id, f"{doc_id}.pdf", f"/tmp/{doc_id}.pdf", status, now, now),
+            )
+    queue = IngestQueue(workers=2, max_pending=10, max_attempts=3)
+    assert queue.recover() == 2
+
+    assert _wait_done("q")["status"] == READY
+    assert _wait_done("p")["status"] == READY
+    assert sorted(indexer["calls"]) == ["/tmp/p.pdf", "/tmp/q.pdf"]
+    queue.shutdown(wait=True)
+
+
+def test_concurrent_submits_never_exceed_max_pending(indexer, tmp_path):
+    indexer["gate"] = threading.Event()  # workers hold their jobs
+    queue = IngestQueue(workers=1, max_pending=3, max_attempts=1)
+    accepted, rejected = [], []
+    start = threading.Barrier(12)
+
+    def submit(i):
+        start.wait()
+        try:
+            accepted.append(queue.submit(tmp_path / f"{i}.pdf", f"{i}.pdf")[0])
+        except IngestBacklogFull:
+            rejected.append(i)
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    assert (len(accepted), len(rejected)) == (3, 9)
+
+    indexer["gate"].set()
+    for job in accepted:
+        _wait_done(job["document_id"])
+    queue.shutdown(wait=True)
+
+
+def test_concurrent_uploads_of_one_file_queue_one_job(indexer, tmp_path):
+    queue = IngestQueue(workers=1, max_pending=10, max_attempts=1)
+    committed, results = [], []
+    start = threading.Barrier(8)
+
+    def commit(path):
+        committed.append(path)
+        return path
+
+    def upload():
+        start.wait()
+        results.append(queue.submit(tmp_path / "same.pdf", "same.pdf", content_hash="abc", commit=commit))
+
+    threads = [threading.Thread(target=upload) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+    fresh = [job for job, duplicate in results if not duplicate]
+    assert len(fresh) == 1 and len(committed) == 1
+    assert {job["document_id"] for job, _ in results} == {fresh[0]["document_id"]}
+    _wait_done(fresh[0]["document_id"])
+
+    # A FAILED job doesn't block re-uploading the same content
+    with ingest.transaction() as conn:
+        conn.execute("UPDATE documents SET status = 'FAILED'")
+    job, duplicate = queue.submit(tmp_path / "same.pdf", "same.pdf", content_hash="abc")
+    assert not duplicate and job["document_id"] != fresh[0]["document_id"]
+    queue.shutdown(wait=True)
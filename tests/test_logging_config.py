@@ -0,0 +1,111 @@
+"""
+Logging setup (app.core.logging_config): per-request sampling, the JSON
+line format, drop-on-full queueing and what configure_logging installs.
+"""
+import json
+import logging
+import logging.config
+import queue
+import sys
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.core import logging_config  # noqa: E402
+
+
+def _record(msg="hello", level=logging.INFO, name="app.api.routes_query", request_id=None, **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, (), None)
+    if request_id is not None:
+        record.request_id = request_id
+    record.__dict__.update(extra)
+    return record
+
+
+@pytest.fixture
+def fresh_logging(monkeypatch):
+    """configure_logging() from scratch; the root logger and module state are restored afterwards."""
+    root = logging.getLogger()
+    access = logging.getLogger("uvicorn.access")
+    saved = (list(root.handlers), root.level, list(access.handlers), list(access.filters), access.propagate)
+    monkeypatch.setattr(logging_config, "_listener", None)
+    monkeypatch.setattr(logging_config, "_atexit_registered", False)
+    yield logging_config
+    logging_config._stop_listener()
+    root.handlers[:], access.handlers[:], access.filters[:] = saved[0], saved[2], saved[3]
+    root.setLevel(saved[1])
+    access.propagate = saved[4]
+
+
+def test_sampling_keeps_or_drops_a_whole_request():
+    sampler = logging_config.SamplingFilter({"app.api": 0.5, "app.api.routes_health": 0.0})
+    decisions = {}
+    for i in range(400):
+        rid = f"req-{i}"
+        kept = {sampler.filter(_record(f"line {n}", request_id=rid)) for n in range(5)}
+        assert len(kept) == 1, f"{rid} was split"
+        decisions[rid] = kept.pop()
+    assert 0.35 < sum(decisions.values()) / len(decisions) < 0.65
+
+    assert not sampler.filter(_record(name="app.api.routes_health", request_id="req-1"))
+    assert sampler.filter(_record(name="app.services.llm", request_id="req-1"))  # no matching prefix
+    assert all(sampler.filter(_record(level=logging.WARNING, request_id=rid)) for rid in decisions)
+
+
+def test_json_formatter_emits_extra_fields_and_ids():
+    line = logging_config.JsonFormatter().format(
+        _record("took %s", request_id="req-7", trace_id="-", elapsed_ms=12.5, route="/v1/query"))
+    out = json.loads(line)
+    assert out["msg"] == "took %s" and out["level"] == "INFO" and out["logger"] == "app.api.routes_query"
+    assert out["request_id"] == "req-7" and "trace_id" not in out  # "-" means no trace
+    assert (out["elapsed_ms"], out["route"]) == (12.5, "/v1/query")
+    assert out["ts"].endswith("Z")
+
+
+def test_json_formatter_keeps_the_traceback_across_the_queue():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = _record("failed")
+        record.exc_info = sys.exc_info()
+
+    direct = json.loads(logging_config.JsonFormatter().format(record))
+    handler = logging_config._DroppingQueueHandler(queue.Queue())
+    queued = json.loads(logging_config.JsonFormatter().format(handler.prepare(record)))
+
+    assert direct["exc"].endswith("ValueError: boom")
+    assert queued["exc"] == direct["exc"]
+    assert queued["msg"] == "failed"  # traceback not glued onto the message
+
+
+def test_full_queue_drops_instead_of_blocking(monkeypatch):
+    monkeypatch.setattr(logging_config, "_dropped", 0)
+    handler = logging_config._DroppingQueueHandler(queue.Queue(maxsize=2))
+    for i in range(5):
+        handler.emit(_record(f"line {i}"))
+    assert handler.queue.qsize() == 2
+    assert logging_config.dropped_records() == 3
+
+
+def test_reconfiguring_registers_one_exit_hook(fresh_logging, monkeypatch):
+    hooks = []
+    monkeypatch.setattr(logging_config.atexit, "register", hooks.append)
+    for _ in range(3):
+        fresh_logging.configure_logging(force=True)
+    assert hooks == [logging_config._stop_listener]
+    queue_handlers = [h for h in logging.getLogger().handlers if isinstance(h, logging.handlers.QueueHandler)]
+    assert len(queue_handlers) == 1
+
+
+def test_uvicorn_access_log_stays_suppressed(fresh_logging):
+    fresh_logging.configure_logging(force=True)
+    # What uvicorn does when it starts after the app was imported (uvicorn.run)
+    logging.config.dictConfig({
+        "version": 1, "disable_existing_loggers": False,
+        "handlers": {"access": {"class": "logging.StreamHandler"}},
+        "loggers": {"uvicorn.access": {"handlers": ["access"], "level": "INFO", "propagate": False}},
+    })
+    access = logging.getLogger("uvicorn.access")
+    assert not access.disabled
+    assert not access.filter(_record('127.0.0.1 - "GET /v1/health HTTP/1.1" 200', name="uvicorn.access"))
@@ -0,0 +1,106 @@
+"""
+Knowledge-base and evaluation records (app.services.metadata_store):
+paginated listings and the one-time import of the legacy JSON files.
+"""
+import json
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.services import metadata_store  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_db, tmp_path, monkeypatch):
+    """metadata_store on a fresh database, with legacy files under tmp_path (absent by default)."""
+    monkeypatch.setattr(metadata_store, "LEGACY_KB_FILE", tmp_path / "knowledge_meta.json")
+    monkeypatch.setattr(metadata_store, "LEGACY_EVAL_FILE", tmp_path / "evaluations.json")
+    monkeypatch.setattr(metadata_store, "_imported", set())
+    return metadata_store
+
+
+def _evaluation(model, question="q", hallucination=False):
+    return {"question": question, "model": model, "provider": "ollama", "answer": "a",
+            "accuracy": 4, "relevance": 5, "completeness": 3, "hallucination": hallucination,
+            "notes": None}
+
+
+def test_documents_are_listed_newest_first_in_pages(store):
+    for i in range(5):
+        store.add_document(f"doc{i}.pdf", f"/uploads/doc{i}.pdf", pages=i, chunks=10 * i)
+
+    first, total = store.list_documents(limit=2)
+    second, _ = store.list_documents(limit=2, offset=2)
+    last, _ = store.list_documents(limit=2, offset=4)
+
+    assert total == 5
+    assert [r["filename"] for r in first + second + last] == [f"doc{i}.pdf" for i in range(4, -1, -1)]
+    assert first[0]["chunks"] == 40 and first[0]["source"] == "upload"
+    assert store.list_documents(limit=2, offset=10) == ([], 5)
+
+
+def test_evaluations_filter_by_model_and_count_the_filtered_rows(store):
+    for i, model in enumerate(["phi3", "mistral", "phi3", "phi3"]):
+        store.add_evaluation(_evaluation(model, question=f"q{i}", hallucination=i == 3))
+
+    rows, total = store.list_evaluations(limit=2, model="phi3")
+    assert total == 3
+    assert [r["question"] for r in rows] == ["q3", "q2"]
+    assert rows[0]["hallucination"] is True and rows[1]["hallucination"] is False
+    assert store.list_evaluations()[1] == 4
+
+
+def test_legacy_knowledge_json_is_imported_once(store, tmp_path):
+    legacy = [
+        {"filename": "old.pdf", "path": "/old.pdf", "pages": 3, "chunks": 7,
+         "created_at": "2023-01-01T00:00:00Z"},
+        {"name": "older.pdf", "num_pages": 2, "chunks_indexed": 4, "added_at": "2022-01-01T00:00:00Z"},
+        "not a record",
+    ]
+    path = tmp_path / "knowledge_meta.json"
+    path.write_text(json.dumps(legacy))
+
+    rows, total = store.list_documents()
+    assert total == 2
+    assert [(r["filename"], r["pages"], r["chunks"], r["source"]) for r in rows] == [
+        ("old.pdf", 3, 7, "legacy"), ("older.pdf", 2, 4, "legacy")]
+
+    store.add_document("new.pdf", "/uploads/new.pdf", 1, 1)
+    store._imported.clear()  # e.g. a restart: the table is no longer empty
+    rows, total = store.list_documents()
+    assert total == 3 and rows[0]["filename"] == "new.pdf"
+    assert json.loads(path.read_text()) == legacy  # left untouched
+
+
+def test_legacy_import_is_skipped_when_the_table_has_rows(store, tmp_path):
+    store.add_document("new.pdf", "/uploads/new.pdf", 1, 1)
+    store._imported.clear()
+    (tmp_path / "knowledge_meta.json").write_text(json.dumps([{"filename": "old.pdf"}]))
+    assert store.list_documents()[1] == 1
+
+
+def test_unreadable_legacy_json_is_skipped(store, tmp_path, caplog):
+    (tmp_path / "knowledge_meta.json").write_text("{not json")
+    assert store.list_documents() == ([], 0)
+    assert "Could not read legacy knowledge_meta.json" in caplog.text
+
+
+def test_incomplete_legacy_evaluations_are_dropped(store, tmp_path):
+    complete = dict(_evaluation("phi3"), created_at="2023-01-01T00:00:00Z")
+    partial = {"question": "q", "model": "phi3"}
+    (tmp_path / "evaluations.json").write_text(json.dumps([complete, partial]))
+
+    rows, total = store.list_evaluations()
+    assert total == 1
+    assert rows[0]["created_at"] == "2023-01-01T00:00:00Z"
+
+
+def test_replace_drops_earlier_rows_for_the_path(store):
+    store.add_document("a.md", "/course/a.md", 1, 5, source="bulk")
+    store.add_document("b.md", "/course/b.md", 1, 2, source="bulk")
+    store.add_document("a.md", "/course/a.md", 1, 1, source="bulk", replace=True)
+
+    rows, total = store.list_documents()
+    assert total == 2
+    assert sorted((r["path"], r["chunks"]) for r in rows) == [("/course/a.md", 1), ("/course/b.md", 2)]
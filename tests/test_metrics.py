@@ -0,0 +1,42 @@
+"""
+Metrics registry (app.services.metrics): get-or-create by name, and the
+metrics shared across modules being declared in one place.
+"""
+import re
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.services import metrics  # noqa: E402
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+SHARED = {"rag_stage_seconds": "RAG_STAGE", "cache_requests_total": "CACHE_REQUESTS",
+          "index_chunks": "INDEX_CHUNKS"}
+
+
+def test_same_name_returns_the_same_metric():
+    assert metrics.histogram("rag_stage_seconds") is metrics.RAG_STAGE
+    assert metrics.counter("cache_requests_total") is metrics.CACHE_REQUESTS
+    assert metrics.gauge("index_chunks") is metrics.INDEX_CHUNKS
+
+
+def test_a_name_cannot_change_type():
+    with pytest.raises(ValueError, match="already registered"):
+        metrics.counter("index_chunks")
+
+
+@pytest.mark.parametrize("name", sorted(SHARED))
+def test_shared_metrics_are_declared_only_in_the_metrics_module(name):
+    declaration = re.compile(rf"metrics\.(counter|gauge|histogram)\(\s*[\"']{name}[\"']")
+    offenders = [str(p.relative_to(APP_DIR)) for p in APP_DIR.rglob("*.py") if declaration.search(p.read_text())]
+    assert offenders == [], f"declare {name} once as metrics.{SHARED[name]}"
+
+
+def test_shared_metrics_are_exported_in_prometheus_format(monkeypatch):
+    monkeypatch.setattr(metrics._State, "enabled", True)
+    metrics.CACHE_REQUESTS.inc(cache="test", result="hit")
+    text = metrics.render_prometheus()
+    assert text.count("# TYPE cache_requests_total counter") == 1
+    assert 'cache_requests_total{cache="test",result="hit"}' in text
@@ -0,0 +1,108 @@
+"""
+OCR fallback (app.services.ocr): with_ocr keeps page order, bounds the
+pages in flight, passes text pages through and degrades to pass-through
+when OCR is off. The process pool is replaced by a thread-backed stand-in
+whose tasks return canned text, so no Tesseract is needed.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.services import ocr  # noqa: E402
+
+
+class FakePool:
+    """Runs a canned 'OCR' per page on threads; later pages finish first."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.executor = ThreadPoolExecutor(max_workers=8)
+        self.submitted = []
+        self.yielded = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def submit(self, fn, path, page_no, dpi, lang, use_cache):
+        assert fn is ocr._ocr_page
+        with self.lock:
+            self.submitted.append(page_no)
+            self.max_in_flight = max(self.max_in_flight, len(self.submitted) - self.yielded)
+
+        def run():
+            time.sleep(0.002 * (self.pages - page_no))
+            return {"page": page_no, "text": f"ocr {page_no}", "cached": page_no % 2 == 0,
+                    "render_ms": 1.0, "ocr_ms": 0.0 if page_no % 2 == 0 else 10.0, "chars": 5}
+
+        return self.executor.submit(run)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(ocr.settings, "ocr_workers", 1)  # window of 2 pages
+    monkeypatch.setattr(ocr.settings, "ocr_min_chars", 10)
+    monkeypatch.setattr(ocr, "ocr_available", lambda: True)
+    fake = FakePool(pages=20)
+    monkeypatch.setattr(ocr, "_get_pool", lambda: fake)
+    yield fake
+    fake.executor.shutdown(wait=True)
+
+
+def _pages(n, scanned):
+    return [(i, "" if i in scanned else f"Page {i} has a proper text layer.") for i in range(1, n + 1)]
+
+
+def test_ocr_pages_come_back_in_page_order(pool):
+    scanned = {2, 3, 4, 7, 8, 12}
+    stats = []
+    out = list(ocr.with_ocr(_pages(12, scanned), "scan.pdf", stats=stats))
+
+    assert [p for p, _ in out] == list(range(1, 13))
+    assert all(text == f"ocr {p}" for p, text in out if p in scanned)
+    assert all(text.startswith(f"Page {p} ") for p, text in out if p not in scanned)
+    assert [s["page"] for s in stats] == sorted(scanned)
+    assert all("text" not in s for s in stats)
+
+
+def test_pages_in_flight_stay_within_the_window(pool):
+    def source():
+        for page in _pages(20, scanned=set(range(1, 21))):
+            yield page
+
+    for _ in ocr.with_ocr(source(), "scan.pdf"):
+        pool.yielded += 1
+    assert pool.submitted == list(range(1, 21))
+    assert pool.max_in_flight <= 2
+
+
+def test_text_pages_are_not_sent_to_ocr(pool):
+    pages = _pages(5, scanned=set())
+    assert list(ocr.with_ocr(pages, "text.pdf")) == pages
+    assert pool.submitted == []
+
+
+def test_disabled_ocr_passes_pages_through(monkeypatch):
+    monkeypatch.setattr(ocr.settings, "enable_ocr", False)
+
+    def no_pool():
+        raise AssertionError("the pool must not start with OCR disabled")
+
+    monkeypatch.setattr(ocr, "_get_pool", no_pool)
+    pages = _pages(3, scanned={2})
+    assert list(ocr.with_ocr(iter(pages), "scan.pdf")) == pages
+
+
+def test_summarize_totals_only_count_real_ocr_time():
+    stats = [
+        {"page": 1, "cached": False, "render_ms": 5.0, "ocr_ms": 100.0, "chars": 10},
+        {"page": 2, "cached": True, "render_ms": 4.0, "ocr_ms": 0.0, "chars": 12},
+        {"page": 3, "cached": False, "render_ms": 6.0, "ocr_ms": 300.0, "chars": 9},
+    ]
+    summary = ocr.summarize(stats)
+    assert {k: v for k, v in summary.items() if k != "per_page"} == {
+        "pages": 3, "cached": 1, "render_ms": 15.0, "ocr_ms": 400.0, "avg_ocr_ms": 200.0}
+    assert summary["per_page"] is stats
+    assert ocr.summarize([])["avg_ocr_ms"] is None
@@ -0,0 +1,33 @@
+"""
+Startup warm-up (app.services.readiness): which steps each setting enables.
+"""
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.services import readiness  # noqa: E402
+
+RETRIEVAL = {"vectorstore", "bm25", "query", "tokenizers"}
+
+
+def _enabled(monkeypatch, **flags):
+    for name, value in flags.items():
+        monkeypatch.setattr(readiness.settings, name, value)
+    return {name for name, _, _, enabled in readiness._steps() if enabled}
+
+
+def test_retrieval_and_llm_warmup_are_switched_independently(monkeypatch):
+    monkeypatch.setattr(readiness.settings, "ollama_warmup_models", ["phi3"])
+    assert _enabled(monkeypatch, warmup_on_startup=True, ollama_warmup_on_startup=True) == RETRIEVAL | {"llm"}
+    assert _enabled(monkeypatch, warmup_on_startup=True, ollama_warmup_on_startup=False) == RETRIEVAL
+    assert _enabled(monkeypatch, warmup_on_startup=False, ollama_warmup_on_startup=True) == {"llm"}
+
+
+def test_llm_warmup_needs_models_to_load(monkeypatch):
+    monkeypatch.setattr(readiness.settings, "ollama_warmup_models", [])
+    assert "llm" not in _enabled(monkeypatch, warmup_on_startup=True, ollama_warmup_on_startup=True)
+
+
+def test_only_retrieval_steps_gate_readiness():
+    required = {name for name, _, required, _ in readiness._steps() if required}
+    assert required == RETRIEVAL - {"tokenizers"}
@@ -0,0 +1,134 @@
+"""
+LLM admission control (app.services.scheduler): slots, queue limits,
+priority order and shedding.
+"""
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.services.scheduler import (  # noqa: E402
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    LLMScheduler,
+    QueueFull,
+    QueueTimeout,
+)
+
+
+def _scheduler(**kwargs):
+    kwargs.setdefault("default_limit", 1)
+    kwargs.setdefault("max_queue", 4)
+    kwargs.setdefault("timeouts", {PRIORITY_INTERACTIVE: 2.0, PRIORITY_BATCH: 2.0})
+    return LLMScheduler(**kwargs)
+
+
+def _wait_queued(sched, model, n):
+    deadline = time.monotonic() + 2
+    while sched.stats()[model]["queued"] < n:
+        assert time.monotonic() < deadline, "waiter never queued"
+        time.sleep(0.005)
+
+
+def test_free_slot_is_admitted_without_waiting():
+    sched = _scheduler(default_limit=2)
+    assert sched.acquire("phi3") == 0.0
+    assert sched.acquire("phi3") == 0.0
+    assert sched.stats()["phi3"]["active"] == 2
+
+
+def test_limits_are_per_model():
+    sched = _scheduler(limits={"phi3": 2})
+    sched.acquire("mistral")
+    sched.acquire("phi3")
+    sched.acquire("phi3")
+    assert {m: s["limit"] for m, s in sched.stats().items()} == {"mistral": 1, "phi3": 2}
+
+
+def test_full_queue_is_shed_with_429():
+    sched = _scheduler(max_queue=1)
+    sched.acquire("phi3")
+    waiter = threading.Thread(target=sched.acquire, args=("phi3",), daemon=True)
+    waiter.start()
+    _wait_queued(sched, "phi3", 1)
+
+    with pytest.raises(QueueFull) as exc:
+        sched.acquire("phi3")
+    assert exc.value.status_code == 429
+    sched.release("phi3")
+    waiter.join(2)
+
+
+def test_interactive_is_served_before_batch():
+    sched = _scheduler()
+    sched.acquire("phi3")
+    order = []
+
+    def take(priority, name):
+        sched.acquire("phi3", priority)
+        order.append(name)
+        sched.release("phi3")
+
+    batch = threading.Thread(target=take, args=(PRIORITY_BATCH, "batch"))
+    batch.start()
+    _wait_queued(sched, "phi3", 1)
+    interactive = threading.Thread(target=take, args=(PRIORITY_INTERACTIVE, "interactive"))
+    interactive.start()
+    _wait_queued(sched, "phi3", 2)
+
+    sched.release("phi3")
+    batch.join(2)
+    interactive.join(2)
+    assert order == ["interactive", "batch"]
+
+
+def test_waiter_times_out_with_503_and_leaves_the_queue():
+    sched = _scheduler(timeouts={PRIORITY_INTERACTIVE: 0.05})
+    sched.acquire("phi3")
+    with pytest.raises(QueueTimeout) as exc:
+        sched.acquire("phi3")
+    assert exc.value.status_code == 503
+    assert sched.stats()["phi3"]["queued"] == 0
+
+    # The cancelled waiter must not swallow the freed slot
+    sched.release("phi3")
+    assert sched.acquire("phi3") == 0.0
+
+
+def test_shed_up_front_when_estimated_wait_exceeds_deadline():
+    sched = _scheduler(timeouts={PRIORITY_INTERACTIVE: 1.0})
+    with sched.slot("phi3"):
+        pass
+    sched._pools["phi3"].avg_service_s = 5.0
+    sched.acquire("phi3")
+
+    t0 = time.perf_counter()
+    with pytest.raises(QueueTimeout, match="estimated wait"):
+        sched.acquire("phi3")
+    assert time.perf_counter() - t0 < 0.5
+
+
+def test_slot_releases_on_error():
+    sched = _scheduler()
+    with pytest.raises(RuntimeError):
+        with sched.slot("phi3"):
+            raise RuntimeError("generation failed")
+    assert sched.stats()["phi3"]["active"] == 0
+
+
+def test_model_availability_lists_instead_of_generating(monkeypatch):
+    from app.services import llm
+
+    class Client:
+        def list(self):
+            return {"models": [{"name": "phi3:latest"}, {"model": "mistral:latest"}]}
+
+        def generate(self, **kwargs):  # loading a model here is the bug
+            raise AssertionError("generate() called")
+
+    monkeypatch.setattr(llm, "_client", Client())
+    status = llm.test_model_availability()
+    assert sorted(status["available"]) == ["mistral", "phi3"]
+    assert [u["model"] for u in status["unavailable"]] == ["llama3"]
@@ -0,0 +1,102 @@
+"""
+Smoke tests for startup: `import app.main` stays cheap (heavy libraries load
+lazily / in the warm-up thread) and liveness answers before warm-up.
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("pydantic_settings")
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# What `import app.main` adds on top of `import fastapi`, as a multiple of
+# the FastAPI import measured in the same fresh interpreter (so a slow or
+# busy machine slows both sides). Currently ~0.5x; a heavy library pulled
+# in eagerly costs several times FastAPI.
+IMPORT_BUDGET_RATIO = float(os.getenv("IMPORT_BUDGET_RATIO", "1.5"))
+
+# Must not be imported until a request (or the warm-up thread) needs them
+HEAVY_MODULES = (
+    "torch", "transformers", "sentence_transformers", "langchain_community",
+    "langchain_core", "chromadb", "ollama", "pandas", "fitz", "pytesseract",
+)
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import fastapi
+t1 = time.perf_counter()
+import app.main
+print(json.dumps({"fastapi": t1 - t0, "app": time.perf_counter() - t1,
+                  "heavy": sorted(m for m in %r if m in sys.modules)}))
+"""
+
+
+def _import_app() -> dict:
+    env = dict(os.environ, PYTHONPATH=str(ROOT), PYTHONWARNINGS="ignore")
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE % (HEAVY_MODULES,)],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120,
+    )
+    if proc.returncode != 0:
+        # A missing optional dependency skips; a heavy one imported eagerly fails
+        missing = re.search(r"No module named '([\w.]+)'", proc.stderr)
+        if missing and missing.group(1).split(".")[0] not in HEAVY_MODULES:
+            pytest.skip(f"app.main dependency not installed: {missing.group(1)}")
+        raise AssertionError(proc.stderr)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def test_import_defers_heavy_modules():
+    assert _import_app()["heavy"] == []
+
+
+def test_import_time_budget():
+    # Best of three: the first run also pays for cold disk caches / .pyc writes
+    runs = [_import_app() for _ in range(3)]
+    ratio = min(r["app"] / r["fastapi"] for r in runs)
+    assert ratio < IMPORT_BUDGET_RATIO, (
+        f"import app.main costs {ratio:.1f}x import fastapi (budget {IMPORT_BUDGET_RATIO}x): {runs}")
+
+
+def test_liveness_before_warmup():
+    pytest.importorskip("httpx")  # TestClient
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    # No `with`: the lifespan (and so the warm-up) doesn't run
+    client = TestClient(app)
+    assert client.get("/v1/health").status_code == 200
+    ready = client.get("/v1/ready")
+    assert ready.status_code == 503
+    assert ready.json()["ready"] is False
+    # Detailed health reads the cached state; nothing has checked Ollama yet
+    detailed = client.get("/v1/v1/health").json()
+    assert detailed["services"]["ollama"]["status"] == "unknown"
+
+
+def test_lifespan_runs_startup_and_shutdown_hooks(monkeypatch):
+    pytest.importorskip("httpx")  # TestClient
+    from fastapi.testclient import TestClient
+
+    import app.main as main
+
+    calls = []
+    monkeypatch.setattr(main.readiness, "start_warmup", lambda: calls.append("warmup"))
+    monkeypatch.setattr(main.ingest_queue, "recover", lambda: calls.append("recover ingest"))
+    monkeypatch.setattr(main.benchmark_runner, "recover", lambda: calls.append("recover benchmarks"))
+    monkeypatch.setattr(main.ingest_queue, "shutdown", lambda wait: calls.append("stop ingest"))
+    monkeypatch.setattr(main.readiness, "stop", lambda: calls.append("stop readiness"))
+
+    with TestClient(main.app) as client:
+        assert calls == ["warmup", "recover ingest", "recover benchmarks"]
+        assert client.get("/v1/health").status_code == 200
+    assert calls[3:] == ["stop ingest", "stop readiness"]
@@ -0,0 +1,88 @@
+"""
+Tokenizer loading (app.services.token_counter, chunker.embedding_tokenizer):
+local caches first, and a fast None instead of hub retries when offline.
+"""
+import socket
+import time
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+tokenizers = pytest.importorskip("tokenizers")
+
+from app.services import chunker, readiness, token_counter  # noqa: E402
+
+REPO = "acme/tiny-embedder"
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(tmp_path, monkeypatch):
+    """Empty HF and sentence-transformers caches; no real hub download ever starts."""
+    from huggingface_hub import constants
+    monkeypatch.setattr(constants, "HF_HUB_CACHE", str(tmp_path / "hub"))
+    monkeypatch.setenv("SENTENCE_TRANSFORMERS_HOME", str(tmp_path / "st"))
+
+    def from_pretrained(name):
+        raise AssertionError(f"hub download of {name}")
+
+    monkeypatch.setattr(tokenizers.Tokenizer, "from_pretrained", staticmethod(from_pretrained))
+    token_counter.get_tokenizer.cache_clear()
+    token_counter._hub_reachable.cache_clear()
+    yield
+    token_counter.get_tokenizer.cache_clear()
+    token_counter._hub_reachable.cache_clear()
+
+
+def _offline(monkeypatch, offline=True):
+    from huggingface_hub import constants
+    monkeypatch.setattr(constants, "HF_HUB_OFFLINE", offline)
+
+
+def _save_tokenizer(path):
+    from tokenizers import models, pre_tokenizers
+    tok = tokenizers.Tokenizer(models.WordLevel({"[UNK]": 0, "solar": 1, "panels": 2}, unk_token="[UNK]"))
+    tok.pre_tokenizer = pre_tokenizers.Whitespace()
+    path.parent.mkdir(parents=True)
+    tok.save(str(path))
+
+
+def test_uncached_repo_fails_fast_when_offline(monkeypatch):
+    _offline(monkeypatch)
+    t0 = time.perf_counter()
+    assert token_counter.get_tokenizer(REPO) is None
+    assert time.perf_counter() - t0 < 1
+
+
+def test_unreachable_hub_is_probed_once_and_not_downloaded_from(monkeypatch):
+    from huggingface_hub import constants
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]  # closed once the block exits: connection refused
+    _offline(monkeypatch, False)
+    monkeypatch.setattr(constants, "ENDPOINT", f"http://127.0.0.1:{port}")
+
+    assert token_counter.get_tokenizer(REPO) is None
+    assert token_counter.get_tokenizer("acme/other") is None
+    assert token_counter._hub_reachable.cache_info().misses == 1
+
+
+def test_legacy_sentence_transformers_cache_is_used_offline(tmp_path, monkeypatch):
+    _offline(monkeypatch)
+    _save_tokenizer(tmp_path / "st" / "acme_tiny-embedder" / "tokenizer.json")
+
+    tok = token_counter.get_tokenizer(REPO)
+    assert tok is not None
+    assert tok.encode("solar panels", add_special_tokens=False).ids == [1, 2]
+
+
+def test_embedding_tokenizer_is_part_of_the_warmup(tmp_path, monkeypatch):
+    _offline(monkeypatch)
+    monkeypatch.setattr(chunker.settings, "embeddings_model", "all-MiniLM-L6-v2")
+    monkeypatch.setattr(token_counter.settings, "llm_tokenizers", {})
+    with pytest.raises(RuntimeError, match="embedding tokenizer"):
+        readiness._load_tokenizers()
+
+    token_counter.get_tokenizer.cache_clear()
+    _save_tokenizer(tmp_path / "st" / "sentence-transformers_all-MiniLM-L6-v2" / "tokenizer.json")
+    assert readiness._load_tokenizers() == {"exact": []}
+    assert chunker.embedding_tokenizer() is not None
@@ -0,0 +1,110 @@
+"""
+Request tracing (app.services.tracing): span nesting and slow-trace capture.
+"""
+import logging
+import time
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.services import tracing  # noqa: E402
+
+
+@pytest.fixture
+def slow_capture(tmp_path, monkeypatch):
+    """Capture every trace as slow, into tmp_path; nothing else exported."""
+    monkeypatch.setattr(tracing.settings, "trace_enabled", True)
+    monkeypatch.setattr(tracing.settings, "trace_exporter", "none")
+    monkeypatch.setattr(tracing.settings, "trace_slow_file", str(tmp_path / "slow.jsonl"))
+    monkeypatch.setattr(tracing, "_slow", type(tracing._slow)(maxlen=10))
+    return tracing
+
+
+def _wait_for_slow(n):
+    deadline = time.monotonic() + 2
+    while len(tracing._slow) < n:
+        assert time.monotonic() < deadline, "slow trace never exported"
+        time.sleep(0.01)
+
+
+def test_default_threshold_is_above_normal_llm_latency():
+    assert tracing.settings.model_fields["trace_slow_ms"].default >= 60_000
+
+
+def test_nested_spans_form_one_trace(slow_capture, monkeypatch):
+    monkeypatch.setattr(tracing.settings, "trace_slow_ms", 0.0)
+    with tracing.span("request", route="/q"):
+        with tracing.span("retrieval.bm25", top_k=3):
+            pass
+    _wait_for_slow(1)
+
+    record = tracing.slow_traces()[0]
+    assert record["name"] == "request"
+    assert [(s["name"], s["depth"]) for s in record["spans"]] == [("request", 0), ("retrieval.bm25", 1)]
+    assert record["spans"][1]["attrs"] == {"top_k": 3}
+
+
+def test_slow_trace_is_logged_at_info(slow_capture, monkeypatch, caplog):
+    monkeypatch.setattr(tracing.settings, "trace_slow_ms", 0.0)
+    with caplog.at_level(logging.INFO, logger="app.services.tracing"):
+        with tracing.span("request"):
+            pass
+        _wait_for_slow(1)
+        deadline = time.monotonic() + 2
+        while not any("Slow trace" in r.getMessage() for r in caplog.records):
+            assert time.monotonic() < deadline, "slow trace never logged"
+            time.sleep(0.01)
+
+    levels = {r.levelno for r in caplog.records if "Slow trace" in r.getMessage()}
+    assert levels == {logging.INFO}
+
+
+def test_fast_trace_is_not_captured(slow_capture, monkeypatch):
+    monkeypatch.setattr(tracing.settings, "trace_slow_ms", 60_000.0)
+    with tracing.span("request"):
+        pass
+    time.sleep(0.05)
+    assert tracing.slow_traces() == []
+
+
+def _otlp_export(root):
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    exporter = InMemorySpanExporter()
+    bridge = tracing._OtlpBridge.create(exporter)
+    bridge.export(root)
+    bridge.provider.force_flush()
+    return {s.name: s for s in exporter.get_finished_spans()}
+
+
+def test_otlp_spans_keep_our_ids_and_the_incoming_parent(monkeypatch):
+    monkeypatch.setattr(tracing.settings, "trace_enabled", True)
+    monkeypatch.setattr(tracing.settings, "trace_exporter", "none")
+    monkeypatch.setattr(tracing.settings, "trace_slow_ms", 60_000.0)
+    trace_id, caller_span = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+    with tracing.start_trace("GET /q", trace_id=trace_id, parent_id=caller_span) as root:
+        with tracing.span("retrieval") as child:
+            pass
+
+    spans = _otlp_export(root)
+    otel_root, otel_child = spans["GET /q"], spans["retrieval"]
+    assert format(otel_root.context.trace_id, "032x") == trace_id
+    assert format(otel_root.context.span_id, "016x") == root.span_id
+    assert format(otel_root.parent.span_id, "016x") == caller_span and otel_root.parent.is_remote
+    assert format(otel_child.context.span_id, "016x") == child.span_id
+    assert otel_child.parent.span_id == otel_root.context.span_id
+    assert otel_child.context.trace_id == otel_root.context.trace_id
+
+
+def test_otlp_root_without_traceparent_has_no_parent(monkeypatch):
+    monkeypatch.setattr(tracing.settings, "trace_enabled", True)
+    monkeypatch.setattr(tracing.settings, "trace_exporter", "none")
+    monkeypatch.setattr(tracing.settings, "trace_slow_ms", 60_000.0)
+    with tracing.span("cli") as root:
+        pass
+
+    otel_root = _otlp_export(root)["cli"]
+    assert format(otel_root.context.trace_id, "032x") == root.trace_id
+    assert otel_root.parent is None
@@ -0,0 +1,115 @@
+"""
+URL ingestion (app.services.url_ingest) against the local fixture server
+(benchmarks.fixture_http): conditional re-fetch, batch concurrency and
+per-URL failure reporting. Indexing is replaced through index_fn.
+"""
+import json
+import socket
+import time
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("httpx")
+pytest.importorskip("lxml")
+
+from benchmarks.fixture_http import FixtureConfig, serve  # noqa: E402
+
+from app.services import url_ingest  # noqa: E402
+
+
+@pytest.fixture
+def site():
+    """Fixture server on a free port; returns a factory taking the per-request latency."""
+    servers = []
+
+    def start(latency_ms=0.0, paragraphs=5):
+        server = serve(port=0, config=FixtureConfig(pages=20, paragraphs=paragraphs, latency_ms=latency_ms))
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+class Indexer:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, url, title, text):
+        self.calls.append((url, title))
+        return len(text) // 100
+
+
+def _stats(base):
+    import httpx
+    return json.loads(httpx.get(f"{base}/stats").text)
+
+
+def test_refetch_sends_validators_and_skips_a_304(site, tmp_db):
+    base = site()
+    url, index = f"{base}/page/3", Indexer()
+
+    first, = url_ingest.ingest_urls([url], index_fn=index)
+    assert (first["status"], first["http_status"], first["title"]) == ("indexed", 200, "Fixture page 3")
+    assert first["chunks_indexed"] > 0 and first["error"] is None
+
+    again, = url_ingest.ingest_urls([url], index_fn=index)
+    assert (again["status"], again["http_status"], again["title"]) == ("unchanged", 304, "Fixture page 3")
+    assert len(index.calls) == 1
+    assert _stats(base)["not_modified"] == 1
+
+    forced, = url_ingest.ingest_urls([url], index_fn=index, force=True)
+    assert forced["status"] == "indexed" and len(index.calls) == 2
+    assert _stats(base)["not_modified"] == 1  # force sends no validators
+
+
+def test_same_body_without_validators_is_unchanged(site, tmp_db):
+    base = site()
+    url, index = f"{base}/page/4", Indexer()
+    url_ingest.ingest_urls([url], index_fn=index)
+    tmp_db.get_conn().execute("UPDATE url_cache SET etag = NULL, last_modified = NULL")
+
+    again, = url_ingest.ingest_urls([url], index_fn=index)
+    assert (again["status"], again["http_status"]) == ("unchanged", 200)
+    assert len(index.calls) == 1
+
+
+def test_batch_fetches_concurrently_within_the_per_host_cap(site, tmp_db):
+    base = site(latency_ms=150)
+    urls = [f"{base}/page/{n}" for n in range(1, 7)]
+
+    t0 = time.perf_counter()
+    results = url_ingest.ingest_urls(urls, index_fn=Indexer(), concurrency=6, per_host=6)
+    parallel = time.perf_counter() - t0
+    assert [r["status"] for r in results] == ["indexed"] * 6
+    assert parallel < 6 * 0.15 * 0.75  # well below one-at-a-time
+
+    t0 = time.perf_counter()
+    url_ingest.ingest_urls(urls, index_fn=Indexer(), concurrency=6, per_host=2, force=True)
+    assert time.perf_counter() - t0 >= 3 * 0.15  # three waves of two
+
+
+def test_failures_are_reported_per_url_in_input_order(site, tmp_db):
+    base = site()
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        dead = f"http://127.0.0.1:{s.getsockname()[1]}/gone"  # closed once the block exits
+    urls = [f"{base}/page/1", f"{base}/page/999", dead, f"{base}/page/1"]
+    index = Indexer()
+
+    results = url_ingest.ingest_urls(urls, index_fn=index)
+    assert [(r["url"], r["status"], r["http_status"]) for r in results] == [
+        (urls[0], "indexed", 200), (urls[1], "failed", 404), (dead, "failed", None)]
+    assert "404" in results[1]["error"]
+    assert results[2]["error"].startswith("Failed to fetch URL")
+    assert len(index.calls) == 1  # the duplicate URL is fetched once
+
+
+def test_page_without_content_fails(site, tmp_db):
+    base = site(paragraphs=0)
+    result, = url_ingest.ingest_urls([f"{base}/page/2"], index_fn=Indexer())
+    assert result["status"] == "failed"
+    assert result["error"] == "Could not extract meaningful content from URL"